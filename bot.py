@@ -11,7 +11,7 @@ import sys
 import math
 from collections import deque
 import re
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta, timezone, time as dt_time
 from typing import Optional
 import aiohttp
 
@@ -108,9 +108,11 @@ except ImportError as e:
         exit(1)
 from discord.ext import tasks
 from modules.werwolf import WerwolfGame
-from modules.api_helpers import get_chat_response, get_relationship_summary_from_api, get_wrapped_summary_from_api, get_game_details_from_api
+from modules.api_helpers import get_chat_response, stream_chat_response, get_relationship_summary_from_api, get_wrapped_summary_from_api, get_game_details_from_api
 from modules import api_helpers
+from modules import http_client  # Shared pooled aiohttp session
 from modules import stock_market  # NEW: Stock market system
+from modules import ledger  # Atomic balance changes + transaction_history
 from modules import news  # NEW: News system
 from modules import word_find  # NEW: Word Find game
 from modules import quests  # NEW: Quest system for tracking
@@ -322,6 +324,8 @@ def save_config(new_config):
         json.dump(config_to_save, f, indent=2)
 
 config = load_config()
+http_client.configure(config.get('api', {}).get('http_client'))
+advanced_ai.configure_response_cache(config.get('api', {}).get('response_cache'))
 
 # --- Feature Flag Helper ---
 def is_feature_enabled(feature_name: str) -> bool:
@@ -896,7 +900,7 @@ async def auto_download_emoji(emoji_name, guild, client):
         
         # Download the emoji image
         emoji_url = str(emoji_obj.url)
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             async with session.get(emoji_url) as response:
                 if response.status != 200:
                     logger.warning(f"Failed to download emoji '{emoji_name}' from {emoji_url}, status: {response.status}")
@@ -1086,6 +1090,9 @@ def parse_spotify_minutes_json(spotify_minutes_data) -> dict:
 @client.event
 async def on_ready():
     """Fires when the bot logs in."""
+    # Outbound HTTP on the bot's loop reuses one pooled session (see modules/http_client.py)
+    http_client.enable_shared_session()
+
     # --- NEW: Sync all guild members to database on startup ---
     print("Syncing guild members to database...")
     total_new = 0
@@ -1179,7 +1186,9 @@ async def on_ready():
     print("Initializing RPG system...")
     await rpg_system.initialize_rpg_tables(db_helpers)
     await rpg_system.initialize_default_monsters(db_helpers)
+    await rpg_system.load_monster_catalog(db_helpers)
     await rpg_system.initialize_shop_items(db_helpers)
+    await rpg_system.refresh_daily_shop(db_helpers)
     print("RPG system ready!")
     
     # --- NEW: Initialize Sport Betting system ---
@@ -1292,6 +1301,24 @@ async def on_ready():
     # --- NEW: Start the background task for voice XP ---
     if not grant_voice_xp.is_running():
         grant_voice_xp.start()
+    # Write-behind flush for Wrapped stat increments
+    if not flush_stat_buffer_task.is_running():
+        flush_stat_buffer_task.start()
+    # Write-behind flush for in-memory quest progress
+    if not flush_quest_progress_task.is_running():
+        flush_quest_progress_task.start()
+    # Write-behind flush for AI response cache hit/miss counters
+    if not flush_ai_cache_usage_task.is_running():
+        flush_ai_cache_usage_task.start()
+    # Next day's quests, generated before the UTC day boundary
+    if not pregenerate_quests_task.is_running():
+        pregenerate_quests_task.start()
+    # Cache/buffer metrics for the web dashboard
+    if not write_runtime_stats_task.is_running():
+        write_runtime_stats_task.start()
+    # RPG daily shop rotation at the UTC day boundary
+    if not rotate_rpg_shop_task.is_running():
+        rotate_rpg_shop_task.start()
     # --- NEW: Start the background task for presence updates ---
     if not update_presence_task.is_running():
         update_presence_task.start()
@@ -1337,32 +1364,9 @@ async def on_ready():
     
     # --- NEW: Generate daily quests for all users on startup ---
     print("Generating daily quests for all users...")
-    quest_generation_count = 0
     try:
-        # Get all unique user IDs from the database
-        if db_helpers.db_pool:
-            cnx = db_helpers.db_pool.get_connection()
-            if cnx:
-                cursor = cnx.cursor(dictionary=True)
-                try:
-                    # Get all users who have activity in the last 30 days
-                    cursor.execute("""
-                        SELECT DISTINCT user_id FROM user_stats 
-                        WHERE stat_period >= DATE_FORMAT(DATE_SUB(NOW(), INTERVAL 30 DAY), '%Y-%m')
-                    """)
-                    users = cursor.fetchall()
-                    
-                    for user_row in users:
-                        user_id = user_row['user_id']
-                        # Generate quests for this user
-                        quest_list = await quests.generate_daily_quests(db_helpers, user_id, config)
-                        if quest_list:
-                            quest_generation_count += 1
-                    
-                    print(f"  -> Generated quests for {quest_generation_count} user(s)")
-                finally:
-                    cursor.close()
-                    cnx.close()
+        quest_generation_count = await quests.pregenerate_daily_quests(db_helpers, config)
+        print(f"  -> Generated quests for {quest_generation_count} user(s)")
     except Exception as e:
         logger.error(f"Error generating startup quests: {e}", exc_info=True)
         print(f"  -> Error generating quests: {e}")
@@ -1510,6 +1514,8 @@ async def update_stock_market():
     try:
         await stock_market.update_stock_prices(db_helpers)
         logger.info("Stock market prices updated")
+        # Raw ticks and fine candles only live for their retention window
+        await stock_market.prune_stock_history(db_helpers, config['modules']['economy'].get('stock_market'))
     except Exception as e:
         logger.error(f"Error updating stock market: {e}", exc_info=True)
 
@@ -2122,39 +2128,46 @@ async def on_presence_update(before, after):
 @tasks.loop(minutes=1)
 async def grant_voice_xp():
     """A background task that grants XP to users in voice channels every minute.
-    This is now highly efficient as it only iterates over users currently in a VC."""
+    XP, VC minutes and quest progress are applied for all active users in bulk;
+    only users who leveled up get individual follow-up work."""
     try:
-        # Create a copy of the user IDs to prevent issues if the set changes during iteration
-        users_to_process = list(active_vc_users.keys())
-        
-        for user_id in users_to_process:
-            member = active_vc_users.get(user_id)
+        # Snapshot the members to prevent issues if the dict changes during the tick
+        members = {user_id: member for user_id, member in list(active_vc_users.items()) if member}
+        if not members:
+            return
+
+        stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
+        level_ups = await db_helpers.add_xp_bulk(
+            [(member.id, member.display_name) for member in members.values()],
+            config['modules']['leveling']['xp_per_minute_in_vc']
+        ) or {}
+
+        for member in members.values():
+            await db_helpers.log_vc_minutes(member.id, 1, stat_period) # Log 1 minute for Wrapped (buffered)
+
+        # --- NEW: Track VC minutes for quest progress ---
+        # Quest completion notifications will be sent when user checks /quests or uses /questclaim
+        try:
+            await quests.update_quest_progress_bulk(db_helpers, list(members.keys()), 'vc_minutes', 1, config)
+        except Exception as e:
+            logger.error(f"Error updating VC quest progress: {e}", exc_info=True)
+
+        for user_id, new_level in level_ups.items():
+            member = members.get(user_id)
             if not member: continue
 
             try:
-                stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-                new_level = await db_helpers.add_xp(member.id, member.display_name, config['modules']['leveling']['xp_per_minute_in_vc'])
-                await db_helpers.log_vc_minutes(member.id, 1, stat_period) # Log 1 minute for Wrapped
-                
-                # --- NEW: Track VC minutes for quest progress ---
-                try:
-                    quest_completed, _ = await quests.update_quest_progress(db_helpers, member.id, 'vc_minutes', 1, config)
-                    # Quest completion notifications will be sent when user checks /quests or uses /questclaim
-                except Exception as e:
-                    logger.error(f"Error updating VC quest progress for user {user_id}: {e}", exc_info=True)
-                
-                if new_level:
-                    bonus = calculate_level_up_bonus(new_level, config)
-                    await db_helpers.add_balance(member.id, member.display_name, bonus, config, stat_period)
-                    # --- FIX: Send level-up notifications via DM and only for special levels ---
-                    if new_level % config['modules']['leveling']['vc_level_up_notification_interval'] == 0:
-                        try:
-                            await member.send(f"GG! Du bist durch deine Aktivität im Voice-Chat jetzt Level **{new_level}**! :YESS:\n"
-                                             f"Du erhältst **{bonus}** Währung als Belohnung!")
-                        except discord.Forbidden:
-                            print(f"Could not send voice level up DM to {member.name} (DMs likely closed).")
+                bonus = calculate_level_up_bonus(new_level, config)
+                await db_helpers.add_balance(member.id, member.display_name, bonus, config, stat_period)
+                # --- FIX: Send level-up notifications via DM and only for special levels ---
+                if new_level % config['modules']['leveling']['vc_level_up_notification_interval'] == 0:
+                    try:
+                        await member.send(f"GG! Du bist durch deine Aktivität im Voice-Chat jetzt Level **{new_level}**! :YESS:\n"
+                                         f"Du erhältst **{bonus}** Währung als Belohnung!")
+                    except discord.Forbidden:
+                        print(f"Could not send voice level up DM to {member.name} (DMs likely closed).")
             except Exception as e:
-                logger.error(f"Error granting voice XP to user {user_id}: {e}")
+                logger.error(f"Error handling voice level up for user {user_id}: {e}")
                 continue
     except Exception as e:
         logger.error(f"Error in grant_voice_xp task: {e}", exc_info=True)
@@ -2165,6 +2178,84 @@ async def before_grant_voice_xp():
     """Ensures the bot is fully logged in before the task starts."""
     await client.wait_until_ready()
 
+@tasks.loop(time=dt_time(hour=0, minute=0, second=5, tzinfo=timezone.utc))
+async def rotate_rpg_shop_task():
+    """Materializes the new RPG daily shop right after the UTC day boundary."""
+    try:
+        await rpg_system.refresh_daily_shop(db_helpers)
+    except Exception as e:
+        logger.error(f"Error rotating RPG daily shop: {e}", exc_info=True)
+
+@rotate_rpg_shop_task.before_loop
+async def before_rotate_rpg_shop_task():
+    """Ensures the bot is fully logged in before the task starts."""
+    await client.wait_until_ready()
+
+@tasks.loop(time=dt_time(hour=23, minute=55, tzinfo=timezone.utc))
+async def pregenerate_quests_task():
+    """Generates tomorrow's daily quests for all recently active users in one batch."""
+    try:
+        tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+        await quests.pregenerate_daily_quests(db_helpers, config, tomorrow)
+    except Exception as e:
+        logger.error(f"Error pre-generating daily quests: {e}", exc_info=True)
+
+@pregenerate_quests_task.before_loop
+async def before_pregenerate_quests_task():
+    """Ensures the bot is fully logged in before the task starts."""
+    await client.wait_until_ready()
+
+RUNTIME_STATS_FILE = 'config/runtime_stats.json'
+
+@tasks.loop(minutes=1)
+async def write_runtime_stats_task():
+    """Writes in-process performance counters (caches, buffers) to a file the web dashboard reads."""
+    try:
+        runtime_stats = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'caches': db_helpers.get_cache_stats(),
+            'stat_buffer': db_helpers.get_stat_buffer_stats(),
+            'chat_history_windows': db_helpers.get_chat_window_stats(),
+            'http': http_client.get_http_stats(),
+            'ai_single_flight': api_helpers.get_single_flight_stats(),
+            'ai_streaming': api_helpers.get_streaming_stats(),
+            'ai_response_cache': advanced_ai.get_response_cache_stats(),
+            'rpg_monster_catalog': rpg_system.get_monster_catalog_stats(),
+            'rpg_daily_shop': rpg_system.get_daily_shop_stats(),
+            'stock_trade_engine': stock_market.get_trade_engine_stats(),
+            'sport_http_cache': sport_betting.get_http_cache_stats(),
+            'sport_match_sync': sport_betting.get_match_sync_stats(),
+            'quest_progress': quests.get_quest_state_stats(),
+        }
+        with open(RUNTIME_STATS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(runtime_stats, f, indent=2)
+    except Exception as e:
+        logger.error(f"Error writing runtime stats: {e}", exc_info=True)
+
+@tasks.loop(seconds=db_helpers.STAT_BUFFER_FLUSH_INTERVAL)
+async def flush_stat_buffer_task():
+    """Writes the buffered Wrapped stat increments (messages, VC minutes, ...) to the database."""
+    try:
+        await db_helpers.flush_stat_buffer()
+    except Exception as e:
+        logger.error(f"Error in flush_stat_buffer_task: {e}", exc_info=True)
+
+@tasks.loop(seconds=quests.QUEST_FLUSH_INTERVAL)
+async def flush_quest_progress_task():
+    """Writes quest progress collected in memory (messages, reactions, VC minutes, ...) to the database."""
+    try:
+        await quests.flush_quest_progress(db_helpers)
+    except Exception as e:
+        logger.error(f"Error in flush_quest_progress_task: {e}", exc_info=True)
+
+@tasks.loop(seconds=advanced_ai.RESPONSE_CACHE_USAGE_FLUSH_INTERVAL)
+async def flush_ai_cache_usage_task():
+    """Writes the AI response cache hit/miss counters collected in memory to ai_model_usage."""
+    try:
+        await advanced_ai.flush_response_cache_usage()
+    except Exception as e:
+        logger.error(f"Error in flush_ai_cache_usage_task: {e}", exc_info=True)
+
 # --- NEW: Wrapped Event Management ---
 
 # --- NEW: Scheduled Event Handlers for Wrapped Registration ---
@@ -2598,14 +2689,30 @@ async def before_sport_betting_notifications():
     await client.wait_until_ready()
 
 
+async def _settle_sport_match(match_id, home_score, away_score, stat_period):
+    """Settles single and combo bets of a finished match (winnings are credited in the same transaction)."""
+    settled_bets = await sport_betting.settle_match_bets_with_details(
+        db_helpers, match_id, home_score, away_score, config, stat_period
+    )
+    settled_combos = await sport_betting.settle_combo_bets_for_match(
+        db_helpers, match_id, home_score, away_score, config, stat_period
+    )
+    
+    if settled_bets:
+        logger.info(f"Settled {len(settled_bets)} bets for match {match_id}")
+    if settled_combos:
+        logger.info(f"Settled {settled_combos} combo bets for match {match_id}")
+    return settled_bets
+
+
 @tasks.loop(minutes=5)
 async def sport_betting_sync_and_settle_task():
     """
     Background task to sync match data and settle bets.
     Runs every 5 minutes to:
-    1. Sync match data from API for free leagues
-    2. Check for finished matches and update their status
-    3. Settle bets for finished matches
+    1. Sync match data from API for free leagues (only changed matches are written)
+    2. Settle bets for the matches the sync saw finish
+    3. Check stale scheduled matches via the API and settle those that finished
     4. Send DM notifications to users about their bet results
     """
     try:
@@ -2627,16 +2734,20 @@ async def sport_betting_sync_and_settle_task():
         if total_synced > 0:
             logger.info(f"Sport betting: Synced {total_synced} matches")
         
-        # Step 2: Get matches that need to be checked for results
-        matches_to_check = await sport_betting.get_matches_to_check(db_helpers)
+        # Step 2: Settle the matches the sync just saw finish
+        all_settled_bets = []
+        stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
         
-        if not matches_to_check:
-            return
+        for finished in sport_betting.pop_finished_matches():
+            all_settled_bets.extend(await _settle_sport_match(
+                finished["match_id"], finished["home_score"], finished["away_score"], stat_period
+            ))
         
-        logger.info(f"Sport betting: Found {len(matches_to_check)} matches to check for results")
+        # Step 3: Fallback for matches still marked scheduled long after kickoff (e.g. outside the sync window)
+        matches_to_check = await sport_betting.get_matches_to_check(db_helpers)
         
-        # Step 3: Check each match and settle bets
-        all_settled_bets = []
+        if matches_to_check:
+            logger.info(f"Sport betting: Found {len(matches_to_check)} matches to check for results")
         
         for match in matches_to_check:
             match_id = match.get("match_id")
@@ -2662,14 +2773,7 @@ async def sport_betting_sync_and_settle_task():
                     home_score = updated_match.get("home_score", 0)
                     away_score = updated_match.get("away_score", 0)
                     
-                    # Settle bets and get details for notifications
-                    settled_bets = await sport_betting.settle_match_bets_with_details(
-                        db_helpers, match_id, home_score, away_score
-                    )
-                    
-                    if settled_bets:
-                        all_settled_bets.extend(settled_bets)
-                        logger.info(f"Settled {len(settled_bets)} bets for match {match_id}")
+                    all_settled_bets.extend(await _settle_sport_match(match_id, home_score, away_score, stat_period))
                         
             except AttributeError as e:
                 logger.debug(f"Provider method not available for match {match_id}: {e}")
@@ -2763,13 +2867,6 @@ async def sport_betting_sync_and_settle_task():
                     try:
                         await user.send(embed=embed)
                         logger.info(f"Sent bet results notification to user {user_id}")
-                        
-                        # Credit winnings to user balance
-                        if total_won > 0:
-                            stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-                            await db_helpers.add_balance(user_id, user.display_name, total_won, config, stat_period)
-                            logger.info(f"Credited {total_won} coins to user {user_id}")
-                            
                     except discord.Forbidden:
                         logger.warning(f"Could not send DM to user {user_id} (DMs disabled)")
                     except Exception as e:
@@ -6555,7 +6652,7 @@ class RPGMenuView(discord.ui.View):
         
         try:
             # Get unlocked skills
-            unlocked_skills = await rpg_system.get_unlocked_skills(db_helpers, self.user_id)
+            unlocked_skills = await rpg_system.get_unlocked_skills(db_helpers, self.user_id) or {}
             
             embed = discord.Embed(
                 title="🌳 Skill-Baum",
@@ -7010,6 +7107,8 @@ class RPGCombatView(discord.ui.View):
         
         # Enhanced combat state for tracking status effects and new mechanics
         self.combat_state = combat_fx.create_enhanced_combat_state()
+        # Player snapshot + in-memory fight state, created on the first turn
+        self.combat_session = None
         
         # Add skill buttons dynamically
         self._add_skill_buttons()
@@ -7039,6 +7138,19 @@ class RPGCombatView(discord.ui.View):
             await self._use_skill(interaction, skill_data, skill_idx)
         return callback
     
+    async def _run_turn(self, action: str, skill_data: dict = None) -> dict:
+        """Runs one turn on the in-memory combat session, starting it on the first turn."""
+        if self.combat_session is None:
+            self.combat_session = await rpg_system.CombatSession.start(db_helpers, self.user_id, self.monster, self.combat_state)
+            if self.combat_session is None:
+                return {'error': 'Profil konnte nicht geladen werden.'}
+        return await self.combat_session.process_turn(db_helpers, action, skill_data=skill_data)
+    
+    async def on_timeout(self):
+        """Saves the player's HP if the fight is left unfinished."""
+        if self.combat_session:
+            await self.combat_session.abandon(db_helpers)
+    
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.user_id:
             await interaction.response.send_message("Dies ist nicht dein Kampf!", ephemeral=True)
@@ -7055,14 +7167,7 @@ class RPGCombatView(discord.ui.View):
         
         try:
             # Process combat turn with skill and combat state
-            result = await rpg_system.process_combat_turn(
-                db_helpers, 
-                self.user_id, 
-                self.monster, 
-                'skill',
-                skill_data=skill,
-                combat_state=self.combat_state
-            )
+            result = await self._run_turn('skill', skill_data=skill)
             
             if 'error' in result:
                 await interaction.followup.send(f"❌ Fehler: {result['error']}")
@@ -7077,7 +7182,7 @@ class RPGCombatView(discord.ui.View):
             self.turn_count += 1
             
             # Get player data
-            player = await rpg_system.get_player_profile(db_helpers, self.user_id)
+            player = self.combat_session.player
             
             # Create result embed with combat log
             embed = discord.Embed(
@@ -7253,13 +7358,7 @@ class RPGCombatView(discord.ui.View):
         
         try:
             # Process combat turn with combat state
-            result = await rpg_system.process_combat_turn(
-                db_helpers, 
-                self.user_id, 
-                self.monster, 
-                'attack',
-                combat_state=self.combat_state
-            )
+            result = await self._run_turn('attack')
             
             if 'error' in result:
                 await interaction.followup.send(f"❌ Fehler: {result['error']}")
@@ -7275,7 +7374,7 @@ class RPGCombatView(discord.ui.View):
             self.turn_count += 1
             
             # Get player data for display
-            player = await rpg_system.get_player_profile(db_helpers, self.user_id)
+            player = self.combat_session.player
             
             # Create result embed with combat log
             embed = discord.Embed(
@@ -7364,13 +7463,7 @@ class RPGCombatView(discord.ui.View):
             return
         
         try:
-            result = await rpg_system.process_combat_turn(
-                db_helpers, 
-                self.user_id, 
-                self.monster, 
-                'run',
-                combat_state=self.combat_state
-            )
+            result = await self._run_turn('run')
             
             if 'error' in result:
                 await interaction.followup.send(f"❌ Fehler: {result['error']}")
@@ -7398,7 +7491,7 @@ class RPGCombatView(discord.ui.View):
                 await interaction.edit_original_response(embed=embed, view=None)
             else:
                 # Failed to flee, show updated health
-                player = await rpg_system.get_player_profile(db_helpers, self.user_id)
+                player = self.combat_session.player
                 health_pct = (result['player_health'] / player['max_health']) * 100
                 health_bar = self._create_health_bar(health_pct)
                 
@@ -7439,13 +7532,7 @@ class RPGCombatView(discord.ui.View):
             return
         
         try:
-            result = await rpg_system.process_combat_turn(
-                db_helpers, 
-                self.user_id, 
-                self.monster, 
-                'defend',
-                combat_state=self.combat_state
-            )
+            result = await self._run_turn('defend')
             
             if 'error' in result:
                 await interaction.followup.send(f"❌ Fehler: {result['error']}")
@@ -7461,7 +7548,7 @@ class RPGCombatView(discord.ui.View):
             
             self.turn_count += 1
             
-            player = await rpg_system.get_player_profile(db_helpers, self.user_id)
+            player = self.combat_session.player
             
             embed = discord.Embed(
                 title=f"🛡️ Kampfrunde {self.turn_count} - Verteidigung",
@@ -8220,7 +8307,7 @@ class RPGTempleView(discord.ui.View):
         
         try:
             # Get unlocked skills
-            unlocked_skills = await rpg_system.get_unlocked_skills(db_helpers, self.user_id)
+            unlocked_skills = await rpg_system.get_unlocked_skills(db_helpers, self.user_id) or {}
             
             embed = discord.Embed(
                 title="🌳 Skill-Baum im Tempel",
@@ -10653,25 +10740,17 @@ class ThemeSelectView(discord.ui.View):
         if success:
             # Deduct from balance
             stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-            await db_helpers.add_balance(
+            new_balance = await ledger.post(
+                db_helpers,
                 self.member.id,
                 self.member.display_name,
                 -price,
+                'shop_purchase',
+                f"Purchased theme: {theme_data['name']}",
                 config,
                 stat_period
             )
             
-            new_balance = await db_helpers.get_balance(self.member.id)
-            
-            # Log transaction
-            await db_helpers.log_transaction(
-                self.member.id,
-                'shop_purchase',
-                -price,
-                new_balance,
-                f"Purchased theme: {theme_data['name']}"
-            )
-            
             # Auto-equip after purchase
             await themes.equip_theme(db_helpers, self.member.id, theme_id)
             
@@ -10871,14 +10950,20 @@ class BundleSelectView(discord.ui.View):
                 return
             
             # Purchase all features in the bundle
-            new_balance = await db_helpers.add_balance(self.member.id, self.member.display_name, -bundle_price, self.config, stat_period)
-            await db_helpers.log_transaction(
-                self.member.id,
-                'shop_purchase',
-                -bundle_price,
-                new_balance,
-                f"Purchased bundle: {bundle_name}"
-            )
+            try:
+                new_balance = await ledger.post(
+                    db_helpers, self.member.id, self.member.display_name, -bundle_price,
+                    'shop_purchase', f"Purchased bundle: {bundle_name}", self.config, stat_period,
+                    require_funds=True
+                )
+            except ledger.InsufficientFunds as e:
+                embed = discord.Embed(
+                    title="❌ Kauf fehlgeschlagen",
+                    description=f"Nicht genug Geld! Du benötigst {bundle_price} {currency}, hast aber nur {e.balance} {currency}.",
+                    color=discord.Color.red()
+                )
+                await interaction.edit_original_response(embed=embed, view=None)
+                return
             
             # Grant all features
             for feature in bundle_features:
@@ -11140,24 +11225,9 @@ async def send_money(interaction: discord.Interaction, user: discord.Member, amo
         )
         
         if success:
-            # Log transactions for both users
+            # transfer_currency already logged both sides in the same transaction
             new_balance = await db_helpers.get_balance(interaction.user.id)
-            await db_helpers.log_transaction(
-                interaction.user.id,
-                'transfer',
-                -amount,
-                new_balance,
-                f"Sent to {user.display_name}"
-            )
-            
             recipient_balance = await db_helpers.get_balance(user.id)
-            await db_helpers.log_transaction(
-                user.id,
-                'transfer',
-                amount,
-                recipient_balance,
-                f"Received from {interaction.user.display_name}"
-            )
             
             # Create success embed
             embed = discord.Embed(
@@ -12073,26 +12143,17 @@ class BlackjackView(discord.ui.View):
         
         # Update balance
         stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-        await db_helpers.add_balance(
+        new_balance = await ledger.post(
+            db_helpers,
             self.user_id,
             interaction.user.display_name,
             winnings,
+            'blackjack',
+            f"Blackjack result: {result}",
             config,
             stat_period
         )
         
-        # Get new balance
-        new_balance = await db_helpers.get_balance(self.user_id)
-        
-        # Log transaction
-        await db_helpers.log_transaction(
-            self.user_id,
-            'blackjack',
-            winnings,
-            new_balance,
-            f"Blackjack result: {result}"
-        )
-        
         # --- NEW: Influence GAMBL stock based on result ---
         try:
             won = result in ['win', 'blackjack']
@@ -12298,26 +12359,17 @@ class MinesView(discord.ui.View):
             # Update balance
             stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
             profit = winnings - self.game.bet
-            await db_helpers.add_balance(
+            new_balance = await ledger.post(
+                db_helpers,
                 self.user_id,
                 interaction.user.display_name,
                 profit,
+                'mines',
+                f"Mines cashout at {multiplier}x",
                 config,
                 stat_period
             )
             
-            # Get new balance
-            new_balance = await db_helpers.get_balance(self.user_id)
-            
-            # Log transaction
-            await db_helpers.log_transaction(
-                self.user_id,
-                'mines',
-                profit,
-                new_balance,
-                f"Mines cashout at {multiplier}x"
-            )
-            
             # --- NEW: Influence GAMBL stock ---
             try:
                 won = profit > 0
@@ -12405,26 +12457,17 @@ class MinesView(discord.ui.View):
         if lost:
             # Lost - deduct bet
             stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-            await db_helpers.add_balance(
+            new_balance = await ledger.post(
+                db_helpers,
                 self.user_id,
                 interaction.user.display_name,
                 -self.game.bet,
+                'mines',
+                "Hit a mine",
                 config,
                 stat_period
             )
             
-            # Get new balance
-            new_balance = await db_helpers.get_balance(self.user_id)
-            
-            # Log transaction
-            await db_helpers.log_transaction(
-                self.user_id,
-                'mines',
-                -self.game.bet,
-                new_balance,
-                "Hit a mine"
-            )
-            
             # --- NEW: Influence GAMBL stock ---
             try:
                 await stock_market.record_gambling_activity(db_helpers, self.game.bet, False, 0)
@@ -12492,26 +12535,17 @@ class MinesView(discord.ui.View):
             profit = winnings - self.game.bet
             
             stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-            await db_helpers.add_balance(
+            new_balance = await ledger.post(
+                db_helpers,
                 self.user_id,
                 interaction.user.display_name,
                 profit,
+                'mines',
+                f"Completed all safe cells at {self.game.get_current_multiplier()}x",
                 config,
                 stat_period
             )
             
-            # Get new balance
-            new_balance = await db_helpers.get_balance(self.user_id)
-            
-            # Log transaction
-            await db_helpers.log_transaction(
-                self.user_id,
-                'mines',
-                profit,
-                new_balance,
-                f"Completed all safe cells at {self.game.get_current_multiplier()}x"
-            )
-            
             # --- NEW: Influence GAMBL stock ---
             try:
                 await stock_market.record_gambling_activity(db_helpers, self.game.bet, True, int(self.game.bet * self.game.get_current_multiplier()))
@@ -12922,26 +12956,17 @@ class RouletteView(discord.ui.View):
         
         # Update balance
         stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-        await db_helpers.add_balance(
+        new_balance = await ledger.post(
+            db_helpers,
             self.user_id,
             interaction.user.display_name,
             net_result,
+            'roulette',
+            f"Bets: {len(self.bets)}, Result: {result_number}",
             config,
             stat_period
         )
         
-        # Get new balance
-        new_balance = await db_helpers.get_balance(self.user_id)
-        
-        # Log transaction
-        await db_helpers.log_transaction(
-            self.user_id,
-            'roulette',
-            net_result,
-            new_balance,
-            f"Bets: {len(self.bets)}, Result: {result_number}"
-        )
-        
         # --- NEW: Influence GAMBL stock based on result ---
         try:
             won = net_result > 0
@@ -13517,26 +13542,17 @@ class TowerOfTreasureView(discord.ui.View):
         
         # Update balance
         stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-        await db_helpers.add_balance(
+        new_balance = await ledger.post(
+            db_helpers,
             self.user_id,
             interaction.user.display_name,
             winnings,
+            'tower_of_treasure',
+            f"Tower game: Floor {self.game.current_floor}/{self.game.max_floors}",
             config,
             stat_period
         )
         
-        # Get new balance
-        new_balance = await db_helpers.get_balance(self.user_id)
-        
-        # Log transaction
-        await db_helpers.log_transaction(
-            self.user_id,
-            'tower_of_treasure',
-            winnings,
-            new_balance,
-            f"Tower game: Floor {self.game.current_floor}/{self.game.max_floors}"
-        )
-        
         # Influence GAMBL stock
         try:
             payout = reward if won else 0
@@ -13767,16 +13783,17 @@ async def horserace(interaction: discord.Interaction, horses: int = 6):
         # Calculate payouts
         payouts = race.calculate_payouts()
         
-        # Update balances and save results
+        # Settle all bets of the race in one ledger transaction
+        entries = []
         for user_id, payout in payouts.items():
-            bet_amount = race.bets[user_id]['amount']
-            
-            # Deduct original bet
-            await db_helpers.add_balance(user_id, -bet_amount, "Horse Race Bet")
-            
-            # Add payout if won
+            # Deduct original bet, add payout if won
+            entries.append(ledger.entry(user_id, None, -race.bets[user_id]['amount'], 'horse_race', "Horse Race Bet"))
             if payout > 0:
-                await db_helpers.add_balance(user_id, payout, f"Horse Race Win (Rennen #{race.race_id})")
+                entries.append(ledger.entry(user_id, None, payout, 'horse_race', f"Horse Race Win (Rennen #{race.race_id})"))
+        try:
+            await ledger.apply_entries(db_helpers, entries, config, datetime.now(timezone.utc).strftime('%Y-%m'))
+        except Exception as e:
+            logger.error(f"Error settling horse race #{race.race_id}: {e}", exc_info=True)
         
         # Save to database
         await horse_racing.save_race_result(db_helpers, race, payouts)
@@ -14046,24 +14063,24 @@ async def tower(interaction: discord.Interaction, bet: int, difficulty: int = 1)
         
         # Deduct bet
         stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-        await db_helpers.add_balance(
-            user_id,
-            interaction.user.display_name,
-            -bet,
-            config,
-            stat_period
-        )
-        
-        new_balance = await db_helpers.get_balance(user_id)
-        
-        # Log transaction
-        await db_helpers.log_transaction(
-            user_id,
-            'tower_of_treasure',
-            -bet,
-            new_balance,
-            f"Tower game started (difficulty {difficulty})"
-        )
+        try:
+            new_balance = await ledger.post(
+                db_helpers,
+                user_id,
+                interaction.user.display_name,
+                -bet,
+                'tower_of_treasure',
+                f"Tower game started (difficulty {difficulty})",
+                config,
+                stat_period,
+                require_funds=True
+            )
+        except ledger.InsufficientFunds as e:
+            await interaction.followup.send(
+                f"Nicht genug Guthaben! Du hast {e.balance} {currency}, brauchst aber {bet} {currency}.",
+                ephemeral=True
+            )
+            return
         
         # Create game
         max_floors = config['modules']['economy']['games']['tower_of_treasure']['max_floors']
@@ -14154,8 +14171,11 @@ class SlotsView(discord.ui.View):
         
         # Process winnings
         if self.game.winnings > 0:
-            await db_helpers.add_balance(self.user_id, self.game.winnings, "slots_win")
-            new_balance = await db_helpers.get_balance(self.user_id)
+            stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
+            new_balance = await ledger.post(
+                db_helpers, self.user_id, interaction.user.display_name, self.game.winnings,
+                'slots', "Slots win", config, stat_period
+            )
             final_embed.add_field(name="💰 Guthaben", value=f"{new_balance} 🪙", inline=False)
         else:
             balance = await db_helpers.get_balance(self.user_id)
@@ -14192,7 +14212,18 @@ class SlotsView(discord.ui.View):
             return
         
         # Deduct bet
-        await db_helpers.add_balance(self.user_id, -self.game.bet, "slots_bet")
+        stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
+        try:
+            await ledger.post(
+                db_helpers, self.user_id, interaction.user.display_name, -self.game.bet,
+                'slots', "Slots bet", config, stat_period, require_funds=True
+            )
+        except ledger.InsufficientFunds as e:
+            await interaction.response.send_message(
+                f"Nicht genug Guthaben! Du hast {e.balance} 🪙, brauchst aber {self.game.bet} 🪙.",
+                ephemeral=True
+            )
+            return
         
         # Create new game
         new_game = SlotsGame(self.user_id, self.game.bet)
@@ -14259,7 +14290,18 @@ async def slots_command(interaction: discord.Interaction, bet: int):
             return
         
         # Deduct bet
-        await db_helpers.add_balance(user_id, -bet, "slots_bet")
+        stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
+        try:
+            new_balance = await ledger.post(
+                db_helpers, user_id, interaction.user.display_name, -bet,
+                'slots', "Slots bet", config, stat_period, require_funds=True
+            )
+        except ledger.InsufficientFunds as e:
+            await interaction.followup.send(
+                f"Nicht genug Guthaben! Du hast {e.balance} {currency}, brauchst aber {bet} {currency}.",
+                ephemeral=True
+            )
+            return
         
         # Create game
         game = SlotsGame(user_id, bet)
@@ -14272,7 +14314,6 @@ async def slots_command(interaction: discord.Interaction, bet: int):
         view = SlotsView(game, user_id, user_theme)
         embed = game.get_embed(embed_color=themes.get_theme_color(user_theme) if user_theme else 0x00ff41)
         
-        new_balance = await db_helpers.get_balance(user_id)
         embed.add_field(name="💰 Guthaben", value=f"{new_balance} {currency}", inline=False)
         
         await interaction.followup.send(embed=embed, view=view, ephemeral=True)
@@ -19931,27 +19972,57 @@ async def on_message(message):
         logger.debug(f"[CHATBOT] History fetched: {len(history)} messages")
         print(f"[CHATBOT] Got {len(history)} messages from history")
 
-        # --- FIX: Revert to using the 'typing' context manager which works for DMs and Guilds. ---
-        # The asyncio.wait_for will prevent the rate-limiting issue by timing out the AI call.
-        try:
-            logger.debug(f"[CHATBOT] Starting typing indicator and AI call")
-            print(f"[CHATBOT] Calling AI API...")
-            async with message.channel.typing():
-                # Wait for the AI response, but with a timeout.
-                response_text, error_message, updated_history = await asyncio.wait_for(
-                    _get_ai_response(history, message, user_prompt),
+        streamed_message = None
+        posted_messages = []  # Partial answers posted while streaming, removed again on errors
+        if config['bot']['chat'].get('streaming', {}).get('enabled', False):
+            # --- NEW: Stream the response and edit it in place as tokens arrive ---
+            # The whole stream gets the same overall timeout as the non-streaming call, so a
+            # provider that keeps sending chunks slowly can't hold the channel forever.
+            try:
+                logger.debug(f"[CHATBOT] Starting streamed AI call")
+                print(f"[CHATBOT] Streaming AI response...")
+                response_text, error_message, updated_history, streamed_message = await asyncio.wait_for(
+                    _stream_ai_response(history, message, user_prompt, posted_messages),
                     timeout=config.get('api', {}).get('timeout', 30)
                 )
-            logger.debug(f"[CHATBOT] AI response received: error={error_message is not None}")
-            print(f"[CHATBOT] AI call completed - got {'error' if error_message else 'response'}")
-        except asyncio.TimeoutError:
-            timeout_val = config.get('api', {}).get('timeout', 30)
-            logger.error(f"[CHATBOT] AI response timed out after {timeout_val}s")
-            print(f"[CHATBOT] [AI] Response for channel {message.channel.id} timed out after {timeout_val} seconds.")
-            error_message = "Die Anfrage hat zu lange gedauert. Versuche es später erneut."
-            response_text, updated_history = None, None
+            except asyncio.TimeoutError:
+                timeout_val = config.get('api', {}).get('timeout', 30)
+                logger.error(f"[CHATBOT] Streamed AI response timed out after {timeout_val}s")
+                print(f"[CHATBOT] [AI] Streamed response for channel {message.channel.id} timed out after {timeout_val} seconds.")
+                error_message = "Die Anfrage hat zu lange gedauert. Versuche es später erneut."
+                response_text, updated_history = None, None
+            except Exception as e:
+                logger.error(f"[CHATBOT] Streamed AI response failed: {e}", exc_info=True)
+                error_message = "Ich konnte die AI nicht erreichen. Versuche es später erneut."
+                response_text, updated_history = None, None
+        else:
+            # --- FIX: Revert to using the 'typing' context manager which works for DMs and Guilds. ---
+            # The asyncio.wait_for will prevent the rate-limiting issue by timing out the AI call.
+            try:
+                logger.debug(f"[CHATBOT] Starting typing indicator and AI call")
+                print(f"[CHATBOT] Calling AI API...")
+                async with message.channel.typing():
+                    # Wait for the AI response, but with a timeout.
+                    response_text, error_message, updated_history = await asyncio.wait_for(
+                        _get_ai_response(history, message, user_prompt),
+                        timeout=config.get('api', {}).get('timeout', 30)
+                    )
+                logger.debug(f"[CHATBOT] AI response received: error={error_message is not None}")
+                print(f"[CHATBOT] AI call completed - got {'error' if error_message else 'response'}")
+            except asyncio.TimeoutError:
+                timeout_val = config.get('api', {}).get('timeout', 30)
+                logger.error(f"[CHATBOT] AI response timed out after {timeout_val}s")
+                print(f"[CHATBOT] [AI] Response for channel {message.channel.id} timed out after {timeout_val} seconds.")
+                error_message = "Die Anfrage hat zu lange gedauert. Versuche es später erneut."
+                response_text, updated_history = None, None
 
         if error_message:
+            # Remove a partial streamed answer, it is neither complete nor saved to the history
+            for partial_message in posted_messages:
+                try:
+                    await partial_message.delete()
+                except discord.HTTPException as delete_error:
+                    logger.warning(f"[CHATBOT] Could not delete partial streamed message: {delete_error}")
             logger.warning(f"[CHATBOT] Sending error message to user: {error_message}")
             print(f"[CHATBOT] Sending error to user: {error_message}")
             await message.channel.send(f"{message.author.mention} {error_message}")
@@ -20007,7 +20078,15 @@ async def on_message(message):
             print(f"[CHATBOT] Sending response chunks to channel...")
             
             chunks_sent = 0
-            for chunk in await split_message(final_response):
+            chunks = [chunk for chunk in await split_message(final_response) if chunk]
+            if streamed_message and chunks:
+                # The live preview already holds the start of the answer; replace it with the final first chunk
+                try:
+                    await streamed_message.edit(content=chunks.pop(0))
+                    chunks_sent += 1
+                except Exception as e:
+                    logger.error(f"[CHATBOT] Failed to finalize streamed message: {e}", exc_info=True)
+            for chunk in chunks:
                 if chunk:
                     try:
                         await message.channel.send(chunk)
@@ -20065,8 +20144,8 @@ async def on_message(message):
                 logger.warning(f"[CHATBOT] AI usage tracking failed: {_e}")
                 print(f"[CHATBOT] [AI Usage] Tracking failed: {_e}")
 
-    async def _get_ai_response(history, message, user_prompt):
-        """Helper function to encapsulate the API call logic."""
+    async def _build_chat_request(message):
+        """Builds the dynamic system prompt and provider config for a chatbot reply."""
         dynamic_system_prompt = config['bot']['system_prompt']
         
         # Add compact language reminder
@@ -20104,16 +20183,62 @@ async def on_message(message):
             short_summary = relationship_summary[:100] + "..." if len(relationship_summary) > 100 else relationship_summary
             dynamic_system_prompt += f"\n[{message.author.display_name}: {short_summary}]"
         
-        # Get AI response
         provider_to_use = await get_current_provider(config)
         temp_config = config.copy()
         temp_config['api']['provider'] = provider_to_use
-        
+        return dynamic_system_prompt, temp_config
+
+    async def _get_ai_response(history, message, user_prompt):
+        """Helper function to encapsulate the API call logic."""
+        dynamic_system_prompt, temp_config = await _build_chat_request(message)
         response_text, error_message, updated_history = await get_chat_response(
             history, user_prompt, message.author.display_name, dynamic_system_prompt, temp_config, GEMINI_API_KEY, OPENAI_API_KEY
         )
         return response_text, error_message, updated_history
 
+    async def _stream_ai_response(history, message, user_prompt, posted_messages):
+        """
+        Streams the AI response into the channel. The first non-blank text is posted as soon
+        as it arrives and the message is then edited (rate limited) as more text comes in.
+        The posted message is also appended to posted_messages, so the caller can remove
+        it if the stream fails or times out.
+        Returns (response_text, error_message, updated_history, streamed_message).
+        """
+        dynamic_system_prompt, temp_config = await _build_chat_request(message)
+        stream = stream_chat_response(
+            history, user_prompt, message.author.display_name, dynamic_system_prompt, temp_config, GEMINI_API_KEY, OPENAI_API_KEY
+        )
+        edit_interval = config['bot']['chat'].get('streaming', {}).get('edit_interval_seconds', 1.2)
+        loop = asyncio.get_running_loop()
+        chunks = stream.__aiter__()
+
+        async with message.channel.typing():
+            # Discord rejects empty messages, so wait for the first visible text
+            while not stream.text.strip():
+                try:
+                    await chunks.__anext__()
+                except StopAsyncIteration:
+                    return stream.text.strip() or None, stream.error, stream.history, None
+
+        streamed_message = await message.channel.send(stream.text[:2000])
+        posted_messages.append(streamed_message)
+        last_edit = loop.time()
+        shown_length = len(stream.text)
+        async for _ in chunks:
+            # Past Discord's limit the final text is split into several messages once the stream ends
+            if len(stream.text) > 2000 or loop.time() - last_edit < edit_interval:
+                continue
+            try:
+                await streamed_message.edit(content=stream.text)
+                shown_length = len(stream.text)
+            except discord.HTTPException as e:
+                logger.warning(f"[CHATBOT] Could not edit streamed message: {e}")
+            last_edit = loop.time()
+
+        logger.debug(f"[CHATBOT] Stream finished: {len(stream.text)} chars, {shown_length} shown live, "
+                     f"first chunk after {stream.time_to_first_chunk_ms or 0:.0f}ms")
+        return stream.text, stream.error, stream.history, streamed_message
+
     # 1. Ignore messages from the bot itself. This is the most important guard to prevent loops.
     if message.author == client.user:
         print(f"[FILTER] Message from bot itself, skipping")
@@ -20530,7 +20655,33 @@ async def graceful_shutdown(signal_name=None):
         logger.info("Closing Discord connection...")
         print("[Shutdown] Closing Discord connection...")
         await client.close()
-        
+
+        # Write out buffered stat increments before the DB executor goes away
+        logger.info("Flushing buffered stats...")
+        print("[Shutdown] Flushing buffered stats...")
+        flush_stat_buffer_task.cancel()
+        flushed = await db_helpers.flush_stat_buffer()
+        print(f"[Shutdown] Flushed {flushed} buffered stat entries")
+        flush_quest_progress_task.cancel()
+        flushed = await quests.flush_quest_progress(db_helpers)
+        print(f"[Shutdown] Flushed progress of {flushed} quest(s)")
+        flush_ai_cache_usage_task.cancel()
+        await advanced_ai.flush_response_cache_usage()
+
+        # Fill queued stock orders while the DB executor is still running
+        await stock_market.shutdown_trade_engines()
+
+        # Close pooled outbound HTTP connections
+        await http_client.close_all_sessions()
+
+        # Keep cached AI responses across restarts (no-op unless persistence is enabled)
+        advanced_ai.save_response_cache()
+
+        # Stop the DB worker threads once no more helpers can be scheduled
+        logger.info("Stopping database executor...")
+        print("[Shutdown] Stopping database executor...")
+        db_helpers.shutdown_db_executor(wait=True)
+
         # Clean up lock file
         if not SECONDARY_INSTANCE and os.path.exists(INSTANCE_LOCK_FILE):
             try:
@@ -10,12 +10,14 @@ Implements Neuro-sama-like advanced AI capabilities including:
 
 import json
 import hashlib
+import math
+import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
-from collections import deque
+from collections import deque, OrderedDict
 
 from modules.logger_utils import bot_logger as logger
-from modules.db_helpers import get_db_connection
+from modules.db_helpers import get_db_connection, track_ai_model_usage
 from modules.api_helpers import get_chat_response
 
 
@@ -24,6 +26,10 @@ MAX_CONTEXT_TOKENS = 4000  # Maximum tokens to keep in context
 CONTEXT_COMPRESSION_THRESHOLD = 0.8  # Compress when reaching 80% of max
 RESPONSE_CACHE_TTL_HOURS = 24  # Cache responses for 24 hours
 MIN_SIMILARITY_FOR_CACHE = 0.85  # Minimum similarity to use cached response
+RESPONSE_CACHE_MAX_ENTRIES = 1000  # LRU capacity of the response cache
+RESPONSE_CACHE_SAVE_EVERY = 20  # Persist the cache after this many new entries
+RESPONSE_CACHE_FILE = 'config/ai_response_cache.json'  # Used when persistence is enabled
+RESPONSE_CACHE_USAGE_FLUSH_INTERVAL = 60  # Seconds between ai_model_usage writes of cache counters (see bot.py)
 
 
 class ContextManager:
@@ -190,74 +196,178 @@ class EmotionalIntelligence:
 
 
 class ResponseCache:
-    """Caches AI responses for similar queries to save tokens."""
+    """
+    Caches AI responses for similar queries to save tokens.
+
+    Entries are kept in LRU order up to max_entries. Similar-prompt lookup uses an
+    inverted token index with prefix filtering: a cached prompt can only reach the
+    Jaccard threshold if it shares one of the query's rarest tokens, so only the
+    posting lists of those tokens are scanned instead of every cached prompt.
+    """
     
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl_hours: float = RESPONSE_CACHE_TTL_HOURS,
+                 min_similarity: float = MIN_SIMILARITY_FOR_CACHE, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = timedelta(hours=ttl_hours)
+        self.min_similarity = min_similarity
+        self.persist_path = persist_path
+        self.cache = OrderedDict()  # prompt hash -> {'prompt', 'response', 'timestamp', 'tokens'}
+        self._index = {}  # token -> set of prompt hashes
+        self._unsaved_changes = 0
+        self.stats = {'exact_hits': 0, 'similar_hits': 0, 'misses': 0, 'tokens_saved': 0, 'candidates_checked': 0}
         
     def _hash_prompt(self, prompt: str) -> str:
         """Create hash of prompt for cache key."""
         return hashlib.md5(prompt.encode()).hexdigest()
         
+    @staticmethod
+    def _tokenize(prompt: str) -> frozenset:
+        return frozenset(prompt.lower().split())
+        
     def _calculate_similarity(self, prompt1: str, prompt2: str) -> float:
         """Calculate similarity between two prompts (simple word overlap)."""
-        words1 = set(prompt1.lower().split())
-        words2 = set(prompt2.lower().split())
+        return self._jaccard(self._tokenize(prompt1), self._tokenize(prompt2))
         
+    @staticmethod
+    def _jaccard(words1: frozenset, words2: frozenset) -> float:
         if not words1 or not words2:
             return 0.0
-            
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
+        intersection = len(words1 & words2)
+        return intersection / (len(words1) + len(words2) - intersection)
+        
+    def _is_expired(self, entry: dict) -> bool:
+        return datetime.fromisoformat(entry['timestamp']) < datetime.now() - self.ttl
+        
+    def _remove(self, prompt_hash: str):
+        entry = self.cache.pop(prompt_hash, None)
+        if entry is None:
+            return
+        for token in entry['tokens']:
+            postings = self._index.get(token)
+            if postings is not None:
+                postings.discard(prompt_hash)
+                if not postings:
+                    del self._index[token]
+                    
+    def _find_similar(self, tokens: frozenset) -> Tuple[Optional[str], float]:
+        """Returns the hash of the most similar live entry above the threshold."""
+        if not tokens:
+            return None, 0.0
+        # Jaccard >= t requires an overlap of at least ceil(t * |tokens|), so any match
+        # must contain one of the (|tokens| - required + 1) rarest query tokens.
+        required_overlap = math.ceil(self.min_similarity * len(tokens))
+        probe_count = len(tokens) - required_overlap + 1
+        probe_tokens = sorted(tokens, key=lambda token: len(self._index.get(token, ())))[:probe_count]
+        
+        candidates = set()
+        for token in probe_tokens:
+            candidates.update(self._index.get(token, ()))
+        self.stats['candidates_checked'] += len(candidates)
         
-        return len(intersection) / len(union)
+        best_hash, best_similarity = None, 0.0
+        for prompt_hash in candidates:
+            entry = self.cache[prompt_hash]
+            similarity = self._jaccard(tokens, entry['tokens'])
+            if similarity >= self.min_similarity and similarity > best_similarity and not self._is_expired(entry):
+                best_hash, best_similarity = prompt_hash, similarity
+        return best_hash, best_similarity
         
     async def get_cached_response(self, prompt: str) -> Optional[str]:
         """Try to get a cached response for similar prompt."""
         # Check exact match first
         prompt_hash = self._hash_prompt(prompt)
-        if prompt_hash in self.cache:
-            cached = self.cache[prompt_hash]
-            # Check if not expired
-            if datetime.fromisoformat(cached['timestamp']) > datetime.now() - timedelta(hours=RESPONSE_CACHE_TTL_HOURS):
+        cached = self.cache.get(prompt_hash)
+        if cached is not None:
+            if not self._is_expired(cached):
+                self.cache.move_to_end(prompt_hash)
+                self.stats['exact_hits'] += 1
                 logger.info(f"Cache hit: exact match for prompt")
                 return cached['response']
-            else:
-                # Expired, remove
-                del self.cache[prompt_hash]
-                
+            # Expired, remove
+            self._remove(prompt_hash)
+            
         # Check for similar prompts
-        for cached_hash, cached_data in self.cache.items():
-            if datetime.fromisoformat(cached_data['timestamp']) < datetime.now() - timedelta(hours=RESPONSE_CACHE_TTL_HOURS):
-                continue  # Skip expired
-                
-            similarity = self._calculate_similarity(prompt, cached_data['prompt'])
-            if similarity >= MIN_SIMILARITY_FOR_CACHE:
-                logger.info(f"Cache hit: similar prompt (similarity={similarity:.2f})")
-                return cached_data['response']
-                
+        similar_hash, similarity = self._find_similar(self._tokenize(prompt))
+        if similar_hash:
+            self.cache.move_to_end(similar_hash)
+            self.stats['similar_hits'] += 1
+            logger.info(f"Cache hit: similar prompt (similarity={similarity:.2f})")
+            return self.cache[similar_hash]['response']
+            
+        self.stats['misses'] += 1
         logger.debug("Cache miss: no similar prompts found")
         return None
         
-    def cache_response(self, prompt: str, response: str):
-        """Cache a response."""
+    def cache_response(self, prompt: str, response: str, timestamp: Optional[str] = None):
+        """Cache a response, evicting the least recently used entries beyond max_entries."""
         prompt_hash = self._hash_prompt(prompt)
+        self._remove(prompt_hash)
+        tokens = self._tokenize(prompt)
         self.cache[prompt_hash] = {
             'prompt': prompt,
             'response': response,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp or datetime.now().isoformat(),
+            'tokens': tokens
         }
+        for token in tokens:
+            self._index.setdefault(token, set()).add(prompt_hash)
+        self._unsaved_changes += 1
         logger.debug(f"Cached response for prompt hash {prompt_hash}")
         
         # Limit cache size
-        if len(self.cache) > 100:
-            # Remove oldest entries
-            sorted_items = sorted(
-                self.cache.items(),
-                key=lambda x: x[1]['timestamp']
-            )
-            for key, _ in sorted_items[:20]:  # Remove oldest 20
-                del self.cache[key]
+        while len(self.cache) > self.max_entries:
+            self._remove(next(iter(self.cache)))
+            
+    def record_tokens_saved(self, tokens: int):
+        self.stats['tokens_saved'] += tokens
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, hit rate and index size."""
+        hits = self.stats['exact_hits'] + self.stats['similar_hits']
+        lookups = hits + self.stats['misses']
+        return {
+            **self.stats,
+            'hits': hits,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self.cache),
+            'max_entries': self.max_entries,
+            'indexed_tokens': len(self._index),
+        }
+        
+    def load(self):
+        """Loads persisted entries from persist_path (if configured), skipping expired ones."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            for entry in entries:
+                if not self._is_expired(entry):
+                    self.cache_response(entry['prompt'], entry['response'], entry['timestamp'])
+            self._unsaved_changes = 0
+            logger.info(f"Loaded {len(self.cache)} cached AI responses from {self.persist_path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load AI response cache from {self.persist_path}: {e}")
+            
+    def save(self, force: bool = False):
+        """Writes entries to persist_path once enough changes accumulated (or when forced)."""
+        if not self.persist_path or not self._unsaved_changes:
+            return
+        if not force and self._unsaved_changes < RESPONSE_CACHE_SAVE_EVERY:
+            return
+        entries = [
+            {'prompt': entry['prompt'], 'response': entry['response'], 'timestamp': entry['timestamp']}
+            for entry in self.cache.values()
+        ]
+        self._unsaved_changes = 0
+        try:
+            temp_path = f"{self.persist_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.persist_path)
+            logger.debug(f"Saved {len(entries)} cached AI responses to {self.persist_path}")
+        except OSError as e:
+            logger.warning(f"Could not save AI response cache to {self.persist_path}: {e}")
 
 
 class ReasoningEngine:
@@ -299,6 +409,72 @@ Respond naturally while considering these steps."""
 _context_managers = {}  # channel_id -> ContextManager
 _response_cache = ResponseCache()
 _emotional_analyzer = EmotionalIntelligence()
+# model_name -> [cache_hits, cache_misses, tokens_saved] not yet written to ai_model_usage
+_pending_cache_usage = {}
+
+
+def configure_response_cache(settings: Optional[dict] = None):
+    """
+    Rebuilds the response cache from config['api']['response_cache']
+    (max_entries, ttl_hours, min_similarity, persist) and loads persisted entries.
+    """
+    global _response_cache
+    settings = settings or {}
+    _response_cache = ResponseCache(
+        max_entries=settings.get('max_entries', RESPONSE_CACHE_MAX_ENTRIES),
+        ttl_hours=settings.get('ttl_hours', RESPONSE_CACHE_TTL_HOURS),
+        min_similarity=settings.get('min_similarity', MIN_SIMILARITY_FOR_CACHE),
+        persist_path=RESPONSE_CACHE_FILE if settings.get('persist', False) else None
+    )
+    _response_cache.load()
+
+
+def save_response_cache():
+    """Persists the response cache (if enabled). Called on shutdown."""
+    _response_cache.save(force=True)
+
+
+def get_response_cache_stats() -> Dict[str, Any]:
+    """Returns in-process response cache statistics."""
+    return _response_cache.get_stats()
+
+
+def _record_cache_usage(model_name: str, hit: bool, tokens_saved: int = 0):
+    """Counts a cache lookup in memory; flush_response_cache_usage() writes the totals."""
+    counters = _pending_cache_usage.setdefault(model_name, [0, 0, 0])
+    counters[0 if hit else 1] += 1
+    counters[2] += tokens_saved
+
+
+async def flush_response_cache_usage() -> int:
+    """
+    Writes the pending cache hit/miss counters to ai_model_usage, one row per model.
+    Counters of a failed write are kept for the next flush.
+    
+    Returns:
+        Number of models written
+    """
+    global _pending_cache_usage
+    batch, _pending_cache_usage = _pending_cache_usage, {}
+    written = 0
+    for model_name, (hits, misses, tokens_saved) in batch.items():
+        if await track_ai_model_usage(model_name, 'response_cache', 0, 0, 0.0,
+                                      cache_hits=hits, cache_misses=misses, tokens_saved=tokens_saved):
+            written += 1
+            continue
+        counters = _pending_cache_usage.setdefault(model_name, [0, 0, 0])
+        counters[0] += hits
+        counters[1] += misses
+        counters[2] += tokens_saved
+    return written
+
+
+def _get_chat_model_name(config: dict) -> str:
+    """Returns the chat model of the configured provider (used for usage tracking)."""
+    api_config = config.get('api', {})
+    if api_config.get('provider', 'gemini') == 'openai':
+        return api_config.get('openai', {}).get('chat_model', 'gpt-4o-mini')
+    return api_config.get('gemini', {}).get('model', 'gemini-2.5-flash')
 
 
 def get_context_manager(channel_id: int) -> ContextManager:
@@ -337,8 +513,11 @@ async def get_advanced_ai_response(
         cached_response = await _response_cache.get_cached_response(prompt)
         if cached_response:
             metadata['cached'] = True
-            metadata['tokens_saved'] = len(cached_response) // 4  # Rough estimate
+            metadata['tokens_saved'] = len(prompt) // 4 + len(cached_response) // 4  # Rough estimate
+            _response_cache.record_tokens_saved(metadata['tokens_saved'])
+            _record_cache_usage(_get_chat_model_name(config), True, metadata['tokens_saved'])
             return cached_response, None, metadata
+        _record_cache_usage(_get_chat_model_name(config), False)
             
     # Get context manager
     context_mgr = get_context_manager(channel_id)
@@ -389,6 +568,7 @@ async def get_advanced_ai_response(
         # Cache the response
         if use_cache:
             _response_cache.cache_response(prompt, response)
+            _response_cache.save()
             
     return response, error, metadata
 
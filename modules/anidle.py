@@ -18,6 +18,7 @@ import discord
 
 # Local imports
 from modules.logger_utils import bot_logger as logger
+from modules import http_client
 
 # Jikan API (MyAnimeList unofficial API) - free, no auth required
 JIKAN_API_BASE = "https://api.jikan.moe/v4"
@@ -72,7 +73,7 @@ async def _rate_limited_api_call(url: str, params: dict = None, timeout: int = 1
                 
                 _last_api_call = time.time()
             
-            async with aiohttp.ClientSession() as session:
+            async with http_client.shared_session() as session:
                 async with session.get(url, params=params, timeout=timeout) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -1,10 +1,15 @@
 import aiohttp
+import asyncio
+import contextlib
+import hashlib
 import json
+import time
 from collections import deque
 from datetime import datetime, timezone
 
 # --- NEW: Import structured logging ---
 from modules.logger_utils import api_logger as logger
+from modules import http_client
 
 # --- Constants ---
 GEMINI_API_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
@@ -139,8 +144,134 @@ def calculate_cost(model_name: str, input_tokens: int, output_tokens: int) -> fl
     output_cost = (output_tokens / 1_000_000) * pricing["output"]
     return input_cost + output_cost
 
+# --- Performance: Single-flight coalescing of identical provider requests ---
+# When several callers send the same (model, payload) at the same time, only the
+# first one (the leader) hits the provider; the others await its result. Followers
+# get zero token usage back so the call is only logged once.
+_inflight_requests = {}
+_single_flight_stats = {'provider_calls': 0, 'deduplicated_calls': 0}
+
+
+def _single_flight_key(model_name, payload):
+    """Builds the coalescing key from the model and a canonical form of the payload."""
+    normalized = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return (asyncio.get_running_loop(), model_name, hashlib.sha256(normalized.encode('utf-8')).hexdigest())
+
+
+async def _record_deduplicated_call(model_name):
+    """Counts a coalesced request in ai_model_usage (no tokens, no provider call)."""
+    try:
+        from modules.db_helpers import track_ai_model_usage
+        await track_ai_model_usage(model_name, 'single_flight', 0, 0, 0.0, deduplicated_calls=1)
+    except Exception as e:
+        logger.debug(f"[Single-Flight] Could not record deduplicated call: {e}")
+
+
+async def _single_flight(model_name, payload, request_factory, share_result):
+    """
+    Runs request_factory() once per identical in-flight (model, payload).
+
+    Args:
+        model_name: Model the request is sent to
+        payload: Request body used to build the key
+        request_factory: Zero-argument coroutine function performing the real request
+        share_result: Maps the leader's result to what a follower receives
+
+    Returns:
+        The leader's result, or share_result(result) for followers
+    """
+    key = _single_flight_key(model_name, payload)
+    existing = _inflight_requests.get(key)
+    if existing is not None:
+        try:
+            result = await asyncio.shield(existing)
+        except asyncio.CancelledError:
+            if not existing.cancelled():
+                raise
+            # The leader was cancelled, not us - do the request ourselves
+            return await request_factory()
+        _single_flight_stats['deduplicated_calls'] += 1
+        logger.info(f"[Single-Flight] Reused in-flight {model_name} response")
+        await _record_deduplicated_call(model_name)
+        return share_result(result)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight_requests[key] = future
+    try:
+        _single_flight_stats['provider_calls'] += 1
+        result = await request_factory()
+        future.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark as retrieved when there are no followers
+        raise
+    finally:
+        if _inflight_requests.get(key) is future:
+            del _inflight_requests[key]
+
+
+def get_single_flight_stats():
+    """Returns provider call and deduplication counters for the dashboard."""
+    stats = dict(_single_flight_stats)
+    stats['in_flight'] = len(_inflight_requests)
+    return stats
+
+
+class _BufferedResponse:
+    """Fully read HTTP response that can be handed to several coalesced callers."""
+
+    def __init__(self, status, body, strip_usage=False):
+        self.status = status
+        self._body = body
+        self._strip_usage = strip_usage
+
+    async def read(self):
+        return self._body
+
+    async def text(self):
+        return self._body.decode('utf-8', errors='replace')
+
+    async def json(self):
+        data = json.loads(self._body)
+        if self._strip_usage and isinstance(data, dict):
+            data.pop('usage', None)
+        return data
+
+
+@contextlib.asynccontextmanager
+async def _post_openai(session, payload, headers, timeout):
+    """
+    POSTs a chat completion with single-flight coalescing.
+    Used as `async with _post_openai(session, payload, headers, timeout) as response:`.
+    """
+    async def _request():
+        async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+            return _BufferedResponse(response.status, await response.read())
+
+    yield await _single_flight(
+        payload.get('model'), payload, _request,
+        lambda response: _BufferedResponse(response.status, response._body, strip_usage=True)
+    )
+
+
 # --- REFACTORED: Centralized Gemini API call logic ---
 async def _call_gemini_api(payload, model_name, api_key, timeout):
+    """
+    Calls the Gemini API, sharing the result between identical concurrent requests.
+    Returns: (response_text, error, usage_metadata, is_quota_error)
+    """
+    return await _single_flight(
+        model_name, payload,
+        lambda: _call_gemini_api_uncoalesced(payload, model_name, api_key, timeout),
+        lambda result: (result[0], result[1], (0, 0), result[3])
+    )
+
+
+async def _call_gemini_api_uncoalesced(payload, model_name, api_key, timeout):
     """
     A centralized function to handle all calls to the Gemini API.
     Returns: (response_text, error, usage_metadata, is_quota_error)
@@ -153,7 +284,7 @@ async def _call_gemini_api(payload, model_name, api_key, timeout):
     print(f"[Gemini API] Making request to model '{model_name}'...")
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             logger.debug(f"[Gemini API] Session created, sending POST request")
             print(f"[Gemini API] Sending POST request with timeout={timeout}...")
             async with session.post(api_url, json=payload, timeout=timeout) as response:
@@ -211,18 +342,9 @@ async def _call_gemini_api(payload, model_name, api_key, timeout):
         print(f"[Gemini API] An exception occurred while calling Gemini API: {e}")
         return None, "Ich konnte die AI nicht erreichen. Überprüfe die Internetverbindung oder die API-Keys.", (0, 0), False
 
-async def get_chat_response(history, user_prompt, user_display_name, system_prompt, config, gemini_key, openai_key):
-    """
-    Gets a chat response from the configured AI provider (Gemini or OpenAI).
-    This function now correctly builds the Gemini URL with the model from the config.
-    """
-    provider = config.get('api', {}).get('provider', 'gemini')
-    timeout = config.get('api', {}).get('timeout', 30)
-
-    logger.info(f"[Chat API] Starting chat response generation via '{provider}'")
-    logger.debug(f"[Chat API] History length: {len(history)}, Timeout: {timeout}s")
-    print(f"[Chat API] Provider: {provider}, History: {len(history)} messages")
 
+def _prepare_chat_history(history, user_prompt, user_display_name):
+    """Returns a copy of the history with alternating roles and the attributed user prompt appended."""
     # --- FIX: Validate and clean the history to ensure alternating roles ---
     # The Gemini API requires a strict user -> model -> user -> model sequence.
     clean_history = deque()
@@ -249,6 +371,55 @@ async def get_chat_response(history, user_prompt, user_display_name, system_prom
     final_history_for_api.append({"role": "user", "parts": [{"text": user_message_with_attribution}]})
     logger.debug(f"[Chat API] Added current user prompt to history with attribution")
     print(f"[Chat API] Added user prompt: '{user_prompt[:50]}...'")
+    return final_history_for_api
+
+
+def _build_gemini_chat_payload(system_prompt, final_history_for_api, generation_config):
+    """Builds the Gemini generateContent payload for a chat turn."""
+    # --- FIX: Prepend system prompt to contents instead of using system_instruction ---
+    # This is more compatible with newer models like gemini-1.5-flash.
+    final_contents = [{"role": "user", "parts": [{"text": system_prompt}]}, {"role": "model", "parts": [{"text": "Understood."}]}] + final_history_for_api
+    logger.debug(f"[Chat API] Final contents length: {len(final_contents)}")
+    print(f"[Chat API] Prepared {len(final_contents)} content items for API call")
+
+    # --- FIX: Add safety settings to prevent blocking ---
+    safety_settings = [
+        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+    ]
+
+    return {
+        "contents": final_contents,
+        "generationConfig": generation_config,
+        "safetySettings": safety_settings
+    }
+
+
+def _build_openai_chat_messages(system_prompt, final_history_for_api):
+    """Converts Gemini-format chat history into OpenAI chat messages."""
+    messages = [{"role": "system", "content": system_prompt}]
+    for item in final_history_for_api:
+        role = "assistant" if item['role'] == 'model' else item['role']
+        content = item['parts'][0]['text']
+        messages.append({"role": role, "content": content})
+    return messages
+
+
+async def get_chat_response(history, user_prompt, user_display_name, system_prompt, config, gemini_key, openai_key):
+    """
+    Gets a chat response from the configured AI provider (Gemini or OpenAI).
+    This function now correctly builds the Gemini URL with the model from the config.
+    """
+    provider = config.get('api', {}).get('provider', 'gemini')
+    timeout = config.get('api', {}).get('timeout', 30)
+
+    logger.info(f"[Chat API] Starting chat response generation via '{provider}'")
+    logger.debug(f"[Chat API] History length: {len(history)}, Timeout: {timeout}s")
+    print(f"[Chat API] Provider: {provider}, History: {len(history)} messages")
+
+    final_history_for_api = _prepare_chat_history(history, user_prompt, user_display_name)
 
     if provider == 'gemini':
         # --- FIX: Dynamically build the URL with the model from config ---
@@ -258,25 +429,7 @@ async def get_chat_response(history, user_prompt, user_display_name, system_prom
         logger.info(f"[Chat API] Using Gemini model: {model}")
         print(f"[Chat API] Gemini model: {model}")
         
-        # --- FIX: Prepend system prompt to contents instead of using system_instruction ---
-        # This is more compatible with newer models like gemini-1.5-flash.
-        final_contents = [{"role": "user", "parts": [{"text": system_prompt}]}, {"role": "model", "parts": [{"text": "Understood."}]}] + final_history_for_api
-        logger.debug(f"[Chat API] Final contents length: {len(final_contents)}")
-        print(f"[Chat API] Prepared {len(final_contents)} content items for API call")
-        
-        # --- FIX: Add safety settings to prevent blocking ---
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-        ]
-
-        payload = {
-            "contents": final_contents,
-            "generationConfig": generation_config,
-            "safetySettings": safety_settings
-        }
+        payload = _build_gemini_chat_payload(system_prompt, final_history_for_api, generation_config)
         
         logger.debug(f"[Chat API] Calling Gemini API with payload size: {len(str(payload))} chars")
         print(f"[Chat API] Sending request to Gemini API...")
@@ -331,18 +484,14 @@ async def get_chat_response(history, user_prompt, user_display_name, system_prom
         headers = {"Authorization": f"Bearer {openai_key}"}
         
         # Convert Gemini history format to OpenAI format
-        messages = [{"role": "system", "content": system_prompt}]
-        for item in final_history_for_api:
-            role = "assistant" if item['role'] == 'model' else item['role']
-            content = item['parts'][0]['text']
-            messages.append({"role": role, "content": content})
+        messages = _build_openai_chat_messages(system_prompt, final_history_for_api)
 
         # Build payload with correct token parameter for the model
         payload = build_openai_payload(model, messages, max_tokens, temperature)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+            async with http_client.shared_session() as session:
+                async with _post_openai(session, payload, headers, timeout) as response:
                     if response.status == 200:
                         data = await response.json()
                         response_text = data['choices'][0]['message']['content']
@@ -398,6 +547,187 @@ async def get_chat_response(history, user_prompt, user_display_name, system_prom
     return None, "Ungültiger API-Provider in der Konfiguration.", history
 
 
+# --- Performance: Streaming chat responses ---
+# The chatbot posts the first chunk as soon as it arrives instead of waiting for the
+# full generation. Time to first chunk is kept for the dashboard (runtime_stats.json).
+STREAM_TTFB_SAMPLES = 200
+_stream_stats = {'streams': 0, 'fallbacks': 0, 'interrupted': 0}
+_stream_ttfb_ms = deque(maxlen=STREAM_TTFB_SAMPLES)
+
+
+class _StreamUnavailable(Exception):
+    """Raised when a provider refuses to stream before the first chunk (HTTP error, quota)."""
+
+
+def get_streaming_stats():
+    """Returns stream counters and time-to-first-chunk percentiles in milliseconds."""
+    stats = dict(_stream_stats)
+    samples = sorted(_stream_ttfb_ms)
+    if samples:
+        stats['ttfb_ms_last'] = round(_stream_ttfb_ms[-1], 1)
+        stats['ttfb_ms_p50'] = round(samples[len(samples) // 2], 1)
+        stats['ttfb_ms_p95'] = round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1)
+    return stats
+
+
+async def _iter_sse_events(response):
+    """Yields the decoded JSON of every `data:` line of a server-sent event stream."""
+    async for raw_line in response.content:
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            return
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            logger.debug(f"[Chat Stream] Skipping malformed event: {data[:100]}")
+
+
+class ChatStream:
+    """
+    Streams a chat response from the configured provider as text deltas.
+
+        stream = stream_chat_response(...)
+        async for delta in stream:
+            ...
+        stream.text, stream.error, stream.history
+
+    If the provider fails before the first chunk (HTTP error, quota exhausted), the
+    stream falls back to get_chat_response() - including its provider fallback - and
+    yields the full answer as a single chunk. A stream that breaks off or gets blocked
+    after some text sets error; the partial text is not added to history.
+    """
+
+    def __init__(self, history, user_prompt, user_display_name, system_prompt, config, gemini_key, openai_key):
+        self._args = (history, user_prompt, user_display_name, system_prompt, config, gemini_key, openai_key)
+        self._config = config
+        self.text = ''
+        self.error = None
+        self.history = None
+        self.time_to_first_chunk_ms = None
+        self._usage = [0, 0]
+
+    def __aiter__(self):
+        return self._run()
+
+    async def _run(self):
+        history, user_prompt, user_display_name, system_prompt, config, gemini_key, openai_key = self._args
+        api_config = config.get('api', {})
+        provider = api_config.get('provider', 'gemini')
+        timeout = api_config.get('timeout', 30)
+        # Bound the wait for each read instead of the whole generation, which may legitimately take longer
+        stream_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+
+        final_history_for_api = _prepare_chat_history(history, user_prompt, user_display_name)
+        if provider == 'gemini':
+            model = api_config.get('gemini', {}).get('model', 'gemini-2.5-flash')
+            payload = _build_gemini_chat_payload(system_prompt, final_history_for_api, api_config.get('gemini', {}).get('generation_config', {}))
+            chunks = self._stream_gemini(payload, model, gemini_key, stream_timeout)
+        elif provider == 'openai':
+            openai_config = api_config.get('openai', {})
+            model = openai_config.get('chat_model', 'gpt-4o-mini')
+            payload = build_openai_payload(model, _build_openai_chat_messages(system_prompt, final_history_for_api),
+                                           openai_config.get('chat_max_tokens', 2048), openai_config.get('chat_temperature', 0.7))
+            payload['stream'] = True
+            payload['stream_options'] = {"include_usage": True}
+            chunks = self._stream_openai(payload, openai_key, stream_timeout)
+        else:
+            self.error = "Ungültiger API-Provider in der Konfiguration."
+            self.history = history
+            return
+
+        _stream_stats['streams'] += 1
+        started_at = time.perf_counter()
+        logger.info(f"[Chat Stream] Streaming response from {provider}/{model}")
+        try:
+            async for delta in chunks:
+                if not delta:
+                    continue
+                if self.time_to_first_chunk_ms is None:
+                    self._record_first_chunk(provider, model, started_at)
+                self.text += delta
+                yield delta
+        except _StreamUnavailable as e:
+            logger.warning(f"[Chat Stream] {provider} stream unavailable: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"[Chat Stream] {provider} stream failed after {len(self.text)} chars: {e}")
+            if self.text:
+                _stream_stats['interrupted'] += 1
+                self.error = "Die Antwort wurde unterbrochen. Versuche es später erneut."
+        finally:
+            input_tokens, output_tokens = self._usage
+            if input_tokens > 0 or output_tokens > 0:
+                from modules.db_helpers import log_api_usage
+                await log_api_usage(model, input_tokens, output_tokens)
+                logger.debug(f"[Chat Stream] Logged API usage: {input_tokens} input / {output_tokens} output tokens")
+
+        if self.error:
+            # Blocked or broken off: the partial answer must not be replayed in later prompts
+            self.history = history
+            return
+        if self.text:
+            final_history_for_api.append({"role": "model", "parts": [{"text": self.text}]})
+            self.history = final_history_for_api
+            return
+
+        _stream_stats['fallbacks'] += 1
+        logger.info(f"[Chat Stream] Falling back to non-streaming request")
+        response_text, self.error, self.history = await get_chat_response(*self._args)
+        if response_text:
+            self._record_first_chunk(provider, model, started_at)
+            self.text = response_text
+            yield response_text
+
+    def _record_first_chunk(self, provider, model, started_at):
+        self.time_to_first_chunk_ms = (time.perf_counter() - started_at) * 1000
+        _stream_ttfb_ms.append(self.time_to_first_chunk_ms)
+        logger.info(f"[Chat Stream] {provider}/{model} first chunk after {self.time_to_first_chunk_ms:.0f}ms")
+
+    async def _stream_gemini(self, payload, model_name, api_key, timeout):
+        api_url = f"{GEMINI_API_BASE_URL}/{model_name}:streamGenerateContent?alt=sse&key={api_key}"
+        async with http_client.shared_session() as session:
+            async with session.post(api_url, json=payload, timeout=timeout) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise _StreamUnavailable(f"HTTP {response.status}: {error_text[:200]}")
+                async for event in _iter_sse_events(response):
+                    usage_metadata = event.get('usageMetadata')
+                    if usage_metadata:
+                        self._usage = [usage_metadata.get('promptTokenCount', 0), usage_metadata.get('candidatesTokenCount', 0)]
+                    block_reason = event.get('promptFeedback', {}).get('blockReason')
+                    if block_reason:
+                        logger.warning(f"[Chat Stream] Gemini blocked the prompt: {block_reason}")
+                        self.error = f"Meine Antwort wurde blockiert (Grund: {block_reason}). Versuchs mal anders zu formulieren."
+                        return
+                    for candidate in event.get('candidates', [])[:1]:
+                        for part in candidate.get('content', {}).get('parts', []):
+                            yield part.get('text', '')
+
+    async def _stream_openai(self, payload, api_key, timeout):
+        headers = {"Authorization": f"Bearer {api_key}"}
+        async with http_client.shared_session() as session:
+            async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise _StreamUnavailable(f"HTTP {response.status}: {error_text[:200]}")
+                async for event in _iter_sse_events(response):
+                    usage_data = event.get('usage')
+                    if usage_data:
+                        self._usage = [usage_data.get('prompt_tokens', 0), usage_data.get('completion_tokens', 0)]
+                    for choice in event.get('choices', [])[:1]:
+                        yield choice.get('delta', {}).get('content') or ''
+
+
+def stream_chat_response(history, user_prompt, user_display_name, system_prompt, config, gemini_key, openai_key):
+    """
+    Streaming counterpart of get_chat_response() with the same arguments.
+    Returns a ChatStream; iterate it for text deltas, then read .text, .error and .history.
+    """
+    return ChatStream(history, user_prompt, user_display_name, system_prompt, config, gemini_key, openai_key)
+
+
 async def get_relationship_summary_from_api(history, user_display_name, old_summary, config, gemini_key, openai_key):
     """Generates a new relationship summary based on chat history."""
     provider = config.get('api', {}).get('provider') # Use the provider from the passed config
@@ -451,8 +781,8 @@ async def get_relationship_summary_from_api(history, user_display_name, old_summ
             messages = [{"role": "user", "content": prompt}]
             payload_openai = build_openai_payload(fallback_model, messages, fallback_max_tokens, fallback_temperature)
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(OPENAI_API_BASE_URL, json=payload_openai, headers=headers, timeout=timeout) as response:
+                async with http_client.shared_session() as session:
+                    async with _post_openai(session, payload_openai, headers, timeout) as response:
                         if response.status == 200:
                             data = await response.json()
                             summary = data['choices'][0]['message']['content'].strip()
@@ -488,8 +818,8 @@ async def get_relationship_summary_from_api(history, user_display_name, old_summ
         payload = build_openai_payload(model, messages, max_tokens, temperature)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+            async with http_client.shared_session() as session:
+                async with _post_openai(session, payload, headers, timeout) as response:
                     if response.status == 200:
                         data = await response.json()
                         response_text = data['choices'][0]['message']['content'].strip()
@@ -553,8 +883,8 @@ async def get_werwolf_tts_message(event_text, config, gemini_key, openai_key):
             messages = [{"role": "user", "content": prompt}]
             payload_openai = build_openai_payload(fallback_model, messages, fallback_max_tokens, fallback_temperature)
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(OPENAI_API_BASE_URL, json=payload_openai, headers=headers, timeout=timeout) as response:
+                async with http_client.shared_session() as session:
+                    async with _post_openai(session, payload_openai, headers, timeout) as response:
                         if response.status == 200:
                             data = await response.json()
                             tts_text = data['choices'][0]['message']['content'].strip().replace("*", "")
@@ -586,8 +916,8 @@ async def get_werwolf_tts_message(event_text, config, gemini_key, openai_key):
         payload = build_openai_payload(model, messages, max_tokens, temperature)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+            async with http_client.shared_session() as session:
+                async with _post_openai(session, payload, headers, timeout) as response:
                     if response.status == 200:
                         data = await response.json()
                         response_text = data['choices'][0]['message']['content'].strip().replace("*", "")
@@ -647,8 +977,8 @@ async def get_random_names(count, db_helpers, config, gemini_key, openai_key):
                 messages = [{"role": "user", "content": prompt}]
                 payload_openai = build_openai_payload(fallback_model, messages, fallback_max_tokens, fallback_temperature)
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(OPENAI_API_BASE_URL, json=payload_openai, headers=headers, timeout=timeout) as response:
+                    async with http_client.shared_session() as session:
+                        async with _post_openai(session, payload_openai, headers, timeout) as response:
                             if response.status == 200:
                                 data = await response.json()
                                 new_names_text = data['choices'][0]['message']['content']
@@ -685,8 +1015,8 @@ async def get_random_names(count, db_helpers, config, gemini_key, openai_key):
             payload = build_openai_payload(model, messages, max_tokens, temperature)
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+                async with http_client.shared_session() as session:
+                    async with _post_openai(session, payload, headers, timeout) as response:
                         if response.status == 200:
                             data = await response.json()
                             new_names_text = data['choices'][0]['message']['content']
@@ -767,8 +1097,8 @@ async def get_wrapped_summary_from_api(user_display_name, stats, config, gemini_
             messages = [{"role": "user", "content": prompt}]
             payload_openai = build_openai_payload(fallback_model, messages, fallback_max_tokens, fallback_temperature)
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(OPENAI_API_BASE_URL, json=payload_openai, headers=headers, timeout=timeout) as response:
+                async with http_client.shared_session() as session:
+                    async with _post_openai(session, payload_openai, headers, timeout) as response:
                         if response.status == 200:
                             data = await response.json()
                             summary = data['choices'][0]['message']['content'].strip()
@@ -800,8 +1130,8 @@ async def get_wrapped_summary_from_api(user_display_name, stats, config, gemini_
         payload = build_openai_payload(model, messages, max_tokens, temperature)
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+            async with http_client.shared_session() as session:
+                async with _post_openai(session, payload, headers, timeout) as response:
                     if response.status == 200:
                         data = await response.json()
                         response_text = data['choices'][0]['message']['content'].strip()
@@ -867,8 +1197,8 @@ async def get_game_details_from_api(game_names: list, config: dict, gemini_key:
                 messages = [{"role": "system", "content": "You are a helpful assistant that returns JSON."}, {"role": "user", "content": prompt}]
                 payload_openai = {"model": fallback_model, "messages": messages, "response_format": {"type": "json_object"}}
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(OPENAI_API_BASE_URL, json=payload_openai, headers=headers, timeout=timeout) as response:
+                    async with http_client.shared_session() as session:
+                        async with _post_openai(session, payload_openai, headers, timeout) as response:
                             if response.status == 200:
                                 data = await response.json()
                                 response_text = data['choices'][0]['message']['content']
@@ -904,8 +1234,8 @@ async def get_game_details_from_api(game_names: list, config: dict, gemini_key:
             payload = {"model": model, "messages": messages, "response_format": {"type": "json_object"}}
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+                async with http_client.shared_session() as session:
+                    async with _post_openai(session, payload, headers, timeout) as response:
                         if response.status == 200:
                             data = await response.json()
                             response_content = data['choices'][0]['message']['content']
@@ -1012,9 +1342,9 @@ async def get_vision_analysis(image_url, prompt, config, gemini_key, openai_key)
             else:
                 payload_openai["max_tokens"] = 1024
             try:
-                async with aiohttp.ClientSession() as session:
+                async with http_client.shared_session() as session:
                     headers = {"Authorization": f"Bearer {openai_key}", "Content-Type": "application/json"}
-                    async with session.post(OPENAI_API_BASE_URL, json=payload_openai, headers=headers, timeout=timeout) as response:
+                    async with _post_openai(session, payload_openai, headers, timeout) as response:
                         if response.status == 200:
                             data = await response.json()
                             response_text = data['choices'][0]['message']['content']
@@ -1064,9 +1394,9 @@ async def get_vision_analysis(image_url, prompt, config, gemini_key, openai_key)
             payload["max_tokens"] = 1024
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.shared_session() as session:
                 headers = {"Authorization": f"Bearer {openai_key}", "Content-Type": "application/json"}
-                async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+                async with _post_openai(session, payload, headers, timeout) as response:
                     if response.status == 200:
                         data = await response.json()
                         response_text = data['choices'][0]['message']['content']
@@ -1146,9 +1476,9 @@ async def get_ai_response_with_model(prompt, model_name, config, gemini_key, ope
             messages.append({"role": "user", "content": prompt})
             payload_openai = build_openai_payload(fallback_model, messages, 8192, temperature)
             try:
-                async with aiohttp.ClientSession() as session:
+                async with http_client.shared_session() as session:
                     headers = {"Authorization": f"Bearer {openai_key}", "Content-Type": "application/json"}
-                    async with session.post(OPENAI_API_BASE_URL, json=payload_openai, headers=headers, timeout=timeout) as response:
+                    async with _post_openai(session, payload_openai, headers, timeout) as response:
                         if response.status == 200:
                             data = await response.json()
                             response_text = data['choices'][0]['message']['content']
@@ -1195,9 +1525,9 @@ async def get_ai_response_with_model(prompt, model_name, config, gemini_key, ope
             payload = build_openai_payload(model_name, messages, 2048, temperature)
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.shared_session() as session:
                 headers = {"Authorization": f"Bearer {openai_key}", "Content-Type": "application/json"}
-                async with session.post(OPENAI_API_BASE_URL, json=payload, headers=headers, timeout=timeout) as response:
+                async with _post_openai(session, payload, headers, timeout) as response:
                     if response.status == 200:
                         data = await response.json()
                         response_text = data['choices'][0]['message']['content']
@@ -22,6 +22,7 @@ import aiohttp
 
 # --- NEW: Import structured logging ---
 from modules.logger_utils import bot_logger as logger
+from modules import http_client
 
 # Rate limiting for emoji auto-download (max 5 emojis per 60 seconds)
 _emoji_download_times = []
@@ -78,7 +79,7 @@ async def _download_emoji_image(emoji_id):
     emoji_url_png = f"https://cdn.discordapp.com/emojis/{emoji_id}.png"
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             # Try GIF first (for animated emojis)
             async with session.get(emoji_url_gif) as response:
                 if response.status == 200:
@@ -237,7 +238,7 @@ async def handle_image_attachment(message, config, gemini_key, openai_key):
         if attachment.content_type and attachment.content_type.startswith('image/'):
             try:
                 # Download image
-                async with aiohttp.ClientSession() as session:
+                async with http_client.shared_session() as session:
                     async with session.get(attachment.url) as response:
                         if response.status == 200:
                             image_data = await response.read()
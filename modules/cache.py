@@ -0,0 +1,160 @@
+"""
+Sulfur Bot - Cache Module
+Bounded in-memory LRU/TTL cache with namespaced keys and hit/miss metrics.
+
+Keys are grouped into namespaces (e.g. 'balance', 'profile', 'leaderboard').
+Invalidating a whole namespace is O(1): each namespace carries a generation
+number and entries from an older generation are treated as misses and removed
+lazily or by the background sweep.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from modules.logger_utils import bot_logger as logger
+
+# Registry of all named caches, used by get_all_cache_stats() for the dashboard
+_caches: Dict[str, "TTLCache"] = {}
+_caches_lock = threading.Lock()
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTL.
+
+    Args:
+        name: Name shown in cache statistics
+        max_size: Maximum number of entries before the least recently used one is evicted
+        default_ttl: TTL in seconds used when set() is called without one
+        sweep_interval: Seconds between background expiry sweeps (0 disables the sweeper)
+    """
+
+    def __init__(self, name: str, max_size: int = 10000, default_ttl: float = 60, sweep_interval: float = 30):
+        self.name = name
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        with _caches_lock:
+            _caches[name] = self
+
+    def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value, or default if missing, expired or invalidated."""
+        full_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(full_key, _MISSING)
+            if entry is _MISSING:
+                self._stats['misses'] += 1
+                return default
+
+            value, expires_at, generation = entry
+            if generation != self._generations.get(namespace, 0):
+                del self._entries[full_key]
+                self._stats['misses'] += 1
+                return default
+            if time.monotonic() >= expires_at:
+                del self._entries[full_key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+
+            self._entries.move_to_end(full_key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Stores a value, evicting least recently used entries when the cache is full."""
+        full_key = (namespace, key)
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[full_key] = (value, expires_at, self._generations.get(namespace, 0))
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        self._ensure_sweeper()
+
+    def invalidate(self, namespace: str, key: Hashable):
+        """Removes a single entry."""
+        with self._lock:
+            if self._entries.pop((namespace, key), _MISSING) is not _MISSING:
+                self._stats['invalidations'] += 1
+
+    def invalidate_namespace(self, namespace: str):
+        """Invalidates every entry in a namespace in O(1) by bumping its generation."""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._stats['invalidations'] += 1
+
+    def clear(self):
+        """Removes all entries (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def sweep(self) -> int:
+        """Removes expired and invalidated entries. Returns the number removed."""
+        now = time.monotonic()
+        with self._lock:
+            stale_keys = [
+                full_key for full_key, (_, expires_at, generation) in self._entries.items()
+                if now >= expires_at or generation != self._generations.get(full_key[0], 0)
+            ]
+            for full_key in stale_keys:
+                del self._entries[full_key]
+            self._stats['expirations'] += len(stale_keys)
+        return len(stale_keys)
+
+    def stats(self) -> dict:
+        """Returns size, hit/miss/eviction counters and hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['namespaces'] = len({namespace for namespace, _ in self._entries})
+        lookups = stats['hits'] + stats['misses']
+        stats['name'] = self.name
+        stats['max_size'] = self.max_size
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _ensure_sweeper(self):
+        """Starts the background expiry sweep thread on first write."""
+        if self._sweeper is not None or self.sweep_interval <= 0:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name=f"cache-sweep-{self.name}", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                removed = self.sweep()
+                if removed:
+                    logger.debug(f"[Cache] {self.name}: swept {removed} stale entries")
+            except Exception as e:
+                logger.error(f"[Cache] {self.name}: sweep failed: {e}")
+
+    def stop(self):
+        """Stops the background sweeper."""
+        self._stop_event.set()
+
+
+def get_all_cache_stats() -> Dict[str, dict]:
+    """Returns stats for every named cache in this process."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
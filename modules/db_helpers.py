@@ -8,6 +8,12 @@ import functools
 import traceback
 import re
 import threading
+import asyncio
+import inspect
+import atexit
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from modules.cache import TTLCache, get_all_cache_stats
 
 # Setup logging
 logger = logging.getLogger('Database')
@@ -23,57 +29,49 @@ if not logger.handlers:
 _EMOJI_FULL_FORMAT_PATTERN = re.compile(r'<a?:([\w]+):\d+>')
 
 db_pool = None
+DB_POOL_SIZE = 32
+
+# --- Performance: Run blocking DB work off the event loop ---
+# mysql.connector is synchronous, so every async helper in this module is routed
+# through a dedicated thread pool (see run_in_db_executor at the bottom of the file).
+# A few pool connections are kept free for modules that still call
+# db_pool.get_connection() directly from the event loop thread.
+DB_EXECUTOR_RESERVED_CONNECTIONS = 4
+_db_executor = None
+_db_executor_lock = threading.Lock()
+_db_thread_state = threading.local()
+
+# --- Performance: Write-behind buffer for user_monthly_stats increments ---
+# Per-message/per-minute Wrapped counters are coalesced in memory per
+# (user_id, stat_period, column, key) and written in bulk by flush_stat_buffer().
+STAT_BUFFER_FLUSH_INTERVAL = 15  # seconds between flushes (see bot.py flush task)
+STAT_BUFFER_ROWS_PER_STATEMENT = 500
+_stat_buffer = {}
+_stat_buffer_lock = threading.Lock()
+_stat_buffer_counters = {
+    'increments_buffered': 0,
+    'increments_coalesced': 0,
+    'entries_flushed': 0,
+    'flushes': 0,
+    'failed_flushes': 0,
+    'last_flush_at': None,
+}
 
 # --- Performance: In-memory cache for frequently accessed data ---
-# TTL-based cache to reduce database queries for hot data
-# Thread-safe implementation using a lock
-_cache = {}
-_cache_ttl = {}
-_cache_lock = threading.Lock()
+# Bounded LRU/TTL cache with namespaced keys (see modules/cache.py).
+# Namespaces used here: 'balance', 'profile', 'leaderboard'.
 DEFAULT_CACHE_TTL = 60  # 1 minute default TTL
 BALANCE_CACHE_TTL = 30  # 30 seconds for balance (changes frequently)
 PLAYER_CACHE_TTL = 120  # 2 minutes for player profiles
+LEADERBOARD_CACHE_TTL = 30  # 30 seconds for leaderboards
 STATS_CACHE_TTL = 300  # 5 minutes for statistics
+CACHE_MAX_SIZE = 20000
+db_cache = TTLCache("db_helpers", max_size=CACHE_MAX_SIZE, default_ttl=DEFAULT_CACHE_TTL)
 
 
-def _get_cached(key: str):
-    """Get a value from cache if it exists and is not expired. Thread-safe."""
-    with _cache_lock:
-        if key in _cache and key in _cache_ttl:
-            if time.time() < _cache_ttl[key]:
-                return _cache[key]
-            else:
-                # Expired, remove from cache
-                del _cache[key]
-                del _cache_ttl[key]
-        return None
-
-
-def _set_cached(key: str, value, ttl: int = DEFAULT_CACHE_TTL):
-    """Set a value in cache with TTL. Thread-safe."""
-    with _cache_lock:
-        _cache[key] = value
-        _cache_ttl[key] = time.time() + ttl
-
-
-def _invalidate_cache(key: str):
-    """Invalidate a specific cache key. Thread-safe."""
-    with _cache_lock:
-        if key in _cache:
-            del _cache[key]
-        if key in _cache_ttl:
-            del _cache_ttl[key]
-
-
-def _invalidate_cache_prefix(prefix: str):
-    """Invalidate all cache keys with a given prefix. Thread-safe."""
-    with _cache_lock:
-        keys_to_remove = [k for k in _cache.keys() if k.startswith(prefix)]
-        for key in keys_to_remove:
-            if key in _cache:
-                del _cache[key]
-            if key in _cache_ttl:
-                del _cache_ttl[key]
+def get_cache_stats():
+    """Returns hit/miss/eviction statistics for all caches in this process."""
+    return get_all_cache_stats()
 
 def convert_decimals(obj):
     """
@@ -100,6 +98,15 @@ def convert_decimals(obj):
     else:
         return obj
 
+def derived_rows(columns, row_count):
+    """
+    SQL for a derived table of row_count parameter rows, used to update many rows with
+    one UPDATE ... JOIN: SELECT %s AS a, %s AS b UNION ALL SELECT %s, %s ...
+    """
+    first = "SELECT " + ", ".join(f"%s AS {column}" for column in columns)
+    rest = "SELECT " + ", ".join(["%s"] * len(columns))
+    return " UNION ALL ".join([first] + [rest] * (row_count - 1))
+
 def db_operation(operation_name):
     """Decorator for database operations with automatic error handling and logging"""
     def decorator(func):
@@ -122,6 +129,63 @@ def db_operation(operation_name):
         return wrapper
     return decorator
 
+def _get_db_executor():
+    """Returns the shared DB thread pool, creating it on first use. Thread-safe."""
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is None:
+            max_workers = max(1, DB_POOL_SIZE - DB_EXECUTOR_RESERVED_CONNECTIONS)
+            _db_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sulfur-db")
+            logger.info(f"DB executor started with {max_workers} worker threads")
+        return _db_executor
+
+
+def _run_on_db_thread(func, args, kwargs):
+    """Drives an async DB helper to completion on the current worker thread."""
+    loop = getattr(_db_thread_state, 'loop', None)
+    if loop is None:
+        # Each worker keeps its own private loop so nested helper calls can be awaited
+        loop = asyncio.new_event_loop()
+        _db_thread_state.loop = loop
+    return loop.run_until_complete(func(*args, **kwargs))
+
+
+def run_in_db_executor(func):
+    """
+    Decorator that executes an async DB helper on the DB thread pool.
+
+    The wrapped coroutine keeps its signature, but the blocking mysql.connector
+    calls inside it no longer stall the caller's event loop. Concurrency is
+    bounded by the number of worker threads, which is tied to DB_POOL_SIZE so
+    workers never wait on an exhausted pool. Calls made from inside a worker
+    (one helper awaiting another) run inline on that worker.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        if loop is getattr(_db_thread_state, 'loop', None):
+            return await func(*args, **kwargs)
+        return await loop.run_in_executor(_get_db_executor(), _run_on_db_thread, func, args, kwargs)
+    return wrapper
+
+
+def runs_on_event_loop(func):
+    """Marks an async helper that never blocks, so it is not routed through the DB executor."""
+    func._runs_on_event_loop = True
+    return func
+
+
+def shutdown_db_executor(wait=True):
+    """Stops the DB thread pool. Called from the bot's graceful shutdown."""
+    global _db_executor
+    with _db_executor_lock:
+        executor = _db_executor
+        _db_executor = None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+        logger.info("DB executor shut down")
+
+
 def get_xp_for_level(level):
     """Calculates the total XP needed to reach the next level."""
     # A common formula that increases with each level: 5 * (lvl^2) + 50 * lvl + 100
@@ -181,10 +245,10 @@ def init_db_pool(host, user, password, database, max_retries=1, retry_delay=1):
             }
             db_pool = pooling.MySQLConnectionPool(
                 pool_name="sulfur_pool", 
-                pool_size=32,  # Increased to 32 to handle concurrent operations (quests, shop, games, autonomous behavior, stats)
+                pool_size=DB_POOL_SIZE,  # 32 to handle concurrent operations (quests, shop, games, autonomous behavior, stats)
                 **db_config
             )
-            logger.info("Database connection pool initialized successfully (size: 32)")
+            logger.info(f"Database connection pool initialized successfully (size: {DB_POOL_SIZE})")
             return True
             
         except mysql.connector.Error as err:
@@ -526,10 +590,23 @@ def initialize_database(max_retries=3, retry_delay=2):
                 input_tokens INT DEFAULT 0 NOT NULL,
                 output_tokens INT DEFAULT 0 NOT NULL,
                 total_cost DECIMAL(10, 6) DEFAULT 0.0 NOT NULL,
+                deduplicated_calls INT DEFAULT 0 NOT NULL,
+                cache_hits INT DEFAULT 0 NOT NULL,
+                cache_misses INT DEFAULT 0 NOT NULL,
+                tokens_saved INT DEFAULT 0 NOT NULL,
                 usage_date DATE NOT NULL,
                 UNIQUE KEY `daily_model_feature_usage` (`usage_date`, `model_name`, `feature`)
             )
         """)
+        # --- NEW: Count of AI calls served by single-flight coalescing ---
+        cursor.execute("SHOW COLUMNS FROM ai_model_usage LIKE 'deduplicated_calls'")
+        if not cursor.fetchone():
+            cursor.execute("ALTER TABLE ai_model_usage ADD COLUMN deduplicated_calls INT DEFAULT 0 NOT NULL")
+        # --- NEW: Response cache effectiveness counters ---
+        for cache_column in ('cache_hits', 'cache_misses', 'tokens_saved'):
+            cursor.execute(f"SHOW COLUMNS FROM ai_model_usage LIKE '{cache_column}'")
+            if not cursor.fetchone():
+                cursor.execute(f"ALTER TABLE ai_model_usage ADD COLUMN {cache_column} INT DEFAULT 0 NOT NULL")
         
         # --- NEW: Emoji Descriptions Table ---
         cursor.execute("""
@@ -1871,8 +1948,109 @@ async def get_all_managed_channels():
 
 # --- NEW: Chat History and Relationship Functions ---
 
+# --- Performance: Per-channel chat history windows ---
+# The last CHAT_HISTORY_WINDOW_SIZE messages of recently active channels are kept in
+# memory, already sanitized and in Gemini "parts" format. A window is hydrated from
+# chat_history on first use and appended to on every save (write-through), so a bot
+# mention in an active channel needs no DB read. Windows are rehydrated after
+# CHAT_HISTORY_WINDOW_TTL so deletes done by other processes (web dashboard) show up.
+CHAT_HISTORY_WINDOW_SIZE = 50
+CHAT_HISTORY_MAX_CHANNELS = 500
+CHAT_HISTORY_MAX_CHARS = 4_000_000  # Total characters held across all windows
+CHAT_HISTORY_WINDOW_TTL = 600
+
+_chat_windows = OrderedDict()  # channel_id -> {'messages': deque, 'chars': int, 'loaded_at': float}
+_chat_windows_lock = threading.Lock()
+_chat_windows_chars = 0
+_chat_window_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'stale_loads': 0}
+# channel_id -> number of saves/invalidations so far. A hydration remembers the version
+# before its DB read and only stores the window if nothing changed in the meantime.
+_chat_window_versions = {}
+
+
+def _history_entry(role, content):
+    """Builds the sanitized Gemini-format message stored in a window."""
+    return {"role": role, "parts": [{"text": _convert_emojis_to_shortcode(content)}]}
+
+
+def _evict_chat_windows_locked():
+    """Drops least recently used windows until both limits hold. Caller holds the lock."""
+    global _chat_windows_chars
+    while _chat_windows and (len(_chat_windows) > CHAT_HISTORY_MAX_CHANNELS or _chat_windows_chars > CHAT_HISTORY_MAX_CHARS):
+        _, window = _chat_windows.popitem(last=False)
+        _chat_windows_chars -= window['chars']
+        _chat_window_stats['evictions'] += 1
+
+
+def _store_chat_window(channel_id, messages, version):
+    """
+    Stores a freshly read window unless the channel was written to or invalidated since
+    version was taken; the next read then rehydrates instead of caching a stale window.
+    """
+    global _chat_windows_chars
+    window = {
+        'messages': deque(messages, maxlen=CHAT_HISTORY_WINDOW_SIZE),
+        'chars': 0,
+        'loaded_at': time.monotonic(),
+    }
+    window['chars'] = sum(len(msg['parts'][0]['text']) for msg in window['messages'])
+    with _chat_windows_lock:
+        if _chat_window_versions.get(channel_id, 0) != version:
+            _chat_window_stats['stale_loads'] += 1
+            return
+        previous = _chat_windows.pop(channel_id, None)
+        if previous:
+            _chat_windows_chars -= previous['chars']
+        _chat_windows[channel_id] = window
+        _chat_windows_chars += window['chars']
+        _evict_chat_windows_locked()
+
+
+def _append_to_chat_window(channel_id, role, content):
+    """Appends a saved message to the channel's window if it is loaded."""
+    global _chat_windows_chars
+    entry = _history_entry(role, content)
+    with _chat_windows_lock:
+        _chat_window_versions[channel_id] = _chat_window_versions.get(channel_id, 0) + 1
+        window = _chat_windows.get(channel_id)
+        if window is None:
+            return
+        messages = window['messages']
+        if len(messages) == messages.maxlen:
+            dropped = len(messages[0]['parts'][0]['text'])
+            window['chars'] -= dropped
+            _chat_windows_chars -= dropped
+        messages.append(entry)
+        added = len(entry['parts'][0]['text'])
+        window['chars'] += added
+        _chat_windows_chars += added
+        _chat_windows.move_to_end(channel_id)
+        _evict_chat_windows_locked()
+
+
+def invalidate_chat_window(channel_id):
+    """Forgets the in-memory history of a channel; the next read rehydrates it."""
+    global _chat_windows_chars
+    with _chat_windows_lock:
+        _chat_window_versions[channel_id] = _chat_window_versions.get(channel_id, 0) + 1
+        window = _chat_windows.pop(channel_id, None)
+        if window:
+            _chat_windows_chars -= window['chars']
+
+
+def get_chat_window_stats():
+    """Returns hit/miss/eviction counters and the size of the chat history windows."""
+    with _chat_windows_lock:
+        stats = dict(_chat_window_stats)
+        stats['channels'] = len(_chat_windows)
+        stats['chars'] = _chat_windows_chars
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    return stats
+
+
 async def save_message_to_history(channel_id, role, content):
-    """Saves a single message to the chat history table."""
+    """Saves a single message to the chat history table and the channel's history window."""
     if not db_pool:
         logger.warning("Database pool not available, cannot save message to history")
         return
@@ -1885,6 +2063,7 @@ async def save_message_to_history(channel_id, role, content):
         query = "INSERT INTO chat_history (channel_id, role, content) VALUES (%s, %s, %s)"
         cursor.execute(query, (channel_id, role, content))
         cnx.commit()
+        _append_to_chat_window(channel_id, role, content)
     except mysql.connector.Error as err:
         print(f"Error saving chat history: {err}")
     finally:
@@ -1910,6 +2089,7 @@ async def save_bulk_history(channel_id, messages):
         query = "INSERT INTO chat_history (channel_id, role, content) VALUES (%s, %s, %s)"
         cursor.executemany(query, data_to_insert)
         cnx.commit()
+        invalidate_chat_window(channel_id)
         print(f"Successfully saved {cursor.rowcount} messages to history for channel {channel_id}.")
     except mysql.connector.Error as err:
         print(f"Error in save_bulk_history: {err}")
@@ -1932,6 +2112,7 @@ async def clear_channel_history(channel_id):
         cursor.execute(query, (channel_id,))
         deleted_rows = cursor.rowcount
         cnx.commit()
+        invalidate_chat_window(channel_id)
         return deleted_rows, None
     except mysql.connector.Error as err:
         print(f"Error clearing channel history: {err}")
@@ -1968,42 +2149,62 @@ def _convert_emojis_to_shortcode(text):
     
     return text
 
+@runs_on_event_loop
 async def get_chat_history(channel_id, limit):
     """
-    Retrieves the last N messages for a channel from the database.
+    Retrieves the last N messages for a channel, from its in-memory window when loaded.
     Converts full-format Discord emojis to shortcode to prevent AI confusion.
+    The returned message dicts are shared with the window and must not be modified.
     """
+    version = None
+    if limit <= CHAT_HISTORY_WINDOW_SIZE:
+        with _chat_windows_lock:
+            window = _chat_windows.get(channel_id)
+            if window and time.monotonic() - window['loaded_at'] < CHAT_HISTORY_WINDOW_TTL:
+                _chat_windows.move_to_end(channel_id)
+                _chat_window_stats['hits'] += 1
+                messages = window['messages']
+                return list(messages)[-limit:] if limit > 0 else []
+            _chat_window_stats['misses'] += 1
+            version = _chat_window_versions.get(channel_id, 0)
+
+    history = await _load_chat_history(channel_id, max(limit, CHAT_HISTORY_WINDOW_SIZE))
+    if history is None:
+        return []
+    if version is not None:
+        _store_chat_window(channel_id, history, version)
+    return history[-limit:] if limit > 0 else []
+
+
+@run_in_db_executor
+async def _load_chat_history(channel_id, limit):
+    """Reads the last N messages of a channel from chat_history. Returns None on errors."""
     if not db_pool:
         logger.warning("Database pool not available, cannot get chat history")
-        return []
+        return None
     cnx = db_pool.get_connection()
     if not cnx:
-        return []
+        return None
 
     cursor = cnx.cursor(dictionary=True)
-    history = []
     try:
         query = """
             SELECT role, content AS text FROM (
-                SELECT role, content, created_at
+                SELECT id, role, content
                 FROM chat_history
                 WHERE channel_id = %s
-                ORDER BY created_at DESC
+                ORDER BY id DESC
                 LIMIT %s
             ) sub
-            ORDER BY created_at ASC;
+            ORDER BY id ASC;
         """
         cursor.execute(query, (channel_id, limit))
-        results = cursor.fetchall()
         # Format for Gemini API: {"role": "user", "parts": [{"text": "Hello"}]}
         # Convert full emoji format to shortcode to prevent AI from learning emoji IDs
-        for row in results:
-            sanitized_text = _convert_emojis_to_shortcode(row['text'])
-            history.append({"role": row['role'], "parts": [{"text": sanitized_text}]})
-        return history
+        return [_history_entry(row['role'], row['text']) for row in cursor.fetchall()]
     except mysql.connector.Error as err:
         print(f"Error getting chat history: {err}")
-        return []
+        return None
     finally:
         cursor.close()
         cnx.close()
@@ -2216,11 +2417,20 @@ async def update_user_presence(user_id, display_name, status, activity_name):
         cnx.close()
 
 
+GUILD_SYNC_CHUNK_SIZE = 1000
+
+
 async def sync_guild_members(members_data: list):
     """
     Bulk sync Discord guild members to the players table.
     Creates entries for new members, updates display names and avatar URLs for existing ones.
 
+    Members are processed in chunks: one SELECT per chunk finds the stored
+    display_name/avatar_url, and only new or changed members are written with a
+    single executemany upsert. That SELECT also tells new members (no stored row)
+    from updated ones. Each chunk is committed on its own; a failing chunk is
+    rolled back and logged, and the sync continues with the next one.
+
     Args:
         members_data: List of tuples (discord_id, display_name, avatar_url)
 
@@ -2238,39 +2448,55 @@ async def sync_guild_members(members_data: list):
     cursor = cnx.cursor()
     new_count = 0
     updated_count = 0
+    unchanged_count = 0
+
+    # Last entry wins if a member is listed twice (e.g. shared across guilds)
+    members_by_id = {discord_id: (discord_id, display_name, avatar_url) for discord_id, display_name, avatar_url in members_data}
+    members = list(members_by_id.values())
 
+    failed_count = 0
     try:
-        # Use batch insert with ON DUPLICATE KEY UPDATE for efficiency
-        for discord_id, display_name, avatar_url in members_data:
+        for start in range(0, len(members), GUILD_SYNC_CHUNK_SIZE):
+            chunk = members[start:start + GUILD_SYNC_CHUNK_SIZE]
             try:
-                # Check if user exists first to count new vs updated
-                cursor.execute("SELECT discord_id FROM players WHERE discord_id = %s", (discord_id,))
-                existing = cursor.fetchone()
-
-                # Insert or update the player with avatar URL
-                cursor.execute("""
-                    INSERT INTO players (discord_id, display_name, avatar_url, last_seen)
-                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                    ON DUPLICATE KEY UPDATE
-                        display_name = VALUES(display_name),
-                        avatar_url = VALUES(avatar_url)
-                """, (discord_id, display_name, avatar_url))
-
-                if existing:
-                    updated_count += 1
-                else:
-                    new_count += 1
-
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"SELECT discord_id, display_name, avatar_url FROM players WHERE discord_id IN ({placeholders})",
+                    tuple(discord_id for discord_id, _, _ in chunk)
+                )
+                stored = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+                rows_to_write = [
+                    member for member in chunk
+                    if stored.get(member[0]) != (member[1], member[2])
+                ]
+                if rows_to_write:
+                    cursor.executemany("""
+                        INSERT INTO players (discord_id, display_name, avatar_url, last_seen)
+                        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                        ON DUPLICATE KEY UPDATE
+                            display_name = VALUES(display_name),
+                            avatar_url = VALUES(avatar_url)
+                    """, rows_to_write)
+                    cnx.commit()
             except Exception as e:
-                logger.debug(f"Error syncing member {discord_id}: {e}")
+                failed_count += len(chunk)
+                logger.error(f"Error syncing guild member chunk at offset {start} ({len(chunk)} members): {e}")
+                cnx.rollback()
                 continue
 
-        cnx.commit()
-        logger.info(f"Guild member sync complete: {new_count} new, {updated_count} updated")
+            chunk_new = sum(1 for member in rows_to_write if member[0] not in stored)
+            new_count += chunk_new
+            updated_count += len(rows_to_write) - chunk_new
+            unchanged_count += len(chunk) - len(rows_to_write)
 
+        logger.info(
+            f"Guild member sync complete: {new_count} new, {updated_count} updated, "
+            f"{unchanged_count} unchanged, {failed_count} failed"
+        )
     except Exception as e:
+        # Only reachable if the connection itself broke (e.g. the rollback failed)
         logger.error(f"Error during guild member sync: {e}")
-        cnx.rollback()
     finally:
         cursor.close()
         cnx.close()
@@ -2280,7 +2506,10 @@ async def sync_guild_members(members_data: list):
 
 @db_operation("add_balance")
 async def add_balance(user_id, display_name, amount_to_add, config, stat_period=None):
-    """Adds an amount to a user's balance, creating the user if they don't exist. Returns the new balance."""
+    """
+    Adds an amount to a user's balance, creating the user if they don't exist. Returns the new balance.
+    Does not write transaction_history; use modules.ledger when the change must be logged.
+    """
     if not db_pool:
         logger.warning("Database pool not available, skipping balance addition")
         return 0
@@ -2293,40 +2522,26 @@ async def add_balance(user_id, display_name, amount_to_add, config, stat_period=
     try:
         starting_balance = config['modules']['economy']['starting_balance']
         
-        # Get current balance first (if exists)
-        cursor.execute("SELECT balance FROM players WHERE discord_id = %s", (user_id,))
-        row = cursor.fetchone()
-        current_balance = int(row['balance']) if row and row.get('balance') is not None else None
-        
-        # Calculate new balance
-        if current_balance is None:
-            # New player - will be created with starting_balance + amount_to_add
-            new_balance = starting_balance + amount_to_add
-        else:
-            # Existing player - add to current balance
-            new_balance = current_balance + amount_to_add
-        
-        # Update or insert player
+        # Single-statement arithmetic: the upsert applies the delta under the row lock,
+        # and the read in the same transaction sees exactly this update's result
         query = """
             INSERT INTO players (discord_id, display_name, balance) VALUES (%s, %s, %s)
             ON DUPLICATE KEY UPDATE
                 balance = balance + %s, display_name = VALUES(display_name);
         """
-        cursor.execute(query, (user_id, display_name, new_balance if current_balance is None else starting_balance, amount_to_add))
+        cursor.execute(query, (user_id, display_name, starting_balance + amount_to_add, amount_to_add))
+        cursor.execute("SELECT balance FROM players WHERE discord_id = %s", (user_id,))
+        row = cursor.fetchone()
         cnx.commit()
+        new_balance = int(row['balance']) if row and row.get('balance') is not None else 0
 
-        # --- NEW: Log money earned for Wrapped ---
+        # --- NEW: Log money earned for Wrapped (buffered, see flush_stat_buffer) ---
         if stat_period:
-            stat_query = """
-                INSERT INTO user_monthly_stats (user_id, stat_period, money_earned)
-                VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE money_earned = money_earned + VALUES(money_earned);
-            """
-            cursor.execute(stat_query, (user_id, stat_period, amount_to_add))
-            cnx.commit()
+            _buffer_stat_increment(user_id, stat_period, 'money_earned', amount=amount_to_add)
         
-        # Invalidate balance cache since it changed
-        _invalidate_cache(f"balance:{user_id}")
+        # Invalidate cached balance and profile since they changed
+        db_cache.invalidate('balance', user_id)
+        db_cache.invalidate('profile', user_id)
             
         logger.debug(f"Added {amount_to_add} balance to user {user_id}, new balance: {new_balance}")
         return new_balance
@@ -2338,8 +2553,7 @@ async def add_balance(user_id, display_name, amount_to_add, config, stat_period=
 async def get_balance(user_id):
     """Returns current balance for a user, creating the player if necessary. Uses cache for performance."""
     # Check cache first
-    cache_key = f"balance:{user_id}"
-    cached = _get_cached(cache_key)
+    cached = db_cache.get('balance', user_id)
     if cached is not None:
         return cached
     
@@ -2354,7 +2568,7 @@ async def get_balance(user_id):
         row = cursor.fetchone()
         balance = int(row["balance"]) if row and row.get("balance") is not None else 0
         # Cache the result
-        _set_cached(cache_key, balance, BALANCE_CACHE_TTL)
+        db_cache.set('balance', user_id, balance, BALANCE_CACHE_TTL)
         return balance
     finally:
         cursor.close()
@@ -2470,100 +2684,159 @@ async def log_game_session(user_id, stat_period, game_name, duration_minutes):
 
 # --- NEW: "Wrapped" Feature DB Functions ---
 
-async def log_message_stat(user_id, channel_id, emoji_list, stat_period):
-    """Logs message count, channel usage, and emoji usage for the Wrapped feature."""
-    # This function is now optimized to perform all logging in a single query.
-    if not db_pool:
-        logger.warning("Database pool not available, cannot log message stat")
+def _buffer_stat_increment(user_id, stat_period, column_name, key=None, amount=1):
+    """Adds an increment to the write-behind buffer, coalescing with pending ones. Thread-safe."""
+    if not column_name.isidentifier():
+        logger.warning(f"Ignoring stat increment for invalid column name: {column_name!r}")
         return
-    cnx = db_pool.get_connection()
-    if not cnx: return
+    buffer_key = (user_id, stat_period, column_name, str(key) if key is not None else None)
+    with _stat_buffer_lock:
+        if buffer_key in _stat_buffer:
+            _stat_buffer_counters['increments_coalesced'] += 1
+        _stat_buffer[buffer_key] = _stat_buffer.get(buffer_key, 0) + amount
+        _stat_buffer_counters['increments_buffered'] += 1
 
-    cursor = cnx.cursor()
-    try:
-        # Build the dynamic part of the query for emoji usage
-        emoji_updates = []
-        params = []
-        for emoji_name in emoji_list:
-            # MariaDB requires quoting numeric-like keys in JSON paths.
-            # We use CONCAT to build the path safely with parameter binding.
-            emoji_updates.append("""
-                emoji_usage = JSON_SET(
-                    COALESCE(emoji_usage, '{}'),
-                    CONCAT('$.', %s),
-                    COALESCE(JSON_UNQUOTE(JSON_EXTRACT(emoji_usage, CONCAT('$.', %s))), 0) + 1
-                )
-            """)
-            params.extend([emoji_name, emoji_name])
 
-        emoji_sql_part = ", " + ", ".join(emoji_updates) if emoji_updates else ""
+def _requeue_stat_batch(batch, failed=False):
+    """Merges a batch that could not be written back into the buffer. Thread-safe."""
+    with _stat_buffer_lock:
+        if failed:
+            _stat_buffer_counters['failed_flushes'] += 1
+        for buffer_key, amount in batch.items():
+            _stat_buffer[buffer_key] = _stat_buffer.get(buffer_key, 0) + amount
 
-        query = f"""
-            INSERT INTO user_monthly_stats (user_id, stat_period, message_count, channel_usage, emoji_usage)
-            VALUES (%s, %s, 1, JSON_OBJECT(%s, 1), %s)
-            ON DUPLICATE KEY UPDATE
-                message_count = message_count + 1,
-                channel_usage = JSON_SET(COALESCE(channel_usage, '{{}}'), CONCAT('$.', %s), COALESCE(JSON_UNQUOTE(JSON_EXTRACT(channel_usage, CONCAT('$.', %s))), 0) + 1)
-                {emoji_sql_part};
-        """
-        initial_emoji_json = json.dumps({emoji: 1 for emoji in emoji_list})
-        final_params = (user_id, stat_period, str(channel_id), initial_emoji_json, str(channel_id), str(channel_id)) + tuple(params)
-        cursor.execute(query, final_params)
-        cnx.commit()
-    except mysql.connector.Error as err:
-        print(f"Error in log_message_stat: {err}")
-    finally:
-        cursor.close()
-        cnx.close()
 
-async def log_vc_minutes(user_id, minutes_to_add, stat_period):
-    """Logs minutes spent in a voice channel."""
+def _flush_stat_buffer_sync():
+    """
+    Writes all pending stat increments to user_monthly_stats.
+
+    The buffer is swapped out under the lock, so increments arriving during the
+    flush go into a fresh buffer. Increments are grouped per (column, key) and
+    each group is written with one multi-row INSERT ... ON DUPLICATE KEY UPDATE,
+    all inside a single transaction. If the connection or commit fails, the whole
+    batch is merged back into the buffer and retried on the next flush.
+
+    Returns:
+        Number of coalesced entries written
+    """
+    global _stat_buffer
+    with _stat_buffer_lock:
+        batch = _stat_buffer
+        _stat_buffer = {}
+    if not batch:
+        return 0
+
     if not db_pool:
-        logger.warning("Database pool not available, cannot log VC minutes")
-        return
-    cnx = db_pool.get_connection()
-    if not cnx: return
+        _requeue_stat_batch(batch)
+        return 0
+
+    groups = {}
+    for (user_id, stat_period, column_name, key), amount in batch.items():
+        if amount:
+            groups.setdefault((column_name, key), []).append((user_id, stat_period, amount))
+
+    cnx = get_db_connection()
+    if not cnx:
+        _requeue_stat_batch(batch, failed=True)
+        return 0
+
     cursor = cnx.cursor()
     try:
-        query = """
-            INSERT INTO user_monthly_stats (user_id, stat_period, minutes_in_vc) VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE minutes_in_vc = minutes_in_vc + VALUES(minutes_in_vc);
-        """
-        cursor.execute(query, (user_id, stat_period, minutes_to_add))
+        for (column_name, key), rows in groups.items():
+            for start in range(0, len(rows), STAT_BUFFER_ROWS_PER_STATEMENT):
+                chunk = rows[start:start + STAT_BUFFER_ROWS_PER_STATEMENT]
+                params = []
+                if key is None:
+                    placeholders = ", ".join(["(%s, %s, %s)"] * len(chunk))
+                    for user_id, stat_period, amount in chunk:
+                        params.extend((user_id, stat_period, amount))
+                    query = f"""
+                        INSERT INTO user_monthly_stats (user_id, stat_period, {column_name}) VALUES {placeholders}
+                        ON DUPLICATE KEY UPDATE {column_name} = {column_name} + VALUES({column_name});
+                    """
+                else:
+                    # The key is the same for every row, so the per-row delta is read back from VALUES()
+                    placeholders = ", ".join(["(%s, %s, JSON_OBJECT(%s, %s))"] * len(chunk))
+                    for user_id, stat_period, amount in chunk:
+                        params.extend((user_id, stat_period, key, amount))
+                    params.extend((key, key, key))
+                    query = f"""
+                        INSERT INTO user_monthly_stats (user_id, stat_period, {column_name}) VALUES {placeholders}
+                        ON DUPLICATE KEY UPDATE {column_name} = JSON_SET(
+                            COALESCE({column_name}, '{{}}'),
+                            CONCAT('$.', %s),
+                            COALESCE(JSON_UNQUOTE(JSON_EXTRACT({column_name}, CONCAT('$.', %s))), 0)
+                                + JSON_EXTRACT(VALUES({column_name}), CONCAT('$.', %s))
+                        );
+                    """
+                try:
+                    cursor.execute(query, tuple(params))
+                except (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError):
+                    raise
+                except mysql.connector.Error as err:
+                    # Bad data (e.g. a key that is not a valid JSON path) only drops its own group,
+                    # matching the old per-call behaviour instead of blocking the buffer forever
+                    logger.error(f"Dropping {len(chunk)} buffered increments for {column_name}/{key}: {err}")
         cnx.commit()
-    except mysql.connector.Error as err:
-        print(f"Error in log_vc_minutes: {err}")
+        with _stat_buffer_lock:
+            _stat_buffer_counters['entries_flushed'] += len(batch)
+            _stat_buffer_counters['flushes'] += 1
+            _stat_buffer_counters['last_flush_at'] = time.time()
+        logger.debug(f"Flushed {len(batch)} buffered stat increments in {len(groups)} statement group(s)")
+        return len(batch)
+    except Exception as e:
+        logger.error(f"Stat buffer flush failed, re-queueing {len(batch)} entries: {e}")
+        try:
+            cnx.rollback()
+        except Exception:
+            pass
+        _requeue_stat_batch(batch, failed=True)
+        return 0
     finally:
         cursor.close()
         cnx.close()
 
+
+async def flush_stat_buffer():
+    """Flushes buffered user_monthly_stats increments. Returns the number of entries written."""
+    return _flush_stat_buffer_sync()
+
+
+def get_stat_buffer_stats():
+    """Returns counters for the stat write-behind buffer (pending entries, flushes, failures)."""
+    with _stat_buffer_lock:
+        pending_entries = len(_stat_buffer)
+        pending_amount = sum(_stat_buffer.values())
+        stats = dict(_stat_buffer_counters)
+    stats['pending_entries'] = pending_entries
+    stats['pending_amount'] = pending_amount
+    return stats
+
+
+# Last-chance flush when the interpreter exits without going through graceful_shutdown
+atexit.register(_flush_stat_buffer_sync)
+
+
+@runs_on_event_loop
+async def log_message_stat(user_id, channel_id, emoji_list, stat_period):
+    """Logs message count, channel usage, and emoji usage for the Wrapped feature.
+
+    Increments are buffered and written by flush_stat_buffer().
+    """
+    _buffer_stat_increment(user_id, stat_period, 'message_count')
+    _buffer_stat_increment(user_id, stat_period, 'channel_usage', key=str(channel_id))
+    for emoji_name in emoji_list:
+        _buffer_stat_increment(user_id, stat_period, 'emoji_usage', key=emoji_name)
+
+@runs_on_event_loop
+async def log_vc_minutes(user_id, minutes_to_add, stat_period):
+    """Logs minutes spent in a voice channel. Buffered, see flush_stat_buffer()."""
+    _buffer_stat_increment(user_id, stat_period, 'minutes_in_vc', amount=minutes_to_add)
+
+@runs_on_event_loop
 async def log_stat_increment(user_id, stat_period, column_name, key=None, amount=1):
-    """A generic function to increment a stat or a key within a JSON column."""
-    if not db_pool:
-        logger.warning("Database pool not available, cannot log stat increment")
-        return
-    cnx = db_pool.get_connection()
-    if not cnx: return
-    cursor = cnx.cursor()
-    try:
-        if key: # It's a JSON column
-            # Safely construct the JSON path using CONCAT
-            # --- FIX: Correctly use the 'amount' parameter for both INSERT and UPDATE ---
-            query = f"""
-                INSERT INTO user_monthly_stats (user_id, stat_period, {column_name}) VALUES (%s, %s, JSON_OBJECT(%s, %s))
-                ON DUPLICATE KEY UPDATE {column_name} = JSON_SET(COALESCE({column_name}, '{{}}'), CONCAT('$.', %s), COALESCE(JSON_UNQUOTE(JSON_EXTRACT({column_name}, CONCAT('$.', %s))), 0) + %s);
-            """
-            params = (user_id, stat_period, key, amount, key, key, amount)
-        else: # It's a simple INT column
-            query = f"INSERT INTO user_monthly_stats (user_id, stat_period, {column_name}) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE {column_name} = {column_name} + %s;"
-            params = (user_id, stat_period, amount, amount)
-        cursor.execute(query, params)
-        cnx.commit()
-    except mysql.connector.Error as err:
-        print(f"Error in log_stat_increment for column '{column_name}': {err}")
-    finally:
-        cursor.close()
-        cnx.close()
+    """A generic function to increment a stat or a key within a JSON column. Buffered, see flush_stat_buffer()."""
+    _buffer_stat_increment(user_id, stat_period, column_name, key=key, amount=amount)
 
 async def get_wrapped_stats_for_period(stat_period):
     """Fetches all user stats for a given Wrapped period."""
@@ -2943,12 +3216,90 @@ async def add_xp(user_id, display_name, xp_to_add):
                 )
 
         cnx.commit()
+        db_cache.invalidate('profile', user_id)
         logger.debug(f"Added {xp_to_add} XP to user {user_id}. New level: {new_level}" if new_level else f"Added {xp_to_add} XP to user {user_id}")
         return new_level
     finally:
         cursor.close()
         cnx.close()
 
+BULK_XP_CHUNK_SIZE = 500
+
+
+@db_operation("add_xp_bulk")
+async def add_xp_bulk(users, xp_to_add):
+    """
+    Adds the same amount of XP to many users at once and handles level ups.
+    Set-based counterpart of add_xp() for periodic ticks such as voice XP.
+
+    Args:
+        users: List of tuples (user_id, display_name)
+        xp_to_add: XP granted to every user
+
+    Returns:
+        Dict mapping user_id -> new level for users who leveled up
+    """
+    if not users:
+        return {}
+    if not db_pool:
+        logger.warning("Database pool not available, skipping bulk XP addition")
+        return {}
+
+    cnx = db_pool.get_connection()
+    if not cnx:
+        return {}
+
+    cursor = cnx.cursor(dictionary=True)
+    level_ups = {}
+    # Same curve as get_xp_for_level(), evaluated per row by the database
+    xp_needed_sql = "(5 * level * level + 50 * level + 100)"
+    try:
+        for start in range(0, len(users), BULK_XP_CHUNK_SIZE):
+            chunk = users[start:start + BULK_XP_CHUNK_SIZE]
+            user_ids = [user_id for user_id, _ in chunk]
+            id_placeholders = ", ".join(["%s"] * len(user_ids))
+
+            # Add XP and create missing players in one statement
+            values_sql = ", ".join(["(%s, %s, %s)"] * len(chunk))
+            params = []
+            for user_id, display_name in chunk:
+                params.extend((user_id, display_name, xp_to_add))
+            cursor.execute(f"""
+                INSERT INTO players (discord_id, display_name, xp)
+                VALUES {values_sql}
+                ON DUPLICATE KEY UPDATE display_name = VALUES(display_name), xp = xp + VALUES(xp);
+            """, tuple(params))
+
+            # Find everyone who crossed their threshold, then level them up together
+            cursor.execute(f"""
+                SELECT discord_id, level FROM players
+                WHERE discord_id IN ({id_placeholders}) AND xp >= {xp_needed_sql}
+                FOR UPDATE
+            """, tuple(user_ids))
+            leveled = cursor.fetchall()
+            if leveled:
+                leveled_ids = [row['discord_id'] for row in leveled]
+                # xp is assigned before level so it uses the old level's threshold
+                cursor.execute(f"""
+                    UPDATE players
+                    SET xp = xp - {xp_needed_sql}, level = level + 1
+                    WHERE discord_id IN ({", ".join(["%s"] * len(leveled_ids))})
+                """, tuple(leveled_ids))
+                for row in leveled:
+                    level_ups[row['discord_id']] = row['level'] + 1
+
+        cnx.commit()
+        for user_id, _ in users:
+            db_cache.invalidate('profile', user_id)
+        logger.debug(f"Added {xp_to_add} XP to {len(users)} users, {len(level_ups)} level up(s)")
+        return level_ups
+    except Exception:
+        cnx.rollback()
+        raise
+    finally:
+        cursor.close()
+        cnx.close()
+
 @db_operation("get_player_rank")
 async def get_player_rank(user_id):
     """Fetches a player's level, xp, and global rank."""
@@ -2980,6 +3331,10 @@ async def get_player_rank(user_id):
 @db_operation("get_level_leaderboard")
 async def get_level_leaderboard():
     """Fetches the top 10 players by level and XP."""
+    cached = db_cache.get('leaderboard', 'level')
+    if cached is not None:
+        return cached, None
+
     if not db_pool:
         logger.warning("Database pool not available")
         return []
@@ -2993,6 +3348,7 @@ async def get_level_leaderboard():
         query = "SELECT display_name, level, xp FROM players ORDER BY level DESC, xp DESC LIMIT 10"
         cursor.execute(query)
         results = cursor.fetchall()
+        db_cache.set('leaderboard', 'level', results, LEADERBOARD_CACHE_TTL)
         return results, None
     except mysql.connector.Error as err:
         print(f"Error fetching level leaderboard: {err}")
@@ -3004,8 +3360,7 @@ async def get_level_leaderboard():
 async def get_player_profile(user_id):
     """Fetches all relevant stats for a user's profile. Uses cache for performance."""
     # Check cache first
-    cache_key = f"profile:{user_id}"
-    cached = _get_cached(cache_key)
+    cached = db_cache.get('profile', user_id)
     if cached is not None:
         return cached, None
     
@@ -3029,7 +3384,7 @@ async def get_player_profile(user_id):
         result = cursor.fetchone()
         # Cache the result
         if result:
-            _set_cached(cache_key, result, PLAYER_CACHE_TTL)
+            db_cache.set('profile', user_id, result, PLAYER_CACHE_TTL)
         return result, None
     except mysql.connector.Error as err:
         print(f"Error fetching player profile: {err}")
@@ -3040,6 +3395,10 @@ async def get_player_profile(user_id):
 
 async def get_leaderboard():
     """Fetches the top 10 players by wins."""
+    cached = db_cache.get('leaderboard', 'wins')
+    if cached is not None:
+        return cached, None
+
     if not db_pool:
         logger.warning("Database pool not available, cannot get leaderboard")
         return None, "Database pool not available."
@@ -3052,6 +3411,7 @@ async def get_leaderboard():
         query = "SELECT display_name, wins, losses FROM players ORDER BY wins DESC LIMIT 10"
         cursor.execute(query)
         results = cursor.fetchall()
+        db_cache.set('leaderboard', 'wins', results, LEADERBOARD_CACHE_TTL)
         return results, None
     except mysql.connector.Error as err:
         print(f"Error fetching leaderboard: {err}")
@@ -3062,6 +3422,10 @@ async def get_leaderboard():
 
 async def get_money_leaderboard():
     """Fetches the top 10 players by balance."""
+    cached = db_cache.get('leaderboard', 'money')
+    if cached is not None:
+        return cached, None
+
     if not db_pool:
         logger.warning("Database pool not available, cannot get money leaderboard")
         return None, "Database pool not available."
@@ -3074,6 +3438,7 @@ async def get_money_leaderboard():
         query = "SELECT display_name, balance FROM players ORDER BY balance DESC LIMIT 10"
         cursor.execute(query)
         results = cursor.fetchall()
+        db_cache.set('leaderboard', 'money', results, LEADERBOARD_CACHE_TTL)
         return results, None
     except mysql.connector.Error as err:
         print(f"Error fetching money leaderboard: {err}")
@@ -3084,6 +3449,10 @@ async def get_money_leaderboard():
 
 async def get_games_leaderboard():
     """Fetches the top 10 players by total games played (wins + losses)."""
+    cached = db_cache.get('leaderboard', 'games')
+    if cached is not None:
+        return cached, None
+
     if not db_pool:
         logger.warning("Database pool not available, cannot get games leaderboard")
         return None, "Database pool not available."
@@ -3102,6 +3471,7 @@ async def get_games_leaderboard():
         """
         cursor.execute(query)
         results = cursor.fetchall()
+        db_cache.set('leaderboard', 'games', results, LEADERBOARD_CACHE_TTL)
         return results, None
     except mysql.connector.Error as err:
         print(f"Error fetching games leaderboard: {err}")
@@ -3730,24 +4100,36 @@ async def get_channel_conversation_context(channel_id):
 # --- AI Model Usage Tracking ---
 
 @db_operation("Track AI Model Usage")
-async def track_ai_model_usage(model_name, feature, input_tokens, output_tokens, cost=0.0):
-    """Tracks AI model usage for analytics."""
+async def track_ai_model_usage(model_name, feature, input_tokens, output_tokens, cost=0.0, deduplicated_calls=0,
+                               cache_hits=0, cache_misses=0, tokens_saved=0):
+    """
+    Tracks AI model usage for analytics.
+    Rows recorded with deduplicated_calls (coalesced in-flight request) or the response
+    cache counters (cache_hits, cache_misses, tokens_saved) don't count as a provider call.
+    """
     if not db_pool:
         return False
     
     cnx = db_pool.get_connection()
     cursor = cnx.cursor()
     try:
+        call_count = 0 if (deduplicated_calls or cache_hits or cache_misses) else 1
         query = """
-            INSERT INTO ai_model_usage (model_name, feature, call_count, input_tokens, output_tokens, total_cost, usage_date)
-            VALUES (%s, %s, 1, %s, %s, %s, CURDATE())
+            INSERT INTO ai_model_usage (model_name, feature, call_count, input_tokens, output_tokens, total_cost,
+                                        deduplicated_calls, cache_hits, cache_misses, tokens_saved, usage_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURDATE())
             ON DUPLICATE KEY UPDATE
-                call_count = call_count + 1,
+                call_count = call_count + VALUES(call_count),
                 input_tokens = input_tokens + VALUES(input_tokens),
                 output_tokens = output_tokens + VALUES(output_tokens),
-                total_cost = total_cost + VALUES(total_cost)
+                total_cost = total_cost + VALUES(total_cost),
+                deduplicated_calls = deduplicated_calls + VALUES(deduplicated_calls),
+                cache_hits = cache_hits + VALUES(cache_hits),
+                cache_misses = cache_misses + VALUES(cache_misses),
+                tokens_saved = tokens_saved + VALUES(tokens_saved)
         """
-        cursor.execute(query, (model_name, feature, input_tokens, output_tokens, cost))
+        cursor.execute(query, (model_name, feature, call_count, input_tokens, output_tokens, cost,
+                               deduplicated_calls, cache_hits, cache_misses, tokens_saved))
         cnx.commit()
         return True
     except mysql.connector.Error as err:
@@ -3776,6 +4158,10 @@ async def get_ai_usage_stats(days=30):
                    SUM(input_tokens) as total_input_tokens,
                    SUM(output_tokens) as total_output_tokens,
                    SUM(total_cost) as total_cost,
+                   SUM(deduplicated_calls) as total_deduplicated_calls,
+                   SUM(cache_hits) as total_cache_hits,
+                   SUM(cache_misses) as total_cache_misses,
+                   SUM(tokens_saved) as total_tokens_saved,
                    MIN(usage_date) as first_use,
                    MAX(usage_date) as last_use
             FROM ai_model_usage
@@ -3784,9 +4170,11 @@ async def get_ai_usage_stats(days=30):
             ORDER BY total_calls DESC
         """
         cursor.execute(query, (days,))
-        rows = cursor.fetchall()
-        # Convert Decimal values for JSON serialization
-        return [convert_decimals(row) for row in rows]
+        rows = [convert_decimals(row) for row in cursor.fetchall()]
+        for row in rows:
+            cache_lookups = (row.get('total_cache_hits') or 0) + (row.get('total_cache_misses') or 0)
+            row['cache_hit_rate'] = round((row.get('total_cache_hits') or 0) / cache_lookups, 4) if cache_lookups else 0.0
+        return rows
     except mysql.connector.Error as err:
         logger.error(f"Error in get_ai_usage_stats: {err}")
         return []
@@ -4424,3 +4812,12 @@ async def get_user_language(user_id):
         cursor.close()
         cnx.close()
 
+
+# --- Performance: Route every public async helper above through the DB executor ---
+# Keep this block at the end of the module so newly added helpers are covered too.
+for _name, _func in list(globals().items()):
+    if (not _name.startswith('_') and inspect.iscoroutinefunction(_func)
+            and getattr(_func, '__module__', None) == __name__
+            and not getattr(_func, '_runs_on_event_loop', False)):
+        globals()[_name] = run_in_db_executor(_func)
+del _name, _func
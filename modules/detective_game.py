@@ -12,6 +12,7 @@ import re
 import mysql.connector
 from datetime import datetime, timezone
 from modules.logger_utils import bot_logger as logger
+from modules import ledger
 
 
 
@@ -794,24 +795,17 @@ async def grant_reward(db_helpers, user_id: int, display_name: str, amount: int,
     """
     try:
         stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-        await db_helpers.add_balance(
+        await ledger.post(
+            db_helpers,
             user_id,
             display_name,
             amount,
+            'detective_game',
+            'Solved murder mystery case',
             config,
             stat_period
         )
         
-        # Log transaction
-        new_balance = await db_helpers.get_balance(user_id)
-        await db_helpers.log_transaction(
-            user_id,
-            'detective_game',
-            amount,
-            new_balance,
-            'Solved murder mystery case'
-        )
-        
         logger.info(f"Granted {amount} currency to user {user_id} for solving detective case")
         
     except Exception as e:
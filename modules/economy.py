@@ -5,6 +5,7 @@ Handles currency, balances, transactions, and daily rewards.
 
 from datetime import datetime, timezone, timedelta
 from modules.logger_utils import bot_logger as logger
+from modules import ledger
 
 
 def calculate_level_up_bonus(level, config):
@@ -158,21 +159,19 @@ async def transfer_currency(db_helpers, from_user_id: int, to_user_id: int, amou
         return False, "You can't send money to yourself!"
     
     try:
-        # Check sender balance
-        balance = await get_balance(db_helpers, from_user_id)
-        if balance < amount:
-            currency = config['modules']['economy']['currency_symbol']
-            return False, f"Insufficient funds! You have {balance} {currency} but need {amount}."
-        
-        # Perform transfer
+        # Both balances and both transaction_history rows change in one transaction;
+        # the sender's balance is checked under the row lock
         stat_period = datetime.now(timezone.utc).strftime('%Y-%m')
-        
-        await db_helpers.add_balance(from_user_id, from_name, -amount, config, stat_period)
-        await db_helpers.add_balance(to_user_id, to_name, amount, config, stat_period)
+        balances = await ledger.transfer(db_helpers, from_user_id, from_name, to_user_id, to_name, amount, config, stat_period)
+        if balances is None:
+            return False, "Database connection error."
         
         currency = config['modules']['economy']['currency_symbol']
         return True, f"Successfully transferred {amount} {currency} to {to_name}!"
         
+    except ledger.InsufficientFunds as e:
+        currency = config['modules']['economy']['currency_symbol']
+        return False, f"Insufficient funds! You have {e.balance} {currency} but need {amount}."
     except Exception as e:
         logger.error(f"Error transferring currency: {e}", exc_info=True)
         return False, "An error occurred during the transfer."
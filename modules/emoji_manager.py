@@ -15,6 +15,7 @@ from modules.db_helpers import (
     get_emoji_description
 )
 from modules.api_helpers import get_emoji_description as analyze_emoji
+from modules import http_client
 
 # Track which missing emojis we've already warned about to reduce log noise
 _warned_missing_emojis = set()
@@ -78,7 +79,7 @@ async def analyze_application_emojis(client, config, gemini_key, openai_key):
                 emoji_url = str(emoji.url)
                 
                 # Download and convert to base64 if needed
-                async with aiohttp.ClientSession() as session:
+                async with http_client.shared_session() as session:
                     async with session.get(emoji_url) as response:
                         if response.status == 200:
                             image_data = await response.read()
@@ -170,7 +171,7 @@ async def analyze_server_emojis(guild, config, gemini_key, openai_key):
             emoji_url = str(emoji.url)
             
             # Download and convert to base64 if needed
-            async with aiohttp.ClientSession() as session:
+            async with http_client.shared_session() as session:
                 async with session.get(emoji_url) as response:
                     if response.status == 200:
                         image_data = await response.read()
@@ -0,0 +1,174 @@
+"""
+Sulfur Bot - Conditional HTTP Cache Module
+On-disk cache for JSON API responses that revalidates with ETag/Last-Modified.
+
+The in-process TTL caches forget everything on restart and refetch whole
+payloads once a TTL runs out. This cache keeps the last body of every URL on
+disk together with its validators, so an expired entry costs a conditional
+request that usually comes back as an empty 304 Not Modified:
+
+    stored = cache.get(url)
+    async with session.get(url, headers=cache.conditional_headers(stored)) as response:
+        if response.status == 304:
+            data = cache.refresh(url, stored)
+        elif response.status == 200:
+            data = await response.json()
+            await cache.store(url, data, response.headers)
+
+Entries older than a caller's TTL can still be served while a background
+refresh runs (stale-while-revalidate, see revalidate_in_background()).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from modules.logger_utils import bot_logger as logger
+
+# Entries not rewritten for this long are deleted when a cache directory is first opened
+HTTP_CACHE_MAX_AGE_DAYS = 30
+
+
+class HTTPCache:
+    """
+    One JSON file per URL under cache_dir ({url, etag, last_modified, stored_at, data}).
+    Entries read from disk are kept in memory for the rest of the process.
+    """
+
+    def __init__(self, cache_dir: str, max_age_days: float = HTTP_CACHE_MAX_AGE_DAYS):
+        self.cache_dir = cache_dir
+        self.max_age = max_age_days * 86400
+        self._entries: Dict[str, dict] = {}
+        self._opened = False
+        self._revalidating: Dict[str, asyncio.Task] = {}
+        self.stats = {'fresh_hits': 0, 'stale_hits': 0, 'not_modified': 0, 'full_responses': 0,
+                      'bytes_stored': 0, 'write_errors': 0}
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode()).hexdigest() + '.json')
+
+    def _open(self):
+        """Creates the cache directory and drops entries older than max_age (once per process)."""
+        if self._opened:
+            return
+        self._opened = True
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cutoff = time.time() - self.max_age
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+        except OSError as e:
+            logger.warning(f"[HTTP Cache] Could not prepare {self.cache_dir}: {e}")
+
+    def get(self, url: str) -> Optional[dict]:
+        """Returns the stored entry for url, or None."""
+        entry = self._entries.get(url)
+        if entry is not None:
+            return entry
+        self._open()
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"[HTTP Cache] Ignoring unreadable entry for {url}: {e}")
+            return None
+        if entry.get('url') != url:
+            return None
+        self._entries[url] = entry
+        return entry
+
+    @staticmethod
+    def age(entry: dict) -> float:
+        """Seconds since the entry was last fetched or revalidated."""
+        return time.time() - entry['stored_at']
+
+    @staticmethod
+    def conditional_headers(entry: Optional[dict]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for revalidating entry (empty without one)."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record_hit(self, stale: bool = False):
+        self.stats['stale_hits' if stale else 'fresh_hits'] += 1
+
+    async def store(self, url: str, data: Any, headers) -> dict:
+        """Stores a 200 response body with its validators."""
+        entry = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': time.time(),
+            'data': data,
+        }
+        self._entries[url] = entry
+        self.stats['full_responses'] += 1
+        await self._write(url, entry)
+        return entry
+
+    def refresh(self, url: str, entry: dict) -> Any:
+        """
+        Marks entry as revalidated after a 304 and returns its body.
+        Only the in-memory copy is updated; after a restart the file just costs one more 304.
+        """
+        entry['stored_at'] = time.time()
+        self.stats['not_modified'] += 1
+        return entry['data']
+
+    async def _write(self, url: str, entry: dict):
+        self._open()
+        path = self._path(url)
+
+        def write():
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+            return os.path.getsize(path)
+
+        try:
+            # Season payloads are large enough that serializing them should stay off the event loop
+            self.stats['bytes_stored'] += await asyncio.to_thread(write)
+        except (OSError, TypeError, ValueError) as e:
+            self.stats['write_errors'] += 1
+            logger.warning(f"[HTTP Cache] Could not write entry for {url}: {e}")
+
+    def revalidate_in_background(self, url: str, revalidate: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Runs revalidate() as a background task unless one is already running for url.
+        Returns True if a task was started.
+        """
+        if url in self._revalidating:
+            return False
+
+        async def run():
+            try:
+                await revalidate()
+            except Exception as e:
+                logger.warning(f"[HTTP Cache] Background revalidation of {url} failed: {e}")
+            finally:
+                self._revalidating.pop(url, None)
+
+        self._revalidating[url] = asyncio.create_task(run())
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit/revalidation counters and the number of entries held in memory."""
+        requests = self.stats['not_modified'] + self.stats['full_responses']
+        return {
+            **self.stats,
+            'entries_in_memory': len(self._entries),
+            'revalidating': len(self._revalidating),
+            'not_modified_rate': round(self.stats['not_modified'] / requests, 4) if requests else 0.0,
+        }
@@ -0,0 +1,159 @@
+"""
+Sulfur Bot - Shared HTTP Client Module
+Process-wide aiohttp session with pooled keep-alive connections and DNS caching.
+
+Creating a new aiohttp.ClientSession per request pays a TCP (and TLS) handshake
+every time. All outbound HTTP should go through this module instead:
+
+    from modules import http_client
+
+    async with http_client.shared_session() as session:
+        async with session.get(url) as response:
+            ...
+
+Only the bot's own event loop keeps a shared session (see enable_shared_session());
+it is never closed by callers, close_all_sessions() is called once from the bot's
+graceful shutdown. On any other loop (asyncio.run() in the web dashboard, setup
+scripts) shared_session() opens a session for the duration of the block and
+closes it afterwards, like the plain `async with aiohttp.ClientSession()` did.
+"""
+
+import asyncio
+import contextlib
+import threading
+import weakref
+from typing import Dict, Optional
+
+import aiohttp
+
+from modules.logger_utils import bot_logger as logger
+
+# Defaults, overridable via config['api']['http_client'] (see configure())
+HTTP_CLIENT_SETTINGS = {
+    'limit': 100,               # Total simultaneous connections
+    'limit_per_host': 20,       # Connections per (host, port, ssl) pool
+    'dns_cache_ttl': 300,       # Seconds to cache DNS lookups
+    'keepalive_timeout': 60,    # Seconds an idle connection stays open for reuse
+    'total_timeout': 300,       # Default total request timeout (aiohttp's default)
+}
+
+# aiohttp sessions are bound to the event loop they were created on. Sessions are
+# only kept for loops registered with enable_shared_session(); short-lived loops
+# would otherwise leave an unclosed session behind every time they finish.
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+_shared_loops = weakref.WeakSet()
+_sessions_lock = threading.Lock()
+_stats = {'sessions_created': 0, 'requests': 0, 'connections_created': 0, 'connections_reused': 0}
+
+
+def configure(settings: Optional[dict] = None):
+    """Applies connection pool settings. Only affects sessions created afterwards."""
+    if settings:
+        HTTP_CLIENT_SETTINGS.update({key: value for key, value in settings.items() if key in HTTP_CLIENT_SETTINGS})
+        logger.info(f"[HTTP] Client settings: {HTTP_CLIENT_SETTINGS}")
+
+
+async def _on_request_start(session, trace_config_ctx, params):
+    _stats['requests'] += 1
+
+
+async def _on_connection_create_end(session, trace_config_ctx, params):
+    _stats['connections_created'] += 1
+
+
+async def _on_connection_reuseconn(session, trace_config_ctx, params):
+    _stats['connections_reused'] += 1
+
+
+def _create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_CLIENT_SETTINGS['limit'],
+        limit_per_host=HTTP_CLIENT_SETTINGS['limit_per_host'],
+        use_dns_cache=True,
+        ttl_dns_cache=HTTP_CLIENT_SETTINGS['dns_cache_ttl'],
+        keepalive_timeout=HTTP_CLIENT_SETTINGS['keepalive_timeout'],
+    )
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    _stats['sessions_created'] += 1
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=HTTP_CLIENT_SETTINGS['total_timeout']),
+        trace_configs=[trace_config],
+    )
+
+
+def enable_shared_session():
+    """Keeps a shared session for the running event loop. Called once by the bot on startup."""
+    _shared_loops.add(asyncio.get_running_loop())
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Returns the shared session for the running event loop, creating it if needed.
+    On a loop without a shared session a new session is returned; the caller must
+    hand it to release_session() when done.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _shared_loops:
+        return _create_session()
+    with _sessions_lock:
+        # Forget sessions whose loop is gone (e.g. asyncio.run() in the web dashboard)
+        for stale_loop in [other for other in _sessions if other.is_closed()]:
+            del _sessions[stale_loop]
+
+        session = _sessions.get(loop)
+        if session is None or session.closed:
+            session = _create_session()
+            _sessions[loop] = session
+        return session
+
+
+@contextlib.asynccontextmanager
+async def shared_session():
+    """
+    Drop-in replacement for `async with aiohttp.ClientSession() as session:`
+    that yields the shared session and leaves it open afterwards. Without a shared
+    session on this loop, a temporary one is closed when the block exits.
+    """
+    session = await get_session()
+    try:
+        yield session
+    finally:
+        await release_session(session)
+
+
+async def release_session(session: Optional[aiohttp.ClientSession]):
+    """Closes a session returned by get_session() unless it is a loop's shared session."""
+    if session is None or session.closed:
+        return
+    with _sessions_lock:
+        shared = any(session is other for other in _sessions.values())
+    if not shared:
+        await session.close()
+
+
+async def close_session():
+    """Closes the shared session of the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        session = _sessions.pop(loop, None)
+    if session and not session.closed:
+        await session.close()
+        logger.info("[HTTP] Shared client session closed")
+
+
+async def close_all_sessions():
+    """Closes the session of the running loop and drops the others. Called on shutdown."""
+    await close_session()
+    with _sessions_lock:
+        _sessions.clear()
+
+
+def get_http_stats() -> dict:
+    """Returns request/connection counters; connections_reused shows saved handshakes."""
+    stats = dict(_stats)
+    stats['open_sessions'] = len(_sessions)
+    return stats
@@ -15,6 +15,7 @@ import os
 import random
 from typing import Optional, List, Dict, Any
 from modules.logger_utils import bot_logger as logger
+from modules import http_client
 
 # Last.fm API configuration
 LASTFM_API_BASE_URL = "https://ws.audioscrobbler.com/2.0/"
@@ -98,7 +99,7 @@ async def _make_api_request(params: Dict[str, str], timeout: int = 15) -> Option
     params['format'] = 'json'
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             async with session.get(LASTFM_API_BASE_URL, params=params, timeout=timeout) as response:
                 if response.status == 200:
                     data = await response.json()
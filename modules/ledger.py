@@ -0,0 +1,219 @@
+"""
+Sulfur Bot - Ledger Module
+Applies balance changes and their transaction_history rows in one transaction.
+
+Every money movement (transfers, shop purchases, game payouts, race and bet
+settlements) should go through this module instead of pairing add_balance with
+log_transaction:
+
+    from modules import ledger
+
+    balances = await ledger.apply_entries(db_helpers, [
+        ledger.entry(user_id, display_name, -bet, 'horse_race', "Horse Race Bet"),
+        ledger.entry(user_id, display_name, payout, 'horse_race', "Horse Race Win"),
+    ], config, stat_period)
+
+The affected players rows are locked with SELECT ... FOR UPDATE in ascending id
+order, so concurrent batches serialize per user without deadlocking and no
+update is lost. The balance_after written to transaction_history is exact.
+A whole batch of entries costs one commit.
+"""
+
+from modules.logger_utils import bot_logger as logger
+from modules.db_helpers import derived_rows
+
+LEDGER_ROWS_PER_STATEMENT = 500
+
+
+class InsufficientFunds(Exception):
+    """Raised when a debit with require_funds would take a balance below zero. Nothing is written."""
+
+    def __init__(self, user_id: int, balance: int, amount: int):
+        super().__init__(f"User {user_id} has {balance} but needs {-amount}")
+        self.user_id = user_id
+        self.balance = balance
+        self.amount = amount
+
+
+def entry(user_id: int, display_name, amount: int, transaction_type: str, description: str = None) -> tuple:
+    """
+    Builds one ledger entry.
+
+    Args:
+        user_id: Discord user ID
+        display_name: Display name; None keeps the stored name (new players get their id)
+        amount: Signed balance change
+        transaction_type: transaction_history type (e.g. 'transfer', 'shop_purchase')
+        description: Optional transaction_history description
+    """
+    return (user_id, display_name, amount, transaction_type, description)
+
+
+def write_entries(cursor, entries: list, starting_balance: int, require_funds: bool = False) -> dict:
+    """
+    Writes a batch of entries on an open cursor without committing.
+
+    For callers that move money as part of a larger transaction (e.g. bet
+    settlement); they commit or roll back themselves and call finish_entries
+    after the commit. The cursor must return plain tuples.
+
+    Returns:
+        Final balances by user
+    """
+    # Create missing players first so every affected row exists and can be locked
+    names = {}
+    for user_id, display_name, _, _, _ in entries:
+        if display_name:
+            names[user_id] = display_name
+        else:
+            names.setdefault(user_id, None)
+    named = [(user_id, name, starting_balance) for user_id, name in names.items() if name]
+    unnamed = [(user_id, str(user_id), starting_balance) for user_id, name in names.items() if not name]
+    if named:
+        cursor.executemany("""
+            INSERT INTO players (discord_id, display_name, balance) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE display_name = VALUES(display_name)
+        """, named)
+    if unnamed:
+        cursor.executemany("""
+            INSERT INTO players (discord_id, display_name, balance) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE discord_id = discord_id
+        """, unnamed)
+
+    user_ids = sorted(names)
+    cursor.execute(f"""
+        SELECT discord_id, balance FROM players
+        WHERE discord_id IN ({", ".join(["%s"] * len(user_ids))}) ORDER BY discord_id FOR UPDATE
+    """, tuple(user_ids))
+    balances = {row[0]: int(row[1] or 0) for row in cursor.fetchall()}
+
+    # Entries apply in order, so a debit sees the credits listed before it
+    deltas = {}
+    transactions = []
+    for user_id, _, amount, transaction_type, description in entries:
+        balance = balances[user_id] + amount
+        if require_funds and amount < 0 and balance < 0:
+            raise InsufficientFunds(user_id, balances[user_id], amount)
+        balances[user_id] = balance
+        deltas[user_id] = deltas.get(user_id, 0) + amount
+        transactions.append((user_id, transaction_type, amount, balance, description))
+
+    changed = [(user_id, delta) for user_id, delta in deltas.items() if delta]
+    for start in range(0, len(changed), LEDGER_ROWS_PER_STATEMENT):
+        chunk = changed[start:start + LEDGER_ROWS_PER_STATEMENT]
+        cursor.execute(f"""
+            UPDATE players p
+            JOIN ({derived_rows(['discord_id', 'delta'], len(chunk))}) d
+                ON d.discord_id = p.discord_id
+            SET p.balance = p.balance + d.delta
+        """, tuple(value for row in chunk for value in row))
+    # executemany sends a single multi-row INSERT
+    cursor.executemany("""
+        INSERT INTO transaction_history (user_id, transaction_type, amount, balance_after, description)
+        VALUES (%s, %s, %s, %s, %s)
+    """, transactions)
+    return balances
+
+
+async def _apply_entries_sync(db_helpers, entries: list, starting_balance: int, require_funds: bool):
+    """
+    Writes a batch of entries in one transaction. Runs on the DB executor.
+
+    Returns:
+        Final balances by user, or None without a connection
+    """
+    conn = db_helpers.db_pool.get_connection()
+    if not conn:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        balances = write_entries(cursor, entries, starting_balance, require_funds)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    return balances
+
+
+async def finish_entries(db_helpers, entries: list, stat_period: str = None):
+    """Drops cached balances and records money_earned for committed entries."""
+    net = {}
+    for user_id, _, amount, _, _ in entries:
+        net[user_id] = net.get(user_id, 0) + amount
+    for user_id, delta in net.items():
+        db_helpers.db_cache.invalidate('balance', user_id)
+        db_helpers.db_cache.invalidate('profile', user_id)
+        if stat_period and delta:
+            await db_helpers.log_stat_increment(user_id, stat_period, 'money_earned', amount=delta)
+
+    logger.debug(f"Ledger applied {len(entries)} entries for {len(net)} user(s)")
+
+
+async def apply_entries(db_helpers, entries: list, config: dict, stat_period: str = None,
+                        require_funds: bool = False):
+    """
+    Applies ledger entries and their transaction_history rows in one transaction.
+
+    Args:
+        db_helpers: Database helpers module
+        entries: List of entry() tuples, applied in order
+        config: Bot configuration (starting balance for new players)
+        stat_period: If given, each user's net change is added to money_earned for Wrapped
+        require_funds: Reject the whole batch if a debit would take a balance below zero
+
+    Returns:
+        {user_id: new_balance}, or None if the database is unavailable
+
+    Raises:
+        InsufficientFunds: require_funds is set and a debit is not covered
+    """
+    if not entries:
+        return {}
+    if not db_helpers.db_pool:
+        logger.warning("Database pool not available, skipping ledger entries")
+        return None
+
+    starting_balance = config['modules']['economy']['starting_balance']
+    balances = await db_helpers.run_in_db_executor(_apply_entries_sync)(
+        db_helpers, entries, starting_balance, require_funds
+    )
+    if balances is None:
+        return None
+
+    await finish_entries(db_helpers, entries, stat_period)
+    return balances
+
+
+async def post(db_helpers, user_id: int, display_name, amount: int, transaction_type: str,
+               description: str, config: dict, stat_period: str = None, require_funds: bool = False):
+    """
+    Applies a single entry. Returns the new balance, or None if the database is unavailable.
+    Raises InsufficientFunds like apply_entries.
+    """
+    balances = await apply_entries(
+        db_helpers, [entry(user_id, display_name, amount, transaction_type, description)],
+        config, stat_period, require_funds
+    )
+    return balances.get(user_id) if balances is not None else None
+
+
+async def transfer(db_helpers, from_user_id: int, from_name, to_user_id: int, to_name, amount: int,
+                   config: dict, stat_period: str = None, transaction_type: str = 'transfer'):
+    """
+    Moves amount from one user to another in one transaction, logging both sides.
+
+    Returns:
+        {user_id: new_balance} for both users, or None if the database is unavailable
+
+    Raises:
+        InsufficientFunds: The sender's balance does not cover the amount
+    """
+    return await apply_entries(db_helpers, [
+        entry(from_user_id, from_name, -amount, transaction_type, f"Sent to {to_name}"),
+        entry(to_user_id, to_name, amount, transaction_type, f"Received from {from_name}"),
+    ], config, stat_period, require_funds=True)
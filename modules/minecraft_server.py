@@ -649,7 +649,8 @@ async def download_file(url: str, dest_path: str, progress_callback: Callable =
         # Use aiohttp for async download if available
         try:
             import aiohttp
-            async with aiohttp.ClientSession() as session:
+            from modules import http_client
+            async with http_client.shared_session() as session:
                 async with session.get(url) as response:
                     if response.status != 200:
                         logger.error(f"Download failed with status {response.status}")
@@ -708,7 +709,8 @@ async def get_vanilla_server_url(version: str) -> Optional[str]:
     """Get the download URL for a vanilla Minecraft server."""
     try:
         import aiohttp
-        async with aiohttp.ClientSession() as session:
+        from modules import http_client
+        async with http_client.shared_session() as session:
             # Get version manifest
             async with session.get(SERVER_TYPES['vanilla']['api_url']) as response:
                 if response.status != 200:
@@ -745,7 +747,8 @@ async def get_paper_server_url(version: str) -> Optional[str]:
     """Get the download URL for a PaperMC server."""
     try:
         import aiohttp
-        async with aiohttp.ClientSession() as session:
+        from modules import http_client
+        async with http_client.shared_session() as session:
             # Get available versions
             async with session.get(f"{SERVER_TYPES['paper']['api_url']}/versions/{version}") as response:
                 if response.status != 200:
@@ -787,7 +790,8 @@ async def get_purpur_server_url(version: str) -> Optional[str]:
     """Get the download URL for a Purpur server."""
     try:
         import aiohttp
-        async with aiohttp.ClientSession() as session:
+        from modules import http_client
+        async with http_client.shared_session() as session:
             # Get latest build for version
             async with session.get(f"{SERVER_TYPES['purpur']['api_url']}/{version}") as response:
                 if response.status != 200:
@@ -882,7 +886,8 @@ async def setup_fabric_server(version: str) -> Tuple[bool, str]:
     
     try:
         import aiohttp
-        async with aiohttp.ClientSession() as session:
+        from modules import http_client
+        async with http_client.shared_session() as session:
             # Get latest installer version
             async with session.get("https://meta.fabricmc.net/v2/versions/installer") as response:
                 if response.status != 200:
@@ -952,7 +957,8 @@ async def get_mod_download_url(modrinth_id: str, minecraft_version: str, loader:
     """
     try:
         import aiohttp
-        async with aiohttp.ClientSession() as session:
+        from modules import http_client
+        async with http_client.shared_session() as session:
             # Get project versions
             url = f"{MODRINTH_API}/project/{modrinth_id}/version"
             params = {
@@ -1743,12 +1749,13 @@ async def download_modpack_from_modrinth(modpack: Dict, minecraft_version: str,
     
     try:
         import aiohttp
+        from modules import http_client
         
         headers = {
             "User-Agent": "SulfurBot/1.0 (github.com/mereMint/sulfur)"
         }
         
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             # Get project info
             logger.info(f"Fetching modpack info from Modrinth: {modrinth_id}")
             project_url = f"{MODRINTH_API}/project/{modrinth_id}"
@@ -1875,13 +1882,14 @@ async def download_modpack_from_curseforge(modpack: Dict, minecraft_version: str
     
     try:
         import aiohttp
+        from modules import http_client
         
         headers = {
             "Accept": "application/json",
             "x-api-key": cf_api_key
         }
         
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             # Get mod files
             logger.info(f"Fetching modpack info from CurseForge: {project_id}")
             files_url = f"https://api.curseforge.com/v1/mods/{project_id}/files"
@@ -2008,9 +2016,10 @@ async def extract_and_install_mrpack(mrpack_path: str, result: Dict) -> bool:
             logger.info(f"Downloading {len(files)} mod files...")
             
             import aiohttp
+            from modules import http_client
             headers = {"User-Agent": "SulfurBot/1.0 (github.com/mereMint/sulfur)"}
             
-            async with aiohttp.ClientSession() as session:
+            async with http_client.shared_session() as session:
                 for file_info in files:
                     file_path = file_info.get('path', '')
                     downloads = file_info.get('downloads', [])
@@ -3362,9 +3371,10 @@ async def get_minecraft_uuid(username: str) -> Optional[str]:
     
     try:
         import aiohttp
+        from modules import http_client
         url = f"https://api.mojang.com/users/profiles/minecraft/{username}"
         
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             async with session.get(url, timeout=10) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -4,14 +4,295 @@ Handles daily quests, monthly tracking, and special completion rewards.
 """
 
 import discord
+import random
 from datetime import datetime, timezone, timedelta
 from modules.logger_utils import bot_logger as logger
+from modules.db_helpers import derived_rows
+
+
+# ============================================================================
+# In-Memory Quest Progress
+# ============================================================================
+
+QUEST_FLUSH_INTERVAL = 15  # seconds between progress flushes (see bot.py flush task)
+QUEST_FLUSH_ROWS_PER_STATEMENT = 500
+
+
+class DailyQuestState:
+    """
+    Today's quests per user, loaded once per UTC day and advanced in memory.
+    
+    daily_quests stays the persisted copy. Progress changes are collected per
+    quest id and written in bulk by flush_quest_progress(), so a quest tick
+    (message, reaction, VC minute) needs no database round-trip. Progress only
+    ever grows, so pending values are absolute and applied with GREATEST.
+    """
+    
+    def __init__(self):
+        self.quest_date = None
+        self.users = {}  # user_id -> {quest_type: {'id', 'target_value', 'current_progress', 'completed'}}
+        self.pending = {}  # quest id -> (current_progress, completed)
+        self.staged_date = None  # Next day's quests, pre-generated before midnight
+        self.staged_users = {}
+        self.ticks = 0
+        self.loads = 0
+        self.completions = 0
+        self.rows_flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_at = None
+    
+    def _roll_date(self):
+        today = datetime.now(timezone.utc).date()
+        if today != self.quest_date:
+            # Pending writes are keyed by quest id and survive the rollover
+            self.quest_date = today
+            self.users = self.staged_users if self.staged_date == today else {}
+            self.staged_date = None
+            self.staged_users = {}
+        return today
+    
+    def get_user(self, user_id: int):
+        self._roll_date()
+        return self.users.get(user_id)
+    
+    def set_user(self, user_id: int, rows: list):
+        """Stores a user's quest rows for today. Unflushed progress wins over the loaded values."""
+        self._roll_date()
+        self.users[user_id] = self._build_user(rows)
+        self.loads += 1
+    
+    def stage_day(self, quest_date, rows_by_user: dict):
+        """
+        Stores pre-generated quests for a day. Today's go live for users not loaded
+        yet; a future day's replace the users map at rollover, starting every
+        user at the freshly generated progress.
+        """
+        if quest_date == self._roll_date():
+            for user_id, rows in rows_by_user.items():
+                if user_id not in self.users:
+                    self.users[user_id] = self._build_user(rows)
+        else:
+            self.staged_date = quest_date
+            self.staged_users = {user_id: self._build_user(rows) for user_id, rows in rows_by_user.items()}
+        self.loads += len(rows_by_user)
+    
+    def _build_user(self, rows: list) -> dict:
+        user_quests = {}
+        for row in rows:
+            progress = row['current_progress'] or 0
+            completed = bool(row['completed'])
+            if row['id'] in self.pending:
+                pending_progress, pending_completed = self.pending[row['id']]
+                progress = max(progress, pending_progress)
+                completed = completed or pending_completed
+            user_quests[row['quest_type']] = {
+                'id': row['id'],
+                'target_value': row['target_value'],
+                'current_progress': progress,
+                'completed': completed
+            }
+        return user_quests
+    
+    def advance(self, user_id: int, quest_type: str, increment: int) -> bool:
+        """Adds progress to a loaded user's quest. Returns True if this tick completed it."""
+        quest = self.users.get(user_id, {}).get(quest_type)
+        if not quest or quest['completed']:
+            return False
+        self.ticks += 1
+        quest['current_progress'] += increment
+        if quest['current_progress'] >= quest['target_value']:
+            quest['completed'] = True
+            self.completions += 1
+        self.pending[quest['id']] = (quest['current_progress'], quest['completed'])
+        return quest['completed']
+    
+    def overlay(self, rows: list):
+        """Applies in-memory progress to quest rows read from the database."""
+        for row in rows:
+            pending = self.pending.get(row.get('id'))
+            if pending:
+                row['current_progress'] = max(row.get('current_progress') or 0, pending[0])
+                row['completed'] = bool(row.get('completed')) or pending[1]
+    
+    def take_pending(self) -> dict:
+        batch = self.pending
+        self.pending = {}
+        return batch
+    
+    def requeue(self, batch: dict):
+        """Merges a batch that could not be written back, keeping newer values."""
+        self.failed_flushes += 1
+        for quest_id, (progress, completed) in batch.items():
+            if quest_id in self.pending:
+                newer_progress, newer_completed = self.pending[quest_id]
+                progress = max(progress, newer_progress)
+                completed = completed or newer_completed
+            self.pending[quest_id] = (progress, completed)
+    
+    def stats(self) -> dict:
+        return {
+            'quest_date': self.quest_date.isoformat() if self.quest_date else None,
+            'users_loaded': len(self.users),
+            'staged_date': self.staged_date.isoformat() if self.staged_date else None,
+            'users_staged': len(self.staged_users),
+            'pending_quests': len(self.pending),
+            'ticks': self.ticks,
+            'loads': self.loads,
+            'completions': self.completions,
+            'rows_flushed': self.rows_flushed,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'last_flush_at': self.last_flush_at
+        }
+
+
+_quest_state = DailyQuestState()
+
+
+def get_quest_state_stats() -> dict:
+    """Returns in-memory quest progress counters for runtime stats."""
+    return _quest_state.stats()
+
+
+async def _write_quest_progress(db_helpers, batch: dict) -> bool:
+    """
+    Writes a batch of quest id -> (current_progress, completed) in one transaction.
+    Runs on the DB executor.
+    """
+    if not db_helpers.db_pool:
+        return False
+    cnx = db_helpers.db_pool.get_connection()
+    if not cnx:
+        return False
+    
+    rows = [(quest_id, progress, completed) for quest_id, (progress, completed) in batch.items()]
+    cursor = cnx.cursor()
+    try:
+        for start in range(0, len(rows), QUEST_FLUSH_ROWS_PER_STATEMENT):
+            chunk = rows[start:start + QUEST_FLUSH_ROWS_PER_STATEMENT]
+            cursor.execute(f"""
+                UPDATE daily_quests q
+                JOIN ({derived_rows(['id', 'progress', 'completed'], len(chunk))}) d ON d.id = q.id
+                SET q.current_progress = GREATEST(q.current_progress, d.progress),
+                    q.completed = (q.completed OR d.completed)
+            """, tuple(value for row in chunk for value in row))
+        cnx.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error writing quest progress: {e}", exc_info=True)
+        try:
+            cnx.rollback()
+        except Exception:
+            pass
+        return False
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+async def flush_quest_progress(db_helpers) -> int:
+    """
+    Writes in-memory quest progress to daily_quests. Failed batches are kept
+    and retried on the next flush.
+    
+    Returns:
+        Number of quest rows written
+    """
+    batch = _quest_state.take_pending()
+    if not batch:
+        return 0
+    
+    try:
+        written = await db_helpers.run_in_db_executor(_write_quest_progress)(db_helpers, batch)
+    except Exception as e:
+        logger.error(f"Error flushing quest progress: {e}", exc_info=True)
+        written = False
+    
+    if not written:
+        _quest_state.requeue(batch)
+        return 0
+    
+    _quest_state.rows_flushed += len(batch)
+    _quest_state.flushes += 1
+    _quest_state.last_flush_at = datetime.now(timezone.utc).timestamp()
+    return len(batch)
+
+
+async def _load_user_quests(db_helpers, user_ids: list, config: dict = None):
+    """
+    Loads today's quests for users not yet in memory with one SELECT. Users
+    without quests get them generated when config is given.
+    
+    Runs on the event loop without yielding, so concurrent ticks for the same
+    user cannot both generate quests.
+    """
+    missing = [user_id for user_id in user_ids if _quest_state.get_user(user_id) is None]
+    if not missing or not db_helpers.db_pool:
+        return
+    
+    today = _quest_state.quest_date
+    cnx = db_helpers.db_pool.get_connection()
+    if not cnx:
+        logger.warning("Could not get DB connection in _load_user_quests")
+        return
+    
+    cursor = cnx.cursor(dictionary=True)
+    try:
+        id_placeholders = ", ".join(["%s"] * len(missing))
+        cursor.execute(
+            f"""
+            SELECT id, user_id, quest_type, target_value, current_progress, completed
+            FROM daily_quests
+            WHERE quest_date = %s AND user_id IN ({id_placeholders})
+            """,
+            (today, *missing)
+        )
+        rows_by_user = {}
+        for row in cursor.fetchall():
+            rows_by_user.setdefault(row['user_id'], []).append(row)
+    finally:
+        cursor.close()
+        cnx.close()
+    
+    for user_id in missing:
+        rows = rows_by_user.get(user_id)
+        if not rows and config:
+            logger.info(f"No quests found for user {user_id}, auto-generating daily quests")
+            rows = await generate_daily_quests(db_helpers, user_id, config)
+        # Users still without quests are retried on their next tick
+        if rows:
+            _quest_state.set_user(user_id, rows)
 
 
 # ============================================================================
 # Quest Generation & Management
 # ============================================================================
 
+def _roll_daily_quests(config: dict) -> list:
+    """Picks 3 random quest types (or all if less than 3) and their targets as (quest_type, target_value) pairs."""
+    quest_config = config['modules']['economy']['quests']['quest_types']
+    randomize_targets = config['modules']['economy']['quests'].get('randomize_targets', False)
+    
+    rolled = []
+    for quest_type in random.sample(list(quest_config.keys()), min(3, len(quest_config))):
+        quest_data = quest_config[quest_type]
+        
+        # Randomize target if enabled
+        if randomize_targets and 'target_min' in quest_data and 'target_max' in quest_data:
+            target_min = quest_data['target_min']
+            target_max = quest_data['target_max']
+            target_step = quest_data.get('target_step', 5)
+            
+            # Generate random target in steps
+            steps = (target_max - target_min) // target_step + 1
+            target_value = target_min + (random.randint(0, steps - 1) * target_step)
+        else:
+            target_value = quest_data['target']
+        rolled.append((quest_type, target_value))
+    return rolled
+
+
 async def generate_daily_quests(db_helpers, user_id: int, config: dict):
     """
     Generates 3 daily quests for a user if they don't already have them.
@@ -46,6 +327,7 @@ async def generate_daily_quests(db_helpers, user_id: int, config: dict):
             existing_quests = cursor.fetchall()
             
             if existing_quests:
+                _quest_state.overlay(existing_quests)
                 # Add reward information from config
                 quest_config = config['modules']['economy']['quests']['quest_types']
                 for quest in existing_quests:
@@ -57,29 +339,11 @@ async def generate_daily_quests(db_helpers, user_id: int, config: dict):
             
             # Generate 3 new quests
             quest_config = config['modules']['economy']['quests']['quest_types']
-            available_quests = list(quest_config.keys())
-            randomize_targets = config['modules']['economy']['quests'].get('randomize_targets', False)
-            
-            # Select 3 random quest types (or all if less than 3)
-            import random
-            selected_types = random.sample(available_quests, min(3, len(available_quests)))
             
             created_quests = []
-            for quest_type in selected_types:
+            for quest_type, target_value in _roll_daily_quests(config):
                 quest_data = quest_config[quest_type]
                 
-                # Randomize target if enabled
-                if randomize_targets and 'target_min' in quest_data and 'target_max' in quest_data:
-                    target_min = quest_data['target_min']
-                    target_max = quest_data['target_max']
-                    target_step = quest_data.get('target_step', 5)
-                    
-                    # Generate random target in steps
-                    steps = (target_max - target_min) // target_step + 1
-                    target_value = target_min + (random.randint(0, steps - 1) * target_step)
-                else:
-                    target_value = quest_data['target']
-                
                 cursor.execute(
                     """
                     INSERT INTO daily_quests (user_id, quest_date, quest_type, target_value, current_progress)
@@ -114,116 +378,154 @@ async def generate_daily_quests(db_helpers, user_id: int, config: dict):
         return []
 
 
-async def update_quest_progress(db_helpers, user_id: int, quest_type: str, increment: int = 1, config: dict = None):
+async def pregenerate_daily_quests(db_helpers, config: dict, quest_date=None):
     """
-    Updates progress for a specific quest type.
-    Auto-generates quests if they don't exist yet.
+    Generates quests for all recently active users in one batched insert and
+    loads them into memory, so their ticks never have to generate quests.
+    Runs shortly before midnight UTC for the next day, and at startup for today.
     
     Args:
         db_helpers: Database helpers module
-        user_id: Discord user ID
-        quest_type: Type of quest (messages, vc_minutes, reactions, game_minutes)
-        increment: Amount to increment progress by
-        config: Bot configuration (required for auto-generating quests)
+        config: Bot configuration
+        quest_date: Day to generate for (defaults to today, UTC)
     
     Returns:
-        (quest_completed, reward_amount) tuple
+        Number of users quests were generated for
     """
     try:
-        today = datetime.now(timezone.utc).date()
+        quest_date = quest_date or datetime.now(timezone.utc).date()
         
         if not db_helpers.db_pool:
-            logger.warning("Database pool not available in update_quest_progress")
-            return False, 0
+            logger.warning("Database pool not available in pregenerate_daily_quests")
+            return 0
             
         cnx = db_helpers.db_pool.get_connection()
         if not cnx:
-            logger.warning("Could not get DB connection in update_quest_progress")
-            return False, 0
+            logger.warning("Could not get DB connection in pregenerate_daily_quests")
+            return 0
             
         cursor = cnx.cursor(dictionary=True)
         try:
-            # Get current quest
-            cursor.execute(
-                """
-                SELECT * FROM daily_quests 
-                WHERE user_id = %s AND quest_date = %s AND quest_type = %s AND completed = FALSE
-                """,
-                (user_id, today, quest_type)
-            )
-            quest = cursor.fetchone()
+            # Users who have activity in the last 30 days
+            cursor.execute("""
+                SELECT DISTINCT user_id FROM user_stats 
+                WHERE stat_period >= DATE_FORMAT(DATE_SUB(NOW(), INTERVAL 30 DAY), '%Y-%m')
+            """)
+            active_users = [row['user_id'] for row in cursor.fetchall()]
             
-            # If quest doesn't exist and we have config, try to generate quests
-            if not quest and config:
-                logger.info(f"Quest {quest_type} not found for user {user_id}, auto-generating daily quests")
-                cursor.close()
-                cnx.close()
-                
-                # Generate quests for this user
-                generated_quests = await generate_daily_quests(db_helpers, user_id, config)
-                
-                # If generation failed, return early
-                if not generated_quests:
-                    logger.warning(f"Failed to auto-generate quests for user {user_id}")
-                    return False, 0
-                
-                # Reconnect and try again
-                cnx = db_helpers.db_pool.get_connection()
-                if not cnx:
-                    return False, 0
-                cursor = cnx.cursor(dictionary=True)
-                
-                cursor.execute(
-                    """
-                    SELECT * FROM daily_quests 
-                    WHERE user_id = %s AND quest_date = %s AND quest_type = %s AND completed = FALSE
-                    """,
-                    (user_id, today, quest_type)
-                )
-                quest = cursor.fetchone()
-            
-            if not quest:
-                logger.debug(f"No quest of type {quest_type} found for user {user_id} on {today}")
-                return False, 0
-            
-            # Update progress
-            new_progress = quest['current_progress'] + increment
-            cursor.execute(
-                """
-                UPDATE daily_quests
-                SET current_progress = %s
-                WHERE id = %s
-                """,
-                (new_progress, quest['id'])
-            )
+            quest_query = """
+                SELECT id, user_id, quest_type, target_value, current_progress, completed
+                FROM daily_quests
+                WHERE quest_date = %s
+            """
+            cursor.execute(quest_query, (quest_date,))
+            users_with_quests = {row['user_id'] for row in cursor.fetchall()}
             
-            # Check if quest completed
-            if new_progress >= quest['target_value'] and not quest['completed']:
-                cursor.execute(
+            new_rows = [
+                (user_id, quest_date, quest_type, target_value)
+                for user_id in active_users if user_id not in users_with_quests
+                for quest_type, target_value in _roll_daily_quests(config)
+            ]
+            if new_rows:
+                # executemany sends a single multi-row INSERT
+                cursor.executemany(
                     """
-                    UPDATE daily_quests
-                    SET completed = TRUE
-                    WHERE id = %s
+                    INSERT INTO daily_quests (user_id, quest_date, quest_type, target_value, current_progress)
+                    VALUES (%s, %s, %s, %s, 0)
                     """,
-                    (quest['id'],)
+                    new_rows
                 )
                 cnx.commit()
-                
-                # Return completion status - reward will be claimed separately
-                logger.info(f"Quest {quest_type} completed for user {user_id}")
-                return True, 0  # Reward amount is 0 until claimed
             
-            cnx.commit()
-            return False, 0
+            # Read back with the new ids
+            cursor.execute(quest_query, (quest_date,))
+            rows_by_user = {}
+            for row in cursor.fetchall():
+                rows_by_user.setdefault(row['user_id'], []).append(row)
         finally:
             cursor.close()
             cnx.close()
+        
+        _quest_state.stage_day(quest_date, rows_by_user)
+        generated_users = len({row[0] for row in new_rows})
+        logger.info(f"Pre-generated daily quests for {generated_users} user(s) on {quest_date}, "
+                    f"{len(rows_by_user)} user(s) loaded")
+        return generated_users
+            
+    except Exception as e:
+        logger.error(f"Error pre-generating daily quests: {e}", exc_info=True)
+        return 0
+
+
+async def update_quest_progress(db_helpers, user_id: int, quest_type: str, increment: int = 1, config: dict = None):
+    """
+    Updates progress for a specific quest type.
+    Auto-generates quests if they don't exist yet.
+    
+    Progress is kept in memory and written by flush_quest_progress(); only the
+    user's first tick of the day reads the database.
+    
+    Args:
+        db_helpers: Database helpers module
+        user_id: Discord user ID
+        quest_type: Type of quest (messages, vc_minutes, reactions, game_minutes)
+        increment: Amount to increment progress by
+        config: Bot configuration (required for auto-generating quests)
+    
+    Returns:
+        (quest_completed, reward_amount) tuple
+    """
+    try:
+        if _quest_state.get_user(user_id) is None:
+            await _load_user_quests(db_helpers, [user_id], config)
+        
+        if _quest_state.advance(user_id, quest_type, increment):
+            # Return completion status - reward will be claimed separately
+            logger.info(f"Quest {quest_type} completed for user {user_id}")
+            return True, 0  # Reward amount is 0 until claimed
+        return False, 0
             
     except Exception as e:
         logger.error(f"Error updating quest progress: {e}", exc_info=True)
         return False, 0
 
 
+async def update_quest_progress_bulk(db_helpers, user_ids: list, quest_type: str, increment: int = 1, config: dict = None):
+    """
+    Updates progress for one quest type for many users at once.
+    Used by periodic ticks (e.g. voice minutes) instead of calling update_quest_progress per user.
+    Users not yet in memory are loaded with one query, and users without quests for
+    today get them generated first, like in update_quest_progress.
+    
+    Args:
+        db_helpers: Database helpers module
+        user_ids: List of Discord user IDs
+        quest_type: Type of quest (messages, vc_minutes, reactions, game_minutes)
+        increment: Amount to increment progress by
+        config: Bot configuration (required for auto-generating quests)
+    
+    Returns:
+        List of user IDs whose quest of this type was completed by this update
+    """
+    if not user_ids:
+        return []
+    
+    try:
+        await _load_user_quests(db_helpers, user_ids, config)
+        
+        completed_users = [
+            user_id for user_id in user_ids
+            if _quest_state.advance(user_id, quest_type, increment)
+        ]
+        if completed_users:
+            logger.info(f"Quest {quest_type} completed for {len(completed_users)} user(s)")
+        return completed_users
+    
+    except Exception as e:
+        logger.error(f"Error updating bulk quest progress: {e}", exc_info=True)
+        return []
+
+
 async def claim_quest_reward(db_helpers, user_id: int, display_name: str, quest_id: int, config: dict):
     """
     Claims the reward for a completed quest.
@@ -239,6 +541,9 @@ async def claim_quest_reward(db_helpers, user_id: int, display_name: str, quest_
         (success, reward_amount, xp_amount, message) tuple
     """
     try:
+        # completed is checked in the database, so write pending progress first
+        await flush_quest_progress(db_helpers)
+        
         if not db_helpers.db_pool:
             logger.warning("Database pool not available in claim_quest_reward")
             return False, 0, 0, "Database connection error."
@@ -343,6 +648,7 @@ async def get_user_quests(db_helpers, user_id: int, config: dict):
                 (user_id, today)
             )
             quests = cursor.fetchall()
+            _quest_state.overlay(quests)
             
             # Add reward amounts from config
             quest_config = config['modules']['economy']['quests']['quest_types']
@@ -374,6 +680,7 @@ async def check_all_quests_completed(db_helpers, user_id: int):
     """
     try:
         today = datetime.now(timezone.utc).date()
+        await flush_quest_progress(db_helpers)
         
         if not db_helpers.db_pool:
             logger.warning("Database pool not available in check_all_quests_completed")
@@ -0,0 +1,564 @@
+"""
+Sulfur Bot - RPG Balance Simulator
+Offline Monte-Carlo simulation of RPG fights for balancing.
+
+Runs many fights of one matchup (player level, build, monster) at once with
+NumPy arrays: one array slot per fight, one loop iteration per combat turn.
+The turn follows _resolve_combat_turn (status effects, turn order, combo and
+rage, monster enrage and abilities, calculate_damage) for a player who
+attacks every turn, without building any of the messages.
+
+simulate_exact() plays the same fights through the real _resolve_combat_turn
+and roll_loot_drops instead. It is slow, but it is the reference the
+vectorized engine is checked against.
+
+Not used by the bot. Requires NumPy: pip install numpy
+Entry points: scripts/rpg_balance_sim.py (CLI) and
+scripts/benchmarks/rpg_balance_sim.py (benchmark suite).
+"""
+
+import math
+import random
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from modules import rpg_system
+from modules import rpg_combat_enhancements as combat_fx
+
+# Player stat allocation per build: relative weights for the 5 skill points per level
+BUILDS = {
+    'balanced': {'strength': 1, 'dexterity': 1, 'defense': 1, 'speed': 1},
+    'warrior': {'strength': 3, 'defense': 1},
+    'tank': {'defense': 3, 'strength': 1},
+    'rogue': {'strength': 1, 'dexterity': 2, 'speed': 2},
+}
+
+MAX_TURNS = 100  # Fights still running after this many turns count as timeouts
+SECONDS_PER_TURN = 4.0  # Wall-clock time a player spends per combat turn
+SECONDS_PER_FIGHT = 20.0  # Starting an adventure, reading the encounter, collecting rewards
+
+# Actions that replace the monster's normal attack (see do_monster_action)
+_REPLACING_ABILITY_TYPES = ('damage_boost', 'lifesteal', 'multi_hit', 'cleanse')
+_CLEANSED_DEBUFFS = ['burn', 'poison', 'darkness', 'slow', 'weakness', 'curse', 'bleed']
+_HAS_DEBUFF_EFFECTS = ['burn', 'poison', 'darkness', 'slow', 'weakness', 'curse', 'bleed', 'doomed']
+
+_STAT_MODIFIERS = ('atk_bonus', 'atk_reduction', 'def_bonus', 'def_reduction', 'speed_bonus', 'speed_reduction')
+
+
+# ============================================================================
+# Matchup setup
+# ============================================================================
+
+def build_player(level: int, build: str = 'balanced', skill_path: Optional[str] = None,
+                 weapon_damage: int = 0) -> dict:
+    """
+    Creates a combat snapshot (same shape as load_combat_snapshot) for a player
+    of the given level who spent all skill points according to a build.
+    With skill_path, the path's 'stat' skills are unlocked first (cheapest tier first).
+    """
+    weights = BUILDS[build]
+    points = (level - 1) * 5
+
+    unlocked = []
+    if skill_path:
+        path_skills = rpg_system.SKILL_TREE[skill_path]['skills']
+        stat_skills = sorted(
+            (skill.get('tier', ''), key, skill.get('cost', 1))
+            for key, skill in path_skills.items() if skill.get('type') == 'stat'
+        )
+        for _, key, cost in stat_skills:
+            if cost <= points:
+                unlocked.append(key)
+                points -= cost
+    skill_tree_bonuses = rpg_system._sum_skill_tree_bonuses({skill_path: unlocked} if skill_path else {})
+
+    # Largest-remainder split of the remaining points
+    total_weight = sum(weights.values())
+    shares = {stat: points * weight / total_weight for stat, weight in weights.items()}
+    allocation = {stat: int(share) for stat, share in shares.items()}
+    leftover = points - sum(allocation.values())
+    for stat in sorted(shares, key=lambda s: shares[s] - allocation[s], reverse=True)[:leftover]:
+        allocation[stat] += 1
+
+    max_health = 100 + 20 * (level - 1) + skill_tree_bonuses.get('max_health', 0)
+    player = {
+        'level': level,
+        'health': max_health,
+        'max_health': max_health,
+        'strength': 10 + allocation.get('strength', 0),
+        'dexterity': 10 + allocation.get('dexterity', 0),
+        'defense': 10 + allocation.get('defense', 0),
+        'speed': 10 + allocation.get('speed', 0),
+    }
+    return {
+        'player': player,
+        'weapon_damage_bonus': weapon_damage,
+        'weapon_damage_type': 'physical',
+        'skill_tree_bonuses': skill_tree_bonuses,
+        'base_stats': {
+            'strength': player['strength'] + weapon_damage + skill_tree_bonuses.get('strength', 0),
+            'defense': player['defense'] + skill_tree_bonuses.get('defense', 0),
+            'speed': player['speed'] + skill_tree_bonuses.get('speed', 0),
+            'dexterity': player['dexterity'] + skill_tree_bonuses.get('dexterity', 0),
+        },
+    }
+
+
+def load_monsters(world: Optional[str] = None, min_level: int = 1, max_level: int = 100,
+                  names: Optional[List[str]] = None) -> List[dict]:
+    """Returns monster templates from the seed data (rpg_monsters_data), filtered."""
+    from modules.rpg_monsters_data import get_base_monsters_data
+
+    monsters = []
+    for monster in get_base_monsters_data():
+        if names:
+            if monster['name'] not in names:
+                continue
+        elif (world and monster['world'] != world) or not min_level <= monster['level'] <= max_level:
+            continue
+        monster = dict(monster)
+        monster['abilities'] = list(monster.get('abilities') or [])
+        monster['loot_table'] = dict(monster.get('loot_table') or {})
+        monsters.append(monster)
+    return monsters
+
+
+# ============================================================================
+# Vectorized engine
+# ============================================================================
+
+def _calculate_damage(rng, attack, defense, dexterity, ai_desperate=None):
+    """Array version of rpg_system.calculate_damage. Damage is 0 where the attack was dodged."""
+    n = len(attack)
+    hit_chance = 0.85 + dexterity / 100.0
+    crit_chance = 0.10 + dexterity / 200.0
+    if ai_desperate is not None:
+        hit_chance = hit_chance + 0.1 * ai_desperate
+        crit_chance = crit_chance + 0.15 * ai_desperate
+    hit = rng.random(n) <= np.minimum(0.95, hit_chance)
+
+    after_defense = np.maximum(1.0, attack * (100.0 / (100.0 + defense)))
+    damage = np.floor(after_defense * rng.uniform(0.70, 1.30, n))
+    crit = rng.random(n) < np.minimum(0.30, crit_chance)
+    damage = np.where(crit, np.floor(damage * 1.75), damage)
+    damage = np.maximum(1, damage).astype(np.int64)
+    return np.where(hit, damage, 0)
+
+
+def _effect_keys(abilities: list, effect_type: str) -> List[str]:
+    """
+    Status effects one side can end up with: only these get a stacks/duration
+    column, which keeps the per-turn work proportional to the matchup.
+    """
+    keys = {ability.get('status_effect') for ability in abilities if ability.get('effect_type') == effect_type}
+    return [key for key in rpg_system.STATUS_EFFECTS if key in keys]
+
+
+def _effective_stats(strength, defense, speed, stacks, keys):
+    """Array version of get_effective_stats; column i of `stacks` holds effect keys[i]."""
+    strength, defense, speed = strength.copy(), defense.copy(), speed.copy()
+    for i, key in enumerate(keys):
+        effect = rpg_system.STATUS_EFFECTS[key]
+        if not any(mod in effect for mod in _STAT_MODIFIERS):
+            continue
+        active = stacks[:, i] > 0
+        if not active.any():
+            continue
+        count = stacks[:, i]
+        if 'atk_bonus' in effect:
+            strength = np.where(active, np.floor(strength * (1 + effect['atk_bonus'] * count)), strength)
+        if 'atk_reduction' in effect:
+            strength = np.where(active, np.maximum(1, np.floor(strength * (1 - effect['atk_reduction'] * count))), strength)
+        if 'def_bonus' in effect:
+            defense = np.where(active, np.floor(defense * (1 + effect['def_bonus'] * count)), defense)
+        if 'def_reduction' in effect:
+            defense = np.where(active, np.maximum(0, np.floor(defense * (1 - effect['def_reduction'] * count))), defense)
+        if 'speed_bonus' in effect:
+            speed = np.where(active, speed + np.floor(effect['speed_bonus'] * count), speed)
+        if 'speed_reduction' in effect:
+            speed = np.where(active, np.maximum(1, speed - np.floor(effect['speed_reduction'] * count)), speed)
+    return strength, defense, speed
+
+
+def _apply_status(stacks, duration, keys, mask, effect_key):
+    """Array version of apply_status_effect (one stack) for the rows in mask."""
+    effect = rpg_system.STATUS_EFFECTS.get(effect_key)
+    if not effect or not mask.any():
+        return
+    i = keys.index(effect_key)
+    has = stacks[:, i] > 0
+    fresh = mask & ~has
+    stacks[fresh, i] = 1
+    duration[fresh, i] = effect['duration']
+    if effect.get('stackable', False):
+        grow = mask & has & (stacks[:, i] < effect.get('max_stacks', 3))
+        stacks[grow, i] += 1
+        duration[grow, i] = effect['duration']
+    else:
+        duration[mask & has, i] = effect['duration']
+
+
+def _process_status(health, max_health, stacks, duration, keys):
+    """Array version of process_status_effects. Returns the health change and expires effects."""
+    change = np.zeros(len(health), dtype=np.int64)
+    for i, key in enumerate(keys):
+        effect = rpg_system.STATUS_EFFECTS[key]
+        active = stacks[:, i] > 0
+        if not active.any():
+            continue
+        if 'dmg_per_turn' in effect:
+            change -= np.where(active, effect['dmg_per_turn'] * stacks[:, i], 0)
+        if 'heal_per_turn' in effect:
+            heal = np.minimum(effect['heal_per_turn'] * stacks[:, i], max_health - health)
+            change += np.where(active & (heal > 0), heal, 0)
+    active = stacks > 0
+    duration[active] -= 1
+    expired = active & (duration <= 0)
+    stacks[expired] = 0
+    duration[expired] = 0
+    return change
+
+
+def _immobilized(rng, stacks, keys):
+    """Array version of is_immobilized."""
+    immobile = np.zeros(len(stacks), dtype=bool)
+    for i, key in enumerate(keys):
+        if rpg_system.STATUS_EFFECTS[key].get('immobilize', False):
+            immobile |= stacks[:, i] > 0
+    if 'static' in keys:
+        static_stacks = stacks[:, keys.index('static')]
+        static_chance = rpg_system.STATUS_EFFECTS['static'].get('paralyze_chance', 0.3) * static_stacks
+        immobile |= (static_stacks > 0) & (rng.random(len(stacks)) < static_chance)
+    return immobile
+
+
+def _ability_conditions(condition, s, keys, profile, turn):
+    """Array version of check_ai_condition."""
+    monster_pct = s['m_hp'] / np.maximum(1, s['m_max'])
+    player_pct = s['p_hp'] / max(1, profile['max_health'])
+    if condition == 'low_health':
+        return monster_pct < 0.5
+    if condition == 'critical_health':
+        return monster_pct < 0.25
+    if condition == 'low_health_or_start':
+        return (monster_pct < 0.5) | (turn <= 1)
+    if condition == 'player_low_health':
+        return player_pct < 0.3
+    if condition == 'player_high_damage':
+        return profile['strength'] > s['m_str'] * 1.2
+    if condition == 'player_faster':
+        return profile['speed'] > s['m_spd']
+    if condition == 'player_high_accuracy':
+        return profile['dexterity'] > s['m_spd']
+    if condition == 'player_high_stats':
+        return profile['strength'] + profile['defense'] + profile['speed'] > (s['m_str'] + s['m_def'] + s['m_spd']) * 1.1
+    if condition == 'has_debuff':
+        has = np.zeros(len(s['m_hp']), dtype=bool)
+        for i, key in enumerate(keys['monster']):
+            if key in _HAS_DEBUFF_EFFECTS:
+                has |= s['m_stk'][:, i] > 0
+        return has
+    return np.ones(len(s['m_hp']), dtype=bool)
+
+
+def _choose_abilities(rng, abilities, s, keys, profile, turn, acting):
+    """
+    Array version of try_monster_ability: abilities are tried in a random order and
+    the first one whose AI condition holds and whose trigger roll succeeds is used.
+    Returns the index into `abilities` per row, or -1.
+    """
+    n = len(acting)
+    if not abilities:
+        return np.full(n, -1)
+    usable = np.stack([
+        _ability_conditions(ability.get('ai_condition', 'always'), s, keys, profile, turn)
+        & (rng.random(n) < ability.get('trigger_chance', 0.2))
+        for ability in abilities
+    ], axis=1)
+    order = np.argsort(rng.random((n, len(abilities))), axis=1)
+    usable_in_order = np.take_along_axis(usable, order, axis=1)
+    first = usable_in_order.argmax(axis=1)
+    chosen = order[np.arange(n), first]
+    return np.where(acting & usable_in_order.any(axis=1), chosen, -1)
+
+
+def _player_attack(rng, s, mask, p_str, p_dex, m_def):
+    """The 'attack' branch of do_player_action with combo and rage."""
+    if not mask.any():
+        return
+    combo_bonus = np.select(
+        [s['combo'] >= 15, s['combo'] >= 10, s['combo'] >= 7, s['combo'] >= 5, s['combo'] >= 3],
+        [1.5, 1.35, 1.25, 1.15, 1.08], 1.0
+    )
+    raging = mask & (s['rage'] >= combat_fx.MAX_RAGE)
+    s['rage'][raging] = 0
+    multiplier = combo_bonus * np.where(raging, 1.5, 1.0)
+    damage = _calculate_damage(rng, np.floor(p_str * multiplier), m_def, p_dex)
+    damage = np.where(mask, damage, 0)
+    hit = damage > 0
+    s['combo'] = np.where(mask, np.where(hit, s['combo'] + 1, 0), s['combo'])
+    s['rage'] = np.where(hit, np.minimum(combat_fx.MAX_RAGE, s['rage'] + 5), s['rage'])
+    s['m_hp'] -= damage
+    s['damage_dealt'] += damage
+
+
+def _monster_action(rng, s, keys, mask, abilities, profile, turn, m_stats, p_def):
+    """do_monster_action for the rows in mask. Returns the damage dealt to the player."""
+    n = len(mask)
+    monster_damage = np.zeros(n, dtype=np.int64)
+    m_str, m_def, m_spd = m_stats
+    acting = mask & (s['m_hp'] > 0)
+    acting &= ~_immobilized(rng, s['m_stk'], keys['monster'])
+    if not acting.any():
+        return monster_damage
+
+    # Enrage at 30% health
+    s['enraged'] |= acting & (s['m_hp'] / np.maximum(1, s['m_max']) <= 0.30)
+    desperate = s['p_hp'] / profile['max_health'] < 0.3
+
+    chosen = _choose_abilities(rng, abilities, s, keys, profile, turn, acting)
+    normal_attack = acting.copy()
+    for k, ability in enumerate(abilities):
+        use = chosen == k
+        if not use.any():
+            continue
+        s['abilities_used'] += use
+        # update_combat_stats(ability_used=...) records no player damage, which breaks the combo
+        s['combo'][use] = 0
+        effect_type = ability.get('effect_type')
+        if effect_type == 'status':
+            _apply_status(s['p_stk'], s['p_dur'], keys['player'], use, ability.get('status_effect'))
+        elif effect_type == 'self_buff':
+            _apply_status(s['m_stk'], s['m_dur'], keys['monster'], use, ability.get('status_effect'))
+        elif effect_type == 'damage_boost':
+            multiplier = ability.get('damage_multiplier', 2.0) * np.where(s['enraged'], 1.2, 1.0)
+            damage = _calculate_damage(rng, np.floor(m_str * multiplier), p_def, m_spd, desperate)
+            damage = np.where(use, damage, 0)
+            monster_damage += damage
+            s['rage'] = np.minimum(combat_fx.MAX_RAGE, s['rage'] + damage // 5)
+        elif effect_type == 'lifesteal':
+            damage = _calculate_damage(rng, m_str, p_def, m_spd, desperate)
+            damage = np.where(use, damage, 0)
+            monster_damage += damage
+            heal = np.floor(damage * ability.get('lifesteal_percent', 0.5)).astype(np.int64)
+            s['m_hp'] = np.where(use, np.minimum(s['m_max'], s['m_hp'] + heal), s['m_hp'])
+        elif effect_type == 'multi_hit':
+            for _ in range(ability.get('hit_count', 2)):
+                damage = _calculate_damage(rng, np.floor(m_str * ability.get('damage_per_hit', 0.5)),
+                                           p_def, m_spd, desperate)
+                monster_damage += np.where(use, damage, 0)
+        elif effect_type == 'cleanse':
+            for i, key in enumerate(keys['monster']):
+                if key in _CLEANSED_DEBUFFS:
+                    s['m_stk'][use, i] = 0
+                    s['m_dur'][use, i] = 0
+        if effect_type in _REPLACING_ABILITY_TYPES:
+            normal_attack &= ~use
+
+    if normal_attack.any():
+        damage = _calculate_damage(rng, m_str, p_def, m_spd, desperate)
+        monster_damage += np.where(normal_attack, damage, 0)
+    return monster_damage
+
+
+def simulate_vectorized(snapshot: dict, template: dict, fights: int, seed: Optional[int] = None,
+                        max_turns: int = MAX_TURNS) -> dict:
+    """
+    Simulates `fights` fights of one matchup. Returns per-fight arrays:
+    'outcome' (1 won, 0 lost, -1 timeout), 'turns', 'player_hp', 'damage_dealt', 'abilities_used'.
+    """
+    rng = np.random.default_rng(seed)
+    profile = snapshot['player']
+    base = snapshot['base_stats']
+    abilities = [rpg_system.MONSTER_ABILITIES[key] for key in template.get('abilities', [])
+                 if key in rpg_system.MONSTER_ABILITIES]
+    keys = {'player': _effect_keys(abilities, 'status'), 'monster': _effect_keys(abilities, 'self_buff')}
+    low, high = rpg_system.MONSTER_STAT_VARIATION
+
+    def varied(stat):
+        return np.floor(template[stat] * rng.uniform(low, high, fights))
+
+    m_hp = varied('health').astype(np.int64)
+    s = {
+        'id': np.arange(fights),
+        'p_hp': np.full(fights, profile['max_health'], dtype=np.int64),
+        'm_hp': m_hp,
+        'm_max': m_hp.copy(),
+        'm_str': varied('strength'),
+        'm_def': varied('defense'),
+        'm_spd': varied('speed'),
+        'combo': np.zeros(fights, dtype=np.int64),
+        'rage': np.zeros(fights, dtype=np.int64),
+        'enraged': np.zeros(fights, dtype=bool),
+        'damage_dealt': np.zeros(fights, dtype=np.int64),
+        'abilities_used': np.zeros(fights, dtype=np.int64),
+        'p_stk': np.zeros((fights, len(keys['player'])), dtype=np.int64),
+        'p_dur': np.zeros((fights, len(keys['player'])), dtype=np.int64),
+        'm_stk': np.zeros((fights, len(keys['monster'])), dtype=np.int64),
+        'm_dur': np.zeros((fights, len(keys['monster'])), dtype=np.int64),
+    }
+    result = {
+        'outcome': np.full(fights, -1, dtype=np.int8),
+        'turns': np.full(fights, max_turns, dtype=np.int64),
+        'player_hp': np.zeros(fights, dtype=np.int64),
+        'damage_dealt': np.zeros(fights, dtype=np.int64),
+        'abilities_used': np.zeros(fights, dtype=np.int64),
+    }
+    max_health = profile['max_health']
+
+    for turn in range(1, max_turns + 1):
+        n = len(s['id'])
+        if not n:
+            break
+
+        # Stats are taken before this turn's effects tick, as in _resolve_combat_turn
+        p_str, p_def, p_spd = _effective_stats(
+            np.full(n, float(base['strength'])), np.full(n, float(base['defense'])),
+            np.full(n, float(base['speed'])), s['p_stk'], keys['player'])
+        m_stats = _effective_stats(s['m_str'], s['m_def'], s['m_spd'], s['m_stk'], keys['monster'])
+        p_dex = np.full(n, float(base.get('dexterity', rpg_system.DEFAULT_DEXTERITY)))
+
+        p_change = _process_status(s['p_hp'], max_health, s['p_stk'], s['p_dur'], keys['player'])
+        m_change = _process_status(s['m_hp'], s['m_max'], s['m_stk'], s['m_dur'], keys['monster'])
+        s['p_hp'] = np.clip(s['p_hp'] + p_change, 0, max_health)
+        s['m_hp'] = np.maximum(0, s['m_hp'] + m_change)
+
+        lost = s['p_hp'] <= 0
+        won = ~lost & (s['m_hp'] <= 0)
+        fighting = ~(lost | won)
+
+        immobile = fighting & _immobilized(rng, s['p_stk'], keys['player'])
+        s['combo'][immobile] = 0
+        player_first = p_spd >= m_stats[2]
+
+        # Faster player attacks, then the monster answers if it survived
+        first = fighting & player_first
+        _player_attack(rng, s, first & ~immobile, p_str, p_dex, m_stats[1])
+        won |= first & (s['m_hp'] <= 0)
+        monster_turn = fighting & ~won
+        monster_damage = _monster_action(rng, s, keys, monster_turn, abilities, profile, turn, m_stats, p_def)
+        s['p_hp'] = np.where(monster_turn, np.maximum(0, s['p_hp'] - monster_damage), s['p_hp'])
+        lost |= monster_turn & (s['p_hp'] <= 0)
+
+        # Slower player attacks after the monster if still standing
+        second = fighting & ~player_first & ~lost
+        _player_attack(rng, s, second & ~immobile, p_str, p_dex, m_stats[1])
+        won |= second & (s['m_hp'] <= 0)
+
+        done = won | lost
+        if done.any():
+            ids = s['id'][done]
+            result['outcome'][ids] = np.where(won[done], 1, 0)
+            result['turns'][ids] = turn
+            for key in ('damage_dealt', 'abilities_used'):
+                result[key][ids] = s[key][done]
+            result['player_hp'][ids] = s['p_hp'][done]
+            keep = ~done
+            s = {key: value[keep] for key, value in s.items()}
+
+    # Timeouts keep the values they had when the turn limit was hit
+    if len(s['id']):
+        for key in ('damage_dealt', 'abilities_used'):
+            result[key][s['id']] = s[key]
+        result['player_hp'][s['id']] = s['p_hp']
+    return result
+
+
+# ============================================================================
+# Reference engine (the real combat code, one fight at a time)
+# ============================================================================
+
+async def simulate_exact(snapshot: dict, template: dict, fights: int, seed: Optional[int] = None,
+                         max_turns: int = MAX_TURNS, with_loot: bool = True) -> dict:
+    """Same output as simulate_vectorized, produced by _resolve_combat_turn. Adds 'loot' counts."""
+    if seed is not None:
+        random.seed(seed)
+    profile = snapshot['player']
+    result = {
+        'outcome': np.full(fights, -1, dtype=np.int8),
+        'turns': np.full(fights, max_turns, dtype=np.int64),
+        'player_hp': np.zeros(fights, dtype=np.int64),
+        'damage_dealt': np.zeros(fights, dtype=np.int64),
+        'abilities_used': np.zeros(fights, dtype=np.int64),
+        'loot': {},
+    }
+    for i in range(fights):
+        fight_snapshot = dict(snapshot, player=dict(profile, health=profile['max_health']))
+        monster = rpg_system._roll_monster_stats(template)
+        combat_state = None
+        for turn in range(1, max_turns + 1):
+            turn_result = rpg_system._resolve_combat_turn(fight_snapshot, monster, 'attack', None, combat_state)
+            combat_state = turn_result['combat_state']
+            if turn_result['combat_over']:
+                result['outcome'][i] = 1 if turn_result['player_won'] else 0
+                result['turns'][i] = turn
+                break
+        result['player_hp'][i] = fight_snapshot['player']['health']
+        result['damage_dealt'][i] = combat_state.get('total_player_damage', 0)
+        result['abilities_used'][i] = len(combat_state.get('abilities_used', []))
+        if with_loot and result['outcome'][i] == 1:
+            for drop in await rpg_system.roll_loot_drops(None, monster, profile['level']):
+                result['loot'][drop['name']] = result['loot'].get(drop['name'], 0) + 1
+    return result
+
+
+# ============================================================================
+# Reporting
+# ============================================================================
+
+def roll_loot_counts(template: dict, player_level: int, wins: int, seed: Optional[int] = None) -> Dict[str, int]:
+    """
+    Loot drops over `wins` victories. Each entry of roll_loot_drops is an
+    independent roll, so its total is Binomial(wins, drop_rate).
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        name: int(rng.binomial(wins, drop_rate))
+        for name, _, _, drop_rate in rpg_system._loot_drop_rates(template.get('loot_table') or {}, player_level)
+    }
+
+
+def summarize(snapshot: dict, template: dict, result: dict, loot: Optional[Dict[str, int]] = None) -> dict:
+    """Win rates, turns-to-kill, XP/gold per hour and loot per win for one matchup."""
+    outcome, turns = result['outcome'], result['turns']
+    fights = len(outcome)
+    won = outcome == 1
+    wins = int(won.sum())
+    hours = float((turns * SECONDS_PER_TURN + SECONDS_PER_FIGHT).sum()) / 3600
+    kill_turns = turns[won]
+    loot = loot if loot is not None else result.get('loot', {})
+    return {
+        'monster': template['name'],
+        'monster_level': template['level'],
+        'world': template['world'],
+        'player_level': snapshot['player']['level'],
+        'fights': fights,
+        'win_rate': wins / fights,
+        'loss_rate': float((outcome == 0).sum()) / fights,
+        'timeout_rate': float((outcome == -1).sum()) / fights,
+        'turns_to_kill_mean': float(kill_turns.mean()) if wins else None,
+        'turns_to_kill_p50': float(np.percentile(kill_turns, 50)) if wins else None,
+        'turns_to_kill_p95': float(np.percentile(kill_turns, 95)) if wins else None,
+        'hp_left_on_win': float(result['player_hp'][won].mean() / snapshot['player']['max_health']) if wins else None,
+        'xp_per_hour': wins * template['xp_reward'] / hours if hours else 0.0,
+        'gold_per_hour': wins * template['gold_reward'] / hours if hours else 0.0,
+        'loot_per_win': {name: count / wins for name, count in loot.items()} if wins else {},
+    }
+
+
+def run_matchup(snapshot: dict, template: dict, fights: int, seed: Optional[int] = None) -> dict:
+    """Vectorized simulation plus loot rolls, summarized. Adds the elapsed time."""
+    start = time.perf_counter()
+    result = simulate_vectorized(snapshot, template, fights, seed)
+    wins = int((result['outcome'] == 1).sum())
+    loot = roll_loot_counts(template, snapshot['player']['level'], wins, None if seed is None else seed + 1)
+    summary = summarize(snapshot, template, result, loot)
+    summary['elapsed_seconds'] = time.perf_counter() - start
+    return summary
+
+
+def standard_error(rate: float, fights: int) -> float:
+    """Standard error of a simulated win rate, for comparing two engines."""
+    return math.sqrt(max(rate * (1 - rate), 1e-12) / fights)
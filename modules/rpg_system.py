@@ -15,11 +15,16 @@ ENHANCED: Combat system now includes strategic elements, animations, and enterta
 """
 
 import discord
+import os
 import random
 import json
+import time
+from bisect import bisect_right
+from collections import Counter
 from datetime import datetime, timezone
 from typing import Optional, Dict, List, Tuple
 from modules.logger_utils import bot_logger as logger
+from modules.cache import TTLCache
 from modules.rpg_items_data import EXTENDED_WEAPONS, EXTENDED_SKILLS
 from modules import rpg_combat_enhancements as combat_fx
 
@@ -2368,15 +2373,9 @@ async def gain_xp(db_helpers, user_id: int, xp_amount: int):
         if not player:
             return None
         
-        new_xp = player['xp'] + xp_amount
         current_level = player['level']
-        new_level = current_level
-        skill_points_gained = 0
-        
         # Check for level ups
-        while new_xp >= calculate_xp_for_level(new_level + 1):
-            new_level += 1
-            skill_points_gained += 5
+        new_xp, new_level, skill_points_gained = _apply_level_ups(player['xp'], current_level, xp_amount)
         
         # Update player
         conn = db_helpers.db_pool.get_connection()
@@ -2427,6 +2426,10 @@ async def initialize_default_monsters(db_helpers):
     # Import monster data from separate module (lazy import to avoid circular dependencies)
     from modules.rpg_monsters_data import get_base_monsters_data
     
+    # Called before every adventure; a fresh catalog already proves the table is seeded
+    if _monster_catalog.size >= 20 and not _monster_catalog.is_stale():
+        return
+    
     try:
         if not db_helpers.db_pool:
             logger.warning("Database pool not available for monster initialization")
@@ -2493,6 +2496,7 @@ async def initialize_default_monsters(db_helpers):
                             logger.warning(f"Failed to insert monster {monster.get('name', 'Unknown')}: {e}")
                 
                 conn.commit()
+                mark_monster_catalog_dirty()
                 logger.info(f"Successfully initialized {inserted} monsters with loot tables ({failed} failed)")
             else:
                 logger.info(f"Monsters already initialized ({count} monsters)")
@@ -2504,154 +2508,237 @@ async def initialize_default_monsters(db_helpers):
 
 
 
-async def get_random_monster(db_helpers, player_level: int, world: str):
-    """
-    Get a random monster appropriate for player level and world.
-    Monster stats are varied by ±10-20% from base values for variety.
-    """
-    try:
-        if not db_helpers.db_pool:
+# Monster catalog - rpg_monsters is small and rarely edited, so it is loaded once
+# and fights pick from memory instead of running ORDER BY RAND() per encounter.
+# The web dashboard runs in its own process and touches the version file after
+# editing monsters; the bot reloads when the file's mtime changes.
+MONSTER_CATALOG_VERSION_FILE = 'config/rpg_monster_catalog.version'
+MONSTER_CATALOG_MAX_AGE = 3600  # Seconds before a reload even without a version change
+MONSTER_STAT_VARIATION = (0.85, 1.20)  # Asymmetric: up to 15% weaker or 20% stronger
+
+
+class _WeightedPicker:
+    """Constant-time weighted random choice (Vose's alias method), built once per bucket."""
+
+    def __init__(self, items: list, weights: list):
+        self.items = items
+        self.total_weight = float(sum(weights))
+        count = len(items)
+        self._prob = [1.0] * count
+        self._alias = list(range(count))
+        if not count or self.total_weight <= 0:
+            return
+
+        scaled = [weight * count / self.total_weight for weight in weights]
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self._prob[low] = scaled[low]
+            self._alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+
+    def pick(self):
+        index = random.randrange(len(self.items))
+        return self.items[index] if random.random() < self._prob[index] else self.items[self._alias[index]]
+
+
+class MonsterCatalog:
+    """In-memory copy of rpg_monsters indexed by (world, level), world, and level."""
+
+    def __init__(self):
+        self.size = 0
+        self.loaded_at = 0.0
+        self.version = None
+        self._by_world_level: Dict[Tuple[str, int], _WeightedPicker] = {}
+        self._by_world: Dict[str, _WeightedPicker] = {}
+        self._by_level: Dict[int, _WeightedPicker] = {}
+        self._all: Optional[_WeightedPicker] = None
+
+    @staticmethod
+    def _read_version():
+        try:
+            return os.stat(MONSTER_CATALOG_VERSION_FILE).st_mtime_ns
+        except OSError:
             return None
-        
+
+    def is_stale(self) -> bool:
+        if not self.loaded_at:
+            return True
+        if time.monotonic() - self.loaded_at > MONSTER_CATALOG_MAX_AGE:
+            return True
+        return self._read_version() != self.version
+
+    def invalidate(self):
+        self.loaded_at = 0.0
+
+    def load(self, db_helpers) -> bool:
+        """Reads all monsters and rebuilds the indexes. Returns False if the DB is unavailable."""
+        if not db_helpers.db_pool:
+            return False
         conn = db_helpers.db_pool.get_connection()
         if not conn:
-            return None
-        
+            return False
         cursor = conn.cursor(dictionary=True)
         try:
-            # Get monsters within 2 levels of player
-            min_level = max(1, player_level - 1)
-            max_level = player_level + 2
-            
-            cursor.execute("""
-                SELECT * FROM rpg_monsters
-                WHERE world = %s AND level BETWEEN %s AND %s
-                ORDER BY RAND()
-                LIMIT 1
-            """, (world, min_level, max_level))
-            
-            monster = cursor.fetchone()
-            
-            # Fallback 1: Try wider level range in same world
-            if not monster:
-                logger.warning(f"No monster found for world={world}, level {min_level}-{max_level}. Trying wider range...")
-                cursor.execute("""
-                    SELECT * FROM rpg_monsters
-                    WHERE world = %s
-                    ORDER BY RAND()
-                    LIMIT 1
-                """, (world,))
-                monster = cursor.fetchone()
-            
-            # Fallback 2: Try any world with similar level
-            if not monster:
-                logger.warning(f"No monster found in world={world}. Trying any world with similar level...")
-                cursor.execute("""
-                    SELECT * FROM rpg_monsters
-                    WHERE level BETWEEN %s AND %s
-                    ORDER BY RAND()
-                    LIMIT 1
-                """, (min_level, max_level))
-                monster = cursor.fetchone()
-            
-            # Fallback 3: Get ANY monster
-            if not monster:
-                logger.error("No monsters found with level criteria. Getting ANY monster...")
-                cursor.execute("""
-                    SELECT * FROM rpg_monsters
-                    ORDER BY RAND()
-                    LIMIT 1
-                """)
-                monster = cursor.fetchone()
-            
-            # If still no monster, database is empty - try to initialize
-            if not monster:
-                logger.error("No monsters in database at all! Attempting to initialize...")
-                new_conn = None
-                new_cursor = None
-                try:
-                    cursor.close()
-                    conn.close()
-                    await initialize_default_monsters(db_helpers)
-                    
-                    # Try one more time
-                    new_conn = db_helpers.db_pool.get_connection()
-                    if not new_conn:
-                        logger.error("Failed to get database connection after initialization")
-                        return None
-                    
-                    new_cursor = new_conn.cursor(dictionary=True)
-                    new_cursor.execute("""
-                        SELECT * FROM rpg_monsters
-                        ORDER BY RAND()
-                        LIMIT 1
-                    """)
-                    monster = new_cursor.fetchone()
-                    
-                    # Update conn and cursor references for cleanup in finally block
-                    conn = new_conn
-                    cursor = new_cursor
-                    
-                    if not monster:
-                        logger.error("Failed to initialize monsters! Database may have issues.")
-                        return None
-                except Exception as init_error:
-                    logger.error(f"Error during monster initialization: {init_error}", exc_info=True)
-                    # Clean up the new connection if it was created
-                    if new_cursor:
-                        try:
-                            new_cursor.close()
-                        except Exception as e:
-                            logger.debug(f"Error closing cursor during cleanup: {e}")
-                    if new_conn:
-                        try:
-                            new_conn.close()
-                        except Exception as e:
-                            logger.debug(f"Error closing connection during cleanup: {e}")
-                    return None
-            
-            if monster:
-                # Add stat variations (±15-20% from base stats)
-                # Note: Variation is asymmetric - monsters can be 15% weaker or 20% stronger
-                # This makes encounters slightly more challenging on average
-                variation_min = 0.85  # -15%
-                variation_max = 1.20  # +20%
-                
-                # Store original stats as 'base_stats' before variation
-                monster['base_health'] = monster['health']
-                monster['base_strength'] = monster['strength']
-                monster['base_defense'] = monster['defense']
-                monster['base_speed'] = monster['speed']
-                
-                # Apply random variations to each stat
-                monster['health'] = int(monster['health'] * random.uniform(variation_min, variation_max))
-                monster['strength'] = int(monster['strength'] * random.uniform(variation_min, variation_max))
-                monster['defense'] = int(monster['defense'] * random.uniform(variation_min, variation_max))
-                monster['speed'] = int(monster['speed'] * random.uniform(variation_min, variation_max))
-                
-                # Store max health for combat
-                monster['max_health'] = monster['health']
-                
-                # Parse abilities JSON if present
-                if monster.get('abilities'):
-                    if isinstance(monster['abilities'], str):
-                        monster['abilities'] = json.loads(monster['abilities'])
-                else:
-                    monster['abilities'] = []
-                
-                # Parse loot table JSON if present
-                if monster.get('loot_table'):
-                    if isinstance(monster['loot_table'], str):
-                        monster['loot_table'] = json.loads(monster['loot_table'])
-                else:
-                    monster['loot_table'] = {}
-                
-                logger.debug(f"Generated monster: {monster['name']} (Level {monster['level']}) with varied stats")
-            
-            return monster
+            version = self._read_version()
+            cursor.execute("SELECT * FROM rpg_monsters")
+            rows = cursor.fetchall()
         finally:
             cursor.close()
             conn.close()
+
+        groups = {'world_level': {}, 'world': {}, 'level': {}}
+        monsters = []
+        for row in rows:
+            row['abilities'] = _parse_json_column(row.get('abilities'), [])
+            row['loot_table'] = _parse_json_column(row.get('loot_table'), {})
+            weight = row.get('spawn_rate')
+            weight = 1.0 if weight is None else max(0.0, float(weight))
+            monsters.append((row, weight))
+            groups['world_level'].setdefault((row['world'], row['level']), []).append((row, weight))
+            groups['world'].setdefault(row['world'], []).append((row, weight))
+            groups['level'].setdefault(row['level'], []).append((row, weight))
+
+        def build(entries):
+            return _WeightedPicker([entry[0] for entry in entries], [entry[1] for entry in entries])
+
+        self._by_world_level = {key: build(entries) for key, entries in groups['world_level'].items()}
+        self._by_world = {key: build(entries) for key, entries in groups['world'].items()}
+        self._by_level = {key: build(entries) for key, entries in groups['level'].items()}
+        self._all = build(monsters)
+        self.size = len(monsters)
+        self.version = version
+        self.loaded_at = time.monotonic()
+        logger.info(f"[RPG] Monster catalog loaded: {self.size} monsters in {len(self._by_world)} worlds")
+        return True
+
+    @staticmethod
+    def _pick_from(pickers: list) -> Optional[dict]:
+        # Choose a bucket proportionally to its total weight, then pick inside it
+        pickers = [picker for picker in pickers if picker and picker.total_weight > 0]
+        if not pickers:
+            return None
+        chosen = random.choices(pickers, weights=[picker.total_weight for picker in pickers])[0]
+        return chosen.pick()
+
+    def pick(self, world: str, min_level: int, max_level: int) -> Optional[dict]:
+        """Weighted pick following the same fallback order as the old queries."""
+        levels = range(min_level, max_level + 1)
+        monster = self._pick_from([self._by_world_level.get((world, level)) for level in levels])
+
+        # Fallback 1: Any level in the same world
+        if not monster:
+            logger.warning(f"No monster found for world={world}, level {min_level}-{max_level}. Trying wider range...")
+            monster = self._pick_from([self._by_world.get(world)])
+
+        # Fallback 2: Any world with similar level
+        if not monster:
+            logger.warning(f"No monster found in world={world}. Trying any world with similar level...")
+            monster = self._pick_from([self._by_level.get(level) for level in levels])
+
+        # Fallback 3: ANY monster
+        if not monster:
+            logger.error("No monsters found with level criteria. Getting ANY monster...")
+            monster = self._pick_from([self._all])
+
+        return monster
+
+
+_monster_catalog = MonsterCatalog()
+
+
+def _parse_json_column(value, default):
+    if not value:
+        return default
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def mark_monster_catalog_dirty():
+    """
+    Signals every process holding a monster catalog to reload it.
+    Call after inserting, editing or deleting rows in rpg_monsters.
+    """
+    _monster_catalog.invalidate()
+    try:
+        os.makedirs(os.path.dirname(MONSTER_CATALOG_VERSION_FILE), exist_ok=True)
+        with open(MONSTER_CATALOG_VERSION_FILE, 'w') as f:
+            f.write(str(time.time()))
+    except OSError as e:
+        logger.warning(f"Could not update monster catalog version file: {e}")
+
+
+async def load_monster_catalog(db_helpers) -> bool:
+    """Loads (or reloads) the monster catalog. Called at startup."""
+    try:
+        return _monster_catalog.load(db_helpers)
+    except Exception as e:
+        logger.error(f"Error loading monster catalog: {e}", exc_info=True)
+        return False
+
+
+def get_monster_catalog_stats() -> dict:
+    return {
+        'monsters': _monster_catalog.size,
+        'age_seconds': round(time.monotonic() - _monster_catalog.loaded_at) if _monster_catalog.loaded_at else None,
+    }
+
+
+def _roll_monster_stats(template: dict) -> dict:
+    """Returns a fresh copy of a catalog monster with varied combat stats."""
+    monster = dict(template)
+    monster['abilities'] = list(template['abilities'])
+    monster['loot_table'] = dict(template['loot_table'])
+
+    variation_min, variation_max = MONSTER_STAT_VARIATION
+    for stat in ('health', 'strength', 'defense', 'speed'):
+        # Store original stats as base_* before variation
+        monster[f'base_{stat}'] = template[stat]
+        monster[stat] = int(template[stat] * random.uniform(variation_min, variation_max))
+
+    # Store max health for combat
+    monster['max_health'] = monster['health']
+    return monster
+
+
+async def get_random_monster(db_helpers, player_level: int, world: str):
+    """
+    Get a random monster appropriate for player level and world.
+    Monster stats are varied by ±10-20% from base values for variety.
+    Picks from the in-memory catalog; the database is only read when it is stale.
+    """
+    try:
+        if _monster_catalog.is_stale():
+            try:
+                loaded = _monster_catalog.load(db_helpers)
+            except Exception as e:
+                # Keep serving the previous catalog if the reload fails
+                logger.warning(f"Could not reload monster catalog: {e}")
+                loaded = False
+            if not loaded and not _monster_catalog.size:
+                return None
+
+        # Get monsters within 2 levels of player
+        min_level = max(1, player_level - 1)
+        max_level = player_level + 2
+        template = _monster_catalog.pick(world, min_level, max_level)
+
+        # If still no monster, database is empty - try to initialize
+        if not template:
+            logger.error("No monsters in database at all! Attempting to initialize...")
+            await initialize_default_monsters(db_helpers)
+            _monster_catalog.load(db_helpers)
+            template = _monster_catalog.pick(world, min_level, max_level)
+            if not template:
+                logger.error("Failed to initialize monsters! Database may have issues.")
+                return None
+
+        monster = _roll_monster_stats(template)
+        logger.debug(f"Generated monster: {monster['name']} (Level {monster['level']}) with varied stats")
+        return monster
     except Exception as e:
         logger.error(f"Error getting random monster: {e}", exc_info=True)
         return None
@@ -2742,6 +2829,29 @@ def calculate_damage(attacker_str: int, defender_def: int, attacker_dex: int, is
     return result
 
 
+def _loot_drop_rates(loot_table: dict, player_level: int) -> List[Tuple[str, float, str, float]]:
+    """
+    Normalizes a parsed loot table into (item_name, base_drop_rate, item_type, drop_rate)
+    tuples, where drop_rate includes the level-based luck bonus.
+    """
+    # Small luck bonus based on player level (configured by LUCK_BONUS constants)
+    luck_bonus = min(LUCK_BONUS_MAX, player_level * LUCK_BONUS_PER_LEVEL)
+    
+    rates = []
+    for item_name, drop_info in loot_table.items():
+        # Handle both simple float and dict formats
+        if isinstance(drop_info, dict):
+            base_drop_rate = drop_info.get('rate', DEFAULT_DROP_RATE)
+            item_type = drop_info.get('type', 'material')
+        else:
+            base_drop_rate = float(drop_info) if drop_info else DEFAULT_DROP_RATE
+            item_type = 'quest_item' if '(Quest)' in item_name else 'material'
+        
+        # Apply luck bonus
+        rates.append((item_name, base_drop_rate, item_type, min(1.0, base_drop_rate + luck_bonus)))
+    return rates
+
+
 async def roll_loot_drops(db_helpers, monster: dict, player_level: int) -> list:
     """
     Roll for loot drops from a defeated monster based on its loot table.
@@ -2776,22 +2886,7 @@ async def roll_loot_drops(db_helpers, monster: dict, player_level: int) -> list:
                 return []
         
         dropped_items = []
-        
-        # Small luck bonus based on player level (configured by LUCK_BONUS constants)
-        luck_bonus = min(LUCK_BONUS_MAX, player_level * LUCK_BONUS_PER_LEVEL)
-        
-        for item_name, drop_info in loot_table.items():
-            # Handle both simple float and dict formats
-            if isinstance(drop_info, dict):
-                base_drop_rate = drop_info.get('rate', DEFAULT_DROP_RATE)
-                item_type = drop_info.get('type', 'material')
-            else:
-                base_drop_rate = float(drop_info) if drop_info else DEFAULT_DROP_RATE
-                item_type = 'quest_item' if '(Quest)' in item_name else 'material'
-            
-            # Apply luck bonus
-            drop_rate = min(1.0, base_drop_rate + luck_bonus)
-            
+        for item_name, base_drop_rate, item_type, drop_rate in _loot_drop_rates(loot_table, player_level):
             # Roll for drop
             if random.random() < drop_rate:
                 dropped_items.append({
@@ -2807,6 +2902,182 @@ async def roll_loot_drops(db_helpers, monster: dict, player_level: int) -> list:
         return []
 
 
+ITEM_DEFINITIONS_VERSION_FILE = 'config/rpg_items.version'
+LOOT_ITEM_ID_CACHE_TTL = 600  # Seconds a resolved loot item name -> id mapping is reused
+# rpg_items.name has no unique key, so concurrent creation of the same loot item is
+# serialized with a named lock (shared across connections and processes)
+LOOT_ITEM_CREATE_LOCK = 'sulfur_rpg_loot_item_create'
+LOOT_ITEM_CREATE_LOCK_TIMEOUT = 10
+
+# Loot item name -> (item id, item type); item ids never change while the row exists
+_loot_item_ids = TTLCache("rpg_loot_item_ids", max_size=2000, default_ttl=LOOT_ITEM_ID_CACHE_TTL)
+_item_definitions_version = None
+
+
+def _check_item_definitions_version():
+    """Drops cached item data (loot ids, daily shop) when another process signalled item changes."""
+    global _item_definitions_version
+    try:
+        version = os.stat(ITEM_DEFINITIONS_VERSION_FILE).st_mtime_ns
+    except OSError:
+        version = None
+    if version != _item_definitions_version:
+        _item_definitions_version = version
+        _loot_item_ids.invalidate_namespace('items')
+        _daily_shop.invalidate()
+
+
+def mark_item_definitions_dirty():
+    """
+    Drops cached loot item ids and the materialized daily shop and signals other
+    processes to do the same. Call after deleting or reseeding rows in rpg_items.
+    """
+    _loot_item_ids.invalidate_namespace('items')
+    _daily_shop.invalidate()
+    try:
+        os.makedirs(os.path.dirname(ITEM_DEFINITIONS_VERSION_FILE), exist_ok=True)
+        with open(ITEM_DEFINITIONS_VERSION_FILE, 'w') as f:
+            f.write(str(time.time()))
+    except OSError as e:
+        logger.warning(f"Could not update item definitions version file: {e}")
+
+
+def _select_loot_item_ids(cursor, names) -> dict:
+    """Looks up item names in rpg_items. Returns {name: (id, type)}, the oldest row winning for duplicates."""
+    placeholders = ", ".join(["%s"] * len(names))
+    cursor.execute(f"""
+        SELECT id, name, type FROM rpg_items WHERE name IN ({placeholders}) ORDER BY id
+    """, tuple(names))
+    found = {}
+    for row in cursor.fetchall():
+        found.setdefault(row['name'], (row['id'], row['type']))
+    return found
+
+
+def _create_loot_item(cursor, loot: dict, monster_name: str):
+    """Inserts an unknown loot item into rpg_items. Returns (item id, item type)."""
+    item_name = loot['name']
+    item_type = loot.get('item_type', 'material')
+    is_quest = loot.get('is_quest_item', False)
+    
+    if item_type in ('weapon', 'skill'):
+        # For weapons/skills dropped as loot, create with basic stats
+        # These are typically monster-specific variants
+        rarity = 'uncommon'  # Loot drops are at least uncommon
+        damage = 15 if item_type == 'weapon' else 20 if item_type == 'skill' else 0
+        price = 100 if item_type == 'weapon' else 80
+        
+        cursor.execute("""
+            INSERT INTO rpg_items 
+            (name, type, rarity, description, damage, price, is_quest_item, is_usable, is_sellable, required_level)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            item_name,
+            item_type,
+            rarity,
+            f'Von {monster_name} erbeutet',
+            damage,
+            price,
+            False,
+            True,  # Usable in combat
+            True,  # Can be sold
+            1      # Level 1 requirement for loot
+        ))
+        return cursor.lastrowid, item_type
+    
+    # Material or quest item
+    stored_type = 'quest_item' if is_quest else 'material'
+    cursor.execute("""
+        INSERT INTO rpg_items 
+        (name, type, rarity, description, price, is_quest_item, is_usable, is_sellable)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, (
+        item_name,
+        stored_type,
+        'common',
+        f'Von {monster_name} erbeutet',
+        QUEST_ITEM_BASE_PRICE if is_quest else random.randint(MATERIAL_ITEM_MIN_PRICE, MATERIAL_ITEM_MAX_PRICE),
+        is_quest,
+        False,  # Not usable in combat
+        not is_quest  # Quest items can't be sold
+    ))
+    return cursor.lastrowid, stored_type
+
+
+def _resolve_loot_item_ids(db_helpers, loot_items: list, monster_name: str) -> dict:
+    """
+    Maps loot item names to (item id, item type), creating unknown items in rpg_items.
+    
+    Known names are served from memory. Lookups and creations run on their own short
+    connection so they never hold locks inside a caller's transaction; creation is
+    serialized with a named lock and re-checks the table, so two victories dropping
+    the same new item cannot insert it twice.
+    """
+    _check_item_definitions_version()
+    resolved = {}
+    missing = {}
+    for loot in loot_items:
+        cached = _loot_item_ids.get('items', loot['name'])
+        if cached is not None:
+            resolved[loot['name']] = cached
+        else:
+            missing.setdefault(loot['name'], loot)
+    if not missing:
+        return resolved
+    
+    conn = db_helpers.db_pool.get_connection()
+    if not conn:
+        raise RuntimeError("Could not get a database connection to resolve loot items")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        found = _select_loot_item_ids(cursor, list(missing))
+        conn.commit()  # End the read snapshot so the re-check below sees rows committed meanwhile
+        
+        to_create = [name for name in missing if name not in found]
+        if to_create:
+            cursor.execute("SELECT GET_LOCK(%s, %s) AS acquired",
+                           (LOOT_ITEM_CREATE_LOCK, LOOT_ITEM_CREATE_LOCK_TIMEOUT))
+            if not cursor.fetchone()['acquired']:
+                raise RuntimeError("Timed out waiting for the loot item creation lock")
+            try:
+                found.update(_select_loot_item_ids(cursor, to_create))
+                for name in to_create:
+                    if name not in found:
+                        found[name] = _create_loot_item(cursor, missing[name], monster_name)
+                        logger.info(f"Created loot item '{name}' (id {found[name][0]})")
+                conn.commit()
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOOT_ITEM_CREATE_LOCK,))
+                cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    
+    for name, item in found.items():
+        _loot_item_ids.set('items', name, item)
+    resolved.update(found)
+    return resolved
+
+
+def _insert_loot_items(cursor, user_id: int, loot_items: list, item_ids: dict) -> list:
+    """
+    Adds loot to the player's inventory with a single multi-row upsert using the
+    caller's cursor. item_ids comes from _resolve_loot_item_ids. The caller commits.
+    Returns the added item names.
+    """
+    quantities = Counter(item_ids[loot['name']] for loot in loot_items)
+    placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(quantities))
+    params = []
+    for (item_id, item_type), quantity in quantities.items():
+        params.extend((user_id, item_id, item_type, quantity))
+    cursor.execute(f"""
+        INSERT INTO rpg_inventory (user_id, item_id, item_type, quantity)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)
+    """, tuple(params))
+    return [loot['name'] for loot in loot_items]
+
+
 async def add_loot_to_inventory(db_helpers, user_id: int, loot_items: list, monster_name: str = "Monster"):
     """
     Add dropped loot items to player's inventory.
@@ -2825,82 +3096,15 @@ async def add_loot_to_inventory(db_helpers, user_id: int, loot_items: list, mons
         if not db_helpers.db_pool or not loot_items:
             return True, []
         
+        item_ids = _resolve_loot_item_ids(db_helpers, loot_items, monster_name)
+        
         conn = db_helpers.db_pool.get_connection()
         if not conn:
             return False, []
         
         cursor = conn.cursor(dictionary=True)
-        added_items = []
-        
         try:
-            for loot in loot_items:
-                item_name = loot['name']
-                item_type = loot.get('item_type', 'material')
-                is_quest = loot.get('is_quest_item', False)
-                
-                # Check if item exists in rpg_items
-                cursor.execute("""
-                    SELECT id, type FROM rpg_items WHERE name = %s LIMIT 1
-                """, (item_name,))
-                
-                item_row = cursor.fetchone()
-                
-                if item_row:
-                    item_id = item_row['id']
-                    actual_type = item_row['type']
-                else:
-                    # Create the item based on its type
-                    if item_type in ('weapon', 'skill'):
-                        # For weapons/skills dropped as loot, create with basic stats
-                        # These are typically monster-specific variants
-                        rarity = 'uncommon'  # Loot drops are at least uncommon
-                        damage = 15 if item_type == 'weapon' else 20 if item_type == 'skill' else 0
-                        price = 100 if item_type == 'weapon' else 80
-                        
-                        cursor.execute("""
-                            INSERT INTO rpg_items 
-                            (name, type, rarity, description, damage, price, is_quest_item, is_usable, is_sellable, required_level)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        """, (
-                            item_name,
-                            item_type,
-                            rarity,
-                            f'Von {monster_name} erbeutet',
-                            damage,
-                            price,
-                            False,
-                            True,  # Usable in combat
-                            True,  # Can be sold
-                            1      # Level 1 requirement for loot
-                        ))
-                    else:
-                        # Material or quest item
-                        cursor.execute("""
-                            INSERT INTO rpg_items 
-                            (name, type, rarity, description, price, is_quest_item, is_usable, is_sellable)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        """, (
-                            item_name,
-                            'quest_item' if is_quest else 'material',
-                            'common',
-                            f'Von {monster_name} erbeutet',
-                            QUEST_ITEM_BASE_PRICE if is_quest else random.randint(MATERIAL_ITEM_MIN_PRICE, MATERIAL_ITEM_MAX_PRICE),
-                            is_quest,
-                            False,  # Not usable in combat
-                            not is_quest  # Quest items can't be sold
-                        ))
-                    item_id = cursor.lastrowid
-                    actual_type = item_type
-                
-                # Add to inventory
-                cursor.execute("""
-                    INSERT INTO rpg_inventory (user_id, item_id, item_type, quantity)
-                    VALUES (%s, %s, %s, 1)
-                    ON DUPLICATE KEY UPDATE quantity = quantity + 1
-                """, (user_id, item_id, actual_type))
-                
-                added_items.append(item_name)
-            
+            added_items = _insert_loot_items(cursor, user_id, loot_items, item_ids)
             conn.commit()
             return True, added_items
         finally:
@@ -3404,225 +3608,288 @@ def get_effective_stats(base_stats: dict, effects: dict) -> dict:
     return stats
 
 
-async def process_combat_turn(db_helpers, user_id: int, monster: dict, action: str, skill_data: dict = None, combat_state: dict = None):
+async def load_combat_snapshot(db_helpers, user_id: int) -> Optional[dict]:
     """
-    Process a single combat turn with strategic AI and status effects.
-    
-    Args:
-        action: 'attack', 'run', 'skill', or 'defend'
-        skill_data: Skill item data when action is 'skill'
-        combat_state: Current combat state with status effects (optional)
+    Loads everything a fight needs about the player in one go: profile, equipped
+    weapon and skill tree bonuses, plus the resulting base combat stats.
     
     Returns:
-        dict with combat results
+        dict with 'player', 'weapon_damage_bonus', 'weapon_damage_type',
+        'skill_tree_bonuses' and 'base_stats', or None if the profile is missing
     """
-    try:
-        player = await get_player_profile(db_helpers, user_id)
-        if not player:
-            return {'error': 'Profil konnte nicht geladen werden.'}
-        
-        # Get equipped weapon for damage boost
-        equipped = await get_equipped_items(db_helpers, user_id)
-        weapon_damage_bonus = 0
-        weapon_damage_type = 'physical'
-        if equipped and equipped.get('weapon_id'):
-            weapon = await get_item_by_id(db_helpers, equipped['weapon_id'])
-            if weapon:
-                weapon_damage_bonus = weapon.get('damage', 0)
-                weapon_damage_type = weapon.get('damage_type', 'physical')
-        
-        # Get skill tree stat bonuses
-        skill_tree_bonuses = await calculate_skill_tree_bonuses(db_helpers, user_id)
-        
-        # Initialize combat state if not provided - now with enhanced tracking
-        if combat_state is None:
-            combat_state = combat_fx.create_enhanced_combat_state()
-        else:
-            # Ensure enhanced fields exist in existing combat state
-            combat_state.setdefault('combo_count', 0)
-            combat_state.setdefault('player_rage', 0)
-            combat_state.setdefault('monster_enraged', False)
-            combat_state.setdefault('total_player_damage', 0)
-            combat_state.setdefault('total_monster_damage', 0)
-            combat_state.setdefault('critical_hits_player', 0)
-            combat_state.setdefault('close_calls', 0)
-        
-        combat_state['turn_count'] = combat_state.get('turn_count', 0) + 1
-        turn_count = combat_state['turn_count']
-        
-        # Store previous health for close-call detection
-        previous_player_health = player['health']
-        monster_health_before = monster['health']
-        monster_max_health = monster.get('max_health', monster['health'])
-        
-        result = {
-            'player_action': action,
-            'player_damage': 0,
-            'monster_damage': 0,
-            'player_health': player['health'],
-            'monster_health': monster['health'],
-            'combat_over': False,
-            'player_won': False,
-            'rewards': None,
-            'messages': [],
-            'combat_state': combat_state,  # Return updated combat state
-            'monster_ability_used': None,
-            'status_applied': [],
-            'weapon_bonus': weapon_damage_bonus,  # Track weapon bonus for display
-            'weapon_damage_type': weapon_damage_type,  # Track damage type
-            'skill_tree_bonuses': skill_tree_bonuses  # Track skill tree bonuses
-        }
-        
-        # Calculate effective strength including weapon bonus AND skill tree bonuses
-        effective_strength = player['strength'] + weapon_damage_bonus + skill_tree_bonuses.get('strength', 0)
-        
-        # Get effective stats with status modifiers (including weapon bonus and skill tree bonuses)
-        player_stats = get_effective_stats({
-            'strength': effective_strength,
-            'defense': player['defense'] + skill_tree_bonuses.get('defense', 0),
-            'speed': player['speed'] + skill_tree_bonuses.get('speed', 0),
-            'dexterity': player.get('dexterity', DEFAULT_DEXTERITY) + skill_tree_bonuses.get('dexterity', 0)
-        }, combat_state.get('player_effects', {}))
-        
-        monster_stats = get_effective_stats({
-            'strength': monster['strength'],
-            'defense': monster['defense'],
-            'speed': monster['speed']
-        }, combat_state.get('monster_effects', {}))
-        
-        # Determine turn order based on speed
-        player_goes_first = player_stats['speed'] >= monster_stats['speed']
-        
-        # Process status effects at turn start for both combatants
-        player_effect_change, player_effect_msgs = process_status_effects(
-            combat_state.get('player_effects', {}),
-            player['health'],
-            player['max_health'],
-            "Du"
-        )
-        monster_effect_change, monster_effect_msgs = process_status_effects(
-            combat_state.get('monster_effects', {}),
-            monster['health'],
-            monster.get('max_health', monster['health']),
-            monster['name']
-        )
-        
-        # Apply status effect damage/healing
-        if player_effect_change != 0:
-            player['health'] = max(0, min(player['max_health'], player['health'] + player_effect_change))
-            result['player_health'] = player['health']
-            result['messages'].extend(player_effect_msgs)
-        
-        if monster_effect_change != 0:
-            monster['health'] = max(0, monster['health'] + monster_effect_change)
-            result['monster_health'] = monster['health']
-            result['messages'].extend(monster_effect_msgs)
-        
-        # Check if someone died from status effects
-        if player['health'] <= 0:
-            result['combat_over'] = True
-            result['player_won'] = False
-            result['messages'].append("💀 **Du wurdest durch Statuseffekte besiegt!**")
-            # Restore half health
-            conn = db_helpers.db_pool.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("UPDATE rpg_players SET health = FLOOR(max_health / 2) WHERE user_id = %s", (user_id,))
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return result
-        
-        if monster['health'] <= 0:
-            result['combat_over'] = True
-            result['player_won'] = True
-            result['messages'].append(f"🎉 **{monster['name']} durch Statuseffekte besiegt!**")
-            # Award rewards
-            xp_result = await gain_xp(db_helpers, user_id, monster['xp_reward'])
-            conn = db_helpers.db_pool.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("UPDATE rpg_players SET gold = gold + %s WHERE user_id = %s", (monster['gold_reward'], user_id))
-            conn.commit()
-            cursor.close()
-            conn.close()
-            result['rewards'] = {
-                'xp': monster['xp_reward'],
-                'gold': monster['gold_reward'],
-                'leveled_up': xp_result['leveled_up'] if xp_result else False,
-                'new_level': xp_result['new_level'] if xp_result and xp_result['leveled_up'] else None
-            }
-            return result
-        
-        # Check if player is immobilized
-        player_immobilized, immob_msg = is_immobilized(combat_state.get('player_effects', {}))
-        if player_immobilized and action != 'run':
-            result['messages'].append(f"⚠️ {immob_msg}")
-            action = 'skip'  # Force skip turn
-            combat_state['combo_count'] = 0  # Reset combo on forced skip
+    player = await get_player_profile(db_helpers, user_id)
+    if not player:
+        return None
+    
+    # Get equipped weapon for damage boost
+    equipped = await get_equipped_items(db_helpers, user_id)
+    weapon_damage_bonus = 0
+    weapon_damage_type = 'physical'
+    if equipped and equipped.get('weapon_id'):
+        weapon = await get_item_by_id(db_helpers, equipped['weapon_id'])
+        if weapon:
+            weapon_damage_bonus = weapon.get('damage', 0)
+            weapon_damage_type = weapon.get('damage_type', 'physical')
+    
+    # Get skill tree stat bonuses
+    skill_tree_bonuses = await calculate_skill_tree_bonuses(db_helpers, user_id)
+    
+    # Calculate effective strength including weapon bonus AND skill tree bonuses
+    base_stats = {
+        'strength': player['strength'] + weapon_damage_bonus + skill_tree_bonuses.get('strength', 0),
+        'defense': player['defense'] + skill_tree_bonuses.get('defense', 0),
+        'speed': player['speed'] + skill_tree_bonuses.get('speed', 0),
+        'dexterity': player.get('dexterity', DEFAULT_DEXTERITY) + skill_tree_bonuses.get('dexterity', 0)
+    }
+    
+    return {
+        'player': player,
+        'weapon_damage_bonus': weapon_damage_bonus,
+        'weapon_damage_type': weapon_damage_type,
+        'skill_tree_bonuses': skill_tree_bonuses,
+        'base_stats': base_stats
+    }
+
+
+def _resolve_combat_turn(snapshot: dict, monster: dict, action: str, skill_data: dict = None, combat_state: dict = None) -> dict:
+    """
+    Computes one combat turn without touching the database.
+    Mutates snapshot['player']['health'], monster['health'] and combat_state.
+    """
+    player = snapshot['player']
+    weapon_damage_bonus = snapshot['weapon_damage_bonus']
+    weapon_damage_type = snapshot['weapon_damage_type']
+    skill_tree_bonuses = snapshot['skill_tree_bonuses']
+    
+    # Initialize combat state if not provided - now with enhanced tracking
+    if combat_state is None:
+        combat_state = combat_fx.create_enhanced_combat_state()
+    else:
+        # Ensure enhanced fields exist in existing combat state
+        combat_state.setdefault('combo_count', 0)
+        combat_state.setdefault('player_rage', 0)
+        combat_state.setdefault('monster_enraged', False)
+        combat_state.setdefault('total_player_damage', 0)
+        combat_state.setdefault('total_monster_damage', 0)
+        combat_state.setdefault('critical_hits_player', 0)
+        combat_state.setdefault('close_calls', 0)
+    
+    combat_state['turn_count'] = combat_state.get('turn_count', 0) + 1
+    turn_count = combat_state['turn_count']
+    
+    # Store previous health for close-call detection
+    previous_player_health = player['health']
+    monster_health_before = monster['health']
+    monster_max_health = monster.get('max_health', monster['health'])
+    
+    result = {
+        'player_action': action,
+        'player_damage': 0,
+        'monster_damage': 0,
+        'player_health': player['health'],
+        'monster_health': monster['health'],
+        'combat_over': False,
+        'player_won': False,
+        'rewards': None,
+        'messages': [],
+        'combat_state': combat_state,  # Return updated combat state
+        'monster_ability_used': None,
+        'status_applied': [],
+        'weapon_bonus': weapon_damage_bonus,  # Track weapon bonus for display
+        'weapon_damage_type': weapon_damage_type,  # Track damage type
+        'skill_tree_bonuses': skill_tree_bonuses  # Track skill tree bonuses
+    }
+    
+    # Get effective stats with status modifiers (base stats already include weapon and skill tree bonuses)
+    player_stats = get_effective_stats(snapshot['base_stats'], combat_state.get('player_effects', {}))
+    
+    monster_stats = get_effective_stats({
+        'strength': monster['strength'],
+        'defense': monster['defense'],
+        'speed': monster['speed']
+    }, combat_state.get('monster_effects', {}))
+    
+    # Determine turn order based on speed
+    player_goes_first = player_stats['speed'] >= monster_stats['speed']
+    
+    # Process status effects at turn start for both combatants
+    player_effect_change, player_effect_msgs = process_status_effects(
+        combat_state.get('player_effects', {}),
+        player['health'],
+        player['max_health'],
+        "Du"
+    )
+    monster_effect_change, monster_effect_msgs = process_status_effects(
+        combat_state.get('monster_effects', {}),
+        monster['health'],
+        monster.get('max_health', monster['health']),
+        monster['name']
+    )
+    
+    # Apply status effect damage/healing
+    if player_effect_change != 0:
+        player['health'] = max(0, min(player['max_health'], player['health'] + player_effect_change))
+        result['player_health'] = player['health']
+        result['messages'].extend(player_effect_msgs)
+    
+    if monster_effect_change != 0:
+        monster['health'] = max(0, monster['health'] + monster_effect_change)
+        result['monster_health'] = monster['health']
+        result['messages'].extend(monster_effect_msgs)
+    
+    # Check if someone died from status effects
+    if player['health'] <= 0:
+        result['combat_over'] = True
+        result['player_won'] = False
+        result['messages'].append("💀 **Du wurdest durch Statuseffekte besiegt!**")
+        return result
+    
+    if monster['health'] <= 0:
+        result['combat_over'] = True
+        result['player_won'] = True
+        result['messages'].append(f"🎉 **{monster['name']} durch Statuseffekte besiegt!**")
+        return result
+    
+    # Check if player is immobilized
+    player_immobilized, immob_msg = is_immobilized(combat_state.get('player_effects', {}))
+    if player_immobilized and action != 'run':
+        result['messages'].append(f"⚠️ {immob_msg}")
+        action = 'skip'  # Force skip turn
+        combat_state['combo_count'] = 0  # Reset combo on forced skip
+    
+    # Define player action function with enhanced combat
+    def do_player_action():
+        nonlocal action
+        if action == 'skip':
+            result['messages'].append("⏭️ Du kannst dich nicht bewegen!")
+            combat_state['combo_count'] = 0
+            return
         
-        # Define player action function with enhanced combat
-        def do_player_action():
-            nonlocal action
-            if action == 'skip':
-                result['messages'].append("⏭️ Du kannst dich nicht bewegen!")
-                combat_state['combo_count'] = 0
-                return
-            
-            if action == 'attack':
-                # Calculate combo bonus
-                combo_bonus, combo_msg = combat_fx.calculate_combo_bonus(combat_state.get('combo_count', 0))
+        if action == 'attack':
+            # Calculate combo bonus
+            combo_bonus, combo_msg = combat_fx.calculate_combo_bonus(combat_state.get('combo_count', 0))
+            
+            # Check for rage mode activation
+            rage_multiplier, rage_msg = combat_fx.consume_rage(combat_state)
+            if rage_msg:
+                result['messages'].append(rage_msg)
+            
+            # Calculate total damage multiplier
+            total_multiplier = combo_bonus * rage_multiplier
+            
+            # Calculate damage with enhanced formula
+            dmg_result = calculate_damage(
+                int(player_stats['strength'] * total_multiplier),
+                monster_stats['defense'],
+                player_stats.get('dexterity', DEFAULT_DEXTERITY)
+            )
+            
+            if dmg_result['dodged']:
+                result['messages'].append("❌ Dein Angriff wurde ausgewichen!")
+                combat_state['combo_count'] = 0  # Reset combo on miss
+                combat_fx.update_combat_stats(combat_state, monster_dodged=True)
+            else:
+                result['player_damage'] = dmg_result['damage']
                 
-                # Check for rage mode activation
-                rage_multiplier, rage_msg = combat_fx.consume_rage(combat_state)
-                if rage_msg:
-                    result['messages'].append(rage_msg)
+                # Generate dynamic combat commentary
+                attack_msg = combat_fx.generate_attack_commentary(
+                    "Du",
+                    monster['name'],
+                    dmg_result['damage'],
+                    weapon_damage_type,
+                    is_player=True,
+                    is_critical=dmg_result['crit'],
+                    combo_count=combat_state.get('combo_count', 0)
+                )
+                result['messages'].append(attack_msg)
                 
-                # Calculate total damage multiplier
-                total_multiplier = combo_bonus * rage_multiplier
+                # Add combo message if applicable - safely handle None or invalid tuple
+                if combo_msg and isinstance(combo_msg, tuple) and len(combo_msg) >= 2:
+                    result['messages'].append(f"{combo_msg[0]} *{combo_msg[1]}*")
                 
-                # Calculate damage with enhanced formula
-                dmg_result = calculate_damage(
-                    int(player_stats['strength'] * total_multiplier),
-                    monster_stats['defense'],
-                    player_stats.get('dexterity', DEFAULT_DEXTERITY)
+                # Update combat stats
+                combat_fx.update_combat_stats(
+                    combat_state, 
+                    player_damage=dmg_result['damage'],
+                    player_crit=dmg_result['crit']
                 )
                 
-                if dmg_result['dodged']:
-                    result['messages'].append("❌ Dein Angriff wurde ausgewichen!")
-                    combat_state['combo_count'] = 0  # Reset combo on miss
-                    combat_fx.update_combat_stats(combat_state, monster_dodged=True)
-                else:
-                    result['player_damage'] = dmg_result['damage']
+                if dmg_result['crit']:
+                    combat_state['critical_hits_player'] = combat_state.get('critical_hits_player', 0) + 1
+            
+            monster['health'] -= result['player_damage']
+            
+            # Check for finishing move
+            if result['player_damage'] > 0:
+                finish_msg = combat_fx.check_finishing_move(
+                    monster_health_before, 
+                    monster['health'], 
+                    result['player_damage'],
+                    dmg_result['crit']
+                )
+                if finish_msg:
+                    result['messages'].append(finish_msg)
+        
+        elif action == 'defend':
+            # Defensive stance - reduce incoming damage and build rage
+            combat_state['player_defending'] = True
+            combat_state['player_rage'] = min(100, combat_state.get('player_rage', 0) + 15)
+            result['messages'].append("🛡️ Du nimmst eine defensive Haltung ein!")
+            result['messages'].append(f"💢 *Wut: +15 (Jetzt: {combat_state['player_rage']}%)*")
+        
+        elif action == 'skill':
+            if not skill_data:
+                result['messages'].append("❌ Kein Skill ausgewählt!")
+            else:
+                skill_name = skill_data.get('name', 'Unknown Skill')
+                skill_damage = skill_data.get('damage', 0)
+                skill_damage_type = skill_data.get('damage_type', 'magic')
+                
+                effects_json = skill_data.get('effects')
+                effects = {}
+                if effects_json:
+                    try:
+                        if isinstance(effects_json, str):
+                            effects = json.loads(effects_json)
+                        elif isinstance(effects_json, dict):
+                            effects = effects_json
+                    except Exception:
+                        pass
+                
+                if skill_damage > 0:
+                    # Calculate combo bonus for skills too
+                    combo_bonus, combo_msg = combat_fx.calculate_combo_bonus(combat_state.get('combo_count', 0))
                     
-                    # Generate dynamic combat commentary
-                    attack_msg = combat_fx.generate_attack_commentary(
-                        "Du",
-                        monster['name'],
-                        dmg_result['damage'],
-                        weapon_damage_type,
-                        is_player=True,
-                        is_critical=dmg_result['crit'],
-                        combo_count=combat_state.get('combo_count', 0)
+                    dmg_result = calculate_damage(
+                        int(skill_damage * combo_bonus),
+                        monster_stats['defense'],
+                        player_stats.get('dexterity', DEFAULT_DEXTERITY)
                     )
-                    result['messages'].append(attack_msg)
+                    
+                    if dmg_result['crit']:
+                        result['player_damage'] = dmg_result['damage']
+                        crit_msg = random.choice(combat_fx.CRITICAL_MESSAGES)
+                        result['messages'].append(f"{crit_msg}\n✨💥 **{skill_name}** - {dmg_result['damage']} Schaden!")
+                        combat_state['critical_hits_player'] = combat_state.get('critical_hits_player', 0) + 1
+                    else:
+                        result['player_damage'] = dmg_result['damage']
+                        damage_anim = combat_fx.create_damage_animation(dmg_result['damage'], False, skill_damage_type)
+                        result['messages'].append(f"✨ **{skill_name}** {damage_anim}")
                     
                     # Add combo message if applicable - safely handle None or invalid tuple
                     if combo_msg and isinstance(combo_msg, tuple) and len(combo_msg) >= 2:
                         result['messages'].append(f"{combo_msg[0]} *{combo_msg[1]}*")
                     
+                    monster['health'] -= result['player_damage']
+                    
                     # Update combat stats
                     combat_fx.update_combat_stats(
-                        combat_state, 
+                        combat_state,
                         player_damage=dmg_result['damage'],
                         player_crit=dmg_result['crit']
                     )
                     
-                    if dmg_result['crit']:
-                        combat_state['critical_hits_player'] = combat_state.get('critical_hits_player', 0) + 1
-                
-                monster['health'] -= result['player_damage']
-                
-                # Check for finishing move
-                if result['player_damage'] > 0:
+                    # Check for finishing move
                     finish_msg = combat_fx.check_finishing_move(
                         monster_health_before, 
                         monster['health'], 
@@ -3631,425 +3898,451 @@ async def process_combat_turn(db_helpers, user_id: int, monster: dict, action: s
                     )
                     if finish_msg:
                         result['messages'].append(finish_msg)
-            
-            elif action == 'defend':
-                # Defensive stance - reduce incoming damage and build rage
-                combat_state['player_defending'] = True
-                combat_state['player_rage'] = min(100, combat_state.get('player_rage', 0) + 15)
-                result['messages'].append("🛡️ Du nimmst eine defensive Haltung ein!")
-                result['messages'].append(f"💢 *Wut: +15 (Jetzt: {combat_state['player_rage']}%)*")
-            
-            elif action == 'skill':
-                if not skill_data:
-                    result['messages'].append("❌ Kein Skill ausgewählt!")
-                else:
-                    skill_name = skill_data.get('name', 'Unknown Skill')
-                    skill_damage = skill_data.get('damage', 0)
-                    skill_damage_type = skill_data.get('damage_type', 'magic')
-                    
-                    effects_json = skill_data.get('effects')
-                    effects = {}
-                    if effects_json:
-                        try:
-                            if isinstance(effects_json, str):
-                                effects = json.loads(effects_json)
-                            elif isinstance(effects_json, dict):
-                                effects = effects_json
-                        except Exception:
-                            pass
-                    
-                    if skill_damage > 0:
-                        # Calculate combo bonus for skills too
-                        combo_bonus, combo_msg = combat_fx.calculate_combo_bonus(combat_state.get('combo_count', 0))
-                        
-                        dmg_result = calculate_damage(
-                            int(skill_damage * combo_bonus),
-                            monster_stats['defense'],
-                            player_stats.get('dexterity', DEFAULT_DEXTERITY)
-                        )
-                        
-                        if dmg_result['crit']:
-                            result['player_damage'] = dmg_result['damage']
-                            crit_msg = random.choice(combat_fx.CRITICAL_MESSAGES)
-                            result['messages'].append(f"{crit_msg}\n✨💥 **{skill_name}** - {dmg_result['damage']} Schaden!")
-                            combat_state['critical_hits_player'] = combat_state.get('critical_hits_player', 0) + 1
-                        else:
-                            result['player_damage'] = dmg_result['damage']
-                            damage_anim = combat_fx.create_damage_animation(dmg_result['damage'], False, skill_damage_type)
-                            result['messages'].append(f"✨ **{skill_name}** {damage_anim}")
-                        
-                        # Add combo message if applicable - safely handle None or invalid tuple
-                        if combo_msg and isinstance(combo_msg, tuple) and len(combo_msg) >= 2:
-                            result['messages'].append(f"{combo_msg[0]} *{combo_msg[1]}*")
-                        
-                        monster['health'] -= result['player_damage']
-                        
-                        # Update combat stats
-                        combat_fx.update_combat_stats(
-                            combat_state,
-                            player_damage=dmg_result['damage'],
-                            player_crit=dmg_result['crit']
-                        )
-                        
-                        # Check for finishing move
-                        finish_msg = combat_fx.check_finishing_move(
-                            monster_health_before, 
-                            monster['health'], 
-                            result['player_damage'],
-                            dmg_result['crit']
-                        )
-                        if finish_msg:
-                            result['messages'].append(finish_msg)
-                    
-                    # Apply healing
-                    if effects.get('heal'):
-                        heal_amount = int(effects['heal'])
-                        new_health = min(player['max_health'], player['health'] + heal_amount)
-                        actual_heal = new_health - player['health']
-                        if actual_heal > 0:
-                            player['health'] = new_health
-                            result['player_health'] = new_health
-                            result['messages'].append(f"💚✨ **{skill_name}** heilt dich um {actual_heal} HP!")
-                    
-                    # Apply status effects from skill
-                    status_effects_to_apply = ['burn', 'freeze', 'poison', 'static', 'darkness', 'slow', 'weakness', 'curse']
-                    for effect_key in status_effects_to_apply:
-                        if effects.get(effect_key):
-                            # Check if effect triggers (based on the effect value as probability)
-                            trigger_chance = float(effects[effect_key]) if isinstance(effects[effect_key], (int, float)) else 0.5
-                            if random.random() < trigger_chance:
-                                success, msg = apply_status_effect(combat_state.setdefault('monster_effects', {}), effect_key)
-                                if success and msg:
-                                    result['messages'].append(f"→ {msg}")
-                                    result['status_applied'].append(effect_key)
-            
-            elif action == 'run':
-                run_chance = 0.50 + (player_stats.get('dexterity', DEFAULT_DEXTERITY) / 200.0)
-                run_chance = min(0.90, run_chance)
-                
-                if random.random() < run_chance:
-                    result['combat_over'] = True
-                    result['messages'].append("🏃💨 Du bist erfolgreich geflohen!")
-                else:
-                    result['messages'].append("❌ Flucht gescheitert! Das Monster versperrt den Weg!")
-                    combat_state['combo_count'] = 0  # Reset combo on failed run
-        
-        # Define monster action function with enhanced features
-        def do_monster_action():
-            if monster['health'] <= 0:
-                return
-            
-            monster_health_pct = monster['health'] / monster_max_health if monster_max_health > 0 else 1.0
-            
-            # Check if monster is immobilized
-            monster_immobilized, monster_immob_msg = is_immobilized(combat_state.get('monster_effects', {}))
-            if monster_immobilized:
-                result['messages'].append(f"🎯 {monster['name']}: {monster_immob_msg}")
-                return
-            
-            # Check for monster enrage trigger (at 30% health)
-            if not combat_state.get('monster_enraged') and monster_health_pct <= 0.30:
-                combat_state['monster_enraged'] = True
-                enrage_msg = combat_fx.get_enemy_enrage_message(monster, monster_health_pct)
-                if enrage_msg:
-                    result['messages'].append(f"\n{enrage_msg}")
-            
-            # Add telegraph warning for next turn's special attack
-            telegraph_msg = combat_fx.should_telegraph_attack(monster, monster_health_pct, turn_count)
-            if telegraph_msg:
-                result['messages'].append(f"\n{telegraph_msg}")
-            
-            # Try to use an ability (with enrage bonus)
-            ability = try_monster_ability(monster, player, combat_state)
-            
-            if ability:
-                result['monster_ability_used'] = ability
-                ability_emoji = ability.get('emoji', '⚡')
-                ability_name = ability.get('name', 'Spezialfähigkeit')
                 
-                result['messages'].append(f"\n🔥 **{monster['name']} benutzt {ability_emoji} {ability_name}!**")
-                combat_fx.update_combat_stats(combat_state, ability_used=ability_name)
-                
-                effect_type = ability.get('effect_type')
-                
-                if effect_type == 'status':
-                    # Apply status effect to player
-                    status_effect = ability.get('status_effect')
-                    if status_effect:
-                        success, msg = apply_status_effect(combat_state.setdefault('player_effects', {}), status_effect)
-                        if success and msg:
-                            result['messages'].append(f"→ {msg}")
-                
-                elif effect_type == 'self_buff':
-                    # Apply buff to monster
-                    status_effect = ability.get('status_effect')
-                    if status_effect:
-                        success, msg = apply_status_effect(combat_state.setdefault('monster_effects', {}), status_effect)
-                        if success and msg:
-                            result['messages'].append(f"→ {monster['name']}: {msg}")
-                
-                elif effect_type == 'damage_boost':
-                    # Enhanced damage attack (with enrage bonus)
-                    multiplier = ability.get('damage_multiplier', 2.0)
-                    if combat_state.get('monster_enraged'):
-                        multiplier *= 1.2  # 20% extra damage when enraged
-                    boosted_strength = int(monster_stats['strength'] * multiplier)
-                    
-                    dmg_result = calculate_damage(
-                        boosted_strength,
-                        player_stats['defense'],
-                        monster_stats['speed'],
-                        is_ai=True,
-                        player_health_pct=player['health'] / player['max_health']
-                    )
-                    
-                    if not dmg_result['dodged']:
-                        damage = dmg_result['damage']
-                        result['monster_damage'] += damage
-                        crit_text = " 💀**KRITISCH!**" if dmg_result['crit'] else ""
-                        enrage_text = " 😤" if combat_state.get('monster_enraged') else ""
-                        damage_anim = combat_fx.create_damage_animation(damage, dmg_result['crit'], 'physical')
-                        result['messages'].append(f"→ {ability_emoji} {damage_anim} verstärkter Schaden!{crit_text}{enrage_text}")
-                        combat_fx.update_combat_stats(combat_state, monster_damage=damage, monster_crit=dmg_result['crit'])
-                    else:
-                        result['messages'].append("→ ✨ Du weichst dem verstärkten Angriff aus!")
-                        combat_fx.update_combat_stats(combat_state, player_dodged=True)
-                    return  # Ability replaces normal attack
+                # Apply healing
+                if effects.get('heal'):
+                    heal_amount = int(effects['heal'])
+                    new_health = min(player['max_health'], player['health'] + heal_amount)
+                    actual_heal = new_health - player['health']
+                    if actual_heal > 0:
+                        player['health'] = new_health
+                        result['player_health'] = new_health
+                        result['messages'].append(f"💚✨ **{skill_name}** heilt dich um {actual_heal} HP!")
                 
-                elif effect_type == 'lifesteal':
-                    # Damage + heal
-                    lifesteal_pct = ability.get('lifesteal_percent', 0.5)
-                    
-                    dmg_result = calculate_damage(
-                        monster_stats['strength'],
-                        player_stats['defense'],
-                        monster_stats['speed'],
-                        is_ai=True,
-                        player_health_pct=player['health'] / player['max_health']
-                    )
-                    
-                    if not dmg_result['dodged']:
-                        damage = dmg_result['damage']
-                        result['monster_damage'] += damage
-                        heal_amount = int(damage * lifesteal_pct)
-                        monster['health'] = min(monster.get('max_health', monster['health']), monster['health'] + heal_amount)
-                        result['messages'].append(f"→ {ability_emoji} Fügt {damage} Schaden zu und heilt {heal_amount} HP!")
-                    return  # Ability replaces normal attack
-                
-                elif effect_type == 'multi_hit':
-                    # Multiple attacks
-                    hit_count = ability.get('hit_count', 2)
-                    damage_per_hit = ability.get('damage_per_hit', 0.5)
-                    
-                    total_damage = 0
-                    hits = 0
-                    for _ in range(hit_count):
-                        dmg_result = calculate_damage(
-                            int(monster_stats['strength'] * damage_per_hit),
-                            player_stats['defense'],
-                            monster_stats['speed'],
-                            is_ai=True,
-                            player_health_pct=player['health'] / player['max_health']
-                        )
-                        if not dmg_result['dodged']:
-                            total_damage += dmg_result['damage']
-                            hits += 1
-                    
-                    if total_damage > 0:
-                        result['monster_damage'] += total_damage
-                        result['messages'].append(f"→ {ability_emoji} Trifft {hits}x für insgesamt {total_damage} Schaden!")
-                    return  # Ability replaces normal attack
-                
-                elif effect_type == 'cleanse':
-                    # Remove debuffs from monster
-                    monster_effects = combat_state.get('monster_effects', {})
-                    debuff_types = ['burn', 'poison', 'darkness', 'slow', 'weakness', 'curse', 'bleed']
-                    removed = []
-                    for debuff in debuff_types:
-                        if debuff in monster_effects:
-                            del monster_effects[debuff]
-                            removed.append(STATUS_EFFECTS[debuff]['emoji'])
-                    if removed:
-                        result['messages'].append(f"→ Entfernt: {' '.join(removed)}")
-                    return  # Don't also do normal attack
-            
-            # Normal attack (if no ability used or ability doesn't replace attack)
-            if not ability or ability.get('effect_type') not in ['damage_boost', 'lifesteal', 'multi_hit', 'cleanse']:
-                # Check if player is defending
-                defense_multiplier = 0.5 if combat_state.get('player_defending') else 1.0
+                # Apply status effects from skill
+                status_effects_to_apply = ['burn', 'freeze', 'poison', 'static', 'darkness', 'slow', 'weakness', 'curse']
+                for effect_key in status_effects_to_apply:
+                    if effects.get(effect_key):
+                        # Check if effect triggers (based on the effect value as probability)
+                        trigger_chance = float(effects[effect_key]) if isinstance(effects[effect_key], (int, float)) else 0.5
+                        if random.random() < trigger_chance:
+                            success, msg = apply_status_effect(combat_state.setdefault('monster_effects', {}), effect_key)
+                            if success and msg:
+                                result['messages'].append(f"→ {msg}")
+                                result['status_applied'].append(effect_key)
+        
+        elif action == 'run':
+            run_chance = 0.50 + (player_stats.get('dexterity', DEFAULT_DEXTERITY) / 200.0)
+            run_chance = min(0.90, run_chance)
+            
+            if random.random() < run_chance:
+                result['combat_over'] = True
+                result['messages'].append("🏃💨 Du bist erfolgreich geflohen!")
+            else:
+                result['messages'].append("❌ Flucht gescheitert! Das Monster versperrt den Weg!")
+                combat_state['combo_count'] = 0  # Reset combo on failed run
+    
+    # Define monster action function with enhanced features
+    def do_monster_action():
+        if monster['health'] <= 0:
+            return
+        
+        monster_health_pct = monster['health'] / monster_max_health if monster_max_health > 0 else 1.0
+        
+        # Check if monster is immobilized
+        monster_immobilized, monster_immob_msg = is_immobilized(combat_state.get('monster_effects', {}))
+        if monster_immobilized:
+            result['messages'].append(f"🎯 {monster['name']}: {monster_immob_msg}")
+            return
+        
+        # Check for monster enrage trigger (at 30% health)
+        if not combat_state.get('monster_enraged') and monster_health_pct <= 0.30:
+            combat_state['monster_enraged'] = True
+            enrage_msg = combat_fx.get_enemy_enrage_message(monster, monster_health_pct)
+            if enrage_msg:
+                result['messages'].append(f"\n{enrage_msg}")
+        
+        # Add telegraph warning for next turn's special attack
+        telegraph_msg = combat_fx.should_telegraph_attack(monster, monster_health_pct, turn_count)
+        if telegraph_msg:
+            result['messages'].append(f"\n{telegraph_msg}")
+        
+        # Try to use an ability (with enrage bonus)
+        ability = try_monster_ability(monster, player, combat_state)
+        
+        if ability:
+            result['monster_ability_used'] = ability
+            ability_emoji = ability.get('emoji', '⚡')
+            ability_name = ability.get('name', 'Spezialfähigkeit')
+            
+            result['messages'].append(f"\n🔥 **{monster['name']} benutzt {ability_emoji} {ability_name}!**")
+            combat_fx.update_combat_stats(combat_state, ability_used=ability_name)
+            
+            effect_type = ability.get('effect_type')
+            
+            if effect_type == 'status':
+                # Apply status effect to player
+                status_effect = ability.get('status_effect')
+                if status_effect:
+                    success, msg = apply_status_effect(combat_state.setdefault('player_effects', {}), status_effect)
+                    if success and msg:
+                        result['messages'].append(f"→ {msg}")
+            
+            elif effect_type == 'self_buff':
+                # Apply buff to monster
+                status_effect = ability.get('status_effect')
+                if status_effect:
+                    success, msg = apply_status_effect(combat_state.setdefault('monster_effects', {}), status_effect)
+                    if success and msg:
+                        result['messages'].append(f"→ {monster['name']}: {msg}")
+            
+            elif effect_type == 'damage_boost':
+                # Enhanced damage attack (with enrage bonus)
+                multiplier = ability.get('damage_multiplier', 2.0)
+                if combat_state.get('monster_enraged'):
+                    multiplier *= 1.2  # 20% extra damage when enraged
+                boosted_strength = int(monster_stats['strength'] * multiplier)
                 
                 dmg_result = calculate_damage(
-                    monster_stats['strength'],
-                    int(player_stats['defense'] / defense_multiplier) if defense_multiplier < 1 else player_stats['defense'],
+                    boosted_strength,
+                    player_stats['defense'],
                     monster_stats['speed'],
                     is_ai=True,
                     player_health_pct=player['health'] / player['max_health']
                 )
                 
-                if dmg_result['dodged']:
-                    result['messages'].append(f"✨ Du bist dem Angriff von {monster['name']} ausgewichen!")
-                else:
-                    damage = int(dmg_result['damage'] * defense_multiplier)
+                if not dmg_result['dodged']:
+                    damage = dmg_result['damage']
                     result['monster_damage'] += damage
-                    if dmg_result['crit']:
-                        result['messages'].append(f"💀 **KRITISCHER TREFFER!** {monster['name']} fügt dir {damage} Schaden zu!")
-                    else:
-                        result['messages'].append(f"🗡️ {monster['name']} fügt dir {damage} Schaden zu!")
-                    
-                    if combat_state.get('player_defending'):
-                        result['messages'].append("🛡️ Deine Verteidigung reduziert den Schaden!")
-            
-            # Reset defending state
-            combat_state['player_defending'] = False
-        
-        # Execute turns based on speed order
-        if player_goes_first:
-            result['messages'].append("**⚡ Du bist schneller!**\n")
-            do_player_action()
-            
-            # Check if monster defeated after player action
-            if monster['health'] <= 0:
-                result['combat_over'] = True
-                result['player_won'] = True
-            elif not result['combat_over']:
-                result['messages'].append("")  # Add spacing
-                do_monster_action()
-        else:
-            result['messages'].append(f"**⚡ {monster['name']} ist schneller!**\n")
-            do_monster_action()
+                    crit_text = " 💀**KRITISCH!**" if dmg_result['crit'] else ""
+                    enrage_text = " 😤" if combat_state.get('monster_enraged') else ""
+                    damage_anim = combat_fx.create_damage_animation(damage, dmg_result['crit'], 'physical')
+                    result['messages'].append(f"→ {ability_emoji} {damage_anim} verstärkter Schaden!{crit_text}{enrage_text}")
+                    combat_fx.update_combat_stats(combat_state, monster_damage=damage, monster_crit=dmg_result['crit'])
+                else:
+                    result['messages'].append("→ ✨ Du weichst dem verstärkten Angriff aus!")
+                    combat_fx.update_combat_stats(combat_state, player_dodged=True)
+                return  # Ability replaces normal attack
             
-            # Apply monster damage before player action
-            if result['monster_damage'] > 0:
-                player['health'] = max(0, player['health'] - result['monster_damage'])
-                result['player_health'] = player['health']
+            elif effect_type == 'lifesteal':
+                # Damage + heal
+                lifesteal_pct = ability.get('lifesteal_percent', 0.5)
+                
+                dmg_result = calculate_damage(
+                    monster_stats['strength'],
+                    player_stats['defense'],
+                    monster_stats['speed'],
+                    is_ai=True,
+                    player_health_pct=player['health'] / player['max_health']
+                )
                 
-                # Check for close call
-                close_call_msg = combat_fx.check_close_call(previous_player_health, player['health'], player['max_health'])
-                if close_call_msg:
-                    result['messages'].append(close_call_msg)
-                    combat_state['close_calls'] = combat_state.get('close_calls', 0) + 1
+                if not dmg_result['dodged']:
+                    damage = dmg_result['damage']
+                    result['monster_damage'] += damage
+                    heal_amount = int(damage * lifesteal_pct)
+                    monster['health'] = min(monster.get('max_health', monster['health']), monster['health'] + heal_amount)
+                    result['messages'].append(f"→ {ability_emoji} Fügt {damage} Schaden zu und heilt {heal_amount} HP!")
+                return  # Ability replaces normal attack
+            
+            elif effect_type == 'multi_hit':
+                # Multiple attacks
+                hit_count = ability.get('hit_count', 2)
+                damage_per_hit = ability.get('damage_per_hit', 0.5)
                 
-                # Check for near death message
-                near_death_msg = combat_fx.get_near_death_message(player['health'], player['max_health'])
-                if near_death_msg:
-                    result['messages'].append(near_death_msg)
+                total_damage = 0
+                hits = 0
+                for _ in range(hit_count):
+                    dmg_result = calculate_damage(
+                        int(monster_stats['strength'] * damage_per_hit),
+                        player_stats['defense'],
+                        monster_stats['speed'],
+                        is_ai=True,
+                        player_health_pct=player['health'] / player['max_health']
+                    )
+                    if not dmg_result['dodged']:
+                        total_damage += dmg_result['damage']
+                        hits += 1
                 
-                if player['health'] <= 0:
-                    result['combat_over'] = True
-                    result['player_won'] = False
-                    result['messages'].append("💀 **Du wurdest besiegt!**")
-            
-            if not result['combat_over']:
-                result['messages'].append("")  # Add spacing
-                do_player_action()
+                if total_damage > 0:
+                    result['monster_damage'] += total_damage
+                    result['messages'].append(f"→ {ability_emoji} Trifft {hits}x für insgesamt {total_damage} Schaden!")
+                return  # Ability replaces normal attack
+            
+            elif effect_type == 'cleanse':
+                # Remove debuffs from monster
+                monster_effects = combat_state.get('monster_effects', {})
+                debuff_types = ['burn', 'poison', 'darkness', 'slow', 'weakness', 'curse', 'bleed']
+                removed = []
+                for debuff in debuff_types:
+                    if debuff in monster_effects:
+                        del monster_effects[debuff]
+                        removed.append(STATUS_EFFECTS[debuff]['emoji'])
+                if removed:
+                    result['messages'].append(f"→ Entfernt: {' '.join(removed)}")
+                return  # Don't also do normal attack
         
-        # Final health updates
-        if not result['combat_over']:
-            # Update player health in DB
-            new_health = max(0, player['health'] - result['monster_damage']) if player_goes_first else player['health']
-            result['player_health'] = new_health
-            
-            # Check for close call on player's turn damage
-            if player_goes_first and result['monster_damage'] > 0:
-                close_call_msg = combat_fx.check_close_call(previous_player_health, new_health, player['max_health'])
-                if close_call_msg:
-                    result['messages'].append(close_call_msg)
-                    combat_state['close_calls'] = combat_state.get('close_calls', 0) + 1
-                
-                # Check for near death message
-                near_death_msg = combat_fx.get_near_death_message(new_health, player['max_health'])
-                if near_death_msg:
-                    result['messages'].append(near_death_msg)
-            
-            conn = db_helpers.db_pool.get_connection()
-            cursor = conn.cursor()
-            try:
-                cursor.execute("UPDATE rpg_players SET health = %s WHERE user_id = %s", (new_health, user_id))
-                conn.commit()
-            finally:
-                cursor.close()
-                conn.close()
+        # Normal attack (if no ability used or ability doesn't replace attack)
+        if not ability or ability.get('effect_type') not in ['damage_boost', 'lifesteal', 'multi_hit', 'cleanse']:
+            # Check if player is defending
+            defense_multiplier = 0.5 if combat_state.get('player_defending') else 1.0
+            
+            dmg_result = calculate_damage(
+                monster_stats['strength'],
+                int(player_stats['defense'] / defense_multiplier) if defense_multiplier < 1 else player_stats['defense'],
+                monster_stats['speed'],
+                is_ai=True,
+                player_health_pct=player['health'] / player['max_health']
+            )
             
-            if new_health <= 0:
-                result['combat_over'] = True
-                result['player_won'] = False
-                result['messages'].append("💀 **Du wurdest besiegt!** Du wirst zum Dorf zurückgebracht.")
+            if dmg_result['dodged']:
+                result['messages'].append(f"✨ Du bist dem Angriff von {monster['name']} ausgewichen!")
+            else:
+                damage = int(dmg_result['damage'] * defense_multiplier)
+                result['monster_damage'] += damage
+                if dmg_result['crit']:
+                    result['messages'].append(f"💀 **KRITISCHER TREFFER!** {monster['name']} fügt dir {damage} Schaden zu!")
+                else:
+                    result['messages'].append(f"🗡️ {monster['name']} fügt dir {damage} Schaden zu!")
                 
-                conn = db_helpers.db_pool.get_connection()
-                cursor = conn.cursor()
-                cursor.execute("UPDATE rpg_players SET health = FLOOR(max_health / 2) WHERE user_id = %s", (user_id,))
-                conn.commit()
-                cursor.close()
-                conn.close()
-            
-            # Show rage meter status if building up
-            can_rage, rage_msg = combat_fx.check_rage_activation(combat_state)
-            if can_rage:
-                result['messages'].append(f"\n{rage_msg}")
-            elif combat_state.get('player_rage', 0) >= 50:
-                result['messages'].append(f"\n💢 *Wut: {combat_state['player_rage']}%*")
+                if combat_state.get('player_defending'):
+                    result['messages'].append("🛡️ Deine Verteidigung reduziert den Schaden!")
+        
+        # Reset defending state
+        combat_state['player_defending'] = False
+    
+    # Execute turns based on speed order
+    if player_goes_first:
+        result['messages'].append("**⚡ Du bist schneller!**\n")
+        do_player_action()
         
-        # Check monster defeat and handle rewards
-        if monster['health'] <= 0 and not result.get('player_won'):
+        # Check if monster defeated after player action
+        if monster['health'] <= 0:
             result['combat_over'] = True
             result['player_won'] = True
+        elif not result['combat_over']:
+            result['messages'].append("")  # Add spacing
+            do_monster_action()
+    else:
+        result['messages'].append(f"**⚡ {monster['name']} ist schneller!**\n")
+        do_monster_action()
+        
+        # Apply monster damage before player action
+        if result['monster_damage'] > 0:
+            player['health'] = max(0, player['health'] - result['monster_damage'])
+            result['player_health'] = player['health']
             
-            xp_result = await gain_xp(db_helpers, user_id, monster['xp_reward'])
+            # Check for close call
+            close_call_msg = combat_fx.check_close_call(previous_player_health, player['health'], player['max_health'])
+            if close_call_msg:
+                result['messages'].append(close_call_msg)
+                combat_state['close_calls'] = combat_state.get('close_calls', 0) + 1
             
-            conn = db_helpers.db_pool.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("UPDATE rpg_players SET gold = gold + %s WHERE user_id = %s", (monster['gold_reward'], user_id))
+            # Check for near death message
+            near_death_msg = combat_fx.get_near_death_message(player['health'], player['max_health'])
+            if near_death_msg:
+                result['messages'].append(near_death_msg)
+            
+            if player['health'] <= 0:
+                result['combat_over'] = True
+                result['player_won'] = False
+                result['messages'].append("💀 **Du wurdest besiegt!**")
+        
+        if not result['combat_over']:
+            result['messages'].append("")  # Add spacing
+            do_player_action()
+    
+    # Final health updates
+    if not result['combat_over']:
+        new_health = max(0, player['health'] - result['monster_damage']) if player_goes_first else player['health']
+        result['player_health'] = new_health
+        
+        # Check for close call on player's turn damage
+        if player_goes_first and result['monster_damage'] > 0:
+            close_call_msg = combat_fx.check_close_call(previous_player_health, new_health, player['max_health'])
+            if close_call_msg:
+                result['messages'].append(close_call_msg)
+                combat_state['close_calls'] = combat_state.get('close_calls', 0) + 1
+            
+            # Check for near death message
+            near_death_msg = combat_fx.get_near_death_message(new_health, player['max_health'])
+            if near_death_msg:
+                result['messages'].append(near_death_msg)
+        
+        player['health'] = new_health
+        
+        if new_health <= 0:
+            result['combat_over'] = True
+            result['player_won'] = False
+            result['messages'].append("💀 **Du wurdest besiegt!** Du wirst zum Dorf zurückgebracht.")
+        
+        # Show rage meter status if building up
+        can_rage, rage_msg = combat_fx.check_rage_activation(combat_state)
+        if can_rage:
+            result['messages'].append(f"\n{rage_msg}")
+        elif combat_state.get('player_rage', 0) >= 50:
+            result['messages'].append(f"\n💢 *Wut: {combat_state['player_rage']}%*")
+
+    if monster['health'] <= 0 and not result['combat_over']:
+        result['combat_over'] = True
+        result['player_won'] = True
+    result['monster_health'] = monster['health']
+    return result
+
+
+def _apply_level_ups(current_xp: int, current_level: int, xp_amount: int) -> Tuple[int, int, int]:
+    """Returns (new_xp, new_level, skill_points_gained) after awarding xp_amount."""
+    new_xp = current_xp + xp_amount
+    new_level = current_level
+    skill_points_gained = 0
+    while new_xp >= calculate_xp_for_level(new_level + 1):
+        new_level += 1
+        skill_points_gained += 5
+    return new_xp, new_level, skill_points_gained
+
+
+async def roll_combat_loot(db_helpers, monster: dict, player: dict) -> Tuple[list, dict]:
+    """
+    Rolls the loot of a won fight at the level the player reaches with its XP and
+    resolves the item ids. Runs before commit_combat_outcome opens its transaction,
+    so no row lock is held while items are looked up or created.
+    
+    Returns:
+        (loot drops, item ids for _insert_loot_items); both empty if nothing dropped
+        or the items could not be resolved
+    """
+    _, level, _ = _apply_level_ups(player.get('xp', 0), player.get('level', 1), monster['xp_reward'])
+    loot_drops = await roll_loot_drops(db_helpers, monster, level)
+    if not loot_drops:
+        return [], {}
+    try:
+        return loot_drops, _resolve_loot_item_ids(db_helpers, loot_drops, monster['name'])
+    except Exception as e:
+        logger.error(f"Error resolving loot from {monster['name']}: {e}", exc_info=True)
+        return [], {}
+
+
+async def commit_combat_outcome(db_helpers, user_id: int, monster: dict, result: dict,
+                                loot_drops: list = None, loot_item_ids: dict = None) -> dict:
+    """
+    Writes the end of a fight in a single transaction: final HP (half HP after a
+    defeat), and on victory XP with level ups, gold and the loot rolled by
+    roll_combat_loot. Adds the rewards and the victory message to result.
+    
+    Returns:
+        The updated result dict
+    """
+    if not db_helpers.db_pool:
+        return result
+    conn = db_helpers.db_pool.get_connection()
+    if not conn:
+        return result
+    
+    cursor = conn.cursor(dictionary=True)
+    loot_names = []
+    loot_rarities = []
+    try:
+        cursor.execute("SELECT level, xp, max_health FROM rpg_players WHERE user_id = %s FOR UPDATE", (user_id,))
+        row = cursor.fetchone()
+        if not row:
+            conn.rollback()
+            return result
+        
+        if not result.get('player_won'):
+            if result.get('player_health', 0) <= 0:
+                # Restore half health after a defeat
+                cursor.execute("UPDATE rpg_players SET health = FLOOR(max_health / 2) WHERE user_id = %s", (user_id,))
+            else:
+                cursor.execute("UPDATE rpg_players SET health = %s WHERE user_id = %s", (result['player_health'], user_id))
+            conn.commit()
+            return result
+        
+        new_xp, new_level, skill_points_gained = _apply_level_ups(row['xp'], row['level'], monster['xp_reward'])
+        hp_increase = 20 * (new_level - row['level'])
+        # Level ups raise max_health and heal by the same amount (capped at the new maximum)
+        cursor.execute("""
+            UPDATE rpg_players
+            SET level = %s, xp = %s, skill_points = skill_points + %s,
+                max_health = max_health + %s,
+                health = LEAST(%s + %s, max_health),
+                gold = gold + %s
+            WHERE user_id = %s
+        """, (new_level, new_xp, skill_points_gained, hp_increase, result['player_health'], hp_increase,
+              monster['gold_reward'], user_id))
+        
+        if loot_drops:
+            loot_names = _insert_loot_items(cursor, user_id, loot_drops, loot_item_ids)
+            # Get loot rarities for celebration messages
+            loot_rarities = [drop.get('rarity', 'common') for drop in loot_drops]
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error committing combat outcome for user {user_id}: {e}", exc_info=True)
+        result['messages'].append("⚠️ Belohnungen konnten nicht gespeichert werden.")
+        return result
+    finally:
+        cursor.close()
+        conn.close()
+    
+    result['rewards'] = {
+        'xp': monster['xp_reward'],
+        'gold': monster['gold_reward'],
+        'leveled_up': new_level > row['level'],
+        'new_level': new_level if new_level > row['level'] else None,
+        'max_health': row['max_health'] + hp_increase,
+        'loot': loot_names
+    }
+    
+    # Enhanced victory message with celebration
+    victory_celebration = combat_fx.get_victory_celebration()
+    msg = f"\n{victory_celebration} **{monster['name']} besiegt!**\n"
+    msg += f"💰 +{monster['gold_reward']} Gold\n"
+    msg += f"⭐ +{monster['xp_reward']} XP"
+    
+    # Enhanced loot display with rarity celebrations
+    if loot_names:
+        # Find highest rarity for celebration
+        rarity_order = ['common', 'uncommon', 'rare', 'epic', 'legendary']
+        highest_rarity = 'common'
+        for r in loot_rarities:
+            if r in rarity_order and rarity_order.index(r) > rarity_order.index(highest_rarity):
+                highest_rarity = r
+        
+        if highest_rarity in ['epic', 'legendary']:
+            loot_celebration = combat_fx.get_loot_celebration(highest_rarity, ', '.join(loot_names))
+            msg += f"\n\n{loot_celebration}"
+        else:
+            msg += f"\n📦 **Loot:** {', '.join(loot_names)}"
+    
+    if result['rewards']['leveled_up']:
+        msg += f"\n\n🎊 **LEVEL UP!** Du bist jetzt Level {result['rewards']['new_level']}!"
+    result['messages'].append(msg)
+    return result
+
+
+async def process_combat_turn(db_helpers, user_id: int, monster: dict, action: str, skill_data: dict = None, combat_state: dict = None):
+    """
+    Process a single combat turn with strategic AI and status effects.
+    Loads the player and writes HP every turn; fights driven by a view should use
+    CombatSession, which does both once per fight.
+    
+    Args:
+        action: 'attack', 'run', 'skill', or 'defend'
+        skill_data: Skill item data when action is 'skill'
+        combat_state: Current combat state with status effects (optional)
+    
+    Returns:
+        dict with combat results
+    """
+    try:
+        snapshot = await load_combat_snapshot(db_helpers, user_id)
+        if not snapshot:
+            return {'error': 'Profil konnte nicht geladen werden.'}
+        
+        result = _resolve_combat_turn(snapshot, monster, action, skill_data, combat_state)
+        if result['combat_over']:
+            loot_drops, loot_item_ids = [], {}
+            if result.get('player_won'):
+                loot_drops, loot_item_ids = await roll_combat_loot(db_helpers, monster, snapshot['player'])
+            return await commit_combat_outcome(db_helpers, user_id, monster, result, loot_drops, loot_item_ids)
+        
+        conn = db_helpers.db_pool.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("UPDATE rpg_players SET health = %s WHERE user_id = %s", (result['player_health'], user_id))
             conn.commit()
+        finally:
             cursor.close()
             conn.close()
-            
-            # Roll for loot drops
-            player_profile = await get_player_profile(db_helpers, user_id)
-            player_level = player_profile['level'] if player_profile else 1
-            loot_drops = await roll_loot_drops(db_helpers, monster, player_level)
-            loot_names = []
-            loot_rarities = []
-            
-            if loot_drops:
-                success, loot_names = await add_loot_to_inventory(db_helpers, user_id, loot_drops, monster['name'])
-                # Get loot rarities for celebration messages
-                for drop in loot_drops:
-                    loot_rarities.append(drop.get('rarity', 'common'))
-            
-            result['rewards'] = {
-                'xp': monster['xp_reward'],
-                'gold': monster['gold_reward'],
-                'leveled_up': xp_result['leveled_up'] if xp_result else False,
-                'new_level': xp_result['new_level'] if xp_result and xp_result['leveled_up'] else None,
-                'loot': loot_names
-            }
-            
-            # Enhanced victory message with celebration
-            victory_celebration = combat_fx.get_victory_celebration()
-            msg = f"\n{victory_celebration} **{monster['name']} besiegt!**\n"
-            msg += f"💰 +{monster['gold_reward']} Gold\n"
-            msg += f"⭐ +{monster['xp_reward']} XP"
-            
-            # Enhanced loot display with rarity celebrations
-            if loot_names:
-                # Find highest rarity for celebration
-                rarity_order = ['common', 'uncommon', 'rare', 'epic', 'legendary']
-                highest_rarity = 'common'
-                for r in loot_rarities:
-                    if r in rarity_order and rarity_order.index(r) > rarity_order.index(highest_rarity):
-                        highest_rarity = r
-                
-                if highest_rarity in ['epic', 'legendary']:
-                    loot_celebration = combat_fx.get_loot_celebration(highest_rarity, ', '.join(loot_names))
-                    msg += f"\n\n{loot_celebration}"
-                else:
-                    msg += f"\n📦 **Loot:** {', '.join(loot_names)}"
-            
-            if result['rewards']['leveled_up']:
-                msg += f"\n\n🎊 **LEVEL UP!** Du bist jetzt Level {result['rewards']['new_level']}!"
-            result['messages'].append(msg)
-        
-        result['monster_health'] = monster['health']
         return result
         
     except Exception as e:
@@ -4057,6 +4350,67 @@ async def process_combat_turn(db_helpers, user_id: int, monster: dict, action: s
         return {'error': str(e)}
 
 
+class CombatSession:
+    """
+    In-memory state of a single fight.
+    
+    The player's profile, equipment and skill tree bonuses are loaded once when the
+    fight starts and combat_state lives in memory, so a turn is pure computation.
+    HP, XP, gold and loot are written in one transaction when the fight ends (or
+    the HP only, if the fight is abandoned).
+    """
+    
+    def __init__(self, user_id: int, monster: dict, snapshot: dict, combat_state: dict = None):
+        self.user_id = user_id
+        self.monster = monster
+        self.snapshot = snapshot
+        self.combat_state = combat_state if combat_state is not None else combat_fx.create_enhanced_combat_state()
+        self.finished = False
+    
+    @classmethod
+    async def start(cls, db_helpers, user_id: int, monster: dict, combat_state: dict = None) -> Optional['CombatSession']:
+        """Snapshots the player for a new fight. Returns None if the profile cannot be loaded."""
+        snapshot = await load_combat_snapshot(db_helpers, user_id)
+        if not snapshot:
+            return None
+        return cls(user_id, monster, snapshot, combat_state)
+    
+    @property
+    def player(self) -> dict:
+        return self.snapshot['player']
+    
+    async def process_turn(self, db_helpers, action: str, skill_data: dict = None) -> dict:
+        """Processes one turn in memory; commits the outcome when the fight ends."""
+        if self.finished:
+            return {'error': 'Der Kampf ist bereits vorbei.'}
+        try:
+            result = _resolve_combat_turn(self.snapshot, self.monster, action, skill_data, self.combat_state)
+            if result['combat_over']:
+                self.finished = True
+                loot_drops, loot_item_ids = [], {}
+                if result.get('player_won'):
+                    loot_drops, loot_item_ids = await roll_combat_loot(db_helpers, self.monster, self.player)
+                result = await commit_combat_outcome(db_helpers, self.user_id, self.monster, result,
+                                                     loot_drops, loot_item_ids)
+                if result.get('rewards', {}).get('max_health'):
+                    self.player['max_health'] = result['rewards']['max_health']
+            return result
+        except Exception as e:
+            logger.error(f"Error processing combat turn: {e}", exc_info=True)
+            return {'error': str(e)}
+    
+    async def abandon(self, db_helpers):
+        """Saves the current HP of an unfinished fight (e.g. when the combat view times out)."""
+        if self.finished:
+            return
+        self.finished = True
+        await commit_combat_outcome(db_helpers, self.user_id, self.monster, {
+            'player_won': False,
+            'player_health': max(1, self.player['health']),
+            'messages': []
+        })
+
+
 # Default Shop Items - Expanded (100+ items)
 # BALANCED: Weapons add to strength, skills use direct damage
 DEFAULT_SHOP_ITEMS = [
@@ -4234,6 +4588,7 @@ async def initialize_shop_items(db_helpers):
                 if count > 0:
                     cursor.execute("DELETE FROM rpg_items WHERE created_by IS NULL")
                     logger.info(f"Cleared {count} existing default items for reinitializing")
+                    mark_item_definitions_dirty()
                 
                 # Insert all items into database
                 inserted = 0
@@ -4272,169 +4627,191 @@ async def initialize_shop_items(db_helpers):
         logger.error(f"Error initializing shop items: {e}", exc_info=True)
 
 
-async def get_daily_shop_items(db_helpers, player_level: int):
+# Daily shop rotation quotas: 10 common, 6 uncommon, 4 rare, 2 epic, 1 legendary
+DAILY_SHOP_RARITY_QUOTAS = {
+    'common': 10,
+    'uncommon': 6,
+    'rare': 4,
+    'epic': 2,
+    'legendary': 1
+}
+
+
+class DailyShop:
     """
-    Get shop items for today's daily rotation.
-    Shop changes every 24 hours with a random selection of items.
+    Today's shop rotation, materialized once per UTC day.
+    
+    rpg_daily_shop keeps the chosen item ids and is the snapshot every process and
+    restart agrees on. This holds the item rows pre-sorted into one view per
+    required level, so opening the shop needs no database read.
+    """
+    
+    def __init__(self):
+        self.shop_date = None
+        self.items_by_id: Dict[int, dict] = {}
+        self._levels: List[int] = []  # Sorted distinct required levels
+        self._views: List[tuple] = []  # _views[i]: items with required_level <= _levels[i]
+        self.hits = 0
+        self.builds = 0
+    
+    def is_current(self) -> bool:
+        return self.shop_date == datetime.now(timezone.utc).date()
+    
+    def invalidate(self):
+        self.shop_date = None
+    
+    def set_items(self, shop_date, items: list):
+        self.items_by_id = {item['id']: item for item in items}
+        self._rebuild_views()
+        self.shop_date = shop_date
+        self.builds += 1
+    
+    def _rebuild_views(self):
+        # Same order as the old "ORDER BY rarity, price" query
+        ordered = sorted(self.items_by_id.values(), key=lambda item: (item['rarity'], item['price']))
+        self._levels = sorted({item['required_level'] or 1 for item in ordered})
+        self._views = [
+            tuple(item for item in ordered if (item['required_level'] or 1) <= level)
+            for level in self._levels
+        ]
+    
+    def view(self, player_level: int) -> list:
+        self.hits += 1
+        index = bisect_right(self._levels, player_level) - 1
+        if index < 0:
+            return []
+        return [dict(item) for item in self._views[index]]
+    
+    def get_item(self, item_id: int) -> Optional[dict]:
+        item = self.items_by_id.get(item_id)
+        return dict(item) if item else None
+    
+    def stats(self) -> dict:
+        return {
+            'shop_date': self.shop_date.isoformat() if self.shop_date else None,
+            'items': len(self.items_by_id),
+            'level_views': len(self._levels),
+            'hits': self.hits,
+            'builds': self.builds
+        }
+
+
+_daily_shop = DailyShop()
+
+
+def get_daily_shop_stats() -> dict:
+    """Returns daily shop counters for runtime stats."""
+    return _daily_shop.stats()
+
+
+def _select_daily_shop_ids(candidates: list) -> list:
+    """Picks today's rotation from (id, rarity) rows according to DAILY_SHOP_RARITY_QUOTAS."""
+    items_by_rarity = {}
+    for item in candidates:
+        items_by_rarity.setdefault(item['rarity'], []).append(item['id'])
+    
+    selected_ids = []
+    for rarity, quota in DAILY_SHOP_RARITY_QUOTAS.items():
+        if rarity in items_by_rarity:
+            available = items_by_rarity[rarity]
+            selected_ids.extend(random.sample(available, min(quota, len(available))))
+    return selected_ids
+
+
+async def refresh_daily_shop(db_helpers) -> bool:
+    """
+    Materializes today's shop: loads the persisted rotation from rpg_daily_shop, or
+    rolls and stores a new one at the start of a UTC day, then loads its item rows.
+    Called at midnight UTC and lazily by get_daily_shop_items.
     
     Returns:
-        List of items available in today's shop
+        True if today's shop is available in memory
     """
     try:
         if not db_helpers.db_pool:
-            return []
+            return False
         
+        today = datetime.now(timezone.utc).date()
         conn = db_helpers.db_pool.get_connection()
         if not conn:
-            return []
+            return False
         
         cursor = conn.cursor(dictionary=True)
         try:
-            today = datetime.now(timezone.utc).date()
-            
-            # Check if we have today's shop
-            cursor.execute("""
-                SELECT item_ids FROM rpg_daily_shop WHERE shop_date = %s
-            """, (today,))
-            
+            cursor.execute("SELECT item_ids FROM rpg_daily_shop WHERE shop_date = %s", (today,))
             shop_row = cursor.fetchone()
             
-            if shop_row:
-                # Shop exists for today, load those items
-                item_ids = json.loads(shop_row['item_ids'])
-                
-                if item_ids:
-                    placeholders = ','.join(['%s'] * len(item_ids))
-                    cursor.execute(f"""
-                        SELECT * FROM rpg_items
-                        WHERE id IN ({placeholders}) AND required_level <= %s
-                        ORDER BY rarity, price ASC
-                    """, (*item_ids, player_level))
-                    
-                    return cursor.fetchall()
-                else:
-                    return []
-            
-            else:
-                # Generate new shop for today
+            if not shop_row:
                 logger.info(f"Generating new daily shop for {today}")
-                
-                # Get all available items for the player level
+                # The rotation is shared by all players; per-level views filter it on open
                 cursor.execute("""
                     SELECT id, rarity FROM rpg_items
-                    WHERE created_by IS NULL AND required_level <= %s AND is_quest_item = FALSE
-                """, (player_level,))
-                
-                all_items = cursor.fetchall()
+                    WHERE created_by IS NULL AND is_quest_item = FALSE
+                """)
+                candidates = cursor.fetchall()
                 
-                # If no items found for player level, try without level restriction
-                if not all_items:
-                    logger.warning(f"No items found for player level {player_level}. Trying all items...")
+                if not candidates:
+                    logger.error("No items in database! Attempting to initialize...")
+                    cursor.close()
+                    conn.close()
+                    await initialize_shop_items(db_helpers)
+                    
+                    conn = db_helpers.db_pool.get_connection()
+                    if not conn:
+                        logger.error("Failed to get database connection after initialization")
+                        return False
+                    cursor = conn.cursor(dictionary=True)
                     cursor.execute("""
                         SELECT id, rarity FROM rpg_items
                         WHERE created_by IS NULL AND is_quest_item = FALSE
                     """)
-                    all_items = cursor.fetchall()
-                
-                # If still no items, try to initialize items
-                if not all_items:
-                    logger.error("No items in database! Attempting to initialize...")
-                    new_conn = None
-                    new_cursor = None
-                    try:
-                        cursor.close()
-                        conn.close()
-                        await initialize_shop_items(db_helpers)
-                        
-                        # Try again after initialization
-                        new_conn = db_helpers.db_pool.get_connection()
-                        if not new_conn:
-                            logger.error("Failed to get database connection after initialization")
-                            return []
-                        
-                        new_cursor = new_conn.cursor(dictionary=True)
-                        new_cursor.execute("""
-                            SELECT id, rarity FROM rpg_items
-                            WHERE created_by IS NULL AND is_quest_item = FALSE
-                        """)
-                        all_items = new_cursor.fetchall()
-                        
-                        # Update conn and cursor references for cleanup in finally block
-                        conn = new_conn
-                        cursor = new_cursor
-                        
-                        if not all_items:
-                            logger.error("Failed to initialize items! Database may have issues.")
-                            return []
-                    except Exception as init_error:
-                        logger.error(f"Error during item initialization: {init_error}", exc_info=True)
-                        # Clean up the new connection if it was created
-                        if new_cursor:
-                            try:
-                                new_cursor.close()
-                            except Exception as e:
-                                logger.debug(f"Error closing cursor during cleanup: {e}")
-                        if new_conn:
-                            try:
-                                new_conn.close()
-                            except Exception as e:
-                                logger.debug(f"Error closing connection during cleanup: {e}")
-                        return []
-                
-                # Select items by rarity for balanced shop
-                # 10 common, 6 uncommon, 4 rare, 2 epic, 1 legendary
-                rarity_quotas = {
-                    'common': 10,
-                    'uncommon': 6,
-                    'rare': 4,
-                    'epic': 2,
-                    'legendary': 1
-                }
-                
-                selected_ids = []
-                items_by_rarity = {}
-                
-                # Group items by rarity
-                for item in all_items:
-                    rarity = item['rarity']
-                    if rarity not in items_by_rarity:
-                        items_by_rarity[rarity] = []
-                    items_by_rarity[rarity].append(item['id'])
-                
-                # Randomly select from each rarity
-                for rarity, quota in rarity_quotas.items():
-                    if rarity in items_by_rarity:
-                        available = items_by_rarity[rarity]
-                        count = min(quota, len(available))
-                        selected_ids.extend(random.sample(available, count))
+                    candidates = cursor.fetchall()
+                    if not candidates:
+                        logger.error("Failed to initialize items! Database may have issues.")
+                        return False
                 
-                # Save today's shop
+                # Another process (web dashboard) may store today's shop first; keep whichever won
                 cursor.execute("""
                     INSERT INTO rpg_daily_shop (shop_date, item_ids)
                     VALUES (%s, %s)
-                """, (today, json.dumps(selected_ids)))
-                
+                    ON DUPLICATE KEY UPDATE id = id
+                """, (today, json.dumps(_select_daily_shop_ids(candidates))))
                 conn.commit()
                 
-                # Return the selected items
-                if selected_ids:
-                    placeholders = ','.join(['%s'] * len(selected_ids))
-                    cursor.execute(f"""
-                        SELECT * FROM rpg_items
-                        WHERE id IN ({placeholders})
-                        ORDER BY rarity, price ASC
-                    """, tuple(selected_ids))
-                    
-                    return cursor.fetchall()
-                else:
-                    return []
-                
+                cursor.execute("SELECT item_ids FROM rpg_daily_shop WHERE shop_date = %s", (today,))
+                shop_row = cursor.fetchone()
+            
+            item_ids = json.loads(shop_row['item_ids']) if shop_row else []
+            items = []
+            if item_ids:
+                placeholders = ','.join(['%s'] * len(item_ids))
+                cursor.execute(f"SELECT * FROM rpg_items WHERE id IN ({placeholders})", tuple(item_ids))
+                items = cursor.fetchall()
+            
+            _daily_shop.set_items(today, items)
+            logger.info(f"Daily shop for {today} materialized with {len(items)} items")
+            return True
         finally:
             cursor.close()
             conn.close()
     except Exception as e:
-        logger.error(f"Error getting daily shop items: {e}", exc_info=True)
-        return []
+        logger.error(f"Error refreshing daily shop: {e}", exc_info=True)
+        return False
+
+
+async def get_daily_shop_items(db_helpers, player_level: int):
+    """
+    Get shop items for today's daily rotation.
+    Shop changes every 24 hours with a random selection of items.
+    
+    Returns:
+        List of items available in today's shop for the player's level
+    """
+    _check_item_definitions_version()
+    if not _daily_shop.is_current():
+        if not await refresh_daily_shop(db_helpers):
+            return []
+    return _daily_shop.view(player_level)
 
 
 async def get_shop_items(db_helpers, player_level: int):
@@ -4457,9 +4834,11 @@ async def purchase_item(db_helpers, user_id: int, item_id: int):
         
         cursor = conn.cursor(dictionary=True)
         try:
-            # Get item
-            cursor.execute("SELECT * FROM rpg_items WHERE id = %s", (item_id,))
-            item = cursor.fetchone()
+            # Get item (today's shop items are already in memory)
+            item = _daily_shop.get_item(item_id)
+            if not item:
+                cursor.execute("SELECT * FROM rpg_items WHERE id = %s", (item_id,))
+                item = cursor.fetchone()
             
             if not item:
                 return False, "Item nicht gefunden"
@@ -5064,14 +5443,18 @@ async def reset_skill_points(db_helpers, user_id: int, cost: int):
 
 
 async def get_unlocked_skills(db_helpers, user_id: int):
-    """Get all unlocked skills from the skill tree for a user."""
+    """
+    Get all unlocked skills from the skill tree for a user ({path_key: [skill_key, ...]}).
+    Returns None if the database is unavailable or the query failed, so callers can tell
+    a failure apart from a player without skills.
+    """
     try:
         if not db_helpers.db_pool:
-            return {}
+            return None
         
         conn = db_helpers.db_pool.get_connection()
         if not conn:
-            return {}
+            return None
         
         cursor = conn.cursor(dictionary=True)
         try:
@@ -5098,7 +5481,90 @@ async def get_unlocked_skills(db_helpers, user_id: int):
             conn.close()
     except Exception as e:
         logger.error(f"Error getting unlocked skills: {e}", exc_info=True)
-        return {}
+        return None
+
+
+# Skill tree bonuses - SKILL_TREE is compiled into a flat (path, skill) -> stat
+# vector table, and each player's summed vector is memoized until their unlocked
+# skills or the tree itself change. The dashboard runs in its own process and
+# touches the version file after skill tree edits or player resets.
+SKILL_BONUS_STATS = ('strength', 'dexterity', 'defense', 'speed', 'max_health')
+SKILL_TREE_VERSION_FILE = 'config/rpg_skill_tree.version'
+SKILL_BONUS_CACHE_TTL = 3600
+
+_skill_bonus_table: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+_skill_bonus_cache = TTLCache("rpg_skill_bonuses", max_size=5000, default_ttl=SKILL_BONUS_CACHE_TTL)
+_skill_tree_version = None
+
+
+def _read_skill_tree_version():
+    try:
+        return os.stat(SKILL_TREE_VERSION_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+
+def compile_skill_tree():
+    """Rebuilds the (path, skill) -> stat vector table from SKILL_TREE. Only 'stat' skills give bonuses."""
+    global _skill_bonus_table, _skill_tree_version
+    table = {}
+    for path_key, path_data in SKILL_TREE.items():
+        for skill_key, skill in path_data.get('skills', {}).items():
+            # Only process 'stat' type skills for permanent bonuses
+            if skill.get('type') != 'stat':
+                continue
+            
+            effect = skill.get('effect', {})
+            vector = []
+            for stat_name in SKILL_BONUS_STATS:
+                # Ensure bonus_value is an integer
+                try:
+                    vector.append(int(effect.get(stat_name, 0)))
+                except (ValueError, TypeError):
+                    logger.warning(f"Invalid bonus value for {stat_name} in {path_key}.{skill_key}: {effect.get(stat_name)}")
+                    vector.append(0)
+            if any(vector):
+                table[(path_key, skill_key)] = tuple(vector)
+    _skill_bonus_table = table
+    _skill_tree_version = _read_skill_tree_version()
+
+
+def invalidate_skill_bonuses(user_id: Optional[int] = None):
+    """Drops one player's memoized bonuses, or everyone's when user_id is None."""
+    if user_id is None:
+        _skill_bonus_cache.invalidate_namespace('bonuses')
+    else:
+        _skill_bonus_cache.invalidate('bonuses', user_id)
+
+
+def mark_skill_tree_dirty():
+    """
+    Recompiles the skill tree, drops all memoized bonuses and signals other
+    processes to do the same. Call after editing SKILL_TREE or deleting
+    rpg_skill_tree rows outside unlock_skill/reset_skill_tree.
+    """
+    try:
+        os.makedirs(os.path.dirname(SKILL_TREE_VERSION_FILE), exist_ok=True)
+        with open(SKILL_TREE_VERSION_FILE, 'w') as f:
+            f.write(str(time.time()))
+    except OSError as e:
+        logger.warning(f"Could not update skill tree version file: {e}")
+    compile_skill_tree()
+    invalidate_skill_bonuses()
+
+
+def _sum_skill_tree_bonuses(unlocked: Dict[str, List[str]]) -> dict:
+    """Sums the stat bonuses of the unlocked skills ({path_key: [skill_key, ...]})."""
+    totals = [0] * len(SKILL_BONUS_STATS)
+    for path_key, skill_keys in unlocked.items():
+        for skill_key in skill_keys:
+            vector = _skill_bonus_table.get((path_key, skill_key))
+            if vector:
+                totals = [total + bonus for total, bonus in zip(totals, vector)]
+    return dict(zip(SKILL_BONUS_STATS, totals))
+
+
+compile_skill_tree()
 
 
 async def calculate_skill_tree_bonuses(db_helpers, user_id: int) -> dict:
@@ -5116,49 +5582,26 @@ async def calculate_skill_tree_bonuses(db_helpers, user_id: int) -> dict:
         dict: Stat bonuses with keys 'strength', 'dexterity', 'defense', 'speed', 'max_health'
               All values are integers.
     """
-    bonuses = {
-        'strength': 0,
-        'dexterity': 0,
-        'defense': 0,
-        'speed': 0,
-        'max_health': 0
-    }
+    bonuses = dict.fromkeys(SKILL_BONUS_STATS, 0)
     
     try:
-        unlocked = await get_unlocked_skills(db_helpers, user_id)
-        
-        if not unlocked:
-            return bonuses
+        # Another process (the web dashboard) changed the tree or reset players
+        if _read_skill_tree_version() != _skill_tree_version:
+            compile_skill_tree()
+            invalidate_skill_bonuses()
         
-        # Iterate through all unlocked skills and sum up stat bonuses
-        for path_key, skill_keys in unlocked.items():
-            if path_key not in SKILL_TREE:
-                continue
-            
-            path_skills = SKILL_TREE[path_key]['skills']
-            
-            for skill_key in skill_keys:
-                if skill_key not in path_skills:
-                    continue
-                
-                skill = path_skills[skill_key]
-                
-                # Only process 'stat' type skills for permanent bonuses
-                if skill.get('type') != 'stat':
-                    continue
-                
-                effect = skill.get('effect', {})
-                
-                # Add each stat bonus (ensure integer conversion)
-                for stat_name, bonus_value in effect.items():
-                    if stat_name in bonuses:
-                        # Ensure bonus_value is an integer
-                        try:
-                            bonuses[stat_name] += int(bonus_value)
-                        except (ValueError, TypeError):
-                            logger.warning(f"Invalid bonus value for {stat_name}: {bonus_value}")
+        cached = _skill_bonus_cache.get('bonuses', user_id)
+        if cached is not None:
+            return dict(cached)
         
-        logger.debug(f"Calculated skill tree bonuses for user {user_id}: {bonuses}")
+        unlocked = await get_unlocked_skills(db_helpers, user_id)
+        if unlocked is None:
+            # Load failed - return zero bonuses this time but don't memoize them
+            return bonuses
+        if unlocked:
+            bonuses = _sum_skill_tree_bonuses(unlocked)
+            logger.debug(f"Calculated skill tree bonuses for user {user_id}: {bonuses}")
+        _skill_bonus_cache.set('bonuses', user_id, dict(bonuses))
         return bonuses
         
     except Exception as e:
@@ -5210,6 +5653,8 @@ async def unlock_skill(db_helpers, user_id: int, skill_path: str, skill_key: str
             
             # Get unlocked skills
             unlocked = await get_unlocked_skills(db_helpers, user_id)
+            if unlocked is None:
+                return False, "Datenbankverbindung fehlgeschlagen"
             path_unlocked = unlocked.get(skill_path, [])
             
             # Check if already unlocked
@@ -5235,6 +5680,7 @@ async def unlock_skill(db_helpers, user_id: int, skill_path: str, skill_key: str
             """, (skill['cost'], user_id))
             
             conn.commit()
+            invalidate_skill_bonuses(user_id)
             return True, f"**{skill['name']}** freigeschaltet!"
         finally:
             cursor.close()
@@ -5296,6 +5742,7 @@ async def reset_skill_tree(db_helpers, user_id: int, cost: int):
             """, (points_to_refund, cost, user_id))
             
             conn.commit()
+            invalidate_skill_bonuses(user_id)
             return True, f"Skill-Baum zurückgesetzt! {points_to_refund} Skillpunkte zurückerhalten."
         finally:
             cursor.close()
@@ -6,6 +6,7 @@ Handles purchases for color roles, features, and unlocks.
 import discord
 from datetime import datetime, timezone
 from modules.logger_utils import bot_logger as logger
+from modules import ledger
 
 # --- Color Role Management ---
 
@@ -134,15 +135,18 @@ async def purchase_color_role(db_helpers, member: discord.Member, color: str, ti
     if error:
         return False, f"Failed to create color role: {error}", None
     
-    # Deduct balance and log transaction
-    new_balance = await db_helpers.add_balance(member.id, member.display_name, -price, config, stat_period)
-    await db_helpers.log_transaction(
-        member.id,
-        'shop_purchase',
-        -price,
-        new_balance,
-        f"Purchased {tier} color role ({color})"
-    )
+    # Deduct balance and log transaction in one step; the balance is re-checked under the row lock
+    try:
+        await ledger.post(
+            db_helpers, member.id, member.display_name, -price, 'shop_purchase',
+            f"Purchased {tier} color role ({color})", config, stat_period, require_funds=True
+        )
+    except ledger.InsufficientFunds as e:
+        try:
+            await role.delete(reason="Color role purchase failed: insufficient funds")
+        except discord.HTTPException:
+            pass
+        return False, f"Insufficient funds! You need {price} {config['modules']['economy']['currency_symbol']} but only have {e.balance}.", None
     
     # Store equipped color in database
     await db_helpers.set_user_equipped_color(member.id, color)
@@ -187,15 +191,15 @@ async def purchase_feature(db_helpers, member: discord.Member, feature: str, pri
         currency = config['modules']['economy']['currency_symbol']
         return False, f"Insufficient funds! You need {price} {currency} but only have {balance}."
     
-    # Deduct balance and log transaction
-    new_balance = await db_helpers.add_balance(member.id, member.display_name, -price, config, stat_period)
-    await db_helpers.log_transaction(
-        member.id,
-        'shop_purchase',
-        -price,
-        new_balance,
-        f"Purchased feature: {feature}"
-    )
+    # Deduct balance and log transaction in one step; the balance is re-checked under the row lock
+    try:
+        await ledger.post(
+            db_helpers, member.id, member.display_name, -price, 'shop_purchase',
+            f"Purchased feature: {feature}", config, stat_period, require_funds=True
+        )
+    except ledger.InsufficientFunds as e:
+        currency = config['modules']['economy']['currency_symbol']
+        return False, f"Insufficient funds! You need {price} {currency} but only have {e.balance}."
     
     # Grant feature
     await db_helpers.add_feature_unlock(member.id, feature)
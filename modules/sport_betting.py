@@ -21,6 +21,10 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional, List, Dict, Any, Tuple
 from enum import Enum
 from modules.logger_utils import bot_logger as logger
+from modules.db_helpers import derived_rows
+from modules import http_client
+from modules import http_cache
+from modules import ledger
 
 
 # ============================================================================
@@ -94,6 +98,15 @@ class APICache:
 # Global API cache instance
 _api_cache = APICache(default_ttl=300)  # 5 minute default TTL
 
+# On-disk conditional-request cache behind _api_cache (survives restarts, revalidates with ETag/Last-Modified)
+SPORT_HTTP_CACHE_DIR = 'config/http_cache/sport_betting'
+_http_cache = http_cache.HTTPCache(SPORT_HTTP_CACHE_DIR)
+
+
+def get_http_cache_stats() -> Dict[str, Any]:
+    """Returns the on-disk provider response cache statistics."""
+    return _http_cache.get_stats()
+
 
 # ============================================================================
 # ENUMS AND CONSTANTS
@@ -165,6 +178,12 @@ FREE_LEAGUES = ["bl1", "bl2", "dfb", "ucl", "uel"]
 # Free motorsport events (OpenF1 is free, MotoGP uses free endpoints)
 FREE_MOTORSPORT = ["f1", "motogp"]
 
+# Bet, combo and stats rows written per settlement statement
+SETTLE_ROWS_PER_STATEMENT = 500
+
+# Matches written per bulk upsert in the incremental sync
+MATCH_SYNC_ROWS_PER_STATEMENT = 500
+
 # League configurations with display info
 LEAGUES = {
     "bl1": {
@@ -272,15 +291,41 @@ class FootballAPIProvider(ABC):
         self.session: Optional[aiohttp.ClientSession] = None
     
     async def get_session(self) -> aiohttp.ClientSession:
-        """Get or create an aiohttp session."""
+        """Get the shared, pooled aiohttp session (see modules/http_client.py)."""
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            self.session = await http_client.get_session()
         return self.session
     
     async def close(self):
-        """Close the aiohttp session."""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Release the session. The shared session itself is closed on bot shutdown."""
+        await http_client.release_session(self.session)
+        self.session = None
+    
+    def _serve_from_http_cache(self, url: str, cache_key: str, cache_ttl: Optional[int],
+                               stale_ttl: int) -> Tuple[Optional[dict], Any]:
+        """
+        Looks url up in the on-disk HTTP cache.
+        
+        Returns:
+            (stored entry, data). data is set when the stored body can be used without a
+            request: it is younger than cache_ttl, or younger than cache_ttl + stale_ttl
+            while a background conditional request refreshes it. Otherwise the stored
+            entry (if any) supplies the validators for the request.
+        """
+        stored = _http_cache.get(url)
+        if stored is None or not cache_ttl:
+            return stored, None
+        
+        age = _http_cache.age(stored)
+        if age < cache_ttl:
+            _http_cache.record_hit()
+            _api_cache.set(cache_key, stored['data'], int(cache_ttl - age))
+            return stored, stored['data']
+        if stale_ttl and age < cache_ttl + stale_ttl:
+            _http_cache.record_hit(stale=True)
+            _http_cache.revalidate_in_background(url, lambda: self._make_api_request(url, cache_key, cache_ttl))
+            return stored, stored['data']
+        return stored, None
     
     @abstractmethod
     async def get_matches(self, league_id: str, matchday: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -339,6 +384,7 @@ class OpenLigaDBProvider(FootballAPIProvider):
     CACHE_TTL_MATCHDAY = 1800    # 30 minutes for current matchday
     CACHE_TTL_TABLE = 3600       # 1 hour for league table
     CACHE_TTL_TEAMS = 86400      # 24 hours for teams (rarely changes)
+    STALE_TTL_CALENDAR = 21600   # Serve season/matchday calendars up to 6 hours stale while revalidating
     
     # Maximum retries for API calls
     MAX_RETRIES = 3
@@ -372,7 +418,7 @@ class OpenLigaDBProvider(FootballAPIProvider):
         return now.year - 1
     
     async def _make_api_request(self, url: str, cache_key: Optional[str] = None, 
-                                 cache_ttl: Optional[int] = None) -> Optional[Any]:
+                                 cache_ttl: Optional[int] = None, stale_ttl: int = 0) -> Optional[Any]:
         """
         Make an API request with caching and retry logic.
         
@@ -380,29 +426,45 @@ class OpenLigaDBProvider(FootballAPIProvider):
             url: The API URL to call
             cache_key: Optional cache key. If provided, will check cache first.
             cache_ttl: Optional TTL for cache entry in seconds.
+            stale_ttl: Seconds past cache_ttl the stored response may still be served
+                       while it is revalidated in the background (calendar data).
             
         Returns:
             API response data (parsed JSON) or None on failure
         """
         # Check cache first
+        stored = None
         if cache_key:
             cached = _api_cache.get(cache_key)
             if cached is not None:
                 logger.debug(f"Cache hit for {cache_key}")
                 return cached
+            
+            # Then the on-disk copy, which also survives restarts
+            stored, data = self._serve_from_http_cache(url, cache_key, cache_ttl, stale_ttl)
+            if data is not None:
+                logger.debug(f"HTTP cache hit for {cache_key}")
+                return data
         
         session = await self.get_session()
         last_error = None
         
         for attempt in range(self.MAX_RETRIES):
             try:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                    if response.status == 200:
+                async with session.get(url, headers=_http_cache.conditional_headers(stored),
+                                       timeout=aiohttp.ClientTimeout(total=15)) as response:
+                    if response.status == 304 and stored is not None:
+                        # Unchanged since the stored copy - no body was transferred
+                        data = _http_cache.refresh(url, stored)
+                        _api_cache.set(cache_key, data, cache_ttl)
+                        return data
+                    elif response.status == 200:
                         data = await response.json()
                         
                         # Cache successful response
                         if cache_key and data:
                             _api_cache.set(cache_key, data, cache_ttl)
+                            await _http_cache.store(url, data, response.headers)
                         
                         return data
                     elif response.status == 404:
@@ -493,7 +555,7 @@ class OpenLigaDBProvider(FootballAPIProvider):
         url = f"{self.BASE_URL}/getmatchdata/{league_id}/{season}"
         cache_key = f"season_matches_{league_id}_{season}"
         
-        data = await self._make_api_request(url, cache_key, self.CACHE_TTL_MATCHES)
+        data = await self._make_api_request(url, cache_key, self.CACHE_TTL_MATCHES, self.STALE_TTL_CALENDAR)
         
         if data is None:
             return []
@@ -520,7 +582,7 @@ class OpenLigaDBProvider(FootballAPIProvider):
         url = f"{self.BASE_URL}/getavailablegroups/{league_id}/{season}"
         cache_key = f"groups_{league_id}_{season}"
         
-        data = await self._make_api_request(url, cache_key, self.CACHE_TTL_MATCHDAY)
+        data = await self._make_api_request(url, cache_key, self.CACHE_TTL_MATCHDAY, self.STALE_TTL_CALENDAR)
         
         return data if data else []
     
@@ -640,7 +702,7 @@ class OpenLigaDBProvider(FootballAPIProvider):
         url = f"{self.BASE_URL}/getcurrentgroup/{league_id}"
         cache_key = f"currentgroup_{league_id}"
         
-        data = await self._make_api_request(url, cache_key, self.CACHE_TTL_MATCHDAY)
+        data = await self._make_api_request(url, cache_key, self.CACHE_TTL_MATCHDAY, self.STALE_TTL_CALENDAR)
         
         if data and isinstance(data, dict):
             group_order = data.get("groupOrderID")
@@ -653,7 +715,9 @@ class OpenLigaDBProvider(FootballAPIProvider):
             all_matches_url = f"{self.BASE_URL}/getmatchdata/{league_id}/{season}"
             all_matches_cache_key = f"all_matches_{league_id}_{season}"
             
-            matches_data = await self._make_api_request(all_matches_url, all_matches_cache_key, self.CACHE_TTL_MATCHES)
+            matches_data = await self._make_api_request(
+                all_matches_url, all_matches_cache_key, self.CACHE_TTL_MATCHES, self.STALE_TTL_CALENDAR
+            )
             
             if matches_data:
                 if isinstance(matches_data, dict):
@@ -1262,6 +1326,7 @@ class OpenF1Provider(FootballAPIProvider):
     CACHE_TTL_SESSIONS = 1800     # 30 minutes for session data
     CACHE_TTL_DRIVERS = 86400    # 24 hours for driver data (rarely changes)
     CACHE_TTL_RESULTS = 300      # 5 minutes for results
+    STALE_TTL_CALENDAR = 21600   # Serve the session calendar up to 6 hours stale while revalidating
     
     MAX_RETRIES = 3
     RETRY_DELAY = 1.0
@@ -1315,24 +1380,36 @@ class OpenF1Provider(FootballAPIProvider):
         return datetime.now().year
     
     async def _make_api_request(self, url: str, cache_key: Optional[str] = None,
-                                 cache_ttl: Optional[int] = None) -> Optional[Any]:
-        """Make an API request with caching and retry logic."""
+                                 cache_ttl: Optional[int] = None, stale_ttl: int = 0) -> Optional[Any]:
+        """Make an API request with caching, conditional revalidation and retry logic."""
+        stored = None
         if cache_key:
             cached = _api_cache.get(cache_key)
             if cached is not None:
                 logger.debug(f"Cache hit for {cache_key}")
                 return cached
+            
+            stored, data = self._serve_from_http_cache(url, cache_key, cache_ttl, stale_ttl)
+            if data is not None:
+                logger.debug(f"HTTP cache hit for {cache_key}")
+                return data
         
         session = await self.get_session()
         last_error = None
         
         for attempt in range(self.MAX_RETRIES):
             try:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                    if response.status == 200:
+                async with session.get(url, headers=_http_cache.conditional_headers(stored),
+                                       timeout=aiohttp.ClientTimeout(total=15)) as response:
+                    if response.status == 304 and stored is not None:
+                        data = _http_cache.refresh(url, stored)
+                        _api_cache.set(cache_key, data, cache_ttl)
+                        return data
+                    elif response.status == 200:
                         data = await response.json()
                         if cache_key and data:
                             _api_cache.set(cache_key, data, cache_ttl)
+                            await _http_cache.store(url, data, response.headers)
                         return data
                     elif response.status == 404:
                         logger.debug(f"OpenF1 404 for URL: {url}")
@@ -1377,7 +1454,7 @@ class OpenF1Provider(FootballAPIProvider):
             url = f"{self.BASE_URL}/sessions?year={year}"
             cache_key = f"f1_sessions_{year}"
             
-            data = await self._make_api_request(url, cache_key, self.CACHE_TTL_SESSIONS)
+            data = await self._make_api_request(url, cache_key, self.CACHE_TTL_SESSIONS, self.STALE_TTL_CALENDAR)
             
             if not data:
                 continue
@@ -2116,6 +2193,182 @@ async def initialize_sport_betting_tables(db_helpers):
         return False
 
 
+# Fingerprint and status of each match as last written to sport_matches (match_id -> (fingerprint, status))
+_match_fingerprints: Dict[str, Tuple[int, str]] = {}
+# Football matches the sync saw finish, waiting for settlement (match_id -> result)
+_finished_matches: Dict[str, Dict[str, Any]] = {}
+_match_sync_stats = {'matches_seen': 0, 'matches_written': 0, 'fingerprints_loaded': 0, 'matches_finished': 0}
+
+_MATCH_COLUMNS = ("match_id, league_id, provider, home_team, away_team, home_team_short, away_team_short, "
+                  "home_score, away_score, status, match_time, matchday")
+
+
+def _match_row(match_data: Dict[str, Any]) -> tuple:
+    """Builds the sport_matches row for a parsed match (columns of _MATCH_COLUMNS, then the three odds)."""
+    # Calculate odds
+    odds = OddsCalculator.calculate_match_odds(match_data)
+    
+    # Convert match_time to UTC naive datetime for MySQL DATETIME storage
+    match_time = match_data["match_time"]
+    if isinstance(match_time, datetime):
+        # If timezone-aware, convert to UTC first
+        if match_time.tzinfo is not None:
+            match_time = match_time.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    # Ensure league_id is stored in lowercase for consistency
+    league_id = match_data.get("league_id", "bl1")
+    if league_id:
+        league_id = league_id.lower()
+    
+    return (
+        match_data["id"],
+        league_id,
+        match_data["provider"],
+        match_data["home_team"],
+        match_data["away_team"],
+        match_data.get("home_team_short", ""),
+        match_data.get("away_team_short", ""),
+        match_data.get("home_score", 0) or 0,
+        match_data.get("away_score", 0) or 0,
+        match_data["status"].value,
+        match_time,
+        match_data.get("matchday", 1) or 1,
+        odds["home"],
+        odds["draw"],
+        odds["away"]
+    )
+
+
+def _match_fingerprint(row: tuple) -> int:
+    """Fingerprint of the synced payload. Odds are left out, they get fresh noise on every calculation."""
+    return hash(tuple(row[:12]))
+
+
+def _upsert_match_rows(cursor, rows: list):
+    """Inserts or updates sport_matches rows, MATCH_SYNC_ROWS_PER_STATEMENT per statement."""
+    for start in range(0, len(rows), MATCH_SYNC_ROWS_PER_STATEMENT):
+        # executemany sends a single multi-row INSERT
+        cursor.executemany(f"""
+            INSERT INTO sport_matches 
+            ({_MATCH_COLUMNS}, odds_home, odds_draw, odds_away)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                home_score = VALUES(home_score),
+                away_score = VALUES(away_score),
+                status = VALUES(status),
+                match_time = VALUES(match_time),
+                odds_home = VALUES(odds_home),
+                odds_draw = VALUES(odds_draw),
+                odds_away = VALUES(odds_away)
+        """, rows[start:start + MATCH_SYNC_ROWS_PER_STATEMENT])
+
+
+async def _write_changed_matches_sync(db_helpers, rows: list, known: Dict[str, Tuple[int, str]]):
+    """
+    Writes the rows whose fingerprint differs from known in one transaction. Runs on the DB executor.
+    Matches missing from known are fingerprinted from their stored sport_matches row first.
+    
+    Returns:
+        (rows written, fingerprints loaded from the database), or None without a connection
+    """
+    conn = db_helpers.db_pool.get_connection()
+    if not conn:
+        return None
+    
+    cursor = conn.cursor()
+    try:
+        loaded = {}
+        unknown = [row[0] for row in rows if row[0] not in known]
+        for start in range(0, len(unknown), MATCH_SYNC_ROWS_PER_STATEMENT):
+            chunk = unknown[start:start + MATCH_SYNC_ROWS_PER_STATEMENT]
+            cursor.execute(f"""
+                SELECT {_MATCH_COLUMNS} FROM sport_matches
+                WHERE match_id IN ({", ".join(["%s"] * len(chunk))})
+            """, tuple(chunk))
+            for stored in cursor.fetchall():
+                loaded[stored[0]] = (_match_fingerprint(stored), stored[9])
+        
+        changed = []
+        for row in rows:
+            previous = known.get(row[0]) or loaded.get(row[0])
+            if previous is None or previous[0] != _match_fingerprint(row):
+                changed.append(row)
+        
+        if changed:
+            _upsert_match_rows(cursor, changed)
+            conn.commit()
+        return changed, loaded
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+async def sync_matches(db_helpers, matches: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    Writes parsed matches to sport_matches, skipping those whose payload has not changed
+    since the last sync. Changed matches are written with one bulk upsert.
+    
+    Football matches that change to finished are queued for settlement (see pop_finished_matches).
+    
+    Returns:
+        Number of matches written, or None if the database is unavailable
+    """
+    if not db_helpers.db_pool:
+        return None
+    
+    rows = list({row[0]: row for row in map(_match_row, matches)}.values())
+    if not rows:
+        return 0
+    
+    known = {row[0]: _match_fingerprints[row[0]] for row in rows if row[0] in _match_fingerprints}
+    result = await db_helpers.run_in_db_executor(_write_changed_matches_sync)(db_helpers, rows, known)
+    if result is None:
+        return None
+    
+    changed, loaded = result
+    finished_status = MatchStatus.FINISHED.value
+    for row in changed:
+        match_id, league_id, status = row[0], row[1], row[9]
+        previous = known.get(match_id) or loaded.get(match_id)
+        league_config = LEAGUES.get(league_id, {})
+        if (status == finished_status and previous is not None and previous[1] != finished_status
+                and league_config.get("sport", SportType.FOOTBALL) == SportType.FOOTBALL):
+            _finished_matches[match_id] = {
+                "match_id": match_id,
+                "league_id": league_id,
+                "home_score": row[7],
+                "away_score": row[8],
+            }
+            _match_sync_stats['matches_finished'] += 1
+        _match_fingerprints[match_id] = (_match_fingerprint(row), status)
+    for match_id, entry in loaded.items():
+        _match_fingerprints.setdefault(match_id, entry)
+    
+    _match_sync_stats['matches_seen'] += len(rows)
+    _match_sync_stats['matches_written'] += len(changed)
+    _match_sync_stats['fingerprints_loaded'] += len(loaded)
+    return len(changed)
+
+
+def pop_finished_matches() -> List[Dict[str, Any]]:
+    """Returns and clears the matches the sync saw finish ({match_id, league_id, home_score, away_score})."""
+    finished = list(_finished_matches.values())
+    _finished_matches.clear()
+    return finished
+
+
+def get_match_sync_stats() -> Dict[str, Any]:
+    """Returns incremental match sync counters."""
+    return {
+        **_match_sync_stats,
+        'fingerprints_cached': len(_match_fingerprints),
+        'finished_pending_settlement': len(_finished_matches),
+    }
+
+
 async def get_or_update_match(db_helpers, match_data: Dict[str, Any]) -> bool:
     """Insert or update a match in the database."""
     try:
@@ -2128,54 +2381,10 @@ async def get_or_update_match(db_helpers, match_data: Dict[str, Any]) -> bool:
         
         cursor = conn.cursor()
         try:
-            # Calculate odds
-            odds = OddsCalculator.calculate_match_odds(match_data)
-            
-            # Convert match_time to UTC naive datetime for MySQL DATETIME storage
-            match_time = match_data["match_time"]
-            if isinstance(match_time, datetime):
-                # If timezone-aware, convert to UTC first
-                if match_time.tzinfo is not None:
-                    match_time = match_time.astimezone(timezone.utc).replace(tzinfo=None)
-            
-            # Ensure league_id is stored in lowercase for consistency
-            league_id = match_data.get("league_id", "bl1")
-            if league_id:
-                league_id = league_id.lower()
-            
-            cursor.execute("""
-                INSERT INTO sport_matches 
-                (match_id, league_id, provider, home_team, away_team, home_team_short, 
-                 away_team_short, home_score, away_score, status, match_time, matchday,
-                 odds_home, odds_draw, odds_away)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    home_score = VALUES(home_score),
-                    away_score = VALUES(away_score),
-                    status = VALUES(status),
-                    match_time = VALUES(match_time),
-                    odds_home = VALUES(odds_home),
-                    odds_draw = VALUES(odds_draw),
-                    odds_away = VALUES(odds_away)
-            """, (
-                match_data["id"],
-                league_id,
-                match_data["provider"],
-                match_data["home_team"],
-                match_data["away_team"],
-                match_data.get("home_team_short", ""),
-                match_data.get("away_team_short", ""),
-                match_data.get("home_score", 0) or 0,
-                match_data.get("away_score", 0) or 0,
-                match_data["status"].value,
-                match_time,
-                match_data.get("matchday", 1) or 1,
-                odds["home"],
-                odds["draw"],
-                odds["away"]
-            ))
-            
+            row = _match_row(match_data)
+            _upsert_match_rows(cursor, [row])
             conn.commit()
+            _match_fingerprints[row[0]] = (_match_fingerprint(row), row[9])
             return True
             
         finally:
@@ -2614,116 +2823,201 @@ async def get_user_combo_bets(db_helpers, user_id: int, status: Optional[str] =
         return []
 
 
-async def settle_combo_bets_for_match(db_helpers, match_id: str, home_score: int, away_score: int) -> int:
+def winning_outcomes(home_score: int, away_score: int) -> frozenset:
+    """
+    Returns every (bet_type, bet_outcome) pair that wins for a final score.
+    Settlement evaluates this once per match and checks each bet with a set lookup.
+    """
+    total_goals = home_score + away_score
+    goal_diff = home_score - away_score
+
+    if goal_diff > 0:
+        winner = "home"
+    elif goal_diff == 0:
+        winner = "draw"
+    else:
+        winner = "away"
+
+    outcomes = {
+        ("winner", winner),
+        ("btts", "yes" if home_score > 0 and away_score > 0 else "no"),
+    }
+    for line in ("1.5", "2.5", "3.5"):
+        outcomes.add((f"over_under_{line}", "over" if total_goals > float(line) else "under"))
+    for margin in (1, 2, 3):
+        if goal_diff >= margin:
+            outcomes.add((f"goal_diff_{margin}", f"home_diff_{margin}"))
+        elif goal_diff <= -margin:
+            outcomes.add((f"goal_diff_{margin}", f"away_diff_{margin}"))
+
+    return frozenset(outcomes)
+
+
+def _update_by_ids(cursor, table: str, id_column: str, ids: list, assignments: str):
+    """Applies the same SET clause to a list of rows, SETTLE_ROWS_PER_STATEMENT ids per statement."""
+    for start in range(0, len(ids), SETTLE_ROWS_PER_STATEMENT):
+        chunk = ids[start:start + SETTLE_ROWS_PER_STATEMENT]
+        cursor.execute(f"""
+            UPDATE {table} SET {assignments}
+            WHERE {id_column} IN ({", ".join(["%s"] * len(chunk))})
+        """, tuple(chunk))
+
+
+def _apply_settlement_stats(cursor, results: list):
+    """
+    Adds settled bets to sport_betting_stats with one locking read and one UPDATE per chunk of users.
+
+    Args:
+        cursor: Dictionary cursor inside the settlement transaction
+        results: (user_id, won, amount) in settlement order; amount is the payout
+                 for a win and the stake for a loss
+    """
+    if not results:
+        return
+
+    user_ids = sorted({user_id for user_id, _, _ in results})
+    cursor.execute(f"""
+        SELECT user_id, current_streak, best_streak FROM sport_betting_stats
+        WHERE user_id IN ({", ".join(["%s"] * len(user_ids))}) ORDER BY user_id FOR UPDATE
+    """, tuple(user_ids))
+    streaks = {row["user_id"]: [row["current_streak"] or 0, row["best_streak"] or 0] for row in cursor.fetchall()}
+
+    # Replay the bets in order so streaks come out as if they were settled one by one
+    totals = {}
+    for user_id, won, amount in results:
+        if user_id not in streaks:
+            continue
+        wins, losses, total_won, total_lost, biggest_win = totals.get(user_id, (0, 0, 0, 0, 0))
+        streak = streaks[user_id]
+        if won:
+            wins, total_won, biggest_win = wins + 1, total_won + amount, max(biggest_win, amount)
+            streak[0] += 1
+            streak[1] = max(streak[1], streak[0])
+        else:
+            losses, total_lost = losses + 1, total_lost + amount
+            streak[0] = 0
+        totals[user_id] = (wins, losses, total_won, total_lost, biggest_win)
+
+    rows = [(user_id, *total, *streaks[user_id]) for user_id, total in totals.items()]
+    columns = ['user_id', 'wins', 'losses', 'won', 'lost', 'biggest', 'streak', 'best']
+    for start in range(0, len(rows), SETTLE_ROWS_PER_STATEMENT):
+        chunk = rows[start:start + SETTLE_ROWS_PER_STATEMENT]
+        cursor.execute(f"""
+            UPDATE sport_betting_stats s
+            JOIN ({derived_rows(columns, len(chunk))}) d ON d.user_id = s.user_id
+            SET s.total_wins = s.total_wins + d.wins,
+                s.total_losses = s.total_losses + d.losses,
+                s.total_won = s.total_won + d.won,
+                s.total_lost = s.total_lost + d.lost,
+                s.biggest_win = GREATEST(s.biggest_win, d.biggest),
+                s.current_streak = d.streak,
+                s.best_streak = d.best
+        """, tuple(value for row in chunk for value in row))
+
+
+async def _settle_combo_bets_sync(db_helpers, match_id: str, home_score: int, away_score: int,
+                                  starting_balance: int):
+    """
+    Settles the combo selections of a finished match in one transaction. Runs on the DB executor.
+
+    Returns:
+        (number of combo bets settled, ledger entries for the payouts), or None without a connection
+    """
+    conn = db_helpers.db_pool.get_connection()
+    if not conn:
+        return None
+
+    cursor = conn.cursor(dictionary=True)
+    ledger_cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT s.selection_id, s.combo_id, s.bet_type, s.bet_outcome
+            FROM sport_combo_selections s
+            JOIN sport_combo_bets c ON s.combo_id = c.combo_id
+            WHERE s.match_id = %s AND s.status = 'pending' AND c.status = 'pending'
+            ORDER BY s.combo_id
+            FOR UPDATE
+        """, (match_id,))
+        selections = cursor.fetchall()
+        if not selections:
+            conn.rollback()
+            return 0, []
+
+        winners = winning_outcomes(home_score, away_score)
+        won_selections = [s["selection_id"] for s in selections if (s["bet_type"], s["bet_outcome"]) in winners]
+        lost_selections = [s["selection_id"] for s in selections if (s["bet_type"], s["bet_outcome"]) not in winners]
+        _update_by_ids(cursor, "sport_combo_selections", "selection_id", won_selections, "status = 'won'")
+        _update_by_ids(cursor, "sport_combo_selections", "selection_id", lost_selections, "status = 'lost'")
+
+        # One grouped read tells which affected combos are complete and whether they lost
+        combo_ids = sorted({s["combo_id"] for s in selections})
+        combos = []
+        for start in range(0, len(combo_ids), SETTLE_ROWS_PER_STATEMENT):
+            chunk = combo_ids[start:start + SETTLE_ROWS_PER_STATEMENT]
+            cursor.execute(f"""
+                SELECT c.combo_id, c.user_id, c.bet_amount, c.potential_payout,
+                       SUM(s.status = 'pending') AS pending, SUM(s.status = 'lost') AS lost
+                FROM sport_combo_bets c
+                JOIN sport_combo_selections s ON s.combo_id = c.combo_id
+                WHERE c.combo_id IN ({", ".join(["%s"] * len(chunk))})
+                GROUP BY c.combo_id, c.user_id, c.bet_amount, c.potential_payout
+                ORDER BY c.combo_id
+            """, tuple(chunk))
+            combos.extend(cursor.fetchall())
+
+        won_combos, lost_combos, results, entries = [], [], [], []
+        for combo in combos:
+            if combo["pending"]:
+                continue
+            if combo["lost"]:
+                lost_combos.append(combo["combo_id"])
+                results.append((combo["user_id"], False, combo["bet_amount"]))
+            else:
+                won_combos.append(combo["combo_id"])
+                results.append((combo["user_id"], True, combo["potential_payout"]))
+                entries.append(ledger.entry(combo["user_id"], None, combo["potential_payout"],
+                                            'sport_bet_win', f"Combo bet #{combo['combo_id']} won"))
+
+        _update_by_ids(cursor, "sport_combo_bets", "combo_id", won_combos,
+                       "status = 'won', actual_payout = potential_payout, settled_at = NOW()")
+        _update_by_ids(cursor, "sport_combo_bets", "combo_id", lost_combos,
+                       "status = 'lost', actual_payout = 0, settled_at = NOW()")
+        _apply_settlement_stats(cursor, results)
+        if entries:
+            ledger.write_entries(ledger_cursor, entries, starting_balance)
+
+        conn.commit()
+        return len(won_combos) + len(lost_combos), entries
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        ledger_cursor.close()
+        cursor.close()
+        conn.close()
+
+
+async def settle_combo_bets_for_match(db_helpers, match_id: str, home_score: int, away_score: int,
+                                      config: dict, stat_period: str = None) -> int:
     """
     Update combo bet selections for a finished match and settle combo bets if all selections are done.
+    Winning combos are paid out in the same transaction.
     Returns the number of combo bets settled.
     """
     try:
         if not db_helpers.db_pool:
             return 0
-        
-        conn = db_helpers.db_pool.get_connection()
-        if not conn:
+
+        result = await db_helpers.run_in_db_executor(_settle_combo_bets_sync)(
+            db_helpers, match_id, home_score, away_score, config['modules']['economy']['starting_balance']
+        )
+        if result is None:
             return 0
-        
-        cursor = conn.cursor(dictionary=True)
-        try:
-            # Get all pending selections for this match
-            cursor.execute("""
-                SELECT s.*, c.combo_id, c.user_id, c.bet_amount, c.potential_payout
-                FROM sport_combo_selections s
-                JOIN sport_combo_bets c ON s.combo_id = c.combo_id
-                WHERE s.match_id = %s AND s.status = 'pending' AND c.status = 'pending'
-            """, (match_id,))
-            
-            selections = cursor.fetchall()
-            affected_combos = set()
-            
-            for selection in selections:
-                # Check if this selection won
-                bet_won = await check_bet_outcome(
-                    selection["bet_type"], 
-                    selection["bet_outcome"], 
-                    home_score, 
-                    away_score
-                )
-                
-                new_status = "won" if bet_won else "lost"
-                cursor.execute("""
-                    UPDATE sport_combo_selections 
-                    SET status = %s
-                    WHERE selection_id = %s
-                """, (new_status, selection["selection_id"]))
-                
-                affected_combos.add(selection["combo_id"])
-            
-            # Check each affected combo bet
-            settled_count = 0
-            for combo_id in affected_combos:
-                # Get all selections for this combo
-                cursor.execute("""
-                    SELECT status FROM sport_combo_selections
-                    WHERE combo_id = %s
-                """, (combo_id,))
-                
-                all_selections = cursor.fetchall()
-                statuses = [s["status"] for s in all_selections]
-                
-                # If any selection is still pending, skip this combo
-                if "pending" in statuses:
-                    continue
-                
-                # If any selection lost, the combo loses
-                if "lost" in statuses:
-                    cursor.execute("""
-                        UPDATE sport_combo_bets 
-                        SET status = 'lost', actual_payout = 0, settled_at = NOW()
-                        WHERE combo_id = %s
-                    """, (combo_id,))
-                    
-                    # Get user_id and bet_amount for stats update
-                    cursor.execute("SELECT user_id, bet_amount FROM sport_combo_bets WHERE combo_id = %s", (combo_id,))
-                    combo_info = cursor.fetchone()
-                    if combo_info:
-                        cursor.execute("""
-                            UPDATE sport_betting_stats 
-                            SET total_losses = total_losses + 1,
-                                total_lost = total_lost + %s,
-                                current_streak = 0
-                            WHERE user_id = %s
-                        """, (combo_info["bet_amount"], combo_info["user_id"]))
-                else:
-                    # All selections won!
-                    cursor.execute("SELECT user_id, potential_payout FROM sport_combo_bets WHERE combo_id = %s", (combo_id,))
-                    combo_info = cursor.fetchone()
-                    
-                    if combo_info:
-                        cursor.execute("""
-                            UPDATE sport_combo_bets 
-                            SET status = 'won', actual_payout = %s, settled_at = NOW()
-                            WHERE combo_id = %s
-                        """, (combo_info["potential_payout"], combo_id))
-                        
-                        cursor.execute("""
-                            UPDATE sport_betting_stats 
-                            SET total_wins = total_wins + 1,
-                                total_won = total_won + %s,
-                                biggest_win = GREATEST(biggest_win, %s),
-                                current_streak = current_streak + 1,
-                                best_streak = GREATEST(best_streak, current_streak + 1)
-                            WHERE user_id = %s
-                        """, (combo_info["potential_payout"], combo_info["potential_payout"], combo_info["user_id"]))
-                
-                settled_count += 1
-            
-            conn.commit()
-            return settled_count
-            
-        finally:
-            cursor.close()
-            conn.close()
-            
+
+        settled_count, entries = result
+        await ledger.finish_entries(db_helpers, entries, stat_period)
+        return settled_count
+
     except Exception as e:
         logger.error(f"Error settling combo bets: {e}", exc_info=True)
         return 0
@@ -2798,200 +3092,135 @@ async def get_user_betting_stats(db_helpers, user_id: int) -> Optional[Dict]:
         return None
 
 
-async def settle_match_bets(db_helpers, match_id: str, home_score: int, away_score: int) -> int:
+async def _settle_match_bets_sync(db_helpers, match_id: str, home_score: int, away_score: int,
+                                  starting_balance: int):
+    """
+    Settles all pending single bets of a finished match in one transaction. Runs on the DB executor.
+
+    Every bet is checked against the match's winning outcome set, then the bets,
+    stats, payouts and the match row are written with a handful of set-based
+    statements instead of two UPDATEs per bet.
+
+    Returns:
+        (settled bet details, ledger entries for the payouts), or None without a connection
+    """
+    conn = db_helpers.db_pool.get_connection()
+    if not conn:
+        return None
+
+    cursor = conn.cursor(dictionary=True)
+    ledger_cursor = conn.cursor()
+    try:
+        # Get all pending bets for this match with match details
+        cursor.execute("""
+            SELECT b.*, m.home_team, m.away_team, m.league_id
+            FROM sport_bets b
+            JOIN sport_matches m ON b.match_id = m.match_id
+            WHERE b.match_id = %s AND b.status = 'pending'
+            ORDER BY b.bet_id
+            FOR UPDATE
+        """, (match_id,))
+        bets = cursor.fetchall()
+
+        winners = winning_outcomes(home_score, away_score)
+        settled_bets, won_ids, lost_ids, results, entries = [], [], [], [], []
+        for bet in bets:
+            bet_won = (bet["bet_type"], bet["bet_outcome"]) in winners
+            home_team = bet.get("home_team", "Heim")
+            away_team = bet.get("away_team", "Auswärts")
+
+            if bet_won:
+                actual_payout = bet["potential_payout"]
+                status = "won"
+                won_ids.append(bet["bet_id"])
+                results.append((bet["user_id"], True, actual_payout))
+                entries.append(ledger.entry(bet["user_id"], None, actual_payout, 'sport_bet_win',
+                                            f"Sport bet won: {home_team} {home_score}:{away_score} {away_team}"))
+            else:
+                actual_payout = 0
+                status = "lost"
+                lost_ids.append(bet["bet_id"])
+                results.append((bet["user_id"], False, bet["bet_amount"]))
+
+            # Add to settled bets list for notifications
+            settled_bets.append({
+                "user_id": bet["user_id"],
+                "bet_id": bet["bet_id"],
+                "match_id": match_id,
+                "home_team": home_team,
+                "away_team": away_team,
+                "home_score": home_score,
+                "away_score": away_score,
+                "bet_type": bet["bet_type"],
+                "bet_outcome": bet["bet_outcome"],
+                "bet_amount": bet["bet_amount"],
+                "odds_at_bet": bet.get("odds_at_bet", 1.0),
+                "potential_payout": bet["potential_payout"],
+                "actual_payout": actual_payout,
+                "status": status,
+                "league_id": bet.get("league_id", "bl1")
+            })
+
+        _update_by_ids(cursor, "sport_bets", "bet_id", won_ids,
+                       "status = 'won', actual_payout = potential_payout, settled_at = NOW()")
+        _update_by_ids(cursor, "sport_bets", "bet_id", lost_ids,
+                       "status = 'lost', actual_payout = 0, settled_at = NOW()")
+        _apply_settlement_stats(cursor, results)
+        if entries:
+            ledger.write_entries(ledger_cursor, entries, starting_balance)
+
+        # Update match status
+        cursor.execute("""
+            UPDATE sport_matches 
+            SET status = 'finished', home_score = %s, away_score = %s
+            WHERE match_id = %s
+        """, (home_score, away_score, match_id))
+
+        conn.commit()
+        return settled_bets, entries
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        ledger_cursor.close()
+        cursor.close()
+        conn.close()
+
+
+async def settle_match_bets(db_helpers, match_id: str, home_score: int, away_score: int,
+                            config: dict, stat_period: str = None) -> int:
     """
     Settle all bets for a finished match.
     Returns the number of bets settled.
     Supports advanced bet types: over/under, BTTS, goal difference.
     """
-    try:
-        if not db_helpers.db_pool:
-            return 0
-        
-        conn = db_helpers.db_pool.get_connection()
-        if not conn:
-            return 0
-        
-        cursor = conn.cursor(dictionary=True)
-        try:
-            # Get all pending bets for this match
-            cursor.execute("""
-                SELECT * FROM sport_bets 
-                WHERE match_id = %s AND status = 'pending'
-            """, (match_id,))
-            bets = cursor.fetchall()
-            
-            settled_count = 0
-            
-            for bet in bets:
-                bet_type = bet["bet_type"]
-                bet_outcome = bet["bet_outcome"]
-                user_id = bet["user_id"]
-                bet_amount = bet["bet_amount"]
-                potential_payout = bet["potential_payout"]
-                
-                # Use the new check_bet_outcome function for all bet types
-                bet_won = await check_bet_outcome(bet_type, bet_outcome, home_score, away_score)
-                
-                if bet_won:
-                    # Winner!
-                    actual_payout = potential_payout
-                    status = "won"
-                    
-                    # Update user stats
-                    cursor.execute("""
-                        UPDATE sport_betting_stats 
-                        SET total_wins = total_wins + 1,
-                            total_won = total_won + %s,
-                            biggest_win = GREATEST(biggest_win, %s),
-                            current_streak = current_streak + 1,
-                            best_streak = GREATEST(best_streak, current_streak + 1)
-                        WHERE user_id = %s
-                    """, (actual_payout, actual_payout, user_id))
-                else:
-                    # Loser
-                    actual_payout = 0
-                    status = "lost"
-                    
-                    # Update user stats
-                    cursor.execute("""
-                        UPDATE sport_betting_stats 
-                        SET total_losses = total_losses + 1,
-                            total_lost = total_lost + %s,
-                            current_streak = 0
-                        WHERE user_id = %s
-                    """, (bet_amount, user_id))
-                
-                # Update bet status
-                cursor.execute("""
-                    UPDATE sport_bets 
-                    SET status = %s, actual_payout = %s, settled_at = NOW()
-                    WHERE bet_id = %s
-                """, (status, actual_payout, bet["bet_id"]))
-                
-                settled_count += 1
-            
-            # Update match status
-            cursor.execute("""
-                UPDATE sport_matches 
-                SET status = 'finished', home_score = %s, away_score = %s
-                WHERE match_id = %s
-            """, (home_score, away_score, match_id))
-            
-            conn.commit()
-            return settled_count
-            
-        finally:
-            cursor.close()
-            conn.close()
-            
-    except Exception as e:
-        logger.error(f"Error settling bets: {e}", exc_info=True)
-        return 0
+    settled_bets = await settle_match_bets_with_details(
+        db_helpers, match_id, home_score, away_score, config, stat_period
+    )
+    return len(settled_bets)
 
 
-async def settle_match_bets_with_details(db_helpers, match_id: str, home_score: int, away_score: int) -> List[Dict]:
+async def settle_match_bets_with_details(db_helpers, match_id: str, home_score: int, away_score: int,
+                                         config: dict, stat_period: str = None) -> List[Dict]:
     """
     Settle all bets for a finished match and return details for notifications.
+    Winnings are credited in the same transaction, so a failed notification cannot lose a payout.
     Returns a list of settled bet details including user_id, won/lost status, amounts, etc.
     """
-    settled_bets = []
     try:
         if not db_helpers.db_pool:
             return []
-        
-        conn = db_helpers.db_pool.get_connection()
-        if not conn:
+
+        result = await db_helpers.run_in_db_executor(_settle_match_bets_sync)(
+            db_helpers, match_id, home_score, away_score, config['modules']['economy']['starting_balance']
+        )
+        if result is None:
             return []
-        
-        cursor = conn.cursor(dictionary=True)
-        try:
-            # Get all pending bets for this match with match details
-            cursor.execute("""
-                SELECT b.*, m.home_team, m.away_team, m.league_id
-                FROM sport_bets b
-                JOIN sport_matches m ON b.match_id = m.match_id
-                WHERE b.match_id = %s AND b.status = 'pending'
-            """, (match_id,))
-            bets = cursor.fetchall()
-            
-            for bet in bets:
-                bet_type = bet["bet_type"]
-                bet_outcome = bet["bet_outcome"]
-                user_id = bet["user_id"]
-                bet_amount = bet["bet_amount"]
-                potential_payout = bet["potential_payout"]
-                
-                # Check if bet won
-                bet_won = await check_bet_outcome(bet_type, bet_outcome, home_score, away_score)
-                
-                if bet_won:
-                    actual_payout = potential_payout
-                    status = "won"
-                    
-                    # Update user stats
-                    cursor.execute("""
-                        UPDATE sport_betting_stats 
-                        SET total_wins = total_wins + 1,
-                            total_won = total_won + %s,
-                            biggest_win = GREATEST(biggest_win, %s),
-                            current_streak = current_streak + 1,
-                            best_streak = GREATEST(best_streak, current_streak + 1)
-                        WHERE user_id = %s
-                    """, (actual_payout, actual_payout, user_id))
-                else:
-                    actual_payout = 0
-                    status = "lost"
-                    
-                    # Update user stats
-                    cursor.execute("""
-                        UPDATE sport_betting_stats 
-                        SET total_losses = total_losses + 1,
-                            total_lost = total_lost + %s,
-                            current_streak = 0
-                        WHERE user_id = %s
-                    """, (bet_amount, user_id))
-                
-                # Update bet status
-                cursor.execute("""
-                    UPDATE sport_bets 
-                    SET status = %s, actual_payout = %s, settled_at = NOW()
-                    WHERE bet_id = %s
-                """, (status, actual_payout, bet["bet_id"]))
-                
-                # Add to settled bets list for notifications
-                settled_bets.append({
-                    "user_id": user_id,
-                    "bet_id": bet["bet_id"],
-                    "match_id": match_id,
-                    "home_team": bet.get("home_team", "Heim"),
-                    "away_team": bet.get("away_team", "Auswärts"),
-                    "home_score": home_score,
-                    "away_score": away_score,
-                    "bet_type": bet_type,
-                    "bet_outcome": bet_outcome,
-                    "bet_amount": bet_amount,
-                    "odds_at_bet": bet.get("odds_at_bet", 1.0),
-                    "potential_payout": potential_payout,
-                    "actual_payout": actual_payout,
-                    "status": status,
-                    "league_id": bet.get("league_id", "bl1")
-                })
-            
-            # Update match status
-            cursor.execute("""
-                UPDATE sport_matches 
-                SET status = 'finished', home_score = %s, away_score = %s
-                WHERE match_id = %s
-            """, (home_score, away_score, match_id))
-            
-            conn.commit()
-            return settled_bets
-            
-        finally:
-            cursor.close()
-            conn.close()
-            
+
+        settled_bets, entries = result
+        await ledger.finish_entries(db_helpers, entries, stat_period)
+        return settled_bets
+
     except Exception as e:
         logger.error(f"Error settling bets with details: {e}", exc_info=True)
         return []
@@ -3000,7 +3229,9 @@ async def settle_match_bets_with_details(db_helpers, match_id: str, home_score:
 async def get_matches_to_check(db_helpers) -> List[Dict]:
     """
     Get matches that should be checked for finished status.
-    Returns matches that are scheduled and have start time in the past (by at least 2 hours).
+    Returns matches that are scheduled and have start time in the past (by at least 2 hours),
+    and finished matches that still have pending bets (e.g. the bot stopped before settling
+    a match the sync had already marked finished).
     """
     try:
         if not db_helpers.db_pool:
@@ -3012,14 +3243,18 @@ async def get_matches_to_check(db_helpers) -> List[Dict]:
         
         cursor = conn.cursor(dictionary=True)
         try:
-            # Get matches that started more than 2 hours ago but are still marked as scheduled
-            cursor.execute("""
-                SELECT * FROM sport_matches 
-                WHERE status = 'scheduled' 
-                  AND match_time < DATE_SUB(NOW(), INTERVAL 2 HOUR)
-                ORDER BY match_time ASC
+            # Get matches that started more than 2 hours ago but are still marked as scheduled,
+            # and finished football matches whose bets were never settled
+            motorsport = ', '.join(['%s'] * len(FREE_MOTORSPORT))
+            cursor.execute(f"""
+                SELECT * FROM sport_matches m
+                WHERE (m.status = 'scheduled' AND m.match_time < DATE_SUB(NOW(), INTERVAL 2 HOUR))
+                   OR (m.status = 'finished' AND m.league_id NOT IN ({motorsport}) AND EXISTS (
+                        SELECT 1 FROM sport_bets b WHERE b.match_id = m.match_id AND b.status = 'pending'
+                   ))
+                ORDER BY m.match_time ASC
                 LIMIT 50
-            """)
+            """, tuple(FREE_MOTORSPORT))
             
             return cursor.fetchall()
             
@@ -3144,69 +3379,7 @@ async def check_bet_outcome(bet_type: str, bet_outcome: str, home_score: int, aw
     Check if a bet won based on bet type and match result.
     Returns True if the bet won, False otherwise.
     """
-    total_goals = home_score + away_score
-    goal_diff = home_score - away_score
-    
-    # Basic winner bets
-    if bet_type == "winner":
-        if bet_outcome == "home" and home_score > away_score:
-            return True
-        elif bet_outcome == "draw" and home_score == away_score:
-            return True
-        elif bet_outcome == "away" and away_score > home_score:
-            return True
-    
-    # Over/Under 2.5 goals
-    elif bet_type == "over_under_2.5":
-        if bet_outcome == "over" and total_goals > 2.5:
-            return True
-        elif bet_outcome == "under" and total_goals < 2.5:
-            return True
-    
-    # Over/Under 1.5 goals
-    elif bet_type == "over_under_1.5":
-        if bet_outcome == "over" and total_goals > 1.5:
-            return True
-        elif bet_outcome == "under" and total_goals < 1.5:
-            return True
-    
-    # Over/Under 3.5 goals
-    elif bet_type == "over_under_3.5":
-        if bet_outcome == "over" and total_goals > 3.5:
-            return True
-        elif bet_outcome == "under" and total_goals < 3.5:
-            return True
-    
-    # Both Teams To Score (BTTS)
-    elif bet_type == "btts":
-        both_scored = home_score > 0 and away_score > 0
-        if bet_outcome == "yes" and both_scored:
-            return True
-        elif bet_outcome == "no" and not both_scored:
-            return True
-    
-    # Goal difference bets (1+ goal margin)
-    elif bet_type == "goal_diff_1":
-        if bet_outcome == "home_diff_1" and goal_diff >= 1:
-            return True
-        elif bet_outcome == "away_diff_1" and goal_diff <= -1:
-            return True
-    
-    # Goal difference bets (2+ goal margin)
-    elif bet_type == "goal_diff_2":
-        if bet_outcome == "home_diff_2" and goal_diff >= 2:
-            return True
-        elif bet_outcome == "away_diff_2" and goal_diff <= -2:
-            return True
-    
-    # Goal difference bets (3+ goal margin)
-    elif bet_type == "goal_diff_3":
-        if bet_outcome == "home_diff_3" and goal_diff >= 3:
-            return True
-        elif bet_outcome == "away_diff_3" and goal_diff <= -3:
-            return True
-    
-    return False
+    return (bet_type, bet_outcome) in winning_outcomes(home_score, away_score)
 
 
 # ============================================================================
@@ -3246,18 +3419,19 @@ async def sync_league_matches(db_helpers, league_id: str, num_matchdays: int = 5
         else:
             matches = await provider.get_matches(league_config["api_id"])
         
-        synced = 0
-        for match in matches:
+        for index, match in enumerate(matches):
             match["league_id"] = league_id
             # For motorsport, convert to match-like format if needed
             if league_config.get("sport") in [SportType.F1, SportType.MOTOGP]:
-                match = _convert_race_to_match_format(match, league_config)
-            
-            if await get_or_update_match(db_helpers, match):
-                synced += 1
+                matches[index] = _convert_race_to_match_format(match, league_config)
+        
+        # Only matches whose payload changed since the last sync are written
+        written = await sync_matches(db_helpers, matches)
+        if written is None:
+            return 0
         
-        logger.info(f"Synced {synced} events for {league_config['name']}")
-        return synced
+        logger.info(f"Synced {len(matches)} events for {league_config['name']} ({written} changed)")
+        return len(matches)
         
     except Exception as e:
         logger.error(f"Error syncing events for {league_id}: {e}", exc_info=True)
@@ -6,8 +6,19 @@ A fun, fast-paced stock trading game with realistic behavior.
 import discord
 import random
 import asyncio
+import time
 from datetime import datetime, timezone, timedelta
 from modules.logger_utils import bot_logger as logger
+from modules.db_helpers import derived_rows
+
+# NumPy computes the price tick for all stocks at once; without it the same math runs per stock
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not installed - stock price ticks use the slower per-stock fallback "
+                   "(pip install numpy)")
 
 
 # Stock categories with different volatility
@@ -20,6 +31,32 @@ STOCK_CATEGORIES = {
     'fund': {'volatility': 0.02, 'trend_strength': 0.9}  # NEW: Safe funds category
 }
 
+# Price tick parameters
+TREND_PERSISTENCE_THRESHOLD = 0.02  # Trends weaker than this do not carry over
+GAME_INFLUENCE_WEIGHT = 0.3  # Share of the game influence factor added to the price change
+TREND_MEMORY = 0.7  # Mean reversion: new trend = 70% old trend + 30% this tick's change
+GAME_INFLUENCE_DECAY = 0.85  # Game influence slowly decays each tick
+MIN_STOCK_PRICE = 0.00000001  # Smaller minimum for crypto (SHIB can be 0.000025)
+# Clamp trend to keep DECIMAL(6,5) (-9.99999 to 9.99999) safe; normal trends are around ±0.5
+TREND_LIMIT = 1.0
+STOCK_TICK_BATCH_SIZE = 1000  # Stocks per UPDATE statement
+
+# OHLC rollups: resolution -> bucket length in seconds. Prices tick every 30 minutes
+# (update_stock_market in bot.py), so nothing finer than hourly candles is kept.
+CANDLE_RESOLUTIONS = {'1h': 3600, '1d': 86400}
+# Chart range -> (candle resolution, lookback); None means everything
+CHART_RANGES = {
+    '1h': ('1h', timedelta(hours=1)),
+    '24h': ('1h', timedelta(hours=24)),
+    '7d': ('1h', timedelta(days=7)),
+    '30d': ('1d', timedelta(days=30)),
+    'all': ('1d', None),
+}
+# Defaults for config['modules']['economy']['stock_market']
+DEFAULT_RAW_TICK_RETENTION_HOURS = 48
+DEFAULT_CANDLE_RETENTION_DAYS = {'1h': 90}  # 1d candles are kept forever
+PRUNE_BATCH_SIZE = 10000  # Rows per DELETE so pruning never holds long locks
+
 # Initial stock list
 DEFAULT_STOCKS = [
     {'symbol': 'SULF', 'name': 'Sulfur Technologies', 'category': 'tech', 'price': 100.0},
@@ -148,6 +185,23 @@ async def initialize_stocks(db_helpers):
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
             
+            # OHLC candles rolled up from the ticks (bucket_start is UTC)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_candles (
+                    stock_id INT NOT NULL,
+                    resolution ENUM('1h', '1d') NOT NULL,
+                    bucket_start DATETIME NOT NULL,
+                    open DECIMAL(18, 8) NOT NULL,
+                    high DECIMAL(18, 8) NOT NULL,
+                    low DECIMAL(18, 8) NOT NULL,
+                    close DECIMAL(18, 8) NOT NULL,
+                    ticks INT NOT NULL DEFAULT 1,
+                    PRIMARY KEY (stock_id, resolution, bucket_start),
+                    INDEX idx_resolution_bucket (resolution, bucket_start),
+                    FOREIGN KEY (stock_id) REFERENCES stocks(id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            
             # Create stock_trades table for tracking individual trades (used by dashboard)
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS stock_trades (
@@ -197,6 +251,114 @@ async def initialize_stocks(db_helpers):
         logger.error(f"Error initializing stocks: {e}", exc_info=True)
 
 
+def _compute_stock_tick_python(categories, prices, trends, influences):
+    """Per-stock version of compute_stock_tick, used when NumPy is not installed."""
+    new_prices, new_trends, new_influences = [], [], []
+    for category, current_price, trend, game_influence in zip(categories, prices, trends, influences):
+        cat_data = STOCK_CATEGORIES.get(category, STOCK_CATEGORIES['tech'])
+        volatility = cat_data['volatility']
+        
+        # Trend persistence (trending stocks continue trending)
+        trend_factor = trend * cat_data['trend_strength'] if abs(trend) > TREND_PERSISTENCE_THRESHOLD else 0
+        trend_factor += game_influence * GAME_INFLUENCE_WEIGHT
+        
+        # Random walk with trend
+        price_change_pct = trend_factor + random.uniform(-volatility, volatility)
+        
+        # Round to 8 decimal places to fit DECIMAL(18, 8) schema
+        new_prices.append(round(max(current_price * (1 + price_change_pct), MIN_STOCK_PRICE), 8))
+        new_trend = trend * TREND_MEMORY + price_change_pct * (1 - TREND_MEMORY)
+        new_trends.append(max(-TREND_LIMIT, min(TREND_LIMIT, new_trend)))
+        new_influences.append(game_influence * GAME_INFLUENCE_DECAY)
+    return new_prices, new_trends, new_influences
+
+
+def compute_stock_tick(categories, prices, trends, influences, rng=None):
+    """
+    Computes one market tick for all stocks: random walk with trend persistence,
+    game influence and its decay, mean-reverting trend and the price/trend clamps.
+    
+    Args:
+        categories: Stock category per stock
+        prices, trends, influences: Current values per stock (floats)
+        rng: Optional numpy.random.Generator (vectorized path only)
+    
+    Returns:
+        (new_prices, new_trends, new_influences) as lists of floats
+    """
+    if not NUMPY_AVAILABLE:
+        return _compute_stock_tick_python(categories, prices, trends, influences)
+    
+    rng = rng or np.random.default_rng()
+    cat_data = [STOCK_CATEGORIES.get(category, STOCK_CATEGORIES['tech']) for category in categories]
+    volatility = np.fromiter((data['volatility'] for data in cat_data), dtype=float, count=len(cat_data))
+    trend_strength = np.fromiter((data['trend_strength'] for data in cat_data), dtype=float, count=len(cat_data))
+    prices = np.asarray(prices, dtype=float)
+    trends = np.asarray(trends, dtype=float)
+    influences = np.asarray(influences, dtype=float)
+    
+    trend_factor = np.where(np.abs(trends) > TREND_PERSISTENCE_THRESHOLD, trends * trend_strength, 0.0)
+    trend_factor += influences * GAME_INFLUENCE_WEIGHT
+    price_change_pct = trend_factor + rng.uniform(-volatility, volatility)
+    
+    new_prices = np.round(np.maximum(prices * (1 + price_change_pct), MIN_STOCK_PRICE), 8)
+    new_trends = np.clip(trends * TREND_MEMORY + price_change_pct * (1 - TREND_MEMORY), -TREND_LIMIT, TREND_LIMIT)
+    new_influences = influences * GAME_INFLUENCE_DECAY
+    return new_prices.tolist(), new_trends.tolist(), new_influences.tolist()
+
+
+def candle_bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Returns the start of the candle bucket (naive UTC) that contains moment."""
+    if resolution == '1d':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _write_stock_tick(cursor, rows):
+    """
+    Writes a computed tick with one UPDATE per STOCK_TICK_BATCH_SIZE stocks, one bulk
+    stock_history insert and one bulk candle upsert.
+    rows: (id, old_price, new_price, new_trend, new_influence).
+    """
+    for start in range(0, len(rows), STOCK_TICK_BATCH_SIZE):
+        batch = rows[start:start + STOCK_TICK_BATCH_SIZE]
+        derived = derived_rows(['id', 'old_price', 'price', 'trend', 'influence'], len(batch))
+        # Multi-table UPDATE does not guarantee assignment order, so previous_price
+        # comes from the price the tick was computed from
+        cursor.execute(f"""
+            UPDATE stocks s
+            JOIN ({derived}) t ON t.id = s.id
+            SET s.previous_price = t.old_price,
+                s.current_price = t.price,
+                s.trend = t.trend,
+                s.game_influence_factor = t.influence,
+                s.last_update = NOW(),
+                s.volume_today = 0
+        """, tuple(value for row in batch for value in row))
+    
+    # executemany sends a single multi-row INSERT
+    cursor.executemany("""
+        INSERT INTO stock_history (stock_id, price)
+        VALUES (%s, %s)
+    """, [(row[0], row[2]) for row in rows])
+    
+    # Roll the tick into the 1h/1d candles of the current buckets
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    candles = []
+    for resolution in CANDLE_RESOLUTIONS:
+        bucket_start = candle_bucket_start(now, resolution)
+        candles.extend((row[0], resolution, bucket_start, row[2], row[2], row[2], row[2]) for row in rows)
+    cursor.executemany("""
+        INSERT INTO stock_candles (stock_id, resolution, bucket_start, open, high, low, close)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            high = GREATEST(high, VALUES(high)),
+            low = LEAST(low, VALUES(low)),
+            close = VALUES(close),
+            ticks = ticks + 1
+    """, candles)
+
+
 async def update_stock_prices(db_helpers):
     """Update all stock prices with realistic market simulation."""
     try:
@@ -212,77 +374,33 @@ async def update_stock_prices(db_helpers):
         cursor = conn.cursor()
         try:
             # Get all stocks
-            cursor.execute("SELECT symbol, category, current_price, trend, game_influence_factor FROM stocks")
+            cursor.execute("SELECT id, symbol, category, current_price, trend, game_influence_factor FROM stocks")
             stocks = cursor.fetchall()
+            if not stocks:
+                return
             
-            for stock in stocks:
-                symbol, category, current_price, trend, game_influence = stock
-                current_price = float(current_price)
-                trend = float(trend) if trend else 0
-                game_influence = float(game_influence) if game_influence else 0
-                
-                cat_data = STOCK_CATEGORIES.get(category, STOCK_CATEGORIES['tech'])
-                
-                # Calculate price change
-                volatility = cat_data['volatility']
-                trend_strength = cat_data['trend_strength']
-                
-                # Trend persistence (trending stocks continue trending)
-                if abs(trend) > 0.02:
-                    trend_factor = trend * trend_strength
-                else:
-                    trend_factor = 0
-                
-                # Add game influence for special stocks
-                # Game influence slowly decays over time
-                trend_factor += game_influence * 0.3
-                
-                # Random walk with trend
-                random_factor = random.uniform(-volatility, volatility)
-                price_change_pct = trend_factor + random_factor
-                
-                # Apply change
-                new_price = current_price * (1 + price_change_pct)
-                
-                # Prevent negative or zero prices
-                # Use smaller minimum for crypto (SHIB can be 0.000025)
-                new_price = max(new_price, 0.00000001)
-                
-                # Round to 8 decimal places to fit DECIMAL(18, 8) schema
-                # This preserves precision for crypto with very small values
-                new_price = round(new_price, 8)
-                
-                # Update trend (with mean reversion)
-                new_trend = (trend * 0.7) + (price_change_pct * 0.3)
-                
-                # Clamp trend to reasonable bounds to prevent DECIMAL(6,5) overflow
-                # DECIMAL(6,5) allows values from -9.99999 to 9.99999
-                # Normal trends are around ±0.5, so ±1.0 provides safety margin
-                new_trend = max(-1.0, min(1.0, new_trend))
-                
-                # Decay game influence
-                new_game_influence = game_influence * 0.85
-                
-                # Update stock
-                cursor.execute("""
-                    UPDATE stocks 
-                    SET previous_price = current_price,
-                        current_price = %s,
-                        trend = %s,
-                        game_influence_factor = %s,
-                        last_update = NOW(),
-                        volume_today = 0
-                    WHERE symbol = %s
-                """, (new_price, new_trend, new_game_influence, symbol))
-                
-                # Record history
-                cursor.execute("""
-                    INSERT INTO stock_history (stock_id, price)
-                    SELECT id, %s FROM stocks WHERE symbol = %s
-                """, (new_price, symbol))
+            prices = [float(stock[3]) for stock in stocks]
+            new_prices, new_trends, new_influences = compute_stock_tick(
+                [stock[2] for stock in stocks],
+                prices,
+                [float(stock[4]) if stock[4] else 0 for stock in stocks],
+                [float(stock[5]) if stock[5] else 0 for stock in stocks]
+            )
+            
+            _write_stock_tick(cursor, [
+                (stock[0], old_price, new_price, new_trend, new_influence)
+                for stock, old_price, new_price, new_trend, new_influence
+                in zip(stocks, prices, new_prices, new_trends, new_influences)
+            ])
             
             conn.commit()
             logger.info(f"Updated {len(stocks)} stock prices")
+            
+            # Trade engines fill at the new prices
+            for stock, new_price in zip(stocks, new_prices):
+                engine = _trade_engines.get(stock[1])
+                if engine:
+                    engine.set_price(new_price)
         finally:
             cursor.close()
             conn.close()
@@ -452,15 +570,14 @@ async def get_stock_stats(db_helpers, symbol: str):
             if not stock:
                 return None
             
-            # Get 24h high/low from history
-            # stock_history uses stock_id (FK) and recorded_at columns, so we need to join
+            # Get 24h high/low from the hourly candles (at most 25 rows per stock)
+            since = candle_bucket_start(datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=24), '1h')
             cursor.execute("""
-                SELECT MAX(sh.price) as high_24h, MIN(sh.price) as low_24h
-                FROM stock_history sh
-                JOIN stocks s ON sh.stock_id = s.id
-                WHERE s.symbol = %s
-                AND sh.recorded_at > DATE_SUB(NOW(), INTERVAL 24 HOUR)
-            """, (symbol.upper(),))
+                SELECT MAX(c.high) as high_24h, MIN(c.low) as low_24h
+                FROM stock_candles c
+                JOIN stocks s ON c.stock_id = s.id
+                WHERE s.symbol = %s AND c.resolution = '1h' AND c.bucket_start >= %s
+            """, (symbol.upper(), since))
             stats = cursor.fetchone()
             
             # Get active traders count
@@ -486,6 +603,110 @@ async def get_stock_stats(db_helpers, symbol: str):
         return None
 
 
+def select_stock_candles(cursor, stock_id: int, chart_range: str = '24h') -> list:
+    """
+    Reads the candles for a chart range at the resolution CHART_RANGES picks for it,
+    using the caller's dictionary cursor. Unknown ranges fall back to 24h.
+    
+    Returns:
+        List of dicts with bucket_start, open, high, low, close and ticks, oldest first
+    """
+    resolution, lookback = CHART_RANGES.get(chart_range, CHART_RANGES['24h'])
+    query = """
+        SELECT bucket_start, open, high, low, close, ticks
+        FROM stock_candles
+        WHERE stock_id = %s AND resolution = %s
+    """
+    params = [stock_id, resolution]
+    if lookback is not None:
+        query += " AND bucket_start >= %s"
+        params.append(candle_bucket_start(datetime.now(timezone.utc).replace(tzinfo=None) - lookback, resolution))
+    cursor.execute(query + " ORDER BY bucket_start ASC", tuple(params))
+    return cursor.fetchall()
+
+
+async def get_stock_candles(db_helpers, symbol: str, chart_range: str = '24h'):
+    """Get OHLC candles for a stock's price chart (see CHART_RANGES for the ranges)."""
+    try:
+        if not db_helpers.db_pool:
+            return []
+        
+        conn = db_helpers.db_pool.get_connection()
+        if not conn:
+            return []
+        
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT id FROM stocks WHERE symbol = %s", (symbol.upper(),))
+            stock = cursor.fetchone()
+            if not stock:
+                return []
+            return select_stock_candles(cursor, stock['id'], chart_range)
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        logger.error(f"Error getting candles for {symbol}: {e}", exc_info=True)
+        return []
+
+
+def _delete_in_batches(conn, cursor, query: str, params: tuple) -> int:
+    """Runs a DELETE ... LIMIT PRUNE_BATCH_SIZE until nothing is left, committing each batch."""
+    deleted = 0
+    while True:
+        cursor.execute(f"{query} LIMIT {PRUNE_BATCH_SIZE}", params)
+        conn.commit()
+        deleted += cursor.rowcount
+        if cursor.rowcount < PRUNE_BATCH_SIZE:
+            return deleted
+
+
+async def prune_stock_history(db_helpers, retention_config: dict = None):
+    """
+    Applies retention: drops raw ticks and fine-grained candles older than their
+    window so table size stays bounded. Windows come from
+    config['modules']['economy']['stock_market'] (raw_tick_retention_hours and
+    candle_retention_days per resolution); daily candles are never pruned.
+    
+    Returns:
+        Dict with the number of deleted rows per table/resolution
+    """
+    retention_config = retention_config or {}
+    raw_hours = retention_config.get('raw_tick_retention_hours', DEFAULT_RAW_TICK_RETENTION_HOURS)
+    candle_days = {**DEFAULT_CANDLE_RETENTION_DAYS, **retention_config.get('candle_retention_days', {})}
+    deleted = {}
+    try:
+        if not db_helpers.db_pool:
+            return deleted
+        
+        conn = db_helpers.db_pool.get_connection()
+        if not conn:
+            return deleted
+        
+        cursor = conn.cursor()
+        try:
+            deleted['raw_ticks'] = _delete_in_batches(conn, cursor, """
+                DELETE FROM stock_history WHERE recorded_at < DATE_SUB(NOW(), INTERVAL %s HOUR)
+            """, (raw_hours,))
+            
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            for resolution, days in candle_days.items():
+                if resolution not in CANDLE_RESOLUTIONS or resolution == '1d' or days is None:
+                    continue
+                deleted[resolution] = _delete_in_batches(conn, cursor, """
+                    DELETE FROM stock_candles WHERE resolution = %s AND bucket_start < %s
+                """, (resolution, now - timedelta(days=days)))
+        finally:
+            cursor.close()
+            conn.close()
+        
+        if any(deleted.values()):
+            logger.info(f"Pruned stock history: {deleted}")
+    except Exception as e:
+        logger.error(f"Error pruning stock history: {e}", exc_info=True)
+    return deleted
+
+
 async def get_market_overview(db_helpers):
     """Get overall market statistics."""
     try:
@@ -531,191 +752,257 @@ async def get_market_overview(db_helpers):
         return None
 
 
-async def buy_stock(db_helpers, user_id: int, symbol: str, shares: int, currency_system):
-    """Buy stock shares."""
+# --- Trade engine ---
+# Orders for one symbol are filled by a single worker, so trades never race on
+# balances or portfolios and each batch of orders costs a fixed number of statements.
+STOCK_ORDER_BATCH_SIZE = 200  # Orders filled per database transaction
+STOCK_PRICE_MAX_AGE = 60  # Seconds before an engine re-reads its price (the dashboard can edit prices)
+
+
+class SymbolTradeEngine:
+    """
+    Fills all buy/sell orders of one stock symbol in arrival order.
+    
+    Orders wait on an asyncio queue; the worker takes everything queued (up to
+    STOCK_ORDER_BATCH_SIZE) and fills it in one transaction on the DB executor:
+    the traders' balance and portfolio rows are locked once, the orders are
+    applied one after another in memory, and the results are written with a
+    handful of multi-row statements. The price lives in memory and the price
+    tick pushes new prices in. Engine state is only touched on the event loop;
+    the executor call gets the price and returns what it loaded.
+    """
+    
+    def __init__(self, db_helpers, symbol: str):
+        self.db_helpers = db_helpers
+        self.symbol = symbol
+        self.price = None
+        self.price_loaded_at = 0.0
+        self.queue = asyncio.Queue()
+        self.worker = None
+        self.symbol_missing = False  # Set when the last batch found no stocks row for the symbol
+        self.stats = {'orders': 0, 'fills': 0, 'rejected': 0, 'batches': 0, 'failed_batches': 0}
+    
+    def set_price(self, price: float):
+        self.price = price
+        self.price_loaded_at = time.monotonic()
+    
+    def submit(self, user_id: int, side: str, shares: int) -> asyncio.Future:
+        """Queues an order. The future resolves to (success, message)."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((user_id, side, shares, future))
+        self.stats['orders'] += 1
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+        return future
+    
+    async def _run(self):
+        fill_batch = self.db_helpers.run_in_db_executor(_fill_order_batch)
+        while True:
+            orders = [await self.queue.get()]
+            while len(orders) < STOCK_ORDER_BATCH_SIZE and not self.queue.empty():
+                orders.append(self.queue.get_nowait())
+            fresh = self.price is not None and time.monotonic() - self.price_loaded_at <= STOCK_PRICE_MAX_AGE
+            price_loaded_at = self.price_loaded_at
+            try:
+                results, loaded_price, self.symbol_missing, fills = await fill_batch(
+                    self.db_helpers, self.symbol, [order[:3] for order in orders], self.price if fresh else None
+                )
+                # A tick that ran during the batch already pushed a newer price
+                if loaded_price is not None and self.price_loaded_at == price_loaded_at:
+                    self.set_price(loaded_price)
+                self.stats['batches'] += 1
+                self.stats['fills'] += fills
+                self.stats['rejected'] += len(orders) - fills
+            except Exception as e:
+                logger.error(f"Error filling {len(orders)} {self.symbol} orders: {e}", exc_info=True)
+                self.stats['failed_batches'] += 1
+                results = [(False, f"Fehler beim Handel: {str(e)}")] * len(orders)
+            for (_, _, _, future), result in zip(orders, results):
+                if not future.done():
+                    future.set_result(result)
+                self.queue.task_done()
+            if self.symbol_missing and self.queue.empty():
+                # Unknown symbol (typo, deleted stock): don't keep an engine around for it
+                if _trade_engines.get(self.symbol) is self:
+                    del _trade_engines[self.symbol]
+                return
+
+
+_trade_engines: dict = {}
+
+
+def _get_trade_engine(db_helpers, symbol: str) -> SymbolTradeEngine:
+    engine = _trade_engines.get(symbol)
+    if engine is None:
+        engine = _trade_engines[symbol] = SymbolTradeEngine(db_helpers, symbol)
+    return engine
+
+
+def get_trade_engine_stats() -> dict:
+    """Returns trade engine counters for runtime stats."""
+    totals = {'symbols': len(_trade_engines), 'queued': 0, 'orders': 0, 'fills': 0,
+              'rejected': 0, 'batches': 0, 'failed_batches': 0}
+    for engine in _trade_engines.values():
+        totals['queued'] += engine.queue.qsize()
+        for key, value in engine.stats.items():
+            totals[key] += value
+    totals['orders_per_batch'] = round(totals['orders'] / totals['batches'], 2) if totals['batches'] else 0
+    return totals
+
+
+async def shutdown_trade_engines(timeout: float = 10.0):
+    """Waits for queued orders to be filled, then stops the engine workers."""
+    for engine in list(_trade_engines.values()):
+        try:
+            await asyncio.wait_for(engine.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Trade engine {engine.symbol} still had {engine.queue.qsize()} orders at shutdown")
+        if engine.worker:
+            engine.worker.cancel()
+    _trade_engines.clear()
+
+
+async def _fill_order_batch(db_helpers, symbol: str, orders: list, current_price: float = None) -> tuple:
+    """
+    Fills a batch of (user_id, side, shares) orders in one transaction. Runs on the
+    DB executor; current_price is the engine's cached price, or None to read it.
+    
+    Returns:
+        (one (success, message) per order, price read from stocks or None,
+         whether the symbol has no stocks row, number of filled orders)
+    """
+    if not db_helpers.db_pool:
+        return [(False, "Datenbankverbindung nicht verfügbar!")] * len(orders), None, False, 0
+    conn = db_helpers.db_pool.get_connection()
+    if not conn:
+        return [(False, "Datenbankverbindung fehlgeschlagen!")] * len(orders), None, False, 0
+    
+    loaded_price = None
+    cursor = conn.cursor()
     try:
-        symbol = symbol.upper()
+        if current_price is None:
+            cursor.execute("SELECT current_price FROM stocks WHERE symbol = %s", (symbol,))
+            stock = cursor.fetchone()
+            if not stock:
+                return [(False, "Stock nicht gefunden!")] * len(orders), None, True, 0
+            current_price = loaded_price = float(stock[0])
         
-        # Get stock info first (synchronous)
-        if not db_helpers.db_pool:
-            return False, "Datenbankverbindung nicht verfügbar!"
+        # Lock every trader's balance and holding once for the whole batch
+        user_ids = sorted({order[0] for order in orders})
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        cursor.execute(f"""
+            SELECT discord_id, balance FROM players
+            WHERE discord_id IN ({placeholders}) ORDER BY discord_id FOR UPDATE
+        """, tuple(user_ids))
+        balances = {row[0]: float(row[1] or 0) for row in cursor.fetchall()}
+        cursor.execute(f"""
+            SELECT user_id, shares, avg_buy_price FROM user_portfolios
+            WHERE stock_symbol = %s AND user_id IN ({placeholders}) FOR UPDATE
+        """, (symbol, *user_ids))
+        holdings = {row[0]: (row[1], float(row[2])) for row in cursor.fetchall()}
         
-        conn = db_helpers.db_pool.get_connection()
-        if not conn:
-            return False, "Datenbankverbindung fehlgeschlagen!"
+        results = []
+        balance_deltas = {}
+        touched = set()
+        transactions = []
+        trades = []
+        volume = 0
+        for user_id, side, shares in orders:
+            held, avg_price = holdings.get(user_id, (0, 0.0))
+            total = current_price * shares
+            if side == 'buy':
+                balance = balances.get(user_id, 0.0)
+                if balance < total:
+                    results.append((False, f"Nicht genug Geld! Benötigt: {total:.2f}, Verfügbar: {balance:.2f}"))
+                    continue
+                balances[user_id] = balance - total
+                balance_deltas[user_id] = balance_deltas.get(user_id, 0.0) - total
+                holdings[user_id] = (held + shares, ((held * avg_price) + (shares * current_price)) / (held + shares))
+                transactions.append((user_id, 'stock_buy', -total, balances[user_id],
+                                     f"Gekauft: {shares}x {symbol} @ {format_price(current_price)}"))
+                results.append((True, f"Gekauft: {shares} Aktien von {symbol} für {total:.2f}"))
+            else:
+                if held < shares:
+                    results.append((False, "Nicht genug Aktien!"))
+                    continue
+                balances[user_id] = balances.get(user_id, 0.0) + total
+                balance_deltas[user_id] = balance_deltas.get(user_id, 0.0) + total
+                holdings[user_id] = (held - shares, avg_price)
+                transactions.append((user_id, 'stock_sell', total, balances[user_id],
+                                     f"Verkauft: {shares}x {symbol} @ {format_price(current_price)}"))
+                results.append((True, f"Verkauft: {shares} Aktien von {symbol} für {total:.2f}"))
+            touched.add(user_id)
+            trades.append((user_id, symbol, shares, current_price, side))
+            volume += shares
         
-        cursor = conn.cursor()
-        try:
-            # Get stock info
-            cursor.execute("""
-                SELECT current_price FROM stocks WHERE symbol = %s
-            """, (symbol,))
-            stock = cursor.fetchone()
-            
-            if not stock:
-                return False, "Stock nicht gefunden!"
-            
-            current_price = float(stock[0])
-            total_cost = current_price * shares
-            
-            # Check if user has enough currency
-            user_balance = await db_helpers.get_balance(user_id)
-            
-            if user_balance < total_cost:
-                return False, f"Nicht genug Geld! Benötigt: {total_cost:.2f}, Verfügbar: {user_balance:.2f}"
-            
-            # Deduct currency (this handles the players table)
-            cursor.execute("SELECT display_name FROM players WHERE discord_id = %s", (user_id,))
-            player_row = cursor.fetchone()
-            display_name = player_row[0] if player_row else f"User{user_id}"
+        if trades:
+            cursor.execute(f"""
+                UPDATE players p
+                JOIN ({derived_rows(['discord_id', 'delta'], len(balance_deltas))}) d
+                    ON d.discord_id = p.discord_id
+                SET p.balance = p.balance + d.delta
+            """, tuple(value for item in balance_deltas.items() for value in item))
             
-            # Update balance directly
-            cursor.execute("""
-                UPDATE players SET balance = balance - %s WHERE discord_id = %s
-            """, (total_cost, user_id))
-            
-            # Update or insert portfolio entry
-            cursor.execute("""
-                SELECT shares, avg_buy_price FROM user_portfolios
-                WHERE user_id = %s AND stock_symbol = %s
-            """, (user_id, symbol))
-            existing = cursor.fetchone()
-            
-            if existing:
-                old_shares, old_avg_price = existing
-                new_shares = old_shares + shares
-                new_avg_price = ((old_shares * float(old_avg_price)) + (shares * current_price)) / new_shares
-                
-                cursor.execute("""
-                    UPDATE user_portfolios
-                    SET shares = %s, avg_buy_price = %s, last_transaction = NOW()
-                    WHERE user_id = %s AND stock_symbol = %s
-                """, (new_shares, new_avg_price, user_id, symbol))
-            else:
-                cursor.execute("""
+            kept = [(user_id, symbol, holdings[user_id][0], holdings[user_id][1])
+                    for user_id in touched if holdings[user_id][0] > 0]
+            if kept:
+                cursor.executemany("""
                     INSERT INTO user_portfolios (user_id, stock_symbol, shares, avg_buy_price)
                     VALUES (%s, %s, %s, %s)
-                """, (user_id, symbol, shares, current_price))
+                    ON DUPLICATE KEY UPDATE shares = VALUES(shares), avg_buy_price = VALUES(avg_buy_price),
+                        last_transaction = NOW()
+                """, kept)
+            # Remove entries if no shares left
+            emptied = [user_id for user_id in touched if holdings[user_id][0] <= 0]
+            if emptied:
+                cursor.execute(f"""
+                    DELETE FROM user_portfolios
+                    WHERE stock_symbol = %s AND user_id IN ({", ".join(["%s"] * len(emptied))})
+                """, (symbol, *emptied))
             
-            # Update volume
             cursor.execute("""
                 UPDATE stocks SET volume_today = volume_today + %s WHERE symbol = %s
-            """, (shares, symbol))
-            
-            # Get new balance for transaction log
-            cursor.execute("SELECT balance FROM players WHERE discord_id = %s", (user_id,))
-            new_balance = cursor.fetchone()[0]
-            
-            # Log transaction
-            cursor.execute("""
+            """, (volume, symbol))
+            cursor.executemany("""
                 INSERT INTO transaction_history (user_id, transaction_type, amount, balance_after, description)
                 VALUES (%s, %s, %s, %s, %s)
-            """, (user_id, 'stock_buy', -total_cost, new_balance, f"Gekauft: {shares}x {symbol} @ {format_price(current_price)}"))
-            
+            """, transactions)
             # Log to stock_trades table for dashboard statistics
-            cursor.execute("""
+            cursor.executemany("""
                 INSERT INTO stock_trades (user_id, stock_symbol, quantity, price_per_share, trade_type)
-                VALUES (%s, %s, %s, %s, 'buy')
-            """, (user_id, symbol, shares, current_price))
-            
-            conn.commit()
-            return True, f"Gekauft: {shares} Aktien von {symbol} für {total_cost:.2f}"
-        finally:
-            cursor.close()
-            conn.close()
-            
-    except Exception as e:
-        logger.error(f"Error buying stock: {e}", exc_info=True)
-        return False, f"Fehler beim Kauf: {str(e)}"
+                VALUES (%s, %s, %s, %s, %s)
+            """, trades)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    
+    # Balances changed outside db_helpers; drop their cached values
+    for user_id in balance_deltas:
+        db_helpers.db_cache.invalidate('balance', user_id)
+        db_helpers.db_cache.invalidate('profile', user_id)
+    return results, loaded_price, False, len(trades)
+
+
+async def buy_stock(db_helpers, user_id: int, symbol: str, shares: int, currency_system):
+    """Buy stock shares. The order is filled by the symbol's trade engine."""
+    if shares <= 0:
+        return False, "Ungültige Anzahl!"
+    if not db_helpers.db_pool:
+        return False, "Datenbankverbindung nicht verfügbar!"
+    return await _get_trade_engine(db_helpers, symbol.upper()).submit(user_id, 'buy', shares)
 
 
 async def sell_stock(db_helpers, user_id: int, symbol: str, shares: int):
-    """Sell stock shares."""
-    try:
-        symbol = symbol.upper()
-        
-        if not db_helpers.db_pool:
-            return False, "Datenbankverbindung nicht verfügbar!"
-        
-        conn = db_helpers.db_pool.get_connection()
-        if not conn:
-            return False, "Datenbankverbindung fehlgeschlagen!"
-        
-        cursor = conn.cursor()
-        try:
-            # Check if user has shares
-            cursor.execute("""
-                SELECT shares FROM user_portfolios
-                WHERE user_id = %s AND stock_symbol = %s
-            """, (user_id, symbol))
-            portfolio = cursor.fetchone()
-            
-            if not portfolio or portfolio[0] < shares:
-                return False, "Nicht genug Aktien!"
-            
-            # Get current price
-            cursor.execute("""
-                SELECT current_price FROM stocks WHERE symbol = %s
-            """, (symbol,))
-            stock = cursor.fetchone()
-            
-            if not stock:
-                return False, "Stock nicht gefunden!"
-            
-            current_price = float(stock[0])
-            total_value = current_price * shares
-            
-            # Add currency
-            cursor.execute("""
-                UPDATE players SET balance = balance + %s WHERE discord_id = %s
-            """, (total_value, user_id))
-            
-            # Update portfolio
-            new_shares = portfolio[0] - shares
-            
-            if new_shares > 0:
-                cursor.execute("""
-                    UPDATE user_portfolios
-                    SET shares = %s, last_transaction = NOW()
-                    WHERE user_id = %s AND stock_symbol = %s
-                """, (new_shares, user_id, symbol))
-            else:
-                # Remove entry if no shares left
-                cursor.execute("""
-                    DELETE FROM user_portfolios
-                    WHERE user_id = %s AND stock_symbol = %s
-                """, (user_id, symbol))
-            
-            # Update volume
-            cursor.execute("""
-                UPDATE stocks SET volume_today = volume_today + %s WHERE symbol = %s
-            """, (shares, symbol))
-            
-            # Get new balance for transaction log
-            cursor.execute("SELECT balance FROM players WHERE discord_id = %s", (user_id,))
-            new_balance = cursor.fetchone()[0]
-            
-            # Log transaction
-            cursor.execute("""
-                INSERT INTO transaction_history (user_id, transaction_type, amount, balance_after, description)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (user_id, 'stock_sell', total_value, new_balance, f"Verkauft: {shares}x {symbol} @ {format_price(current_price)}"))
-            
-            # Log to stock_trades table for dashboard statistics
-            cursor.execute("""
-                INSERT INTO stock_trades (user_id, stock_symbol, quantity, price_per_share, trade_type)
-                VALUES (%s, %s, %s, %s, 'sell')
-            """, (user_id, symbol, shares, current_price))
-            
-            conn.commit()
-            return True, f"Verkauft: {shares} Aktien von {symbol} für {total_value:.2f}"
-        finally:
-            cursor.close()
-            conn.close()
-            
-    except Exception as e:
-        logger.error(f"Error selling stock: {e}", exc_info=True)
-        return False, f"Fehler beim Verkauf: {str(e)}"
+    """Sell stock shares. The order is filled by the symbol's trade engine."""
+    if shares <= 0:
+        return False, "Ungültige Anzahl!"
+    if not db_helpers.db_pool:
+        return False, "Datenbankverbindung nicht verfügbar!"
+    return await _get_trade_engine(db_helpers, symbol.upper()).submit(user_id, 'sell', shares)
 
 
 def get_stock_emoji(change_pct: float) -> str:
@@ -401,9 +401,17 @@ async def initialize_themes_table(db_helpers):
         logger.error(f"Error initializing themes tables: {e}", exc_info=True)
 
 
+THEME_CACHE_TTL = 300  # 5 minutes, invalidated on equip
+
+
 async def get_user_theme(db_helpers, user_id: int):
-    """Get the currently equipped theme for a user."""
+    """Get the currently equipped theme for a user. Uses cache for performance."""
     try:
+        # An empty string is cached for "no theme" so misses can be told apart
+        cached = db_helpers.db_cache.get('theme', user_id)
+        if cached is not None:
+            return cached or None
+        
         if not db_helpers.db_pool:
             return None
         
@@ -419,9 +427,9 @@ async def get_user_theme(db_helpers, user_id: int):
             """, (user_id,))
             
             result = cursor.fetchone()
-            if result and result['theme_id'] in THEMES:
-                return result['theme_id']
-            return None
+            theme_id = result['theme_id'] if result and result['theme_id'] in THEMES else None
+            db_helpers.db_cache.set('theme', user_id, theme_id or '', THEME_CACHE_TTL)
+            return theme_id
         finally:
             cursor.close()
             conn.close()
@@ -537,6 +545,7 @@ async def equip_theme(db_helpers, user_id: int, theme_id: str):
                 message = "Theme unequipped!"
             
             conn.commit()
+            db_helpers.db_cache.invalidate('theme', user_id)
             return True, message
         finally:
             cursor.close()
@@ -357,9 +357,11 @@ class TwitchBot:
                 self.writer.close()
                 await self.writer.wait_closed()
 
-            # Close API session
+            # Release the API session (the bot's shared session stays open until shutdown)
             if self.api_session:
-                await self.api_session.close()
+                from modules import http_client
+                await http_client.release_session(self.api_session)
+            self.api_session = None
 
             # Save state
             self.state.save_state()
@@ -378,7 +380,8 @@ class TwitchBot:
             logger.warning("Install aiohttp with: pip install aiohttp")
             return
 
-        self.api_session = aiohttp.ClientSession()
+        from modules import http_client
+        self.api_session = await http_client.get_session()
 
         # Get access token if client credentials are provided
         if self.config.get('client_id') and self.config.get('client_secret'):
@@ -6,6 +6,7 @@ Fetches slang definitions from Urban Dictionary API.
 import aiohttp
 import asyncio
 from modules.logger_utils import bot_logger as logger
+from modules import http_client
 
 
 # Urban Dictionary API endpoint
@@ -47,7 +48,7 @@ async def search_urban_dictionary(term: str) -> dict:
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             params = {'term': term}
             async with session.get(
                 URBAN_DICTIONARY_API, 
@@ -119,7 +120,7 @@ async def get_random_word() -> dict:
         Dictionary with word details or None if failed
     """
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             async with session.get(
                 "https://api.urbandictionary.com/v0/random",
                 timeout=aiohttp.ClientTimeout(total=API_TIMEOUT)
@@ -7,6 +7,7 @@ import aiohttp
 import random
 import asyncio
 from modules.logger_utils import bot_logger as logger
+from modules import http_client
 
 
 # External word APIs
@@ -30,7 +31,7 @@ async def fetch_random_words_english(count=1, min_length=5, max_length=5):
         # Try random-word-api first
         url = f"{RANDOM_WORD_API}?number={count}&length={max_length}"
         
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
                 if response.status == 200:
                     words = await response.json()
@@ -419,7 +420,7 @@ async def validate_word_in_dictionary(word: str, language: str = 'en') -> dict:
     word = word.lower().strip()
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             if language == 'de':
                 # Try German dictionary API
                 url = DICTIONARY_API_DE.format(word=word)
@@ -518,7 +519,7 @@ async def get_related_words(word: str, language: str = 'en', limit: int = 5) ->
     word = word.lower().strip()
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_client.shared_session() as session:
             if language == 'de':
                 url = DICTIONARY_API_DE.format(word=word)
             else:
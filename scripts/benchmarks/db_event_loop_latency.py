@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - DB Event Loop Latency Benchmark
+
+Measures how much the asyncio event loop lags while hundreds of async
+db_helpers calls are in flight, comparing the old inline execution with the
+DB executor. A stub connection pool simulates query latency, so no database
+server is required.
+
+Usage:
+    python scripts/benchmarks/db_event_loop_latency.py --calls 500 --query-ms 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import db_helpers  # noqa: E402
+
+
+class _StubCursor:
+    def __init__(self, query_seconds):
+        self.query_seconds = query_seconds
+
+    def execute(self, query, params=None):
+        # Blocking sleep, exactly like a real mysql.connector round-trip
+        time.sleep(self.query_seconds)
+
+    def fetchone(self):
+        return {"relationship_summary": "benchmark"}
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, query_seconds):
+        self.query_seconds = query_seconds
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self.query_seconds)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _StubPool:
+    def __init__(self, query_seconds):
+        self.query_seconds = query_seconds
+
+    def get_connection(self):
+        return _StubConnection(self.query_seconds)
+
+
+async def _measure_loop_lag(stop_event, samples, interval=0.005):
+    """Records how late the loop wakes up compared to the requested interval."""
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def _run_case(helper, calls):
+    samples = []
+    stop_event = asyncio.Event()
+    ticker = asyncio.create_task(_measure_loop_lag(stop_event, samples))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(helper(user_id) for user_id in range(calls)))
+    elapsed = time.perf_counter() - start
+
+    stop_event.set()
+    await ticker
+    return elapsed, samples
+
+
+def _report(label, elapsed, samples, calls):
+    samples = samples or [0.0]
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<10} total={elapsed:7.2f}s  throughput={calls / elapsed:8.1f} calls/s  "
+          f"loop lag: median={statistics.median(samples):7.2f}ms  p99={p99:8.2f}ms  max={max(samples):8.2f}ms  "
+          f"(ticks={len(samples)})")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark event-loop latency during concurrent DB calls")
+    parser.add_argument("--calls", type=int, default=500, help="Concurrent DB helper calls (default: 500)")
+    parser.add_argument("--query-ms", type=float, default=20.0, help="Simulated query latency in ms (default: 20)")
+    parser.add_argument("--skip-inline", action="store_true", help="Skip the slow inline baseline")
+    args = parser.parse_args()
+
+    db_helpers.db_pool = _StubPool(args.query_ms / 1000)
+    executor_helper = db_helpers.get_relationship_summary
+    inline_helper = executor_helper.__wrapped__
+
+    print(f"Running {args.calls} concurrent get_relationship_summary calls, {args.query_ms}ms per query")
+    print(f"DB executor workers: {db_helpers.DB_POOL_SIZE - db_helpers.DB_EXECUTOR_RESERVED_CONNECTIONS}")
+    print("-" * 60)
+
+    if not args.skip_inline:
+        elapsed, samples = await _run_case(inline_helper, args.calls)
+        _report("inline", elapsed, samples, args.calls)
+
+    elapsed, samples = await _run_case(executor_helper, args.calls)
+    _report("executor", elapsed, samples, args.calls)
+
+    db_helpers.shutdown_db_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - Guild Member Sync Benchmark
+
+Compares the legacy per-member sync (SELECT + upsert per member) with the
+chunked db_helpers.sync_guild_members() at 1k/10k/50k members. A stub
+connection pool keeps the players table in memory and charges a fixed
+round-trip latency per statement, so no database server is required.
+
+Usage:
+    python scripts/benchmarks/guild_member_sync.py --sizes 1000 10000 50000 --rtt-ms 0.3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import db_helpers  # noqa: E402
+
+
+class _StubCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.rowcount = 0
+        self._result = []
+
+    def _round_trip(self):
+        self.pool.round_trips += 1
+        time.sleep(self.pool.rtt_seconds)
+
+    def execute(self, query, params=()):
+        self._round_trip()
+        players = self.pool.players
+        if query.lstrip().startswith("SELECT discord_id, display_name, avatar_url"):
+            self._result = [(pid, *players[pid]) for pid in params if pid in players]
+        elif query.lstrip().startswith("SELECT discord_id FROM players"):
+            self._result = [(params[0],)] if params[0] in players else []
+        else:
+            self.rowcount = self._upsert([params])
+
+    def executemany(self, query, rows):
+        # mysql.connector rewrites INSERT executemany into one multi-row statement
+        self._round_trip()
+        self.rowcount = self._upsert(rows)
+
+    def _upsert(self, rows):
+        affected = 0
+        for discord_id, display_name, avatar_url in rows:
+            current = self.pool.players.get(discord_id)
+            if current is None:
+                affected += 1
+            elif current != (display_name, avatar_url):
+                affected += 2
+            self.pool.players[discord_id] = (display_name, avatar_url)
+        return affected
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self.pool)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _StubPool:
+    def __init__(self, rtt_seconds):
+        self.rtt_seconds = rtt_seconds
+        self.players = {}
+        self.round_trips = 0
+
+    def get_connection(self):
+        return _StubConnection(self)
+
+
+def _legacy_sync(pool, members_data):
+    """The previous implementation: one SELECT and one upsert per member."""
+    cursor = pool.get_connection().cursor()
+    new_count = updated_count = 0
+    for discord_id, display_name, avatar_url in members_data:
+        cursor.execute("SELECT discord_id FROM players WHERE discord_id = %s", (discord_id,))
+        existing = cursor.fetchone()
+        cursor.execute("INSERT INTO players ...", (discord_id, display_name, avatar_url))
+        if existing:
+            updated_count += 1
+        else:
+            new_count += 1
+    return new_count, updated_count
+
+
+def _members(count, renamed_every=20):
+    """Builds member tuples; every Nth member gets a new display name on the second pass."""
+    first = [(i, f"user{i}", f"https://cdn.example/avatars/{i}.png") for i in range(count)]
+    second = [
+        (i, f"renamed{i}" if i % renamed_every == 0 else name, avatar)
+        for i, name, avatar in first
+    ]
+    return first, second
+
+
+async def _run(size, rtt_seconds, skip_legacy_above):
+    first, second = _members(size)
+    print(f"\n{size:,} members")
+
+    if size <= skip_legacy_above:
+        pool = _StubPool(rtt_seconds)
+        start = time.perf_counter()
+        _legacy_sync(pool, first)
+        initial = time.perf_counter() - start
+        trips_initial = pool.round_trips
+        start = time.perf_counter()
+        _legacy_sync(pool, second)
+        resync = time.perf_counter() - start
+        print(f"  legacy   initial={initial:7.2f}s ({trips_initial:,} trips)  "
+              f"resync={resync:7.2f}s ({pool.round_trips - trips_initial:,} trips)")
+    else:
+        print("  legacy   skipped (use --legacy-max to include)")
+
+    pool = _StubPool(rtt_seconds)
+    db_helpers.db_pool = pool
+    start = time.perf_counter()
+    counts_initial = await db_helpers.sync_guild_members(first)
+    initial = time.perf_counter() - start
+    trips_initial = pool.round_trips
+    start = time.perf_counter()
+    counts_resync = await db_helpers.sync_guild_members(second)
+    resync = time.perf_counter() - start
+    print(f"  bulk     initial={initial:7.2f}s ({trips_initial:,} trips) {counts_initial}  "
+          f"resync={resync:7.2f}s ({pool.round_trips - trips_initial:,} trips) {counts_resync}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark guild member sync")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--rtt-ms", type=float, default=0.3, help="Simulated round-trip time per statement (default: 0.3)")
+    parser.add_argument("--legacy-max", type=int, default=10000, help="Largest size to run the slow legacy path for")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        await _run(size, args.rtt_ms / 1000, args.legacy_max)
+
+    db_helpers.shutdown_db_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - HTTP Session Reuse Benchmark
+
+Starts a local stub server and compares a fresh aiohttp.ClientSession per
+request (the old pattern) with the shared pooled session from
+modules/http_client.py. With --tls the stub serves HTTPS using a throwaway
+self-signed certificate (requires the openssl CLI), which shows the TLS
+handshake savings as well.
+
+Usage:
+    python scripts/benchmarks/http_session_reuse.py --requests 300 --tls
+"""
+
+import argparse
+import asyncio
+import shutil
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import http_client  # noqa: E402
+
+
+async def _handle(request):
+    return web.json_response({"candidates": [{"content": {"parts": [{"text": "ok"}]}}]})
+
+
+def _make_ssl_contexts(workdir):
+    """Creates a self-signed certificate and matching server/client SSL contexts."""
+    cert, key = Path(workdir) / "cert.pem", Path(workdir) / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", str(key), "-out", str(cert)],
+        check=True, capture_output=True
+    )
+    server_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_ctx.load_cert_chain(cert, key)
+    client_ctx = ssl.create_default_context(cafile=str(cert))
+    return server_ctx, client_ctx
+
+
+async def _timed(requests, do_request):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await do_request()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<16} mean={statistics.mean(latencies):7.2f}ms  median={statistics.median(latencies):7.2f}ms  "
+          f"p95={p95:7.2f}ms  total={sum(latencies) / 1000:6.2f}s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request vs shared aiohttp sessions")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tls", action="store_true", help="Serve HTTPS with a self-signed cert (needs openssl)")
+    args = parser.parse_args()
+
+    server_ctx = client_ctx = None
+    tmpdir = tempfile.TemporaryDirectory()
+    if args.tls:
+        if not shutil.which("openssl"):
+            print("openssl not found, falling back to plain HTTP")
+        else:
+            server_ctx, client_ctx = _make_ssl_contexts(tmpdir.name)
+
+    app = web.Application()
+    app.router.add_post("/v1beta/models/stub:generateContent", _handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.port, ssl_context=server_ctx).start()
+
+    scheme = "https" if server_ctx else "http"
+    url = f"{scheme}://localhost:{args.port}/v1beta/models/stub:generateContent"
+    payload = {"contents": [{"role": "user", "parts": [{"text": "ping"}]}]}
+    ssl_arg = client_ctx if client_ctx else None
+
+    async def fresh_session_request():
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, json=payload, ssl=ssl_arg) as response:
+                await response.json()
+
+    async def shared_session_request():
+        async with http_client.shared_session() as session:
+            async with session.post(url, json=payload, ssl=ssl_arg) as response:
+                await response.json()
+
+    http_client.enable_shared_session()  # The bot does this in on_ready
+    print(f"{args.requests} sequential POSTs to {url}")
+    print("-" * 60)
+    _report("fresh session", await _timed(args.requests, fresh_session_request))
+    _report("shared session", await _timed(args.requests, shared_session_request))
+    print(f"shared session counters: {http_client.get_http_stats()}")
+
+    await http_client.close_all_sessions()
+    await runner.cleanup()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - Ledger Concurrency Stress Test
+
+Fires many concurrent transfers and game payouts at a small set of users and
+then checks that no update was lost:
+
+- every user's final balance equals the starting balance plus the sum of their
+  transaction_history amounts
+- every user's transaction_history rows form an unbroken chain
+  (balance_after of each row = balance_after of the previous row + amount)
+- the total amount of money only changed by the payouts
+- no transfer took a balance below zero
+
+The previous pattern (balance check, add_balance, get_balance and
+log_transaction as separate steps) is run the same way for comparison.
+
+By default a stub connection pool keeps players and transaction_history in
+memory and implements SELECT ... FOR UPDATE row locks, so no database server is
+required. With --mysql the ledger run goes against the database from
+config/database.json or the DB_* environment variables; it uses user ids from
+--first-user-id upwards and deletes its rows afterwards.
+
+Usage:
+    python scripts/benchmarks/ledger_stress.py --operations 2000 --users 20
+    python scripts/benchmarks/ledger_stress.py --mysql --operations 2000 --users 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import db_helpers  # noqa: E402
+from modules import ledger  # noqa: E402
+
+CONFIG = {'modules': {'economy': {'starting_balance': 1000}}}
+
+
+class _StubCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.pool = conn.pool
+        self.rows = []
+
+    def _round_trip(self):
+        time.sleep(self.pool.query_seconds)
+
+    def execute(self, query, params=()):
+        self._round_trip()
+        pool = self.pool
+        if "FOR UPDATE" in query:
+            # Row locks are held until commit/rollback, like InnoDB
+            for user_id in params:
+                if user_id not in self.conn.locks:
+                    pool.row_lock(user_id).acquire()
+                    self.conn.locks.append(user_id)
+            with pool.lock:
+                self.rows = [(user_id, pool.players[user_id]) for user_id in params if user_id in pool.players]
+        elif query.lstrip().startswith("UPDATE players p"):
+            with pool.lock:
+                for user_id, delta in zip(params[0::2], params[1::2]):
+                    pool.players[user_id] += delta
+                    self.conn.undo.append((user_id, delta))
+        elif query.lstrip().startswith("SELECT balance FROM players"):
+            with pool.lock:
+                self.rows = [(pool.players.get(params[0], 0),)]
+        else:
+            raise NotImplementedError(query)
+
+    def executemany(self, query, seq_params):
+        self._round_trip()
+        pool = self.pool
+        if "INSERT INTO players" in query:
+            with pool.lock:
+                for user_id, _, balance in seq_params:
+                    pool.players.setdefault(user_id, balance)
+        elif "INSERT INTO transaction_history" in query:
+            self.conn.history.extend(seq_params)
+        else:
+            raise NotImplementedError(query)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.locks = []
+        self.undo = []
+        self.history = []
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self)
+
+    def _release(self):
+        for user_id in self.locks:
+            self.pool.row_lock(user_id).release()
+        self.locks = []
+        self.undo = []
+        self.history = []
+
+    def commit(self):
+        with self.pool.lock:
+            self.pool.history.extend(self.history)
+        self._release()
+
+    def rollback(self):
+        with self.pool.lock:
+            for user_id, delta in self.undo:
+                self.pool.players[user_id] -= delta
+        self._release()
+
+    def close(self):
+        if self.locks:
+            self.rollback()
+
+
+class _StubPool:
+    def __init__(self, query_seconds):
+        self.query_seconds = query_seconds
+        self.players = {}
+        self.history = []  # (user_id, transaction_type, amount, balance_after, description) in commit order
+        self.lock = threading.Lock()
+        self._row_locks = {}
+
+    def row_lock(self, user_id):
+        with self.lock:
+            return self._row_locks.setdefault(user_id, threading.Lock())
+
+    def get_connection(self):
+        return _StubConnection(self)
+
+
+class _LegacyStore:
+    """The old separate steps against the stub tables: each step is atomic, the sequence is not."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def _step(self, func):
+        await asyncio.sleep(self.pool.query_seconds)
+        with self.pool.lock:
+            return func()
+
+    async def get_balance(self, user_id):
+        return await self._step(lambda: self.pool.players.get(user_id, CONFIG['modules']['economy']['starting_balance']))
+
+    async def add_balance(self, user_id, amount):
+        def apply():
+            self.pool.players.setdefault(user_id, CONFIG['modules']['economy']['starting_balance'])
+            self.pool.players[user_id] += amount
+        await self._step(apply)
+
+    async def log_transaction(self, user_id, transaction_type, amount, balance_after, description):
+        await self._step(lambda: self.pool.history.append((user_id, transaction_type, amount, balance_after, description)))
+
+
+async def _legacy_transfer(store, from_id, to_id, amount):
+    if await store.get_balance(from_id) < amount:
+        return False
+    await store.add_balance(from_id, -amount)
+    await store.add_balance(to_id, amount)
+    await store.log_transaction(from_id, 'transfer', -amount, await store.get_balance(from_id), None)
+    await store.log_transaction(to_id, 'transfer', amount, await store.get_balance(to_id), None)
+    return True
+
+
+async def _legacy_payout(store, user_id, amount):
+    await store.add_balance(user_id, amount)
+    await store.log_transaction(user_id, 'blackjack', amount, await store.get_balance(user_id), None)
+    return True
+
+
+async def _ledger_transfer(from_id, to_id, amount):
+    try:
+        await ledger.transfer(db_helpers, from_id, None, to_id, None, amount, CONFIG)
+        return True
+    except ledger.InsufficientFunds:
+        return False
+
+
+async def _ledger_payout(user_id, amount):
+    await ledger.post(db_helpers, user_id, None, amount, 'blackjack', None, CONFIG)
+    return True
+
+
+def _plan(operations, user_ids, seed):
+    rng = random.Random(seed)
+    plan = []
+    for _ in range(operations):
+        if rng.random() < 0.8:
+            from_id, to_id = rng.sample(user_ids, 2)
+            plan.append(('transfer', from_id, to_id, rng.randint(1, 400)))
+        else:
+            plan.append(('payout', rng.choice(user_ids), None, rng.randint(1, 300)))
+    return plan
+
+
+def _check(label, starting, final, history, payouts, seconds, operations):
+    """Verifies the invariants and prints one report line. Returns the number of violations."""
+    by_user = {user_id: [] for user_id in starting}
+    for user_id, _, amount, balance_after, _ in history:
+        by_user[user_id].append((amount, balance_after))
+
+    lost = broken = 0
+    for user_id, rows in by_user.items():
+        if starting[user_id] + sum(amount for amount, _ in rows) != final[user_id]:
+            lost += 1
+        previous = starting[user_id]
+        for amount, balance_after in rows:
+            if balance_after != previous + amount:
+                broken += 1
+            previous = balance_after
+    money_drift = sum(final.values()) - sum(starting.values()) - payouts
+    overdrawn = sum(1 for balance in final.values() if balance < 0)
+
+    print(f"{label:<8} {operations / seconds:8.0f} ops/s  users with lost updates={lost}  "
+          f"broken history rows={broken}  money drift={money_drift}  overdrawn users={overdrawn}")
+    return lost + broken + abs(money_drift) + overdrawn
+
+
+async def _run_legacy(pool, plan, user_ids):
+    store = _LegacyStore(pool)
+    pool.players = {user_id: CONFIG['modules']['economy']['starting_balance'] for user_id in user_ids}
+    pool.history = []
+    starting = dict(pool.players)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        _legacy_transfer(store, a, b, amount) if kind == 'transfer' else _legacy_payout(store, a, amount)
+        for kind, a, b, amount in plan
+    ))
+    seconds = time.perf_counter() - start
+    payouts = sum(amount for (kind, _, _, amount), ok in zip(plan, results) if kind == 'payout' and ok)
+    return _check("legacy", starting, dict(pool.players), pool.history, payouts, seconds, len(plan))
+
+
+async def _run_ledger(plan, user_ids, read_state):
+    starting = {user_id: CONFIG['modules']['economy']['starting_balance'] for user_id in user_ids}
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        _ledger_transfer(a, b, amount) if kind == 'transfer' else _ledger_payout(a, amount)
+        for kind, a, b, amount in plan
+    ))
+    seconds = time.perf_counter() - start
+    payouts = sum(amount for (kind, _, _, amount), ok in zip(plan, results) if kind == 'payout' and ok)
+    final, history = read_state()
+    return _check("ledger", starting, final, history, payouts, seconds, len(plan))
+
+
+def _load_mysql_config():
+    db_config_file = PROJECT_ROOT / "config" / "database.json"
+    if db_config_file.exists():
+        with open(db_config_file, 'r') as f:
+            db_config = json.load(f)
+        return (db_config.get("host", "localhost"), db_config.get("user", "sulfur_bot_user"),
+                db_config.get("password", ""), db_config.get("database", "sulfur_bot"))
+    return (os.environ.get("DB_HOST", "localhost"), os.environ.get("DB_USER", "sulfur_bot_user"),
+            os.environ.get("DB_PASS", ""), os.environ.get("DB_NAME", "sulfur_bot"))
+
+
+def _mysql_cleanup(user_ids):
+    cnx = db_helpers.db_pool.get_connection()
+    cursor = cnx.cursor()
+    try:
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        cursor.execute(f"DELETE FROM transaction_history WHERE user_id IN ({placeholders})", tuple(user_ids))
+        cursor.execute(f"DELETE FROM players WHERE discord_id IN ({placeholders})", tuple(user_ids))
+        cnx.commit()
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+def _mysql_state(user_ids):
+    cnx = db_helpers.db_pool.get_connection()
+    cursor = cnx.cursor()
+    try:
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        cursor.execute(f"SELECT discord_id, balance FROM players WHERE discord_id IN ({placeholders})", tuple(user_ids))
+        final = {row[0]: int(row[1]) for row in cursor.fetchall()}
+        cursor.execute(f"""
+            SELECT user_id, transaction_type, amount, balance_after, description FROM transaction_history
+            WHERE user_id IN ({placeholders}) ORDER BY id
+        """, tuple(user_ids))
+        return final, [tuple(row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrency stress test for modules/ledger.py")
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--query-ms", type=float, default=0.2, help="Simulated latency per statement (stub only)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mysql", action="store_true", help="Run the ledger against the configured database")
+    parser.add_argument("--first-user-id", type=int, default=9_000_000_000_000_000)
+    args = parser.parse_args()
+
+    user_ids = list(range(args.first_user_id, args.first_user_id + args.users))
+    plan = _plan(args.operations, user_ids, args.seed)
+    print(f"{args.operations} concurrent operations (80% transfers, 20% payouts) on {args.users} users")
+    print("-" * 110)
+
+    failures = 0
+    if args.mysql:
+        if not db_helpers.init_db_pool(*_load_mysql_config()):
+            print("Could not connect to the database")
+            return 1
+        _mysql_cleanup(user_ids)
+        try:
+            failures += await _run_ledger(plan, user_ids, lambda: _mysql_state(user_ids))
+        finally:
+            _mysql_cleanup(user_ids)
+    else:
+        pool = _StubPool(args.query_ms / 1000)
+        await _run_legacy(pool, plan, user_ids)
+        pool.players, pool.history = {}, []
+        db_helpers.db_pool = pool
+        failures += await _run_ledger(plan, user_ids, lambda: (dict(pool.players), list(pool.history)))
+
+    db_helpers.shutdown_db_executor(wait=True)
+    print("PASS: no lost updates" if not failures else "FAIL: ledger lost updates")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
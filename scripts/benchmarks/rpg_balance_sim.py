@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - RPG Balance Simulator Benchmark
+
+Runs a fixed suite of matchups through both engines of
+modules/rpg_balance_sim.py: the reference engine (the real
+_resolve_combat_turn, one fight at a time) and the NumPy-batched engine.
+Prints fights per second for each and checks that the win rates agree
+within sampling error.
+
+Requires NumPy (pip install numpy).
+
+Usage:
+    python scripts/benchmarks/rpg_balance_sim.py --fights 100000 --exact-fights 3000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import rpg_balance_sim as sim  # noqa: E402
+
+# (player level, build, monster) - covers status, self-buff, lifesteal and multi-hit abilities
+SUITE = [
+    (1, 'balanced', 'Schleimling'),
+    (2, 'warrior', 'Goblin'),
+    (5, 'balanced', 'Zombie'),
+    (5, 'warrior', 'Waldschamane'),
+    (6, 'rogue', 'Dunkler Magier'),
+    (8, 'tank', 'Troll'),
+    (10, 'warrior', 'Drache (Jung)'),
+    (20, 'warrior', 'Abgrundwächter'),
+    (22, 'balanced', 'Ur-Dämon'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RPG balance simulator engines")
+    parser.add_argument("--fights", type=int, default=100000, help="Fights per matchup for the vectorized engine")
+    parser.add_argument("--exact-fights", type=int, default=3000, help="Fights per matchup for the reference engine")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'matchup':<34} {'exact':>14} {'vectorized':>14} {'speedup':>8}   win rate exact / vectorized")
+    print("-" * 108)
+    totals = {'exact': 0.0, 'vectorized': 0.0}
+    matchups = mismatches = 0
+    for level, build, name in SUITE:
+        templates = sim.load_monsters(names=[name])
+        if not templates:
+            print(f"{name}: not in the seed data, skipped")
+            continue
+        template = templates[0]
+        snapshot = sim.build_player(level, build)
+
+        start = time.perf_counter()
+        exact = asyncio.run(sim.simulate_exact(snapshot, template, args.exact_fights, args.seed, with_loot=False))
+        exact_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = sim.simulate_vectorized(snapshot, template, args.fights, args.seed)
+        vectorized_seconds = time.perf_counter() - start
+
+        exact_rate = float((exact['outcome'] == 1).mean())
+        vectorized_rate = float((vectorized['outcome'] == 1).mean())
+        # Three standard errors of the difference between the two estimates
+        tolerance = 3 * (sim.standard_error(exact_rate, args.exact_fights) ** 2
+                         + sim.standard_error(vectorized_rate, args.fights) ** 2) ** 0.5
+        agrees = abs(exact_rate - vectorized_rate) <= tolerance
+        mismatches += not agrees
+        matchups += 1
+
+        exact_fps = args.exact_fights / exact_seconds
+        vectorized_fps = args.fights / vectorized_seconds
+        totals['exact'] += exact_seconds / args.exact_fights
+        totals['vectorized'] += vectorized_seconds / args.fights
+        label = f"L{level} {build} vs {name}"
+        print(f"{label:<34} {exact_fps:>10,.0f} f/s {vectorized_fps:>10,.0f} f/s {vectorized_fps / exact_fps:>7.0f}x   "
+              f"{exact_rate:6.1%} / {vectorized_rate:6.1%} {'ok' if agrees else 'MISMATCH'}")
+
+    print("-" * 108)
+    print(f"mean cost per fight: exact {totals['exact'] / max(1, matchups) * 1e6:.1f} us, "
+          f"vectorized {totals['vectorized'] / max(1, matchups) * 1e6:.2f} us")
+    if mismatches:
+        print(f"{mismatches} matchup(s) outside 3 standard errors - the engines have drifted apart")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - RPG Combat Turn Benchmark
+
+Compares the per-turn latency of the legacy rpg_system.process_combat_turn()
+path (profile, equipment, weapon and skill tree reloaded and HP written every
+turn, plus the profile re-read the combat view does for display) with
+rpg_system.CombatSession, which snapshots the player once per fight. A stub
+connection pool charges a fixed round-trip latency per statement, so no
+database server is required.
+
+Usage:
+    python scripts/benchmarks/rpg_combat_turn.py --turns 200 --rtt-ms 0.5
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import db_helpers, rpg_system  # noqa: E402
+
+USER_ID = 1
+WEAPON_ID = 7
+
+
+class _StubCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self._result = []
+        self.lastrowid = 0
+
+    def execute(self, query, params=()):
+        self.pool.round_trips += 1
+        time.sleep(self.pool.rtt_seconds)
+        query = " ".join(query.split())
+        if query.startswith("SELECT * FROM rpg_players"):
+            self._result = [dict(self.pool.player)]
+        elif query.startswith("SELECT level, xp, max_health FROM rpg_players"):
+            self._result = [{k: self.pool.player[k] for k in ('level', 'xp', 'max_health')}]
+        elif query.startswith("SELECT * FROM rpg_equipped"):
+            self._result = [{'user_id': USER_ID, 'weapon_id': WEAPON_ID, 'skill1_id': None, 'skill2_id': None}]
+        elif query.startswith("SELECT * FROM rpg_items"):
+            self._result = [{'id': WEAPON_ID, 'name': 'Schwert', 'damage': 12, 'damage_type': 'physical'}]
+        elif query.startswith("SELECT skill_path, skill_key"):
+            self._result = [{'skill_path': 'warrior', 'skill_key': 'strength_1', 'unlocked_at': None}]
+        elif query.startswith("UPDATE rpg_players SET health = %s"):
+            self.pool.player['health'] = params[0]
+            self._result = []
+        else:
+            self._result = []
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self.pool)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _StubPool:
+    def __init__(self, rtt_seconds):
+        self.rtt_seconds = rtt_seconds
+        self.round_trips = 0
+        self.player = {
+            'user_id': USER_ID, 'level': 10, 'xp': 0, 'health': 10 ** 9, 'max_health': 10 ** 9,
+            'strength': 20, 'dexterity': 15, 'defense': 12, 'speed': 14, 'gold': 0, 'skill_points': 0,
+        }
+
+    def get_connection(self):
+        return _StubConnection(self)
+
+
+def _monster():
+    # Effectively unkillable so every measured turn is a mid-fight turn
+    return {'name': 'Benchmark-Golem', 'health': 10 ** 9, 'max_health': 10 ** 9, 'strength': 15, 'defense': 10,
+            'speed': 10, 'xp_reward': 0, 'gold_reward': 0, 'abilities': [], 'loot_table': {}}
+
+
+def _report(label, latencies, round_trips):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<10} mean={statistics.mean(latencies):7.3f}ms  median={statistics.median(latencies):7.3f}ms  "
+          f"p95={p95:7.3f}ms  round trips/turn={round_trips / len(latencies):5.1f}")
+
+
+async def _legacy(turns):
+    monster, combat_state, latencies = _monster(), None, []
+    start_trips = db_helpers.db_pool.round_trips
+    for _ in range(turns):
+        start = time.perf_counter()
+        result = await rpg_system.process_combat_turn(db_helpers, USER_ID, monster, 'attack', combat_state=combat_state)
+        combat_state = result['combat_state']
+        await rpg_system.get_player_profile(db_helpers, USER_ID)  # The view re-read the profile for display
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, db_helpers.db_pool.round_trips - start_trips
+
+
+async def _session(turns):
+    start_trips = db_helpers.db_pool.round_trips
+    session = await rpg_system.CombatSession.start(db_helpers, USER_ID, _monster())
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        await session.process_turn(db_helpers, 'attack')
+        _ = session.player['max_health']
+        latencies.append((time.perf_counter() - start) * 1000)
+    await session.abandon(db_helpers)
+    return latencies, db_helpers.db_pool.round_trips - start_trips
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-turn RPG combat latency")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="Simulated round-trip time per statement (default: 0.5)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    db_helpers.db_pool = _StubPool(args.rtt_ms / 1000)
+    print(f"{args.turns} attack turns, {args.rtt_ms}ms per statement")
+    print("-" * 60)
+    _report("legacy", *await _legacy(args.turns))
+    _report("session", *await _session(args.turns))
+    print("(session round trips include the fight-start snapshot and final commit)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - Sport Provider HTTP Cache Benchmark
+
+Runs repeated get_upcoming_matches syncs (current matchday + 5 matchdays, as
+smart_sync_leagues does) against a local fake OpenLigaDB that sends ETags and
+answers If-None-Match with 304. Between cycles the in-process APICache is
+cleared, as if its TTL had expired, and one matchday gets a new score. Halfway
+through, the provider restarts with an empty in-process cache.
+
+Reports requests, response bytes and time for:
+- memory only: the previous behaviour (every expired entry refetches the full body)
+- disk cache:  stored ETag/Last-Modified, conditional requests, survives the restart
+
+No network access is needed; the server listens on 127.0.0.1 and waits
+--latency-ms before each response.
+
+Usage:
+    python scripts/benchmarks/sport_http_cache.py --cycles 10 --matches-per-day 9 --latency-ms 40
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import http_cache  # noqa: E402
+from modules import http_client  # noqa: E402
+from modules import sport_betting  # noqa: E402
+
+LEAGUE = "bl1"
+MATCHDAYS = 34
+CURRENT_MATCHDAY = 10
+
+
+class _FakeOpenLigaDB:
+    def __init__(self, matches_per_day, season, latency):
+        self.season = season
+        self.latency = latency
+        self.days = {
+            day: [self._match(day, index) for index in range(matches_per_day)]
+            for day in range(1, MATCHDAYS + 1)
+        }
+        self.requests = 0
+        self.not_modified = 0
+        self.body_bytes = 0
+
+    @staticmethod
+    def _match(day, index):
+        return {
+            "matchID": day * 100 + index,
+            "matchDateTimeUTC": f"2025-{(day % 12) + 1:02d}-{(index % 27) + 1:02d}T15:30:00Z",
+            "team1": {"teamId": index, "teamName": f"Heimteam {index}", "shortName": f"H{index}"},
+            "team2": {"teamId": 100 + index, "teamName": f"Gastteam {index}", "shortName": f"G{index}"},
+            "group": {"groupOrderID": day, "groupName": f"{day}. Spieltag"},
+            "matchIsFinished": day < CURRENT_MATCHDAY,
+            "matchResults": [{"resultTypeID": 2, "pointsTeam1": index % 3, "pointsTeam2": 1}],
+            "goals": [], "location": {"locationCity": "Stadt", "locationStadium": "Arena"},
+        }
+
+    def change_score(self, day):
+        self.days[day][0]["matchResults"][0]["pointsTeam1"] += 1
+
+    async def _respond(self, request, payload):
+        await asyncio.sleep(self.latency)
+        self.requests += 1
+        body = json.dumps(payload).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        self.body_bytes += len(body)
+        return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+    async def current_group(self, request):
+        return await self._respond(request, {"groupOrderID": CURRENT_MATCHDAY, "groupName": f"{CURRENT_MATCHDAY}. Spieltag"})
+
+    async def matchday(self, request):
+        return await self._respond(request, self.days.get(int(request.match_info["day"]), []))
+
+
+class _MemoryOnlyCache(http_cache.HTTPCache):
+    """Stores nothing, so every request is unconditional like before."""
+
+    def get(self, url):
+        return None
+
+    async def store(self, url, data, headers):
+        return None
+
+
+async def _run(label, server, base_url, make_cache, cycles):
+    provider = sport_betting.OpenLigaDBProvider()
+    provider.BASE_URL = base_url
+    provider.REQUEST_DELAY = 0
+    sport_betting._http_cache = make_cache()
+    server.requests = server.not_modified = server.body_bytes = 0
+
+    start = time.perf_counter()
+    for cycle in range(cycles):
+        if cycle == cycles // 2:
+            # Restart: fresh in-process state, the disk cache (if any) stays
+            sport_betting._http_cache = make_cache()
+        sport_betting._api_cache.clear()
+        for entry in sport_betting._http_cache._entries.values():
+            entry["stored_at"] -= 3600  # Past every TTL, so each entry must be revalidated
+        server.change_score(CURRENT_MATCHDAY + cycle % 2)
+        matches = await provider.get_upcoming_matches(LEAGUE, num_matchdays=5)
+        assert matches, "sync returned no matches"
+    seconds = time.perf_counter() - start
+
+    print(f"{label:<12} {server.requests:>9} {server.not_modified:>6} {server.body_bytes / 1024:>10.1f} KiB "
+          f"{seconds * 1000:>9.1f}ms")
+    return server.body_bytes
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark conditional requests for the sport betting providers")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--matches-per-day", type=int, default=9)
+    parser.add_argument("--latency-ms", type=float, default=40, help="Simulated API response latency")
+    args = parser.parse_args()
+
+    http_client.enable_shared_session()  # The bot does this in on_ready
+    season = sport_betting.OpenLigaDBProvider()._get_season()
+    server = _FakeOpenLigaDB(args.matches_per_day, season, args.latency_ms / 1000)
+    app = web.Application()
+    app.router.add_get(f"/getcurrentgroup/{LEAGUE}", server.current_group)
+    app.router.add_get(f"/getmatchdata/{LEAGUE}/{season}/{{day}}", server.matchday)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    print(f"{args.cycles} sync cycles, 1 changed matchday per cycle, restart after cycle {args.cycles // 2}")
+    print(f"{'':<12} {'requests':>9} {'304s':>6} {'body bytes':>14} {'time':>11}")
+    print("-" * 56)
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            legacy_bytes = await _run("memory only", server, base_url,
+                                      lambda: _MemoryOnlyCache(cache_dir), args.cycles)
+            cached_bytes = await _run("disk cache", server, base_url,
+                                      lambda: http_cache.HTTPCache(cache_dir), args.cycles)
+        print(f"Transferred {100 * (1 - cached_bytes / legacy_bytes):.0f}% fewer response bytes")
+    finally:
+        await http_client.close_all_sessions()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - Incremental Match Sync Benchmark
+
+Syncs the same window of matches (5 leagues x 5 matchdays x 9 matches by
+default) several times, as sport_betting_sync_and_settle_task does every five
+minutes. Between cycles two matches get a new score and one of them finishes.
+
+Compares the old per-match upsert (one INSERT ... ON DUPLICATE KEY UPDATE and
+one commit per match, every cycle) with sync_matches (fingerprints loaded once
+from sport_matches, then only changed matches written with one bulk upsert).
+Also checks that every finished match is reported by pop_finished_matches.
+
+A stub connection pool keeps sport_matches in memory and sleeps --query-ms per
+statement and commit, so no database server is required.
+
+Usage:
+    python scripts/benchmarks/sport_match_sync.py --cycles 10 --query-ms 0.3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import db_helpers  # noqa: E402
+from modules import sport_betting  # noqa: E402
+
+LEAGUES = ["bl1", "bl2", "dfb", "ucl", "uel"]
+
+
+class _StubCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.rows = []
+
+    def _round_trip(self):
+        self.pool.statements += 1
+        time.sleep(self.pool.query_seconds)
+
+    def execute(self, query, params=()):
+        self._round_trip()
+        if "FROM sport_matches" in query:
+            self.rows = [self.pool.matches[match_id][:12] for match_id in params if match_id in self.pool.matches]
+        else:
+            self.rows = []
+
+    def executemany(self, query, seq_params):
+        # mysql.connector rewrites an INSERT executemany into one multi-row statement
+        self._round_trip()
+        for row in seq_params:
+            self.pool.matches[row[0]] = tuple(row)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self.pool)
+
+    def commit(self):
+        self.pool.statements += 1
+        time.sleep(self.pool.query_seconds)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _StubPool:
+    def __init__(self, query_seconds):
+        self.query_seconds = query_seconds
+        self.statements = 0
+        self.matches = {}
+
+    def get_connection(self):
+        return _StubConnection(self)
+
+
+def _window(matchdays, matches_per_day):
+    kickoff = datetime(2025, 10, 18, 13, 30)
+    window = []
+    for league_id in LEAGUES:
+        for day in range(matchdays):
+            for index in range(matches_per_day):
+                window.append({
+                    "id": f"{league_id}_{day}_{index}", "league_id": league_id, "provider": "openligadb",
+                    "home_team": f"Heim {index}", "away_team": f"Gast {index}",
+                    "home_team_short": f"H{index}", "away_team_short": f"G{index}",
+                    "home_score": 0, "away_score": 0, "status": sport_betting.MatchStatus.SCHEDULED,
+                    "match_time": kickoff + timedelta(days=7 * day, minutes=index), "matchday": day + 1,
+                })
+    return window
+
+
+async def _legacy_sync(window):
+    for match in window:
+        await sport_betting.get_or_update_match(db_helpers, match)
+
+
+async def _incremental_sync(window):
+    await sport_betting.sync_matches(db_helpers, window)
+
+
+def _run(label, sync, pool, args):
+    window = _window(args.matchdays, args.matches_per_day)
+    pool.matches = {}
+    asyncio.run(_legacy_sync(window))  # The database already holds the window before the bot starts
+    sport_betting._match_fingerprints.clear()
+    sport_betting.pop_finished_matches()
+
+    pool.statements = 0
+    finished_ids, reported = [], []
+    start = time.perf_counter()
+    for cycle in range(args.cycles):
+        live, done = window[cycle * 2], window[cycle * 2 + 1]
+        live["home_score"] += 1
+        live["status"] = sport_betting.MatchStatus.LIVE
+        done["away_score"] += 2
+        done["status"] = sport_betting.MatchStatus.FINISHED
+        finished_ids.append(done["id"])
+        asyncio.run(sync(window))
+        reported.extend(match["match_id"] for match in sport_betting.pop_finished_matches())
+    seconds = time.perf_counter() - start
+
+    print(f"{label:<12} {seconds / args.cycles * 1000:>9.1f}ms {pool.statements / args.cycles:>10.1f}")
+    return finished_ids, reported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-match vs incremental sport match sync")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--matchdays", type=int, default=5)
+    parser.add_argument("--matches-per-day", type=int, default=9)
+    parser.add_argument("--query-ms", type=float, default=0.3, help="Simulated latency per statement")
+    args = parser.parse_args()
+
+    pool = _StubPool(args.query_ms / 1000)
+    db_helpers.db_pool = pool
+    matches = len(LEAGUES) * args.matchdays * args.matches_per_day
+    print(f"{matches} matches per sync, {args.cycles} cycles, 2 changed and 1 finished match per cycle")
+    print(f"{'':<12} {'per sync':>11} {'stmts/sync':>10}")
+    print("-" * 36)
+
+    _run("per match", _legacy_sync, pool, args)
+    finished_ids, reported = _run("incremental", _incremental_sync, pool, args)
+
+    db_helpers.shutdown_db_executor(wait=True)
+    missing = set(finished_ids) - set(reported)
+    print(f"Finished matches reported for settlement: {len(reported)}/{len(finished_ids)}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
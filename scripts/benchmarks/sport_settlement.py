@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - Sport Bet Settlement Benchmark
+
+Times the settlement of one finished match at 100, 1000 and 10000 open bets,
+comparing the old per-bet loop (check_bet_outcome, a stats UPDATE and a bet
+UPDATE per bet, then add_balance per winning user from the notification loop)
+with the batched settlement (one outcome set per match, bulk status and stats
+updates and one ledger batch for the payouts).
+A stub connection pool sleeps --query-ms per statement to stand in for the
+database round-trip, so no database server is required.
+
+Before timing, the per-match outcome set is checked against the old per-bet
+evaluation for every bet type and every score up to 9:9.
+
+Usage:
+    python scripts/benchmarks/sport_settlement.py --query-ms 0.3 --bets 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import db_helpers  # noqa: E402
+from modules import sport_betting  # noqa: E402
+
+CONFIG = {'modules': {'economy': {'starting_balance': 1000}}}
+
+BET_OPTIONS = [
+    ("winner", "home"), ("winner", "draw"), ("winner", "away"),
+    ("over_under_1.5", "over"), ("over_under_1.5", "under"),
+    ("over_under_2.5", "over"), ("over_under_2.5", "under"),
+    ("over_under_3.5", "over"), ("over_under_3.5", "under"),
+    ("btts", "yes"), ("btts", "no"),
+    ("goal_diff_1", "home_diff_1"), ("goal_diff_1", "away_diff_1"),
+    ("goal_diff_2", "home_diff_2"), ("goal_diff_2", "away_diff_2"),
+    ("goal_diff_3", "home_diff_3"), ("goal_diff_3", "away_diff_3"),
+]
+
+
+class _StubCursor:
+    def __init__(self, pool, dictionary):
+        self.pool = pool
+        self.dictionary = dictionary
+        self.rows = []
+
+    def execute(self, query, params=None):
+        # Blocking sleep, exactly like a real mysql.connector round-trip
+        self.pool.statements += 1
+        time.sleep(self.pool.query_seconds)
+        if "FROM sport_bets b" in query:
+            self.rows = self.pool.bets
+        elif "FROM sport_betting_stats" in query:
+            self.rows = [{"user_id": user_id, "current_streak": 0, "best_streak": 0} for user_id in params]
+        elif "FROM players" in query:
+            self.rows = [(user_id, CONFIG['modules']['economy']['starting_balance']) for user_id in params]
+        else:
+            self.rows = []
+
+    def executemany(self, query, seq_params):
+        # mysql.connector rewrites an INSERT executemany into one multi-row statement
+        self.execute(query)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self.pool, dictionary)
+
+    def commit(self):
+        self.pool.statements += 1
+        time.sleep(self.pool.query_seconds)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _StubPool:
+    def __init__(self, bet_count, query_seconds):
+        self.query_seconds = query_seconds
+        self.statements = 0
+        rng = random.Random(bet_count)
+        users = max(1, bet_count // 5)
+        self.bets = []
+        for bet_id in range(1, bet_count + 1):
+            bet_type, bet_outcome = rng.choice(BET_OPTIONS)
+            amount = rng.randint(10, 500)
+            self.bets.append({
+                "bet_id": bet_id, "user_id": 1000 + rng.randrange(users), "match_id": "m1",
+                "bet_type": bet_type, "bet_outcome": bet_outcome, "bet_amount": amount,
+                "odds_at_bet": 2.0, "potential_payout": amount * 2,
+                "home_team": "Heim", "away_team": "Gast", "league_id": "bl1",
+            })
+
+    def get_connection(self):
+        return _StubConnection(self)
+
+
+def _legacy_check(bet_type, bet_outcome, home_score, away_score):
+    """The previous check_bet_outcome body."""
+    total_goals = home_score + away_score
+    goal_diff = home_score - away_score
+    if bet_type == "winner":
+        return ((bet_outcome == "home" and home_score > away_score)
+                or (bet_outcome == "draw" and home_score == away_score)
+                or (bet_outcome == "away" and away_score > home_score))
+    if bet_type.startswith("over_under_"):
+        line = float(bet_type.rsplit("_", 1)[1])
+        return (bet_outcome == "over" and total_goals > line) or (bet_outcome == "under" and total_goals < line)
+    if bet_type == "btts":
+        both_scored = home_score > 0 and away_score > 0
+        return (bet_outcome == "yes" and both_scored) or (bet_outcome == "no" and not both_scored)
+    if bet_type.startswith("goal_diff_"):
+        margin = int(bet_type.rsplit("_", 1)[1])
+        return ((bet_outcome == f"home_diff_{margin}" and goal_diff >= margin)
+                or (bet_outcome == f"away_diff_{margin}" and goal_diff <= -margin))
+    return False
+
+
+def _check_outcomes():
+    mismatches = 0
+    for home_score in range(10):
+        for away_score in range(10):
+            winners = sport_betting.winning_outcomes(home_score, away_score)
+            for bet_type, bet_outcome in BET_OPTIONS + [("winner", "unknown"), ("unknown", "home")]:
+                if ((bet_type, bet_outcome) in winners) != _legacy_check(bet_type, bet_outcome, home_score, away_score):
+                    mismatches += 1
+    return mismatches
+
+
+def _legacy_settle(pool, home_score, away_score):
+    """The previous settle_match_bets_with_details loop plus the per-user add_balance of the notification loop."""
+    conn = pool.get_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT b.*, m.home_team ... FROM sport_bets b ...", ("m1",))
+    winnings = {}
+    for bet in cursor.fetchall():
+        if _legacy_check(bet["bet_type"], bet["bet_outcome"], home_score, away_score):
+            winnings[bet["user_id"]] = winnings.get(bet["user_id"], 0) + bet["potential_payout"]
+            cursor.execute("UPDATE sport_betting_stats SET total_wins = ... WHERE user_id = %s", ())
+        else:
+            cursor.execute("UPDATE sport_betting_stats SET total_losses = ... WHERE user_id = %s", ())
+        cursor.execute("UPDATE sport_bets SET status = %s ... WHERE bet_id = %s", ())
+    cursor.execute("UPDATE sport_matches SET status = 'finished' ...", ())
+    conn.commit()
+    # add_balance: upsert + balance read + commit per user
+    for _ in winnings:
+        cursor.execute("INSERT INTO players ... ON DUPLICATE KEY UPDATE balance = balance + %s", ())
+        cursor.execute("SELECT balance FROM players WHERE discord_id = %s", ())
+        conn.commit()
+
+
+def _batched_settle(pool, home_score, away_score):
+    async def settle():
+        return await sport_betting.settle_match_bets_with_details(db_helpers, "m1", home_score, away_score, CONFIG)
+    return asyncio.run(settle())
+
+
+def _time_settle(pool, settle):
+    pool.statements = 0
+    start = time.perf_counter()
+    settle(pool, 2, 1)
+    return (time.perf_counter() - start) * 1000, pool.statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-bet vs batched sport bet settlement")
+    parser.add_argument("--bets", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--query-ms", type=float, default=0.3, help="Simulated latency per statement")
+    args = parser.parse_args()
+
+    mismatches = _check_outcomes()
+    print(f"Outcome set vs per-bet evaluation: {mismatches} mismatches")
+
+    print(f"{'bets':>8} {'legacy':>11} {'stmts':>7} {'batched':>11} {'stmts':>7} {'speedup':>8}")
+    print("-" * 58)
+    for bet_count in args.bets:
+        pool = _StubPool(bet_count, args.query_ms / 1000)
+        db_helpers.db_pool = pool
+        legacy_ms, legacy_statements = _time_settle(pool, _legacy_settle)
+        batched_ms, batched_statements = _time_settle(pool, _batched_settle)
+        print(f"{bet_count:>8} {legacy_ms:>9.1f}ms {legacy_statements:>7} "
+              f"{batched_ms:>9.1f}ms {batched_statements:>7} {legacy_ms / batched_ms:>7.1f}x")
+
+    db_helpers.shutdown_db_executor(wait=True)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - Stock Market Tick Benchmark
+
+Times one update_stock_prices tick at 50, 500 and 5000 symbols, comparing the
+old per-symbol loop (UPDATE + INSERT ... SELECT per stock) with the batched
+tick (NumPy price math, one UPDATE per 1000 stocks, one bulk history insert
+and one bulk candle upsert).
+A stub connection pool sleeps --query-ms per statement to stand in for the
+database round-trip, so no database server is required.
+
+Usage:
+    python scripts/benchmarks/stock_tick.py --query-ms 0.3 --ticks 5
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import stock_market  # noqa: E402
+
+
+class _StubCursor:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def execute(self, query, params=None):
+        # Blocking sleep, exactly like a real mysql.connector round-trip
+        self.pool.statements += 1
+        time.sleep(self.pool.query_seconds)
+
+    def executemany(self, query, seq_params):
+        # mysql.connector rewrites an INSERT executemany into one multi-row statement
+        self.execute(query)
+
+    def fetchall(self):
+        return self.pool.stocks
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self.pool)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _StubPool:
+    def __init__(self, symbols, query_seconds):
+        self.query_seconds = query_seconds
+        self.statements = 0
+        categories = list(stock_market.STOCK_CATEGORIES)
+        rng = random.Random(symbols)
+        self.stocks = [
+            (i + 1, f"S{i:04d}", rng.choice(categories), rng.uniform(0.01, 5000.0),
+             rng.uniform(-0.1, 0.1), rng.uniform(0.0, 0.05))
+            for i in range(symbols)
+        ]
+
+    def get_connection(self):
+        return _StubConnection(self)
+
+
+class _StubDbHelpers:
+    def __init__(self, pool):
+        self.db_pool = pool
+
+
+def _legacy_tick(pool):
+    """The previous update_stock_prices body: Python random walk and 2 statements per stock."""
+    conn = pool.get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT symbol, category, current_price, trend, game_influence_factor FROM stocks")
+    for _, symbol, category, current_price, trend, game_influence in cursor.fetchall():
+        cat_data = stock_market.STOCK_CATEGORIES.get(category, stock_market.STOCK_CATEGORIES['tech'])
+        volatility = cat_data['volatility']
+        trend_factor = trend * cat_data['trend_strength'] if abs(trend) > 0.02 else 0
+        trend_factor += game_influence * 0.3
+        price_change_pct = trend_factor + random.uniform(-volatility, volatility)
+        new_price = round(max(current_price * (1 + price_change_pct), 0.00000001), 8)
+        new_trend = max(-1.0, min(1.0, (trend * 0.7) + (price_change_pct * 0.3)))
+        cursor.execute("UPDATE stocks ...", (new_price, new_trend, game_influence * 0.85, symbol))
+        cursor.execute("INSERT INTO stock_history ...", (new_price, symbol))
+    conn.commit()
+
+
+def _batched_tick(pool):
+    asyncio.run(stock_market.update_stock_prices(_StubDbHelpers(pool)))
+
+
+def _time_ticks(pool, tick, ticks):
+    durations = []
+    pool.statements = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        tick(pool)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations), pool.statements // ticks
+
+
+def _time_compute(symbols, repeats=20):
+    pool = _StubPool(symbols, 0)
+    columns = list(zip(*pool.stocks))
+    args = (list(columns[2]), list(columns[3]), list(columns[4]), list(columns[5]))
+    results = {}
+    for label, compute in (("python", stock_market._compute_stock_tick_python),
+                           ("vectorized", stock_market.compute_stock_tick)):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            compute(*args)
+        results[label] = (time.perf_counter() - start) / repeats * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-symbol vs batched stock ticks")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--query-ms", type=float, default=0.3, help="Simulated latency per statement")
+    parser.add_argument("--ticks", type=int, default=5, help="Ticks per measurement (median is reported)")
+    args = parser.parse_args()
+
+    if not stock_market.NUMPY_AVAILABLE:
+        print("NumPy not installed: the batched tick falls back to the per-stock Python math")
+
+    print(f"{'symbols':>8} {'compute py':>11} {'compute np':>11} "
+          f"{'legacy tick':>12} {'stmts':>6} {'batched tick':>13} {'stmts':>6} {'speedup':>8}")
+    print("-" * 84)
+    for symbols in args.symbols:
+        compute = _time_compute(symbols)
+        pool = _StubPool(symbols, args.query_ms / 1000)
+        legacy_ms, legacy_statements = _time_ticks(pool, _legacy_tick, args.ticks)
+        batched_ms, batched_statements = _time_ticks(pool, _batched_tick, args.ticks)
+        print(f"{symbols:>8} {compute['python']:>9.2f}ms {compute['vectorized']:>9.2f}ms "
+              f"{legacy_ms:>10.1f}ms {legacy_statements:>6} {batched_ms:>11.1f}ms {batched_statements:>6} "
+              f"{legacy_ms / batched_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - Stock Trade Engine Benchmark
+
+Fires a burst of concurrent buy/sell orders and reports per-order latency and
+throughput for the old per-order transactions (about ten statements each, run
+on the event loop) and the per-symbol trade engines in modules/stock_market.py
+(orders batched per symbol, filled on the DB executor). A stub connection pool
+sleeps --query-ms per statement to stand in for the database round-trip, so no
+database server is required.
+
+Usage:
+    python scripts/benchmarks/stock_trade_engine.py --orders 1000 --symbols 5 --query-ms 0.3
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import db_helpers  # noqa: E402
+from modules import stock_market  # noqa: E402
+
+LEGACY_STATEMENTS_PER_ORDER = 10  # price, balance, name, balance update, portfolio read/write, volume, tx logs
+
+
+class _StubCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, query, params=()):
+        # Blocking sleep, exactly like a real mysql.connector round-trip
+        with self.pool.lock:
+            self.pool.statements += 1
+        time.sleep(self.pool.query_seconds)
+        if "SELECT current_price" in query:
+            self.rows = [(100.0,)]
+        elif "FROM players" in query:
+            self.rows = [(user_id, 1_000_000) for user_id in params]
+        elif "FROM user_portfolios" in query:
+            self.rows = [(user_id, 50, 90.0) for user_id in params[1:]]
+        else:
+            self.rows = []
+
+    def executemany(self, query, seq_params):
+        # mysql.connector rewrites an INSERT executemany into one multi-row statement
+        self.execute(query)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _StubConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, dictionary=False):
+        return _StubCursor(self.pool)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _StubPool:
+    def __init__(self, query_seconds):
+        self.query_seconds = query_seconds
+        self.statements = 0
+        self.lock = threading.Lock()
+
+    def get_connection(self):
+        return _StubConnection(self)
+
+
+async def _legacy_order(pool, user_id, symbol, side, shares):
+    """Cost of the previous buy_stock/sell_stock: one blocking transaction per order."""
+    cursor = pool.get_connection().cursor()
+    for _ in range(LEGACY_STATEMENTS_PER_ORDER):
+        cursor.execute("SELECT ...", ())
+    return True, f"{side} {shares}x {symbol}"
+
+
+async def _engine_order(pool, user_id, symbol, side, shares):
+    if side == 'buy':
+        return await stock_market.buy_stock(db_helpers, user_id, symbol, shares, None)
+    return await stock_market.sell_stock(db_helpers, user_id, symbol, shares)
+
+
+async def _burst(pool, place_order, orders):
+    """All orders arrive at once; latency is measured from the burst start to each order's result."""
+    latencies = []
+
+    async def timed(order):
+        success, message = await place_order(pool, *order)
+        latencies.append((time.perf_counter() - start) * 1000)
+        return success
+
+    pool.statements = 0
+    start = time.perf_counter()
+    filled = sum(await asyncio.gather(*(timed(order) for order in orders)))
+    return time.perf_counter() - start, latencies, filled
+
+
+def _report(label, seconds, latencies, filled, statements):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<14} p50={statistics.median(latencies):8.1f}ms  p95={p95:8.1f}ms  max={ordered[-1]:8.1f}ms  "
+          f"{len(latencies) / seconds:8.0f} orders/s  filled={filled}  statements={statements}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-order transactions vs per-symbol trade engines")
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--symbols", type=int, default=5)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--query-ms", type=float, default=0.3, help="Simulated latency per statement")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    orders = [(rng.randrange(1, args.users + 1), rng.choice(symbols),
+               'buy' if rng.random() < 0.7 else 'sell', rng.randint(1, 5))
+              for _ in range(args.orders)]
+
+    pool = _StubPool(args.query_ms / 1000)
+    db_helpers.db_pool = pool
+    print(f"{args.orders} concurrent orders on {args.symbols} symbols from {args.users} users, "
+          f"{args.query_ms}ms per statement")
+    print("-" * 110)
+    seconds, latencies, filled = await _burst(pool, _legacy_order, orders)
+    _report("per-order", seconds, latencies, filled, pool.statements)
+    seconds, latencies, filled = await _burst(pool, _engine_order, orders)
+    _report("trade engine", seconds, latencies, filled, pool.statements)
+    print(f"engine counters: {stock_market.get_trade_engine_stats()}")
+
+    await stock_market.shutdown_trade_engines()
+    db_helpers.shutdown_db_executor(wait=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
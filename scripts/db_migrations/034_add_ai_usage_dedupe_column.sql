@@ -0,0 +1,59 @@
+-- ============================================================================
+-- Migration 034: AI Usage Deduplication Counter
+-- ============================================================================
+-- Adds ai_model_usage.deduplicated_calls, which counts AI requests that were
+-- answered by an identical in-flight request (single-flight coalescing)
+-- instead of a separate provider call.
+-- ============================================================================
+
+DELIMITER $$
+
+-- Create helper procedure to add columns if they don't exist
+DROP PROCEDURE IF EXISTS add_column_if_not_exists_034$$
+CREATE PROCEDURE add_column_if_not_exists_034(
+    IN p_table_name VARCHAR(64),
+    IN p_column_name VARCHAR(64),
+    IN p_column_definition VARCHAR(500)
+)
+BEGIN
+    DECLARE table_exists INT DEFAULT 0;
+    DECLARE column_exists INT DEFAULT 0;
+
+    -- Check if table exists
+    SELECT COUNT(*) INTO table_exists
+    FROM information_schema.tables
+    WHERE table_schema = DATABASE() AND table_name = p_table_name;
+
+    IF table_exists > 0 THEN
+        -- Check if column exists
+        SELECT COUNT(*) INTO column_exists
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+          AND table_name = p_table_name
+          AND column_name = p_column_name;
+
+        IF column_exists = 0 THEN
+            SET @sql = CONCAT('ALTER TABLE `', p_table_name, '` ADD COLUMN `', p_column_name, '` ', p_column_definition);
+            PREPARE stmt FROM @sql;
+            EXECUTE stmt;
+            DEALLOCATE PREPARE stmt;
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- ============================================================================
+-- PART 1: Add deduplicated_calls column to ai_model_usage
+-- ============================================================================
+
+CALL add_column_if_not_exists_034('ai_model_usage', 'deduplicated_calls', 'INT NOT NULL DEFAULT 0');
+
+-- ============================================================================
+-- Cleanup
+-- ============================================================================
+DROP PROCEDURE IF EXISTS add_column_if_not_exists_034;
+
+-- ============================================================================
+-- Migration 034 Complete
+-- ============================================================================
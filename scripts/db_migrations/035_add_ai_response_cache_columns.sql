@@ -0,0 +1,60 @@
+-- ============================================================================
+-- Migration 035: AI Response Cache Counters
+-- ============================================================================
+-- Adds cache_hits, cache_misses and tokens_saved to ai_model_usage so the
+-- advanced AI response cache effectiveness shows up in the usage stats.
+-- ============================================================================
+
+DELIMITER $$
+
+-- Create helper procedure to add columns if they don't exist
+DROP PROCEDURE IF EXISTS add_column_if_not_exists_035$$
+CREATE PROCEDURE add_column_if_not_exists_035(
+    IN p_table_name VARCHAR(64),
+    IN p_column_name VARCHAR(64),
+    IN p_column_definition VARCHAR(500)
+)
+BEGIN
+    DECLARE table_exists INT DEFAULT 0;
+    DECLARE column_exists INT DEFAULT 0;
+
+    -- Check if table exists
+    SELECT COUNT(*) INTO table_exists
+    FROM information_schema.tables
+    WHERE table_schema = DATABASE() AND table_name = p_table_name;
+
+    IF table_exists > 0 THEN
+        -- Check if column exists
+        SELECT COUNT(*) INTO column_exists
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+          AND table_name = p_table_name
+          AND column_name = p_column_name;
+
+        IF column_exists = 0 THEN
+            SET @sql = CONCAT('ALTER TABLE `', p_table_name, '` ADD COLUMN `', p_column_name, '` ', p_column_definition);
+            PREPARE stmt FROM @sql;
+            EXECUTE stmt;
+            DEALLOCATE PREPARE stmt;
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- ============================================================================
+-- PART 1: Add response cache columns to ai_model_usage
+-- ============================================================================
+
+CALL add_column_if_not_exists_035('ai_model_usage', 'cache_hits', 'INT NOT NULL DEFAULT 0');
+CALL add_column_if_not_exists_035('ai_model_usage', 'cache_misses', 'INT NOT NULL DEFAULT 0');
+CALL add_column_if_not_exists_035('ai_model_usage', 'tokens_saved', 'INT NOT NULL DEFAULT 0');
+
+-- ============================================================================
+-- Cleanup
+-- ============================================================================
+DROP PROCEDURE IF EXISTS add_column_if_not_exists_035;
+
+-- ============================================================================
+-- Migration 035 Complete
+-- ============================================================================
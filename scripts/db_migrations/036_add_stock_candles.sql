@@ -0,0 +1,60 @@
+-- ============================================================================
+-- Migration 036: Stock OHLC Candles
+-- ============================================================================
+-- Adds stock_candles, the 1-hour / 1-day OHLC rollups that the stock tick
+-- maintains incrementally, and backfills them from the raw stock_history
+-- rows that exist today. Stats and charts read the candles;
+-- raw ticks are pruned after config.modules.economy.stock_market
+-- .raw_tick_retention_hours.
+-- bucket_start is UTC.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS stock_candles (
+    stock_id INT NOT NULL,
+    resolution ENUM('1h', '1d') NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    open DECIMAL(18, 8) NOT NULL,
+    high DECIMAL(18, 8) NOT NULL,
+    low DECIMAL(18, 8) NOT NULL,
+    close DECIMAL(18, 8) NOT NULL,
+    ticks INT NOT NULL DEFAULT 1,
+    PRIMARY KEY (stock_id, resolution, bucket_start),
+    INDEX idx_resolution_bucket (resolution, bucket_start),
+    FOREIGN KEY (stock_id) REFERENCES stocks(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================================================
+-- Backfill from stock_history
+-- ============================================================================
+-- Open/close are the first element of the ordered GROUP_CONCAT, which is
+-- never cut off by group_concat_max_len.
+
+INSERT IGNORE INTO stock_candles (stock_id, resolution, bucket_start, open, high, low, close, ticks)
+SELECT stock_id, '1h', bucket_start,
+       SUBSTRING_INDEX(GROUP_CONCAT(price ORDER BY recorded_at ASC), ',', 1),
+       MAX(price), MIN(price),
+       SUBSTRING_INDEX(GROUP_CONCAT(price ORDER BY recorded_at DESC), ',', 1),
+       COUNT(*)
+FROM (
+    SELECT stock_id, price, recorded_at,
+           DATE_FORMAT(CONVERT_TZ(recorded_at, @@session.time_zone, '+00:00'), '%Y-%m-%d %H:00:00') AS bucket_start
+    FROM stock_history
+) ticks
+GROUP BY stock_id, bucket_start;
+
+INSERT IGNORE INTO stock_candles (stock_id, resolution, bucket_start, open, high, low, close, ticks)
+SELECT stock_id, '1d', bucket_start,
+       SUBSTRING_INDEX(GROUP_CONCAT(price ORDER BY recorded_at ASC), ',', 1),
+       MAX(price), MIN(price),
+       SUBSTRING_INDEX(GROUP_CONCAT(price ORDER BY recorded_at DESC), ',', 1),
+       COUNT(*)
+FROM (
+    SELECT stock_id, price, recorded_at,
+           DATE_FORMAT(CONVERT_TZ(recorded_at, @@session.time_zone, '+00:00'), '%Y-%m-%d 00:00:00') AS bucket_start
+    FROM stock_history
+) ticks
+GROUP BY stock_id, bucket_start;
+
+-- ============================================================================
+-- Migration 036 Complete
+-- ============================================================================
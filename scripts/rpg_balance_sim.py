@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Sulfur Bot - RPG Balance Simulator CLI
+
+Simulates fights for every (player level, build, monster) combination and
+prints win rates, turns-to-kill, XP/gold per hour and the most common loot.
+Monsters come from the seed data in modules/rpg_monsters_data.py; by default
+each level is matched against the monsters get_random_monster would pick
+(same world, level - 1 to level + 2).
+
+Requires NumPy (pip install numpy).
+
+Usage:
+    python scripts/rpg_balance_sim.py --levels 1 5 10 --builds balanced warrior --fights 200000
+    python scripts/rpg_balance_sim.py --levels 20 --world underworld --skill-path warrior --json balance.json
+    python scripts/rpg_balance_sim.py --levels 5 --monsters Schleimling --engine exact --fights 2000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from modules import rpg_balance_sim as sim  # noqa: E402
+from modules import rpg_system  # noqa: E402
+
+
+def _format_row(build, summary):
+    turns = summary['turns_to_kill_mean']
+    top_loot = sorted(summary['loot_per_win'].items(), key=lambda item: -item[1])[:2]
+    loot = ", ".join(f"{name} {rate:.0%}" for name, rate in top_loot)
+    return (f"L{summary['player_level']:<3} {build:<9} {summary['monster'][:22]:<22} L{summary['monster_level']:<3} "
+            f"win={summary['win_rate']:6.1%}  timeout={summary['timeout_rate']:5.1%}  "
+            f"ttk={turns if turns is None else round(turns, 1)!s:>5}  "
+            f"xp/h={summary['xp_per_hour']:8.0f}  gold/h={summary['gold_per_hour']:8.0f}  {loot}")
+
+
+def _run_exact(snapshot, template, fights, seed):
+    result = asyncio.run(sim.simulate_exact(snapshot, template, fights, seed))
+    return sim.summarize(snapshot, template, result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte-Carlo balance simulation for RPG combat")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--builds", nargs="+", default=["balanced"], choices=sorted(sim.BUILDS))
+    parser.add_argument("--world", default="overworld", choices=sorted(rpg_system.WORLDS))
+    parser.add_argument("--monsters", nargs="+", help="Simulate these monsters (by name) at every level instead")
+    parser.add_argument("--skill-path", choices=sorted(rpg_system.SKILL_TREE),
+                        help="Unlock this skill path's stat skills before allocating points")
+    parser.add_argument("--weapon-damage", type=int, default=0, help="Damage bonus of the equipped weapon")
+    parser.add_argument("--fights", type=int, default=100000, help="Fights per matchup (default: 100000)")
+    parser.add_argument("--engine", choices=["vectorized", "exact"], default="vectorized",
+                        help="'exact' plays every fight through _resolve_combat_turn (slow)")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    parser.add_argument("--json", metavar="PATH", help="Also write all summaries to this file")
+    args = parser.parse_args()
+
+    summaries = []
+    for level in args.levels:
+        if args.monsters:
+            monsters = sim.load_monsters(names=args.monsters)
+        else:
+            monsters = sim.load_monsters(args.world, max(1, level - 1), level + 2)
+        if not monsters:
+            print(f"L{level:<3} no monsters in {args.world} for levels {max(1, level - 1)}-{level + 2}")
+            continue
+
+        for build in args.builds:
+            snapshot = sim.build_player(level, build, args.skill_path, args.weapon_damage)
+            for template in monsters:
+                if args.engine == "exact":
+                    summary = _run_exact(snapshot, template, args.fights, args.seed)
+                else:
+                    summary = sim.run_matchup(snapshot, template, args.fights, args.seed)
+                summary['build'] = build
+                summaries.append(summary)
+                print(_format_row(build, summary))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, indent=2, ensure_ascii=False)
+        print(f"\nWrote {len(summaries)} matchups to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2859,6 +2859,10 @@ def delete_rpg_item(item_id):
         cursor.close()
         conn.close()
         
+        # Tell the bot process to drop cached loot item ids
+        from modules import rpg_system
+        rpg_system.mark_item_definitions_dirty()
+        
         return jsonify({'success': True})
     except Exception as e:
         logger.error(f"Error deleting RPG item: {e}")
@@ -2924,6 +2928,10 @@ def rpg_monsters():
             cursor.close()
             conn.close()
             
+            # Tell the bot process to reload its monster catalog
+            from modules import rpg_system
+            rpg_system.mark_monster_catalog_dirty()
+            
             return jsonify({'success': True, 'id': monster_id}), 201
             
     except Exception as e:
@@ -2950,6 +2958,10 @@ def delete_rpg_monster(monster_id):
         cursor.close()
         conn.close()
         
+        # Tell the bot process to reload its monster catalog
+        from modules import rpg_system
+        rpg_system.mark_monster_catalog_dirty()
+        
         return jsonify({'success': True})
     except Exception as e:
         logger.error(f"Error deleting RPG monster: {e}")
@@ -3033,6 +3045,7 @@ def save_skill_tree():
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2)
         
+        rpg_system.mark_skill_tree_dirty()
         logger.info(f"Skill tree configuration saved to {config_path}")
         return jsonify({'success': True, 'message': 'Skill tree saved successfully'})
     except Exception as e:
@@ -3058,6 +3071,7 @@ def load_skill_tree():
         # Update in-memory skill tree
         rpg_system.SKILL_TREE.clear()
         rpg_system.SKILL_TREE.update(saved_tree)
+        rpg_system.mark_skill_tree_dirty()
         
         logger.info("Skill tree configuration loaded from file")
         return jsonify({'success': True, 'message': 'Skill tree loaded successfully', 'data': saved_tree})
@@ -3119,6 +3133,7 @@ def update_skill(path_key, skill_key):
             skill['requires'] = data['requires']
         if 'effect' in data:
             skill['effect'] = data['effect']
+        rpg_system.mark_skill_tree_dirty()
         
         return jsonify({'success': True, 'message': 'Skill updated'})
     except Exception as e:
@@ -3156,6 +3171,7 @@ def add_skill_to_path(path_key):
             'requires': data.get('requires'),
             'effect': data.get('effect', {})
         }
+        rpg_system.mark_skill_tree_dirty()
         
         return jsonify({'success': True, 'message': f'Skill {skill_key} added to {path_key}'})
     except Exception as e:
@@ -3177,6 +3193,7 @@ def delete_skill(path_key, skill_key):
         
         # Delete the skill
         del rpg_system.SKILL_TREE[path_key]['skills'][skill_key]
+        rpg_system.mark_skill_tree_dirty()
         
         return jsonify({'success': True, 'message': f'Skill {skill_key} deleted'})
     except Exception as e:
@@ -3254,6 +3271,10 @@ def reset_rpg_player():
             
             conn.commit()
             
+            # The bot memoizes skill tree bonuses per player
+            from modules import rpg_system
+            rpg_system.mark_skill_tree_dirty()
+            
             return jsonify({
                 'success': True,
                 'message': f'RPG data cleared for user {user_id}',
@@ -3462,7 +3483,7 @@ def api_get_stocks():
 
 @app.route('/api/stocks/<symbol>', methods=['GET'])
 def api_get_stock(symbol):
-    """Get details for a specific stock."""
+    """Get details for a specific stock, with OHLC candles for ?range= (1h, 24h, 7d, 30d, all)."""
     try:
         if not db_helpers.db_pool:
             return jsonify({'error': 'Database not available'}), 500
@@ -3485,6 +3506,15 @@ def api_get_stock(symbol):
             # Convert Decimal values for JSON serialization
             stock = db_helpers.convert_decimals(raw_stock)
             
+            # Chart data comes from the candle resolution that fits the range, never raw ticks
+            from modules import stock_market
+            chart_range = request.args.get('range', '24h')
+            candles = stock_market.select_stock_candles(cursor, raw_stock['id'], chart_range)
+            stock['candles'] = [
+                {**db_helpers.convert_decimals(candle), 'bucket_start': candle['bucket_start'].isoformat()}
+                for candle in candles
+            ]
+            
             return jsonify(stock)
         finally:
             cursor.close()
@@ -4308,6 +4338,20 @@ def system_health():
         }), 200  # Return 200 even on error so frontend can display partial data
 
 
+@app.route('/api/system/runtime_stats', methods=['GET'])
+def system_runtime_stats():
+    """Get in-process performance counters (cache effectiveness, write buffers) published by the bot."""
+    stats_file = 'config/runtime_stats.json'
+    try:
+        if os.path.exists(stats_file):
+            with open(stats_file, 'r', encoding='utf-8-sig') as f:
+                return jsonify(json.load(f))
+        return jsonify({'caches': {}, 'message': 'Runtime stats not available yet.'})
+    except Exception as e:
+        logger.error(f"Error reading runtime stats: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/system/api_quotas', methods=['GET'])
 def api_quotas():
     """Get API usage quotas and limits."""